@@ -0,0 +1,68 @@
+import threading
+from loguru import logger
+from typing import Any, Callable, Tuple
+
+
+class AnalyticsResult:
+    """A finished computation and the game time of the snapshot it was computed from."""
+    def __init__(self, value: Any, time: float) -> None:
+        self.value = value
+        self.time = time
+
+    def staleness(self, current_time: float) -> float:
+        return current_time - self.time
+
+
+class BackgroundAnalytics:
+    """Runs compute(snapshot) on a worker thread and double buffers the results.
+
+    submit hands over the newest snapshot, replacing one the worker hasn't started on, so the
+    worker always works on the latest state and never queues up. Finished results are swapped
+    into the front buffer in one assignment, and latest reads it without waiting on the worker.
+    Snapshots must not be touched by the game loop after they are submitted. The worker mostly
+    gets to run while the step is waiting on the game, which is the time this frees up.
+    """
+    def __init__(self, name: str, compute: Callable[[Any], Any]) -> None:
+        self.name = name
+        self.compute = compute
+        # snapshot waiting for the worker and when it was taken
+        self.pending: Tuple[Any, float] | None = None
+        self.front: AnalyticsResult | None = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, snapshot: Any, time: float) -> None:
+        with self.lock:
+            self.pending = (snapshot, time)
+        self.wake.set()
+
+    def latest(self, current_time: float, max_staleness: float) -> AnalyticsResult | None:
+        """Most recent finished result if it's no older than max_staleness seconds."""
+        result = self.front
+        if result is None or result.staleness(current_time) > max_staleness:
+            return None
+        return result
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.wake.set()
+
+    def run(self) -> None:
+        while True:
+            self.wake.wait()
+            if self.stopped:
+                return
+            with self.lock:
+                self.wake.clear()
+                pending = self.pending
+                self.pending = None
+            if pending is None:
+                continue
+            snapshot, time = pending
+            try:
+                self.front = AnalyticsResult(self.compute(snapshot), time)
+            except Exception as e:
+                logger.error(f"{self.name} analytics failed: {e}")
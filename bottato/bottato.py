@@ -13,12 +13,19 @@ from sc2.ids.upgrade_id import UpgradeId
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.command_filter import CommandFilter
 from bottato.commander import Commander
+from bottato.detection_helper import DetectionHelper
 from bottato.enums import ActionErrorCode
 from bottato.log_helper import LogHelper
+from bottato.micro.aoe_planner import AoePlanner
+from bottato.micro.effect_hazards import EffectHazards
+from bottato.micro.target_allocator import TargetAllocator
 from bottato.mixins import GeometryMixin, print_decorator_timers, timed_async
 from bottato.unit_reference_helper import UnitReferenceHelper
+from bottato.unit_state_store import UnitStateStore
 from bottato.unit_types import UnitTypes
+from bottato.visibility_helper import VisibilityHelper
 
 
 class BotTato(BotAI):
@@ -62,6 +69,13 @@ class BotTato(BotAI):
         self.patch_game_data()
         LogHelper.init(self)
         UnitReferenceHelper.init(self, self.units_by_tag)
+        VisibilityHelper.init(self, self.commander.tactics.map.terrain)
+        DetectionHelper.init(self)
+        EffectHazards.init(self)
+        TargetAllocator.init(self)
+        AoePlanner.init(self)
+        UnitStateStore.init(self)
+        CommandFilter.init(self)
         logger.info(f"on_start complete (time={self.time:.1f}s, game_loop={self.state.game_loop})")
         # Emit resolved race to stderr so test_lab can capture it (useful for Random)
         logger.info(f"BOT_RACE:{self.race.name}")
@@ -114,6 +128,7 @@ class BotTato(BotAI):
             self.commander.tactics.map.draw()
         self.print_game_state_summary(10)
         LogHelper.print_logs(iteration)
+        CommandFilter.filter_actions()
 
         if LogHelper.testing and self.time >= 3540 and not self.replay_saved:
             # save replay at 59 minutes
@@ -129,6 +144,11 @@ class BotTato(BotAI):
         self.print_all_timers()
         LogHelper.print_logs(99999)
         logger.info(f"Game length: {self.time_formatted}")
+        UnitStateStore.log_memory_report()
+        CommandFilter.log_report()
+        self.commander.military.army_ratio_analytics.stop()
+        influence_maps = self.commander.tactics.map.influence_maps
+        logger.info(f"influence path cache hits: {influence_maps.path_cache_hits}, misses: {influence_maps.path_cache_misses}")
         try:
             logger.debug(self.commander.build_order.complete)
         except AttributeError:
@@ -137,6 +157,8 @@ class BotTato(BotAI):
     @timed_async
     async def update_unit_references(self):
         UnitReferenceHelper.update()
+        VisibilityHelper.update()
+        UnitStateStore.update()
         await self.commander.update_references()
 
     def print_all_timers(self, interval: int = 0):
@@ -196,6 +218,8 @@ class BotTato(BotAI):
     async def on_unit_destroyed(self, unit_tag: int):
         logger.debug(f"Unit {unit_tag} destroyed")
         self.commander.remove_destroyed_unit(unit_tag)
+        # after subsystems have read what they need for their own cleanup
+        UnitStateStore.on_unit_destroyed(unit_tag)
 
     async def on_upgrade_complete(self, upgrade: UpgradeId):
         logger.debug(f"upgrade completed {upgrade}")
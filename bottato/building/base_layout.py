@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import math
+from loguru import logger
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import ndimage
+from sc2.bot_ai import BotAI
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from bottato.map.map_cache import MapCache
+from bottato.mixins import timed
+
+
+class BaseLayout:
+    """Building slots planned once per map and spawn.
+
+    Slots are stored as ordered lists (closest to the main townhall first), so
+    placement during the game is a few can_place checks instead of a
+    find_placement search. A build step reserves the slot it picked so other
+    steps skip it, and the slot is only removed by claim_slot once the build
+    command goes out. Slots that can't be used right now are moved to the back
+    with defer_slot instead of being dropped.
+
+    All grids are indexed [x, y] (the transpose of game_info pixel maps).
+    """
+    VERSION = 1
+    CACHE_SECTION = "base_layout"
+    PRODUCTION_TYPES = {UnitTypeId.BARRACKS, UnitTypeId.FACTORY, UnitTypeId.STARPORT}
+    # production reservation: 3x3 structure + 2x2 add-on, plus a one cell lane to the right and below
+    PRODUCTION_RESERVATION = (6, 4)
+    MAX_PRODUCTION_SLOTS = 16
+    MAX_DEPOT_SLOTS = 30
+    MAIN_BASE_RADIUS = 32
+    # keep the space between townhalls and resources open for mining
+    MINING_CORRIDOR_WIDTH = 3
+    RAMP_CLEARANCE_RADIUS = 3
+    # a reservation from a step that never builds (cancelled, lost its worker) lapses after this
+    RESERVATION_SECONDS = 30
+
+    def __init__(self, bot: BotAI) -> None:
+        self.bot = bot
+        self.production_slots: List[Point2] = []
+        self.depot_slots: List[Point2] = []
+        self.turret_slots: Dict[Point2, Point2] = {}
+        self.bunker_slots: Dict[Point2, Point2] = {}
+        # slot -> (owner id, game time reserved)
+        self.reservations: Dict[Point2, Tuple[int, float]] = {}
+        self.is_initialized = False
+
+    def __repr__(self) -> str:
+        return (f"BaseLayout(production={len(self.production_slots)}, depots={len(self.depot_slots)}, "
+                f"turrets={len(self.turret_slots)}, bunkers={len(self.bunker_slots)})")
+
+    @timed
+    def init(self) -> None:
+        key = MapCache.get_key(self.bot)
+        plan = MapCache.load(self.CACHE_SECTION, key, self.VERSION)
+        if plan is None:
+            plan = self.compute_plan()
+            MapCache.save(self.CACHE_SECTION, key, self.VERSION, plan)
+        self.load_plan(plan)
+        self.is_initialized = True
+        logger.info(f"base layout ready: {self}")
+
+    def load_plan(self, plan: Dict[str, list]) -> None:
+        self.production_slots = [Point2(p) for p in plan["production"]]
+        self.depot_slots = [Point2(p) for p in plan["depots"]]
+        self.turret_slots = {Point2(expansion): Point2(slot) for expansion, slot in plan["turrets"]}
+        self.bunker_slots = {Point2(expansion): Point2(slot) for expansion, slot in plan["bunkers"]}
+
+    def _get_slot_list(self, unit_type_id: UnitTypeId) -> List[Point2]:
+        if unit_type_id in self.PRODUCTION_TYPES:
+            return self.production_slots
+        if unit_type_id == UnitTypeId.SUPPLYDEPOT:
+            return self.depot_slots
+        return []
+
+    def get_free_slots(self, unit_type_id: UnitTypeId, owner: int) -> List[Point2]:
+        """Slots in order without removing them, skipping ones reserved by another owner."""
+        return [slot for slot in self._get_slot_list(unit_type_id) if not self.is_reserved(slot, owner)]
+
+    def is_reserved(self, slot: Point2, owner: int) -> bool:
+        reservation = self.reservations.get(slot)
+        if reservation is None:
+            return False
+        reserved_by, reserved_at = reservation
+        return reserved_by != owner and self.bot.time - reserved_at < self.RESERVATION_SECONDS
+
+    def reserve_slot(self, slot: Point2, owner: int) -> None:
+        self.release_slots(owner)
+        self.reservations[slot] = (owner, self.bot.time)
+
+    def release_slots(self, owner: int) -> None:
+        for slot in [slot for slot, (reserved_by, _) in self.reservations.items() if reserved_by == owner]:
+            del self.reservations[slot]
+
+    def defer_slot(self, unit_type_id: UnitTypeId, slot: Point2) -> None:
+        """Move a slot that can't be used right now to the back so it's tried again later."""
+        slots = self._get_slot_list(unit_type_id)
+        if slot in slots:
+            slots.remove(slot)
+            slots.append(slot)
+
+    def claim_slot(self, position: Point2) -> None:
+        """Remove the slot at position for good, called once a build is issued there."""
+        self.reservations.pop(position, None)
+        for slots in (self.production_slots, self.depot_slots):
+            if position in slots:
+                slots.remove(position)
+
+    def get_turret_slot(self, townhall_position: Point2) -> Point2 | None:
+        return self._get_expansion_slot(self.turret_slots, townhall_position)
+
+    def get_bunker_slot(self, townhall_position: Point2) -> Point2 | None:
+        return self._get_expansion_slot(self.bunker_slots, townhall_position)
+
+    @staticmethod
+    def _get_expansion_slot(slots: Dict[Point2, Point2], position: Point2) -> Point2 | None:
+        for expansion_position, slot in slots.items():
+            if expansion_position._distance_squared(position) < 9:
+                return slot
+        return None
+
+    @timed
+    def compute_plan(self) -> Dict[str, list]:
+        game_info = self.bot.game_info
+        buildable: np.ndarray = game_info.placement_grid.data_numpy.T.astype(bool)
+        heights: np.ndarray = game_info.terrain_height.data_numpy.T.astype(np.int16)
+        reserved = self.get_reserved_grid(buildable.shape)
+        start = self.bot.start_location
+
+        main_mask = BaseLayout.get_main_base_mask(buildable, heights, (start.x, start.y), self.MAIN_BASE_RADIUS)
+        free = buildable & ~reserved & main_mask
+        production = BaseLayout.plan_production_slots(free, (start.x, start.y), self.MAX_PRODUCTION_SLOTS)
+        depots = BaseLayout.plan_depot_slots(free, buildable, (start.x, start.y), self.MAX_DEPOT_SLOTS)
+
+        map_center = game_info.map_center
+        expansion_free = buildable & ~reserved & ~BaseLayout._occupied_by(production, depots, buildable.shape)
+        turrets: List[Tuple[Tuple[float, float], Tuple[float, float]]] = []
+        bunkers: List[Tuple[Tuple[float, float], Tuple[float, float]]] = []
+        for expansion_position in self.bot.expansion_locations_list:
+            away_from_center = expansion_position.towards(map_center, -4)
+            turret = BaseLayout.find_nearest_free_footprint(expansion_free, (away_from_center.x, away_from_center.y), 2, 6)
+            if turret:
+                turrets.append(((expansion_position.x, expansion_position.y), turret))
+                BaseLayout._mark_footprint(expansion_free, turret, 2)
+            if expansion_position == start:
+                continue
+            toward_center = expansion_position.towards(map_center, 6)
+            bunker = BaseLayout.find_nearest_free_footprint(expansion_free, (toward_center.x, toward_center.y), 3, 5)
+            if bunker:
+                bunkers.append(((expansion_position.x, expansion_position.y), bunker))
+                BaseLayout._mark_footprint(expansion_free, bunker, 3)
+
+        return {
+            "production": production,
+            "depots": depots,
+            "turrets": turrets,
+            "bunkers": bunkers,
+        }
+
+    def get_reserved_grid(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Cells that should never get a planned structure: townhall spots, mining corridors and the ramp wall."""
+        reserved = np.zeros(shape, dtype=bool)
+        resource_positions = [(r.position.x, r.position.y) for r in self.bot.resources]
+        for expansion_position in self.bot.expansion_locations_list:
+            BaseLayout._mark_footprint(reserved, (expansion_position.x, expansion_position.y), 5)
+            nearby_resources = [r for r in resource_positions
+                                if (r[0] - expansion_position.x) ** 2 + (r[1] - expansion_position.y) ** 2 < 144]
+            BaseLayout.mark_corridors(reserved, (expansion_position.x, expansion_position.y), nearby_resources,
+                                      self.MINING_CORRIDOR_WIDTH)
+
+        ramp = self.bot.main_base_ramp
+        for depot_position in ramp.corner_depots:
+            BaseLayout._mark_footprint(reserved, (depot_position.x, depot_position.y), 2)
+        for barracks_position in (ramp.barracks_in_middle, ramp.barracks_correct_placement):
+            if barracks_position:
+                BaseLayout._mark_footprint(reserved, (barracks_position.x, barracks_position.y), 3)
+                addon = barracks_position.offset((2.5, -0.5))
+                BaseLayout._mark_footprint(reserved, (addon.x, addon.y), 2)
+        BaseLayout._mark_disc(reserved, (ramp.top_center.x, ramp.top_center.y), self.RAMP_CLEARANCE_RADIUS)
+        return reserved
+
+    @staticmethod
+    def get_main_base_mask(buildable: np.ndarray, heights: np.ndarray, start: Tuple[float, float], radius: float) -> np.ndarray:
+        """Buildable cells on the start location's plateau that are connected to it."""
+        start_cell = (int(start[0]), int(start[1]))
+        same_height = np.abs(heights - heights[start_cell]) <= 2
+        labels, _ = ndimage.label(buildable & same_height)
+        main_label = labels[start_cell]
+        if main_label == 0:
+            # townhall footprint isn't buildable on some maps, take the nearest labelled cell
+            labelled = np.argwhere(labels > 0)
+            if labelled.size == 0:
+                return np.zeros_like(buildable)
+            nearest = labelled[np.argmin(((labelled - np.array(start_cell)) ** 2).sum(axis=1))]
+            main_label = labels[tuple(nearest)]
+        xs, ys = np.indices(buildable.shape)
+        in_radius = (xs + 0.5 - start[0]) ** 2 + (ys + 0.5 - start[1]) ** 2 <= radius ** 2
+        return (labels == main_label) & in_radius
+
+    @staticmethod
+    def window_is_free(free: np.ndarray, width: int, height: int) -> np.ndarray:
+        """result[x, y] is True if every cell of free[x:x + width, y:y + height] is True."""
+        if free.shape[0] < width or free.shape[1] < height:
+            return np.zeros((0, 0), dtype=bool)
+        integral = np.zeros((free.shape[0] + 1, free.shape[1] + 1), dtype=np.int32)
+        integral[1:, 1:] = free.astype(np.int32).cumsum(axis=0).cumsum(axis=1)
+        sums = (integral[width:, height:] - integral[:-width, height:]
+                - integral[width:, :-height] + integral[:-width, :-height])
+        return sums == width * height
+
+    @staticmethod
+    def plan_production_slots(free: np.ndarray, origin: Tuple[float, float], max_slots: int) -> List[Tuple[float, float]]:
+        """Pack production structures with add-on clearance, closest to origin first.
+
+        Each slot reserves a 6x4 block: the 3x3 structure in the upper-left, its 2x2 add-on
+        to the right and a one cell lane on the right and bottom edges so units can get out.
+        Marks used cells in free.
+        """
+        width, height = BaseLayout.PRODUCTION_RESERVATION
+        candidates = BaseLayout.window_is_free(free, width, height)
+        xs, ys = np.nonzero(candidates)
+        if xs.size == 0:
+            return []
+        # structure center relative to the reservation corner
+        centers_x = xs + 1.5
+        centers_y = ys + 2.5
+        order = np.argsort((centers_x - origin[0]) ** 2 + (centers_y - origin[1]) ** 2, kind="stable")
+        slots: List[Tuple[float, float]] = []
+        for index in order:
+            x, y = xs[index], ys[index]
+            if not free[x:x + width, y:y + height].all():
+                continue
+            free[x:x + width, y:y + height] = False
+            slots.append((float(centers_x[index]), float(centers_y[index])))
+            if len(slots) >= max_slots:
+                break
+        return slots
+
+    @staticmethod
+    def plan_depot_slots(free: np.ndarray, buildable: np.ndarray, origin: Tuple[float, float], max_slots: int) -> List[Tuple[float, float]]:
+        """Pack 2x2 depots, preferring cells along the edge of the base and then distance from origin.
+
+        Marks used cells in free.
+        """
+        candidates = BaseLayout.window_is_free(free, 2, 2)
+        xs, ys = np.nonzero(candidates)
+        if xs.size == 0:
+            return []
+        # count unbuildable cells in the ring around each depot
+        padded = np.pad(~buildable, 1, constant_values=True).astype(np.int32)
+        integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.int32)
+        integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+        # ring window in padded coordinates starts at (x, y) with size 4x4
+        edge_score = (integral[xs + 4, ys + 4] - integral[xs, ys + 4]
+                      - integral[xs + 4, ys] + integral[xs, ys])
+        centers_x = xs + 1.0
+        centers_y = ys + 1.0
+        distance = (centers_x - origin[0]) ** 2 + (centers_y - origin[1]) ** 2
+        # lexsort uses the last key as primary: most edge cells first, then furthest from the townhall
+        order = np.lexsort((-distance, -edge_score))
+        slots: List[Tuple[float, float]] = []
+        for index in order:
+            x, y = xs[index], ys[index]
+            if edge_score[index] == 0:
+                # only build depots along edges, keep open ground free
+                break
+            if not free[x:x + 2, y:y + 2].all():
+                continue
+            free[x:x + 2, y:y + 2] = False
+            slots.append((float(centers_x[index]), float(centers_y[index])))
+            if len(slots) >= max_slots:
+                break
+        return slots
+
+    @staticmethod
+    def find_nearest_free_footprint(free: np.ndarray, target: Tuple[float, float], size: int, max_distance: float) -> Tuple[float, float] | None:
+        """Center of the free size x size footprint nearest to target, or None if none within max_distance."""
+        offset = size / 2
+        x_min = max(0, int(target[0] - max_distance - offset))
+        y_min = max(0, int(target[1] - max_distance - offset))
+        x_max = min(free.shape[0], int(target[0] + max_distance + offset) + 1)
+        y_max = min(free.shape[1], int(target[1] + max_distance + offset) + 1)
+        candidates = BaseLayout.window_is_free(free[x_min:x_max, y_min:y_max], size, size)
+        xs, ys = np.nonzero(candidates)
+        if xs.size == 0:
+            return None
+        centers_x = xs + x_min + offset
+        centers_y = ys + y_min + offset
+        distances = (centers_x - target[0]) ** 2 + (centers_y - target[1]) ** 2
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance ** 2:
+            return None
+        return (float(centers_x[best]), float(centers_y[best]))
+
+    @staticmethod
+    def mark_corridors(grid: np.ndarray, townhall: Tuple[float, float], resources: List[Tuple[float, float]], width: float) -> None:
+        """Mark cells within width of the segment from the townhall to each resource."""
+        if not resources:
+            return
+        reach = max(math.dist(townhall, r) for r in resources) + width
+        x_min = max(0, int(townhall[0] - reach))
+        y_min = max(0, int(townhall[1] - reach))
+        x_max = min(grid.shape[0], int(townhall[0] + reach) + 1)
+        y_max = min(grid.shape[1], int(townhall[1] + reach) + 1)
+        xs, ys = np.meshgrid(np.arange(x_min, x_max) + 0.5, np.arange(y_min, y_max) + 0.5, indexing="ij")
+        for resource in resources:
+            dx = resource[0] - townhall[0]
+            dy = resource[1] - townhall[1]
+            length_sq = dx * dx + dy * dy
+            if length_sq == 0:
+                continue
+            t = np.clip(((xs - townhall[0]) * dx + (ys - townhall[1]) * dy) / length_sq, 0, 1)
+            distance_sq = (xs - townhall[0] - t * dx) ** 2 + (ys - townhall[1] - t * dy) ** 2
+            grid[x_min:x_max, y_min:y_max] |= distance_sq <= width * width
+
+    @staticmethod
+    def _mark_footprint(grid: np.ndarray, center: Tuple[float, float], size: int) -> None:
+        x = int(round(center[0] - size / 2))
+        y = int(round(center[1] - size / 2))
+        grid[max(0, x):max(0, x + size), max(0, y):max(0, y + size)] = True
+
+    @staticmethod
+    def _mark_disc(grid: np.ndarray, center: Tuple[float, float], radius: float) -> None:
+        xs, ys = np.indices(grid.shape)
+        grid[(xs + 0.5 - center[0]) ** 2 + (ys + 0.5 - center[1]) ** 2 <= radius ** 2] = True
+
+    @staticmethod
+    def _occupied_by(production: List[Tuple[float, float]], depots: List[Tuple[float, float]], shape: Tuple[int, int]) -> np.ndarray:
+        occupied = np.zeros(shape, dtype=bool)
+        for center in production:
+            BaseLayout._mark_footprint(occupied, center, 3)
+            BaseLayout._mark_footprint(occupied, (center[0] + 2.5, center[1] - 0.5), 2)
+        for center in depots:
+            BaseLayout._mark_footprint(occupied, center, 2)
+        return occupied
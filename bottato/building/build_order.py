@@ -16,8 +16,11 @@ from sc2.ids.upgrade_id import UpgradeId
 from sc2.position import Point2
 from sc2.unit import Unit
 
+from bottato.building.base_layout import BaseLayout
+from bottato.building.build_queue import BuildQueue
 from bottato.building.build_starts import BuildStarts
 from bottato.building.build_step import BuildStep
+from bottato.building.planning_engine import PlanningEngine
 from bottato.building.scv_build_step import SCVBuildStep
 from bottato.building.special_locations import SpecialLocation, SpecialLocations
 from bottato.building.structure_build_step import StructureBuildStep
@@ -45,14 +48,14 @@ from bottato.upgrades import Upgrades
 
 class BuildOrder():
     # gets processed first, for supply depots and workers
-    interrupted_queue: List[BuildStep] = []
-    priority_queue: List[BuildStep] = []
+    interrupted_queue: BuildQueue
+    priority_queue: BuildQueue
     # initial build order and interrupted builds
-    static_queue: List[BuildStep] = []
+    static_queue: BuildQueue
     # dynamic queue for army units and production
-    build_queue: List[BuildStep] = []
-    started: List[BuildStep] = []
-    complete: List[BuildStep] = []
+    build_queue: BuildQueue
+    started: BuildQueue
+    complete: BuildQueue
     # next_unfinished_step_index: int
     tech_tree: Dict[UnitTypeId, List[UnitTypeId]] = {}
     rush_defense_enacted: bool = False
@@ -68,10 +71,19 @@ class BuildOrder():
         self.enemy = tactics.enemy
 
         self.upgrades = Upgrades(bot)
-        self.special_locations = SpecialLocations(ramp=self.bot.main_base_ramp)
+        self.base_layout = BaseLayout(bot)
+        self.special_locations = SpecialLocations(ramp=self.bot.main_base_ramp, base_layout=self.base_layout)
         self.changes_enacted: Set[BuildOrderChange] = set()
         self.only_build_units: bool = False
         self.floating_building_destinations: Dict[int, Point2] = {}
+        self.interrupted_queue = BuildQueue()
+        self.priority_queue = BuildQueue()
+        self.static_queue = BuildQueue()
+        self.build_queue = BuildQueue()
+        self.started = BuildQueue()
+        self.complete = BuildQueue()
+        self.planning = PlanningEngine(bot)
+        self.init_planning()
 
         if not hasattr(self.bot, "_replay_time_offset") or self.bot._replay_time_offset == 0: # type: ignore
             # skip loading static ord if resuming from a replay
@@ -83,6 +95,40 @@ class BuildOrder():
                 step = self.create_build_step(unit_type, None)
                 self.static_queue.append(step)
 
+    def init_planning(self) -> None:
+        """Declare what each planner depends on so execute only re-runs planners whose inputs changed."""
+        bot = self.bot
+        self.planning.add_input("supply", lambda: (bot.supply_used, bot.supply_cap))
+        self.planning.add_input("bank", lambda: (int(bot.minerals // 50), int(bot.vespene // 50)))
+        self.planning.add_input("income", lambda: (int(bot.state.score.collection_rate_minerals // 100),
+                                                   int(bot.state.score.collection_rate_vespene // 100)))
+        self.planning.add_input("structures", lambda: (bot.structures.amount, bot.structures.ready.amount, bot.structures.idle.amount))
+        self.planning.add_input("townhalls", lambda: (bot.townhalls.amount, bot.townhalls.ready.idle.amount))
+        self.planning.add_input("workers", lambda: (bot.workers.amount, len(self.workers.assignments_by_worker)))
+        self.planning.add_input("army", lambda: bot.units.amount - bot.workers.amount)
+        self.planning.add_input("enemy_units", lambda: bot.enemy_units.amount)
+        self.planning.add_input("enemy_builds", lambda: frozenset(self.intel.enemy_builds_detected.keys()))
+        self.planning.add_input("army_ratio", lambda: round(self.intel.army_ratio * 10))
+        self.planning.add_input("tactics", lambda: tuple(self.tactics.last_values.values()))
+        self.planning.add_input("only_build_units", lambda: self.only_build_units)
+        # build_queue is rebuilt every step so it isn't an input
+        self.planning.add_input("queues", lambda: (self.started.version, self.interrupted_queue.version,
+                                                   self.priority_queue.version, self.static_queue.version))
+        self.planning.add_input("staging", lambda: self.intel.main_army_staging_location.rounded)
+
+        self.planning.add_planner("townhall_work", ["townhalls", "workers", "structures", "enemy_builds", "tactics", "queues"],
+                                  MN.BUILD_PLANNER_FAST_STALENESS)
+        self.planning.add_planner("supply", ["supply", "bank", "income", "queues"], MN.BUILD_PLANNER_FAST_STALENESS)
+        self.planning.add_planner("command_center", ["townhalls", "workers", "bank", "enemy_builds", "army_ratio", "structures", "queues"],
+                                  MN.BUILD_PLANNER_SLOW_STALENESS)
+        self.planning.add_planner("upgrade", ["structures", "bank", "queues"], MN.BUILD_PLANNER_SLOW_STALENESS)
+        self.planning.add_planner("marines", ["tactics", "army_ratio", "enemy_units", "bank", "structures", "only_build_units", "queues"],
+                                  MN.BUILD_PLANNER_FAST_STALENESS)
+        self.planning.add_planner("bunker", ["staging", "structures", "queues"], MN.BUILD_PLANNER_SLOW_STALENESS)
+        self.planning.add_planner("production", ["structures", "bank", "only_build_units", "queues"], MN.BUILD_PLANNER_SLOW_STALENESS)
+        self.planning.add_planner("medivacs", ["army", "structures", "queues"], MN.BUILD_PLANNER_SLOW_STALENESS)
+        self.planning.add_planner("refinery", ["structures", "townhalls", "workers"], MN.BUILD_PLANNER_SLOW_STALENESS)
+
     @timed_async
     async def update_references(self) -> None:
         await self.production.update_references()
@@ -91,6 +137,10 @@ class BuildOrder():
             build_step.draw_debug_box()
         await self.move_interupted_to_pending()
 
+    @property
+    def all_queues(self) -> List[BuildQueue]:
+        return [self.started, self.interrupted_queue, self.priority_queue, self.static_queue, self.build_queue]
+
     @property
     def all_steps(self) -> List[BuildStep]:
         return self.started + self.interrupted_queue + self.priority_queue + self.static_queue + self.build_queue
@@ -108,23 +158,36 @@ class BuildOrder():
                 UnitTypeId.WIDOWMINE, UnitTypeId.SWARMHOSTMP)) \
                     or self.map.natural_position and len(cy_closer_than(self.bot.enemy_units, 25, self.map.natural_position)) >= 10):
             # abort static build order if we need a specialized response
-            self.static_queue = self.static_queue[:10]
+            del self.static_queue[10:]
 
         self.only_build_units = False
 
-        self.queue_townhall_work(detected_enemy_builds)
-        self.queue_supply()
-
-        self.queue_command_center(self.intel, detected_enemy_builds)
-        self.queue_upgrade()
+        if self.planning.is_due("townhall_work"):
+            self.queue_townhall_work(detected_enemy_builds)
+            self.planning.mark_ran("townhall_work")
+        if self.planning.is_due("supply"):
+            self.queue_supply()
+            self.planning.mark_ran("supply")
+
+        if self.planning.is_due("command_center"):
+            self.queue_command_center(self.intel, detected_enemy_builds)
+            self.planning.mark_ran("command_center")
+        if self.planning.is_due("upgrade"):
+            self.queue_upgrade()
+            self.planning.mark_ran("upgrade")
         self.only_build_units = self.bot.supply_left > 6 and 0.0 < self.intel.army_ratio < 0.6
         do_early_third_response = BuildType.EARLY_THIRD_BASE in detected_enemy_builds and self.bot.time < 300
         if do_early_third_response:
             self.only_build_units = True
-        self.queue_marines(detected_enemy_builds, self.intel.army_ratio, self.only_build_units)
+        if self.planning.is_due("marines"):
+            self.queue_marines(detected_enemy_builds, self.intel.army_ratio, self.only_build_units)
+            self.planning.mark_ran("marines")
         if len(self.static_queue) < 10 or self.bot.time > 240:
+            # not gated, turrets go in build_queue which is rebuilt every step
             self.queue_turret(self.intel)
-            await self.queue_bunker(self.intel.main_army_staging_location)
+            if self.planning.is_due("bunker"):
+                await self.queue_bunker(self.intel.main_army_staging_location)
+                self.planning.mark_ran("bunker")
 
             military_queue, priority_military_queue = self.get_military_queue(self.enemy, self.intel)
             # randomize unit queue so it doesn't get stuck on one unit type
@@ -137,15 +200,21 @@ class BuildOrder():
             self.add_to_build_queue(military_queue, queue=self.build_queue)
             self.queue_to_spend_bank_on_idle_production(self.only_build_units)
 
-            if self.only_build_units:
-                capacity_available: bool = self.production.can_build_any(military_queue)
-                if not capacity_available:
-                    self.queue_production(only_build_units = True)
-            else:
-                self.queue_production(only_build_units = False)
-            self.queue_medivacs()
+            if self.planning.is_due("production"):
+                if self.only_build_units:
+                    capacity_available: bool = self.production.can_build_any(military_queue)
+                    if not capacity_available:
+                        self.queue_production(only_build_units = True)
+                else:
+                    self.queue_production(only_build_units = False)
+                self.planning.mark_ran("production")
+            if self.planning.is_due("medivacs"):
+                self.queue_medivacs()
+                self.planning.mark_ran("medivacs")
 
-            self.queue_refinery()
+            if self.planning.is_due("refinery"):
+                self.queue_refinery()
+                self.planning.mark_ran("refinery")
 
 
         remaining_resources: Cost = await self.execute_pending_builds(self.only_build_units, detected_enemy_builds)
@@ -245,7 +314,7 @@ class BuildOrder():
             viking_count = self.bot.units.of_type({UnitTypeId.VIKINGFIGHTER, UnitTypeId.VIKINGASSAULT}).amount + self.get_queued_count(UnitTypeId.VIKINGFIGHTER)
             viking_deficit = min_vikings - viking_count
             if viking_deficit > 0:
-                priority_queued_count = self.get_queued_count(UnitTypeId.VIKINGFIGHTER, queue=self.priority_queue)
+                priority_queued_count = self.get_queued_count(UnitTypeId.VIKINGFIGHTER, [self.priority_queue])
                 if priority_queued_count == 0:
                     self.add_to_build_queue([UnitTypeId.VIKINGFIGHTER], position=0, queue=self.priority_queue)
                     viking_deficit -= 1
@@ -375,7 +444,9 @@ class BuildOrder():
             self.remove_step_from_queue(UnitTypeId.WIDOWMINE, self.static_queue)
             self.substitute_steps_in_queue(UnitTypeId.STARPORT, [UnitTypeId.FACTORYTECHLAB, UnitTypeId.STARPORT, UnitTypeId.SIEGETANK], self.static_queue)
     
-    def move_between_queues(self, unit_type: UnitTypeId, from_queue: List[BuildStep], to_queue: List[BuildStep], position: int | None = None) -> bool:
+    def move_between_queues(self, unit_type: UnitTypeId, from_queue: BuildQueue, to_queue: BuildQueue, position: int | None = None) -> bool:
+        if from_queue.count_unit_type(unit_type) == 0:
+            return False
         for step in from_queue:
             if step.is_unit_type(unit_type):
                 from_queue.remove(step)
@@ -391,7 +462,9 @@ class BuildOrder():
     
     def substitute_steps_in_queue(self, from_unit_type: UnitTypeId | UpgradeId,
                                   to_unit_types: List[UnitTypeId | UpgradeId],
-                                  queue: List[BuildStep]) -> bool:
+                                  queue: BuildQueue) -> bool:
+        if queue.count_unit_type(from_unit_type) == 0:
+            return False
         for idx, step in enumerate(queue):
             if step.is_unit_type(from_unit_type):
                 queue.remove(step)
@@ -402,7 +475,10 @@ class BuildOrder():
                 return True
         return False
     
-    def remove_step_from_queue(self, unit_type: UnitTypeId | UpgradeId, queue: List[BuildStep], remove_all: bool = False) -> bool:
+    def remove_step_from_queue(self, unit_type: UnitTypeId | UpgradeId, queue: BuildQueue, remove_all: bool = False) -> bool:
+        if isinstance(unit_type, UnitTypeId) and queue.count_unit_type(unit_type) == 0 \
+                or isinstance(unit_type, UpgradeId) and queue.count_upgrade_type(unit_type) == 0:
+            return False
         removed = False
         for step in queue[:]:
             if isinstance(unit_type, UnitTypeId):
@@ -420,7 +496,7 @@ class BuildOrder():
     @timed
     def add_to_build_queue(self, unit_types: List[UnitTypeId | UpgradeId],
                            position: int | None = None,
-                           queue: List[BuildStep] | None = None,
+                           queue: BuildQueue | None = None,
                            remove_duplicates: bool = True) -> List[BuildStep]:
         if queue is None:
             queue = self.build_queue
@@ -441,29 +517,24 @@ class BuildOrder():
         unit_types = all_prereqs + unit_types
         
         if remove_duplicates:
-            for build_step in self.started + self.interrupted_queue + queue:
-                if isinstance(build_step, StructureBuildStep) or isinstance(build_step, SCVBuildStep):
-                    if build_step.unit_type_id in unit_types:
-                        unit_types.remove(build_step.unit_type_id)
-                        if not unit_types:
-                            break
-                        
-            # check that upgrades are unique among all queues
-            for build_step in self.all_steps:
-                if isinstance(build_step, UpgradeBuildStep):
-                    if build_step.upgrade_id in unit_types:
-                        unit_types.remove(build_step.upgrade_id)
-                        if not unit_types:
-                            break
+            for unit_type in set(unit_types):
+                if isinstance(unit_type, UpgradeId):
+                    # check that upgrades are unique among all queues
+                    existing_queues = self.all_queues
+                else:
+                    existing_queues = [self.started, self.interrupted_queue, queue]
+                existing_count = sum(existing_queue.count_exact(unit_type) for existing_queue in existing_queues)
+                for _ in range(min(existing_count, unit_types.count(unit_type))):
+                    unit_types.remove(unit_type)
         steps_to_add: List[BuildStep] = [self.create_build_step(unit_type) for unit_type in unit_types]
         if steps_to_add:
             if len(steps_to_add) < 5:
                 sorted_steps = sorted([step.friendly_name for step in steps_to_add])
                 LogHelper.add_log(f"Adding to build queue: {', '.join(sorted_steps)}")
             if position is not None:
-                steps_to_add = queue[:position] + steps_to_add + queue[position:]
-                queue.clear()
-            queue.extend(steps_to_add)
+                queue[position:position] = steps_to_add
+            else:
+                queue.extend(steps_to_add)
         return steps_to_add
 
     def create_build_step(self, unit_type: UnitTypeId | UpgradeId, existing_structure: Unit | None = None) -> BuildStep:
@@ -523,7 +594,7 @@ class BuildOrder():
             ideal_count = math.ceil(count * buildable_percentage)
             existing_count = current_composition.get(unit_type, 0)
             in_progress_count = self.get_in_progress_count(unit_type)
-            queued_count = self.get_queued_count(unit_type, self.priority_queue + self.static_queue)
+            queued_count = self.get_queued_count(unit_type, [self.priority_queue, self.static_queue])
 
             needed_count = ideal_count - existing_count - in_progress_count - queued_count
             if needed_count > 0:
@@ -536,7 +607,7 @@ class BuildOrder():
         # recent_drops = intel.get_recent_drop_locations(within_seconds=120)
         # if len(recent_drops) > 0:
         #     widowmines = self.bot.units(UnitTypeId.WIDOWMINE)
-        #     in_progress_and_queued_widowmines = self.get_queued_count(UnitTypeId.WIDOWMINE, queue=self.started + self.priority_queue + self.static_queue)
+        #     in_progress_and_queued_widowmines = self.get_queued_count(UnitTypeId.WIDOWMINE, [self.started, self.priority_queue, self.static_queue])
         #     needed_mine_count = len(recent_drops) - len(widowmines) + in_progress_and_queued_widowmines
         #     if needed_mine_count > 0:
         #         # need more widowmines for drop defense
@@ -606,23 +677,12 @@ class BuildOrder():
             return
 
     def get_in_progress_count(self, unit_type: UnitTypeId | UpgradeId) -> int:
-        count = 0
-        for build_step in self.started + self.interrupted_queue:
-            if build_step.is_unit_type(unit_type):
-                count += 1
-        return count
-
-    def get_queued_count(self, unit_types: UnitTypeId | List[UnitTypeId], queue: List[BuildStep] | None = None) -> int:
-        count = 0
-        if isinstance(unit_types, UnitTypeId):
-            unit_types = [unit_types]
-        if queue is None:
-            queue = self.priority_queue + self.static_queue + self.build_queue
-        for build_step in queue:
-            for unit_type in unit_types:
-                if build_step.is_unit_type(unit_type):
-                    count += 1
-        return count
+        return BuildQueue.total_unit_type([self.started, self.interrupted_queue], unit_type)
+
+    def get_queued_count(self, unit_types: UnitTypeId | List[UnitTypeId], queues: List[BuildQueue] | None = None) -> int:
+        if queues is None:
+            queues = [self.priority_queue, self.static_queue, self.build_queue]
+        return BuildQueue.total_unit_type(queues, unit_types)
 
     @timed
     def queue_command_center(self, intel: EnemyIntel, detected_enemy_builds) -> None:
@@ -649,7 +709,7 @@ class BuildOrder():
             return
 
         projected_worker_capacity = self.workers.get_mineral_capacity()
-        cc_count = self.get_queued_count(UnitTypeId.COMMANDCENTER, self.all_steps)
+        cc_count = self.get_queued_count(UnitTypeId.COMMANDCENTER, self.all_queues)
         projected_worker_capacity += cc_count * 16
 
         # adds number of townhalls to account for near-term production
@@ -699,7 +759,7 @@ class BuildOrder():
         else:
             worker_build_capacity: int = len(available_townhalls)
             cc_queued_upgrade_count = self.get_queued_count([UnitTypeId.COMMANDCENTER, UnitTypeId.ORBITALCOMMAND, UnitTypeId.PLANETARYFORTRESS],
-                                                            self.interrupted_queue + self.priority_queue)
+                                                            [self.interrupted_queue, self.priority_queue])
             worker_build_capacity -= cc_queued_upgrade_count
             desired_worker_count = min(MN.MAX_WORKERS_GLOBAL, self.bot.townhalls.amount * MN.MAX_WORKERS_PER_BASE)
             number_to_build = desired_worker_count - len(self.workers.assignments_by_worker)
@@ -779,7 +839,7 @@ class BuildOrder():
             
         if need_early_marines and self.bot.minerals >= 50 and self.bot.structures(UnitTypeId.BARRACKSREACTOR):
             idle_capacity = self.production.get_build_capacity(UnitTypeId.BARRACKS)
-            priority_queue_count = self.get_queued_count(UnitTypeId.MARINE, self.priority_queue)
+            priority_queue_count = self.get_queued_count(UnitTypeId.MARINE, [self.priority_queue])
             if idle_capacity > 0 and priority_queue_count == 0:
                 if not self.move_between_queues(UnitTypeId.MARINE, self.static_queue, self.priority_queue):
                     self.add_to_build_queue([UnitTypeId.MARINE], queue=self.priority_queue)
@@ -914,10 +974,7 @@ class BuildOrder():
                     self.add_to_build_queue(new_build_steps, queue=self.static_queue, position=0)
 
     def upgrade_is_in_progress(self, upgrade_type: UpgradeId) -> bool:
-        for build_step in self.started:
-            if build_step.is_upgrade_type(upgrade_type):
-                return True
-        return False
+        return self.started.count_upgrade_type(upgrade_type) > 0
 
     @timed
     def queue_planetary(self) -> None:
@@ -963,7 +1020,7 @@ class BuildOrder():
                 else:
                     self.add_to_build_queue([UnitTypeId.MISSILETURRET])
 
-    def add_to_build_queue_with_build_position(self, unit_type: UnitTypeId | UpgradeId, build_position: Point2, build_queue: List[BuildStep] | None = None) -> None:
+    def add_to_build_queue_with_build_position(self, unit_type: UnitTypeId | UpgradeId, build_position: Point2, build_queue: BuildQueue | None = None) -> None:
         new_steps = self.add_to_build_queue([unit_type], queue=build_queue)
         if new_steps:
             LogHelper.add_log(f"Queuing {unit_type.name} at {build_position}")
@@ -1106,7 +1163,7 @@ class BuildOrder():
         return remaining_resources
 
     @timed_async
-    async def build_from_queue(self, build_queue: List[BuildStep], only_build_units: bool, detected_enemy_builds: Dict[BuildType, float],
+    async def build_from_queue(self, build_queue: BuildQueue, only_build_units: bool, detected_enemy_builds: Dict[BuildType, float],
                                allow_skip: bool = True, remaining_resources: Cost | None = None) -> Cost:
         execution_index = -1
         failed_types: List[UnitTypeId] = []
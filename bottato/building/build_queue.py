@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, List
+
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+if TYPE_CHECKING:
+    from bottato.building.build_step import BuildStep
+
+
+class BuildQueue(list):
+    """List of build steps that keeps per-type and membership counts up to date.
+
+    Every mutating list method updates the counters, so existing code can keep
+    treating queues as lists while count and membership queries are O(1) instead
+    of scanning the queue.
+    """
+    # matching rules mirrored from SCVBuildStep.is_unit_type and UpgradeBuildStep.is_upgrade_type
+    UNIT_TYPE_ALIASES = {
+        UnitTypeId.REFINERY: (UnitTypeId.REFINERY, UnitTypeId.REFINERYRICH),
+        UnitTypeId.REFINERYRICH: (UnitTypeId.REFINERY, UnitTypeId.REFINERYRICH),
+    }
+    UPGRADE_ALIASES = {
+        UpgradeId.SUNDERINGIMPACT: (UpgradeId.SUNDERINGIMPACT, UpgradeId.INTERFERENCEMATRIX),
+    }
+
+    def __init__(self, steps: Iterable[BuildStep] = ()) -> None:
+        super().__init__()
+        self.type_counts: Counter = Counter()
+        self.step_counts: Counter = Counter()
+        # bumped on every change so planners can tell if a queue was touched
+        self.version: int = 0
+        self.extend(steps)
+
+    def _added(self, steps: Iterable[BuildStep]) -> None:
+        self.version += 1
+        for step in steps:
+            self.type_counts[step.get_queue_key()] += 1
+            self.step_counts[id(step)] += 1
+
+    def _removed(self, steps: Iterable[BuildStep]) -> None:
+        self.version += 1
+        for step in steps:
+            key = step.get_queue_key()
+            self.type_counts[key] -= 1
+            if self.type_counts[key] == 0:
+                del self.type_counts[key]
+            self.step_counts[id(step)] -= 1
+            if self.step_counts[id(step)] == 0:
+                del self.step_counts[id(step)]
+
+    def append(self, step: BuildStep) -> None:
+        super().append(step)
+        self._added((step,))
+
+    def extend(self, steps: Iterable[BuildStep]) -> None:
+        steps = list(steps)
+        super().extend(steps)
+        self._added(steps)
+
+    def __iadd__(self, steps: Iterable[BuildStep]) -> BuildQueue:  # type: ignore[override]
+        self.extend(steps)
+        return self
+
+    def insert(self, index: int, step: BuildStep) -> None:  # type: ignore[override]
+        super().insert(index, step)
+        self._added((step,))
+
+    def pop(self, index: int = -1) -> BuildStep:  # type: ignore[override]
+        step = super().pop(index)
+        self._removed((step,))
+        return step
+
+    def remove(self, step: BuildStep) -> None:
+        super().remove(step)
+        self._removed((step,))
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+        self.type_counts.clear()
+        self.step_counts.clear()
+
+    def __delitem__(self, index) -> None:
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        self._removed(removed)
+
+    def __setitem__(self, index, value) -> None:
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        added = list(value) if isinstance(index, slice) else [value]
+        super().__setitem__(index, added if isinstance(index, slice) else value)
+        self._removed(removed)
+        self._added(added)
+
+    def __contains__(self, step: object) -> bool:
+        # build steps compare by identity
+        return id(step) in self.step_counts
+
+    def count_unit_type(self, unit_type: UnitTypeId | UpgradeId) -> int:
+        """Number of steps where step.is_unit_type(unit_type) is True."""
+        if isinstance(unit_type, UpgradeId):
+            return 0
+        keys = self.UNIT_TYPE_ALIASES.get(unit_type, (unit_type,))
+        return sum(self.type_counts[key] for key in keys)
+
+    def count_upgrade_type(self, upgrade_type: UpgradeId) -> int:
+        """Number of steps where step.is_upgrade_type(upgrade_type) is True."""
+        keys = self.UPGRADE_ALIASES.get(upgrade_type, (upgrade_type,))
+        return sum(self.type_counts[key] for key in keys)
+
+    def count_exact(self, key: UnitTypeId | UpgradeId) -> int:
+        """Number of steps with exactly this unit type or upgrade, no aliasing."""
+        return self.type_counts[key]
+
+    @staticmethod
+    def total_unit_type(queues: List[BuildQueue], unit_types: UnitTypeId | UpgradeId | List[UnitTypeId]) -> int:
+        if not isinstance(unit_types, list):
+            unit_types = [unit_types]
+        return sum(queue.count_unit_type(unit_type) for queue in queues for unit_type in unit_types)
@@ -66,6 +66,10 @@ class BuildStep(GeometryMixin):
     
     def get_unit_type_id(self) -> UnitTypeId:
         return UnitTypeId.NOTAUNIT
+
+    def get_queue_key(self) -> UnitTypeId | UpgradeId:
+        """Type the step is counted under in a BuildQueue."""
+        return self.get_unit_type_id()
     
     def get_structure_being_built(self) -> Unit | None:
         return None
@@ -0,0 +1,51 @@
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from sc2.bot_ai import BotAI
+
+
+class PlanningEngine:
+    """Decides which build planners need to run this step.
+
+    Each planner declares the named inputs it depends on. A planner is due when the
+    value of any of its inputs differs from when it last ran, or when it hasn't run
+    for max_staleness seconds (covers time thresholds and anything not captured by
+    an input). Inputs should be cheap summaries like counts and buckets.
+    """
+    def __init__(self, bot: BotAI) -> None:
+        self.bot = bot
+        self.inputs: Dict[str, Callable[[], Hashable]] = {}
+        self.planners: Dict[str, Tuple[List[str], float]] = {}
+        self.last_signatures: Dict[str, Tuple] = {}
+        self.last_run_times: Dict[str, float] = {}
+
+    def add_input(self, name: str, getter: Callable[[], Hashable]) -> None:
+        self.inputs[name] = getter
+
+    def add_planner(self, name: str, inputs: List[str], max_staleness: float) -> None:
+        for input_name in inputs:
+            if input_name not in self.inputs:
+                raise ValueError(f"planner {name} depends on unknown input {input_name}")
+        self.planners[name] = (inputs, max_staleness)
+
+    def get_signature(self, name: str) -> Tuple:
+        inputs, _ = self.planners[name]
+        return tuple(self.inputs[input_name]() for input_name in inputs)
+
+    def is_due(self, name: str) -> bool:
+        if name not in self.last_signatures:
+            return True
+        _, max_staleness = self.planners[name]
+        if self.bot.time - self.last_run_times[name] >= max_staleness:
+            return True
+        return self.get_signature(name) != self.last_signatures[name]
+
+    def mark_ran(self, name: str) -> None:
+        """Record inputs after the planner runs so its own queue changes don't make it due again."""
+        self.last_signatures[name] = self.get_signature(name)
+        self.last_run_times[name] = self.bot.time
+
+    def invalidate(self, name: str | None = None) -> None:
+        if name is None:
+            self.last_signatures.clear()
+        else:
+            self.last_signatures.pop(name, None)
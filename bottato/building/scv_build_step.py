@@ -15,6 +15,7 @@ from sc2.unit import Unit
 from sc2.unit_command import UnitCommand
 from sc2.units import Units
 
+from bottato.building.base_layout import BaseLayout
 from bottato.building.build_step import BuildStep
 from bottato.building.special_locations import SpecialLocations
 from bottato.economy.production import Production
@@ -208,7 +209,7 @@ class SCVBuildStep(BuildStep):
             return BuildResponseCode.NO_BUILDER
 
         micro: BaseUnitMicro = MicroFactory.get_unit_micro(self.unit_in_charge)
-        if await micro._retreat(self.unit_in_charge, 0.8) == UnitMicroType.RETREAT:
+        if micro._retreat(self.unit_in_charge, 0.8) == UnitMicroType.RETREAT:
             LogHelper.add_log(f"Builder {self.unit_in_charge} retreating instead of building {self.unit_type_id} at {self.position} due to nearby enemies")
             return BuildResponseCode.TOO_CLOSE_TO_ENEMY
 
@@ -242,6 +243,8 @@ class SCVBuildStep(BuildStep):
                 build_response = self.unit_in_charge.build(
                     self.unit_type_id, self.position, queue=queue_order
                 )
+                if build_response:
+                    special_locations.base_layout.claim_slot(self.position)
 
         if build_response:
             self.start_time = self.bot.time
@@ -296,9 +299,9 @@ class SCVBuildStep(BuildStep):
         if unit_type_id == UnitTypeId.COMMANDCENTER:
             new_build_position = await self.find_command_center_placement(special_locations, flying_building_destinations)
         elif unit_type_id == UnitTypeId.BUNKER:
-            new_build_position = await self.find_bunker_placement(detected_enemy_builds)
+            new_build_position = await self.find_bunker_placement(detected_enemy_builds, special_locations)
         elif unit_type_id == UnitTypeId.MISSILETURRET:
-            new_build_position = await self.find_missile_turret_placement()
+            new_build_position = await self.find_missile_turret_placement(special_locations)
         elif unit_type_id == UnitTypeId.SUPPLYDEPOT and self.bot.supply_cap < 45 and self.bot.enemy_race != Race.Terran:
             new_build_position = await self.find_depot_placement_for_visibility(special_locations)
         elif self.is_proxy_barracks():
@@ -311,6 +314,7 @@ class SCVBuildStep(BuildStep):
                 threats = self.bot.all_enemy_units.filter(lambda u: UnitTypes.can_attack_ground(u) and u.type_id not in UnitTypes.WORKER_TYPES)
                 if threats and cy_closer_than(threats, 10, new_build_position):
                     logger.debug(f"found enemy near proposed build position {new_build_position}, rejecting")
+                    special_locations.base_layout.release_slots(id(self))
                     return None
                 
             if unit_type_id == UnitTypeId.COMMANDCENTER and BuildType.RUSH not in detected_enemy_builds:
@@ -401,7 +405,7 @@ class SCVBuildStep(BuildStep):
         return new_build_position
     
     @timed_async
-    async def find_bunker_placement(self, detected_enemy_builds: Dict[BuildType, float]) -> Point2 | None:
+    async def find_bunker_placement(self, detected_enemy_builds: Dict[BuildType, float], special_locations: SpecialLocations) -> Point2 | None:
         new_build_position: Point2 | None = None
         candidate: Point2
         natural_is_in_place = len(cy_closer_than(self.bot.structures, 2, self.map.natural_position)) > 0
@@ -415,6 +419,9 @@ class SCVBuildStep(BuildStep):
             # candidates = [(depot_position + ramp_barracks.position) / 2 for depot_position in self.bot.main_base_ramp.corner_depots]
             candidate = min(candidates, key=lambda p: cy_distance_to_squared(self.bot.start_location, p))
         elif len(cy_closer_than(self.bot.structures.of_type(UnitTypeId.BUNKER), 15, self.map.natural_position)) == 0:
+            layout_slot = special_locations.base_layout.get_bunker_slot(self.map.natural_position)
+            if layout_slot and await self.bot.can_place_single(UnitTypeId.BUNKER, layout_slot):
+                return layout_slot
             ramp_position: Point2 = self.bot.main_base_ramp.bottom_center
             # enemy_start: Point2 = self.bot.enemy_start_locations[0]
             ramp_to_natural_vector = (self.map.natural_position - ramp_position).normalized
@@ -440,12 +447,15 @@ class SCVBuildStep(BuildStep):
         return new_build_position
     
     @timed_async
-    async def find_missile_turret_placement(self) -> Point2 | None:
+    async def find_missile_turret_placement(self, special_locations: SpecialLocations) -> Point2 | None:
         new_build_position: Point2 | None = None
         bases = self.bot.structures.of_type({UnitTypeId.COMMANDCENTER, UnitTypeId.ORBITALCOMMAND, UnitTypeId.PLANETARYFORTRESS})
         turrets = self.bot.structures.of_type(UnitTypeId.MISSILETURRET)
         for base in bases:
             if not turrets or self.closest_distance_squared(base, turrets) > 100: # 10 squared
+                layout_slot = special_locations.base_layout.get_turret_slot(base.position)
+                if layout_slot and await self.bot.can_place_single(UnitTypeId.MISSILETURRET, layout_slot):
+                    return layout_slot
                 new_build_position = await self.bot.find_placement(
                     UnitTypeId.MISSILETURRET,
                     near=Point2(cy_towards(base.position, self.bot.game_info.map_center, distance=-4)),
@@ -490,6 +500,8 @@ class SCVBuildStep(BuildStep):
                 and not special_locations.is_blocked
             ):
             new_build_position = special_locations.find_placement(unit_type_id)
+        if new_build_position is None:
+            new_build_position = await self.find_layout_placement(unit_type_id, special_locations, flying_building_destinations)
         addon_place = unit_type_id in (
             UnitTypeId.BARRACKS,
             UnitTypeId.FACTORY,
@@ -540,41 +552,8 @@ class SCVBuildStep(BuildStep):
                     )
             except (ConnectionAlreadyClosedError, ConnectionResetError, ProtocolError):
                 return None
-            if new_build_position:
-                # don't build near edge to avoid trapping units
-                edge_distance = self.map.get_distance_from_edge(new_build_position.rounded)
-                if edge_distance <= 3:
-                    # accept defeat, is ok to do it sometimes
-                    new_build_position = None
-            if new_build_position:
-                new_build_radius = BUILDING_RADIUS[unit_type_id]
-                for tag, destination in flying_building_destinations.items():
-                    flying_building = self.bot.structures.find_by_tag(tag)
-                    if not flying_building:
-                        continue
-                    flying_building_radius = BUILDING_RADIUS[flying_building.type_id]
-                    grid_distance = GeometryMixin.grid_distance(new_build_position, destination)
-                    if grid_distance < new_build_radius + flying_building_radius:
-                        new_build_position = None
-                        break
-            # don't build production between townhalls and resources
-            if new_build_position and addon_place and self.bot.townhalls:
-                nearest_townhall = cy_closest_to(new_build_position, self.bot.townhalls)
-                addon_position = new_build_position.offset(Point2((2.5, -0.5)))
-                if self.bot.mineral_field:
-                    nearest_minerals = cy_closest_to(new_build_position, self.bot.mineral_field)
-                    minerals_are_near = cy_distance_to_squared(new_build_position, nearest_minerals.position) <= 9 \
-                        or cy_distance_to_squared(addon_position, nearest_minerals.position) <= 9
-                    if minerals_are_near and (self.position_is_between(new_build_position, nearest_townhall.position, nearest_minerals.position) \
-                    or self.position_is_between(addon_position, nearest_minerals.position, nearest_townhall.position)):
-                        new_build_position = None
-                if new_build_position and self.bot.vespene_geyser:
-                    nearest_gas = cy_closest_to(new_build_position, self.bot.vespene_geyser)
-                    gas_is_near = cy_distance_to_squared(new_build_position, nearest_gas.position) <= 9 \
-                        or cy_distance_to_squared(addon_position, nearest_gas.position) <= 9
-                    if gas_is_near and (self.position_is_between(new_build_position, nearest_townhall.position, nearest_gas.position) \
-                    or self.position_is_between(addon_position, nearest_gas.position, nearest_townhall.position)):
-                        new_build_position = None
+            if new_build_position and self.is_rejected_position(new_build_position, unit_type_id, flying_building_destinations):
+                new_build_position = None
             if new_build_position is None:
                 max_distance += 1
                 retry_count += 1
@@ -584,6 +563,74 @@ class SCVBuildStep(BuildStep):
                     break
         return new_build_position
 
+    def is_rejected_position(self, position: Point2, unit_type_id: UnitTypeId, flying_building_destinations: Dict[int, Point2],
+                             check_edge_distance: bool = True) -> bool:
+        # don't build near edge to avoid trapping units
+        if check_edge_distance and self.map.get_distance_from_edge(position.rounded) <= 3:
+            # accept defeat, is ok to do it sometimes
+            return True
+        new_build_radius = BUILDING_RADIUS[unit_type_id]
+        for tag, destination in flying_building_destinations.items():
+            flying_building = self.bot.structures.find_by_tag(tag)
+            if not flying_building:
+                continue
+            flying_building_radius = BUILDING_RADIUS[flying_building.type_id]
+            grid_distance = GeometryMixin.grid_distance(position, destination)
+            if grid_distance < new_build_radius + flying_building_radius:
+                return True
+        # don't build production between townhalls and resources
+        if unit_type_id in BaseLayout.PRODUCTION_TYPES and self.bot.townhalls:
+            nearest_townhall = cy_closest_to(position, self.bot.townhalls)
+            addon_position = position.offset(Point2((2.5, -0.5)))
+            if self.bot.mineral_field:
+                nearest_minerals = cy_closest_to(position, self.bot.mineral_field)
+                minerals_are_near = cy_distance_to_squared(position, nearest_minerals.position) <= 9 \
+                    or cy_distance_to_squared(addon_position, nearest_minerals.position) <= 9
+                if minerals_are_near and (self.position_is_between(position, nearest_townhall.position, nearest_minerals.position) \
+                or self.position_is_between(addon_position, nearest_minerals.position, nearest_townhall.position)):
+                    return True
+            if self.bot.vespene_geyser:
+                nearest_gas = cy_closest_to(position, self.bot.vespene_geyser)
+                gas_is_near = cy_distance_to_squared(position, nearest_gas.position) <= 9 \
+                    or cy_distance_to_squared(addon_position, nearest_gas.position) <= 9
+                if gas_is_near and (self.position_is_between(position, nearest_townhall.position, nearest_gas.position) \
+                or self.position_is_between(addon_position, nearest_gas.position, nearest_townhall.position)):
+                    return True
+        return False
+
+    async def find_layout_placement(self, unit_type_id: UnitTypeId, special_locations: SpecialLocations, flying_building_destinations: Dict[int, Point2]) -> Point2 | None:
+        """Reserve the first planned slot that can still be placed. Slots are only planned for the main base.
+
+        Slots that fail are moved to the back instead of dropped, the slot is only removed
+        from the layout once the build command goes out (see execute_scv_build).
+        """
+        base_layout = special_locations.base_layout
+        base_layout.release_slots(id(self))
+        if not self.member_is_closer_than(self.bot.start_location, self.bot.townhalls.filter(lambda th: not th.is_flying), 2):
+            return None
+        for slot in base_layout.get_free_slots(unit_type_id, id(self)):
+            # the layout already keeps open ground free, depots are planned against the edge on purpose
+            if self.is_rejected_position(slot, unit_type_id, flying_building_destinations, check_edge_distance=False):
+                base_layout.defer_slot(unit_type_id, slot)
+                continue
+            try:
+                if not await self.bot.can_place_single(unit_type_id, slot):
+                    if self.member_is_closer_than(slot, self.bot.structures, 1):
+                        # already built on, won't free up
+                        base_layout.claim_slot(slot)
+                    else:
+                        base_layout.defer_slot(unit_type_id, slot)
+                    continue
+                if unit_type_id in BaseLayout.PRODUCTION_TYPES \
+                        and not await self.bot.can_place_single(UnitTypeId.SUPPLYDEPOT, slot.offset(Point2((2.5, -0.5)))):
+                    base_layout.defer_slot(unit_type_id, slot)
+                    continue
+            except (ConnectionAlreadyClosedError, ConnectionResetError, ProtocolError):
+                return None
+            base_layout.reserve_slot(slot, id(self))
+            return slot
+        return None
+
     def get_geysir(self) -> Unit | None:
         if self.bot.townhalls:
             vespene_geysirs = Units([], self.bot)
@@ -654,7 +701,7 @@ class SCVBuildStep(BuildStep):
                     interrupted = True
             else:
                 micro: BaseUnitMicro = MicroFactory.get_unit_micro(self.unit_in_charge)
-                if await micro._retreat(self.unit_in_charge, 0.8) == UnitMicroType.RETREAT:
+                if micro._retreat(self.unit_in_charge, 0.8) == UnitMicroType.RETREAT:
                     interrupted = True
                     LogHelper.add_log(f"{self} interrupted due to retreating worker {self.unit_in_charge}")
 
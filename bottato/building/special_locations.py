@@ -7,6 +7,8 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2
 from sc2.unit import Unit
 
+from bottato.building.base_layout import BaseLayout
+
 
 class SpecialLocation:
     def __init__(self, unit_type_id: UnitTypeId, position: Point2):
@@ -23,10 +25,11 @@ class SpecialLocation:
 
 
 class SpecialLocations:
-    def __init__(self, ramp: Ramp):
+    def __init__(self, ramp: Ramp, base_layout: BaseLayout):
         self.is_blocked: bool = False
         self.ramps = []
         self.ramp_blockers: List[SpecialLocation] = []
+        self.base_layout = base_layout
         self.add_ramp(ramp)
 
     def add_ramp(self, ramp: Ramp):
@@ -184,7 +184,7 @@ class StructureBuildStep(BuildStep):
             # self.pos = self.unit_in_charge.position
             logger.debug(f"Found training facility {self.unit_in_charge}")
             if self.facility:
-                self.facility.add_queued_unit_id(self.unit_type_id)
+                self.production.add_queued_unit(self.facility, self.unit_type_id)
             build_response = self.unit_in_charge(self.get_build_ability())
             if build_response:
                 response = BuildResponseCode.SUCCESS
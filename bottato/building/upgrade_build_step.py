@@ -51,6 +51,9 @@ class UpgradeBuildStep(BuildStep):
 
     def is_upgrade_type(self, upgrade_id: UpgradeId) -> bool:
         return self.upgrade_id == upgrade_id or upgrade_id == UpgradeId.SUNDERINGIMPACT and self.upgrade_id == UpgradeId.INTERFERENCEMATRIX
+
+    def get_queue_key(self) -> UnitTypeId | UpgradeId:
+        return self.upgrade_id
     
 
     def get_readiness_to_build(self) -> float:
@@ -0,0 +1,168 @@
+import math
+from loguru import logger
+from typing import Dict, List, Tuple
+
+from sc2.bot_ai import BotAI
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+from sc2.unit_command import UnitCommand
+
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.unit_state_store import UnitComponent, UnitStateStore
+
+
+class CommandFilter:
+    """Last stop for bot.actions before they are sent to the server.
+
+    Drops commands that wouldn't change what a unit is doing: the same ability and
+    (nearly) the same target as its current order or as the command it was sent within
+    the repeat cooldown, and morphs into the state the unit is already in. Commands are
+    then ordered so identical commands for different units are sent as one grouped action.
+    Units given several commands or a queued command this step keep all of them, in order.
+    """
+    # morphs that do nothing when the unit is already in the resulting state
+    ALREADY_IN_STATE: Dict[AbilityId, Tuple[UnitTypeId, ...]] = {
+        AbilityId.MORPH_SUPPLYDEPOT_RAISE: (UnitTypeId.SUPPLYDEPOT,),
+        AbilityId.MORPH_SUPPLYDEPOT_LOWER: (UnitTypeId.SUPPLYDEPOTLOWERED,),
+        AbilityId.SIEGEMODE_SIEGEMODE: (UnitTypeId.SIEGETANKSIEGED,),
+        AbilityId.UNSIEGE_UNSIEGE: (UnitTypeId.SIEGETANK,),
+        AbilityId.BURROWDOWN_WIDOWMINE: (UnitTypeId.WIDOWMINEBURROWED,),
+        AbilityId.BURROWUP_WIDOWMINE: (UnitTypeId.WIDOWMINE,),
+    }
+    # morphs take a moment to show up in unit orders, so give them longer before resending
+    REPEAT_COOLDOWNS: Dict[AbilityId, float] = {
+        AbilityId.MORPH_SUPPLYDEPOT_RAISE: 1.0,
+        AbilityId.MORPH_SUPPLYDEPOT_LOWER: 1.0,
+        AbilityId.SIEGEMODE_SIEGEMODE: 1.0,
+        AbilityId.UNSIEGE_UNSIEGE: 1.0,
+        AbilityId.BURROWDOWN_WIDOWMINE: 1.0,
+        AbilityId.BURROWUP_WIDOWMINE: 1.0,
+    }
+
+    bot: BotAI
+    # unit tag -> (ability, target, time) of the last command actually sent
+    last_sent: UnitComponent = UnitStateStore.register("commands.last_sent", stale_seconds=30)
+    sent_count: int = 0
+    dropped_count: int = 0
+    action_count: int = 0
+
+    @staticmethod
+    def init(bot: BotAI):
+        CommandFilter.bot = bot
+        CommandFilter.last_sent.clear()
+        CommandFilter.sent_count = 0
+        CommandFilter.dropped_count = 0
+        CommandFilter.action_count = 0
+
+    @staticmethod
+    def filter_actions():
+        """Replace bot.actions with the commands worth sending, grouped for combining."""
+        bot = CommandFilter.bot
+        if not bot.actions:
+            return
+        actions = CommandFilter.filter(bot.actions, bot.time)
+        bot.actions[:] = actions
+        CommandFilter.action_count += CommandFilter.count_grouped_actions(actions)
+
+    @staticmethod
+    def filter(actions: List[UnitCommand], time: float) -> List[UnitCommand]:
+        commands_by_tag: Dict[int, List[UnitCommand]] = {}
+        for action in actions:
+            commands_by_tag.setdefault(action.unit.tag, []).append(action)
+
+        single_commands: List[UnitCommand] = []
+        sequences: List[UnitCommand] = []
+        for tag, commands in commands_by_tag.items():
+            command = commands[0]
+            if len(commands) > 1 or command.queue:
+                # e.g. stim then attack, or move then queued gather; order matters so leave them alone
+                sequences.extend(commands)
+                CommandFilter.last_sent.pop(tag, None)
+                continue
+            if CommandFilter.is_redundant(command, time):
+                CommandFilter.dropped_count += 1
+                continue
+            CommandFilter.last_sent[tag] = (command.ability, CommandFilter.get_target_key(command.target), time)
+            single_commands.append(command)
+
+        # put identical commands next to each other so combine_actions sends them as one action
+        single_commands.sort(key=CommandFilter.get_group_key)
+        CommandFilter.sent_count += len(single_commands) + len(sequences)
+        return single_commands + sequences
+
+    @staticmethod
+    def is_redundant(command: UnitCommand, time: float) -> bool:
+        unit = command.unit
+        if command.ability in CommandFilter.ALREADY_IN_STATE:
+            if unit.type_id in CommandFilter.ALREADY_IN_STATE[command.ability]:
+                return True
+        elif command.target is None:
+            # training, research and other untargeted commands stack when repeated
+            return False
+
+        target_key = CommandFilter.get_target_key(command.target)
+        if unit.tag in CommandFilter.last_sent:
+            ability, last_target, sent_time = CommandFilter.last_sent[unit.tag]
+            cooldown = CommandFilter.REPEAT_COOLDOWNS.get(command.ability, MN.COMMAND_REPEAT_COOLDOWN)
+            if ability == command.ability and time - sent_time < cooldown \
+                    and CommandFilter.targets_match(unit, last_target, target_key):
+                return True
+
+        if unit.orders:
+            order = unit.orders[0]
+            if command.ability in (order.ability.id, order.ability.exact_id):
+                if CommandFilter.targets_match(unit, order.target, target_key):
+                    return True
+        return False
+
+    @staticmethod
+    def get_target_key(target: Unit | Point2 | None) -> int | Point2 | None:
+        if isinstance(target, Unit):
+            return target.tag
+        return target
+
+    @staticmethod
+    def targets_match(unit: Unit, current: int | Point2 | None, new: int | Point2 | None) -> bool:
+        if isinstance(current, Point2) and isinstance(new, Point2):
+            return CommandFilter.positions_match(unit.position, current, new)
+        return current == new
+
+    @staticmethod
+    def positions_match(origin: Point2, current: Point2, new: Point2) -> bool:
+        """Close together, or far enough away that they are in nearly the same direction."""
+        target_distance = math.hypot(new.x - current.x, new.y - current.y)
+        if target_distance <= MN.COMMAND_POSITION_TOLERANCE:
+            return True
+        unit_distance = math.hypot(new.x - origin.x, new.y - origin.y)
+        return target_distance <= unit_distance * MN.COMMAND_ANGLE_TOLERANCE
+
+    @staticmethod
+    def get_group_key(command: UnitCommand) -> Tuple:
+        target = command.target
+        if isinstance(target, Unit):
+            target_key: Tuple = (1, target.tag)
+        elif isinstance(target, Point2):
+            target_key = (2, target.x, target.y)
+        else:
+            target_key = (0,)
+        return (command.ability.value, target_key)
+
+    @staticmethod
+    def count_grouped_actions(actions: List[UnitCommand]) -> int:
+        """Number of raw actions combine_actions will produce, for the on_end report."""
+        count = 0
+        previous_key = None
+        for action in actions:
+            ability, target, queue, combineable = action.combining_tuple
+            key = (ability, CommandFilter.get_target_key(target), queue)
+            if not combineable or key != previous_key:
+                count += 1
+            previous_key = key
+        return count
+
+    @staticmethod
+    def log_report():
+        logger.info(f"commands sent: {CommandFilter.sent_count}, dropped: {CommandFilter.dropped_count}, "
+                    f"raw actions after grouping: {CommandFilter.action_count}")
@@ -23,6 +23,7 @@ from bottato.economy.workers import Workers
 from bottato.enums import CustomEffectTargetArea, CustomEffectType
 from bottato.log_helper import LogHelper
 from bottato.map.destructibles import BUILDING_RADIUS
+from bottato.map.init_pipeline import InitPipeline
 from bottato.map.map import Map
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.micro.cyclone_micro import CycloneMicro
@@ -57,9 +58,20 @@ class Commander(GeometryMixin):
         self.stuck_units: Units = Units([], bot_object=bot)
 
     async def init_map(self):
-        await self.tactics.map.init(self.tactics.intel.scouting_locations)
-        logger.info("Map initialized, initializing scouting routes...")
-        self.scouting.init_scouting_routes()
+        # grid-only analyses run in worker processes while zones are built here
+        pipeline = InitPipeline()
+        try:
+            self.tactics.map.submit_init_jobs(pipeline, self.tactics.intel.scouting_locations)
+            self.scouting.submit_init_jobs(pipeline)
+            await self.tactics.map.init(self.tactics.intel.scouting_locations, pipeline)
+            logger.info("Map initialized, initializing scouting routes...")
+            self.scouting.init_scouting_routes(await pipeline.result("scouting_distances"))
+        finally:
+            pipeline.shutdown()
+        logger.info("Scouting routes initialized, planning base layout...")
+        self.build_order.base_layout.init()
+        logger.info("Base layout planned, loading mineral geometry...")
+        self.my_workers.minerals.geometry.init()
 
     @timed_async
     async def command(self, iteration: int):
@@ -81,6 +93,8 @@ class Commander(GeometryMixin):
         await self.detect_stuck_units(iteration) # fast
 
         BaseUnitMicro.reset_tag_sets()
+        BaseUnitMicro.update_effect_hazards()
+        BaseUnitMicro.allocate_targets(self.tactics.enemy)
         await CycloneMicro.update_lock_on_states(self.bot)
 
         await self.structure_micro.execute(self.tactics.intel.army_ratio, self.stuck_units, iteration) # fast
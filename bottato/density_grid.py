@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from cython_extensions.units_utils import cy_closer_than
+from scipy.signal import fftconvolve
+from sc2.position import Point2
+from sc2.unit import Unit
+
+class DensityGrid:
+    """Unit counts binned into grid cells, for "where are units most grouped" questions.
+
+    density(radius) convolves the counts with a disk so each cell holds the number of units
+    within radius of it; the result is cached until units are added, moved or removed. Only
+    the window around occupied cells is convolved, so a map-sized grid kept up to date with
+    update() costs about the same as one built around a handful of units with from_units().
+    """
+    def __init__(self, origin: Point2, width: int, height: int, cell_size: float = 1.0):
+        self.origin = origin
+        self.cell_size = cell_size
+        self.counts = np.zeros((max(width, 1), max(height, 1)), dtype=np.float64)
+        self.units: Dict[int, Unit] = {}
+        self.cells: Dict[int, Tuple[int, int]] = {}
+        self.density_cache: Dict[float, np.ndarray] = {}
+
+    @staticmethod
+    def from_units(units: Iterable[Unit], radius: float) -> DensityGrid:
+        """Grid just big enough for units, with cells small enough to resolve radius."""
+        units = list(units)
+        cell_size = min(1.0, max(radius / 4, 0.25))
+        if units:
+            xs = [unit.position.x for unit in units]
+            ys = [unit.position.y for unit in units]
+            origin = Point2((min(xs) - radius, min(ys) - radius))
+            width = int((max(xs) - min(xs) + 2 * radius) / cell_size) + 1
+            height = int((max(ys) - min(ys) + 2 * radius) / cell_size) + 1
+        else:
+            origin, width, height = Point2((0, 0)), 1, 1
+        grid = DensityGrid(origin, width, height, cell_size)
+        grid.update(units)
+        return grid
+
+    def cell_of(self, position: Point2) -> Tuple[int, int]:
+        width, height = self.counts.shape
+        x = int((position.x - self.origin.x) / self.cell_size)
+        y = int((position.y - self.origin.y) / self.cell_size)
+        return min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+
+    def cell_center(self, x: int, y: int) -> Point2:
+        return Point2((self.origin.x + (x + 0.5) * self.cell_size, self.origin.y + (y + 0.5) * self.cell_size))
+
+    def add(self, unit: Unit):
+        """Add unit, or move it to its current cell if it's already in the grid."""
+        cell = self.cell_of(unit.position)
+        self.units[unit.tag] = unit
+        previous_cell = self.cells.get(unit.tag)
+        if previous_cell == cell:
+            return
+        if previous_cell is not None:
+            self.counts[previous_cell] -= 1
+        self.counts[cell] += 1
+        self.cells[unit.tag] = cell
+        self.density_cache.clear()
+
+    def remove(self, tag: int):
+        if tag not in self.cells:
+            return
+        self.counts[self.cells.pop(tag)] -= 1
+        del self.units[tag]
+        self.density_cache.clear()
+
+    def update(self, units: Iterable[Unit]):
+        """Make the grid hold exactly units, only touching cells for units that changed cell."""
+        current_tags = set()
+        for unit in units:
+            current_tags.add(unit.tag)
+            self.add(unit)
+        for tag in [tag for tag in self.cells if tag not in current_tags]:
+            self.remove(tag)
+
+    def get_kernel(self, radius: float) -> np.ndarray:
+        cell_radius = radius / self.cell_size
+        reach = int(cell_radius)
+        offsets = np.arange(-reach, reach + 1)
+        return (offsets[:, None] ** 2 + offsets[None, :] ** 2 <= cell_radius ** 2).astype(np.float64)
+
+    def density(self, radius: float) -> np.ndarray:
+        """Number of units within radius of each cell."""
+        if radius in self.density_cache:
+            return self.density_cache[radius]
+        density = np.zeros_like(self.counts)
+        if self.cells:
+            kernel = self.get_kernel(radius)
+            reach = kernel.shape[0] // 2
+            cells = np.array(list(self.cells.values()))
+            width, height = self.counts.shape
+            x_min, y_min = np.maximum(cells.min(axis=0) - reach, 0)
+            x_max, y_max = np.minimum(cells.max(axis=0) + reach + 1, (width, height))
+            window = fftconvolve(self.counts[x_min:x_max, y_min:y_max], kernel, mode="same")
+            density[x_min:x_max, y_min:y_max] = np.rint(window)
+        self.density_cache[radius] = density
+        return density
+
+    def count_near(self, position: Point2, radius: float) -> int:
+        return int(self.density(radius)[self.cell_of(position)])
+
+    def densest_point(self, radius: float) -> Tuple[Point2, int]:
+        density = self.density(radius)
+        x, y = np.unravel_index(int(np.argmax(density)), density.shape)
+        return self.cell_center(int(x), int(y)), int(density[x, y])
+
+    def counts_near_units(self, radius: float) -> Dict[int, int]:
+        """Unit tag -> number of units (including itself) within about radius of it."""
+        density = self.density(radius)
+        return {tag: int(density[cell]) for tag, cell in self.cells.items()}
+
+    def most_grouped_unit(self, radius: float) -> Tuple[Unit, List[Unit]]:
+        """The unit with the most other units within radius, and those units."""
+        assert self.units, "grid is empty"
+        units = list(self.units.values())
+        counts = self.counts_near_units(radius)
+        most_grouped_unit = max(units, key=lambda unit: counts[unit.tag])
+        return most_grouped_unit, cy_closer_than(units, radius, most_grouped_unit.position)
+
+    def clusters(self, radius: float, count: int, min_size: int = 1) -> List[Tuple[Point2, List[Unit]]]:
+        """Up to count non-overlapping clusters, densest first, as (center, units within radius)."""
+        clusters: List[Tuple[Point2, List[Unit]]] = []
+        if not self.units:
+            return clusters
+        saved_counts = self.counts.copy()
+        saved_cache = self.density_cache
+        remaining = dict(self.units)
+        cell_radius_squared = (radius / self.cell_size) ** 2
+        try:
+            while len(clusters) < count and remaining:
+                self.density_cache = {}
+                density = self.density(radius)
+                x, y = np.unravel_index(int(np.argmax(density)), density.shape)
+                if density[x, y] < min_size:
+                    break
+                # same cell distances the density kernel uses, so members match the count
+                members = [unit for tag, unit in remaining.items()
+                           if (self.cells[tag][0] - x) ** 2 + (self.cells[tag][1] - y) ** 2 <= cell_radius_squared]
+                if not members:
+                    break
+                center = self.cell_center(int(x), int(y))
+                clusters.append((center, members))
+                # take the members out so the next cluster is found among the units that are left
+                for unit in members:
+                    self.counts[self.cells[unit.tag]] -= 1
+                    del remaining[unit.tag]
+        finally:
+            self.counts = saved_counts
+            self.density_cache = saved_cache
+        return clusters
@@ -0,0 +1,122 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.ids.effect_id import EffectId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.map.terrain import Terrain
+
+
+class DetectionHelper:
+    """Per-step bitmaps of where cloaked and burrowed units are detected, as [x, y] arrays.
+
+    friendly holds cells our detectors and scans (including scans just ordered) reveal, enemy
+    holds cells the enemy's detectors and scans reveal. Detection ranges are padded by
+    MN.DETECTION_UNIT_RADIUS so a lookup at a unit's position accounts for its size, and enemy
+    mobile detectors get extra room since they may be closer than last seen. Points are
+    floored to grid cells with Terrain.grid_indices, like VisibilityHelper and BotAI.is_visible,
+    so a cell is stamped when its center is in range.
+    """
+    SCAN_RADIUS = 13.0
+
+    bot: BotAI
+    friendly: np.ndarray = np.zeros((0, 0), dtype=bool)
+    enemy: np.ndarray = np.zeros((0, 0), dtype=bool)
+    # scans ordered but not showing up as effects yet
+    pending_scans: List[Tuple[Point2, float]] = []
+    updated_loop: int = -1
+
+    @staticmethod
+    def init(bot: BotAI):
+        DetectionHelper.bot = bot
+        shape = bot.state.visibility.data_numpy.T.shape
+        DetectionHelper.friendly = np.zeros(shape, dtype=bool)
+        DetectionHelper.enemy = np.zeros(shape, dtype=bool)
+        DetectionHelper.pending_scans = []
+        DetectionHelper.updated_loop = -1
+
+    @staticmethod
+    def update(enemy_units: Iterable[Unit], enemy_positions: Dict[int, Point2]):
+        """Rebuild both bitmaps. enemy_positions overrides positions of enemies out of view."""
+        bot = DetectionHelper.bot
+        if DetectionHelper.updated_loop == bot.state.game_loop:
+            return
+        DetectionHelper.updated_loop = bot.state.game_loop
+        DetectionHelper.friendly.fill(False)
+        DetectionHelper.enemy.fill(False)
+        padding = MN.DETECTION_UNIT_RADIUS
+
+        for unit in bot.all_own_units:
+            if unit.is_detector:
+                DetectionHelper.stamp(DetectionHelper.friendly, unit.position, unit.sight_range + padding)
+        for enemy in enemy_units:
+            if enemy.is_detector:
+                position = enemy_positions.get(enemy.tag, enemy.position) if enemy.age > 0 else enemy.position
+                bonus = 0.5 if enemy.is_structure else 1.5
+                DetectionHelper.stamp(DetectionHelper.enemy, position, enemy.sight_range + bonus + padding)
+        for effect in bot.state.effects:
+            if effect.id == EffectId.SCANNERSWEEP:
+                grid = DetectionHelper.friendly if effect.is_mine else DetectionHelper.enemy
+                for position in effect.positions:
+                    DetectionHelper.stamp(grid, position, DetectionHelper.SCAN_RADIUS + padding)
+        DetectionHelper.pending_scans = [(position, scan_time) for position, scan_time in DetectionHelper.pending_scans
+                                         if bot.time - scan_time < MN.SCAN_PENDING_SECONDS]
+        for position, _ in DetectionHelper.pending_scans:
+            DetectionHelper.stamp(DetectionHelper.friendly, position, DetectionHelper.SCAN_RADIUS + padding)
+
+    @staticmethod
+    def record_scan(position: Point2):
+        DetectionHelper.pending_scans.append((position, DetectionHelper.bot.time))
+        DetectionHelper.stamp(DetectionHelper.friendly, position, DetectionHelper.SCAN_RADIUS + MN.DETECTION_UNIT_RADIUS)
+
+    @staticmethod
+    def stamp(grid: np.ndarray, center: Point2, radius: float):
+        width, height = grid.shape
+        # cells whose centers (x + 0.5, y + 0.5) can be within radius
+        x_min, x_max = max(int(np.ceil(center.x - radius - 0.5)), 0), min(int(np.floor(center.x + radius - 0.5)) + 1, width)
+        y_min, y_max = max(int(np.ceil(center.y - radius - 0.5)), 0), min(int(np.floor(center.y + radius - 0.5)) + 1, height)
+        if x_min >= x_max or y_min >= y_max:
+            return
+        xs, ys = np.meshgrid(np.arange(x_min, x_max) + 0.5, np.arange(y_min, y_max) + 0.5, indexing="ij")
+        grid[x_min:x_max, y_min:y_max] |= (xs - center.x) ** 2 + (ys - center.y) ** 2 <= radius ** 2
+
+    @staticmethod
+    def detected_at(points, by_enemy: bool = False) -> np.ndarray:
+        """For each point, whether we detect it (or the enemy does if by_enemy)."""
+        grid = DetectionHelper.enemy if by_enemy else DetectionHelper.friendly
+        return grid[Terrain.grid_indices(points, grid.shape)]
+
+    @staticmethod
+    def is_detected(position: Point2, by_enemy: bool = False) -> bool:
+        return bool(DetectionHelper.detected_at([position], by_enemy)[0])
+
+    @staticmethod
+    def best_scan_position(targets: List[Point2]) -> Tuple[Point2 | None, int]:
+        """Scan center revealing the most targets we don't already detect, and how many it reveals.
+
+        Candidates are the targets themselves and the midpoints of pairs close enough to share a
+        scan; ties go to the candidate closest on average to the targets it reveals.
+        """
+        if not targets:
+            return None, 0
+        positions = np.array(targets, dtype=np.float64).reshape(-1, 2)
+        positions = positions[~DetectionHelper.detected_at(positions)]
+        if len(positions) == 0:
+            return None, 0
+        diameter_squared = (2 * DetectionHelper.SCAN_RADIUS) ** 2
+        firsts, seconds = np.triu_indices(len(positions), k=1)
+        pair_distances = np.sum((positions[firsts] - positions[seconds]) ** 2, axis=1)
+        close_pairs = pair_distances <= diameter_squared
+        midpoints = (positions[firsts[close_pairs]] + positions[seconds[close_pairs]]) / 2
+        candidates = np.vstack([positions, midpoints])
+
+        differences = candidates[:, None, :] - positions[None, :, :]
+        distances_squared = np.einsum("ijk,ijk->ij", differences, differences)
+        covered = distances_squared <= DetectionHelper.SCAN_RADIUS ** 2
+        gains = covered.sum(axis=1)
+        average_distance = np.where(covered, np.sqrt(distances_squared), 0).sum(axis=1) / np.maximum(gains, 1)
+        best = int(np.lexsort((average_distance, -gains))[0])
+        return Point2((float(candidates[best, 0]), float(candidates[best, 1]))), int(gains[best])
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from loguru import logger
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.position import Point2
+
+from bottato.map.map_cache import MapCache
+from bottato.mixins import timed
+
+
+class MineralGeometry:
+    """Speed mining target points for every mineral field on the map.
+
+    Mining points (where a worker queues the gather command) and dropoff points (where
+    it queues the return command) only depend on the map, so they are computed for all
+    expansions at once on start and cached per map name.
+    """
+    VERSION = 1
+    CACHE_SECTION = "mineral_geometry"
+    MINING_RADIUS = 1.325
+    # townhall radius plus a little extra, same as the speed mining return point
+    DROPOFF_DISTANCE = 2.75 * 1.08
+    # townhall must be this close to the expansion location for the cached points to apply
+    EXPANSION_TOLERANCE = 1.0
+
+    def __init__(self, bot: BotAI) -> None:
+        self.bot = bot
+        # keyed by rounded mineral position since tags change between games
+        self.expansion_by_mineral: Dict[Tuple[float, float], Point2] = {}
+        self.mining_positions: Dict[Tuple[float, float], Point2] = {}
+        self.dropoff_positions: Dict[Tuple[float, float], Point2] = {}
+
+    @staticmethod
+    def _key(position: Point2 | Tuple[float, float]) -> Tuple[float, float]:
+        return (round(position[0], 1), round(position[1], 1))
+
+    @timed
+    def init(self) -> None:
+        map_name = self.bot.game_info.map_name
+        cached = MapCache.load(self.CACHE_SECTION, map_name, self.VERSION)
+        if cached is not None:
+            self.load_entries(cached["entries"])
+            logger.info(f"loaded mineral geometry for {len(self.mining_positions)} minerals from cache")
+            return
+        entries = self.compute_entries()
+        self.load_entries(entries)
+        MapCache.save(self.CACHE_SECTION, map_name, self.VERSION, {"entries": entries})
+        logger.info(f"computed mineral geometry for {len(self.mining_positions)} minerals")
+
+    def load_entries(self, entries: List[Dict[str, List[float]]]) -> None:
+        for entry in entries:
+            key = self._key(entry["mineral"])
+            self.expansion_by_mineral[key] = Point2(entry["expansion"])
+            self.mining_positions[key] = Point2(entry["mining"])
+            self.dropoff_positions[key] = Point2(entry["dropoff"])
+
+    def compute_entries(self) -> List[Dict[str, List[float]]]:
+        entries: List[Dict[str, List[float]]] = []
+        for expansion, resources in self.bot.expansion_locations_dict.items():
+            minerals = [resource for resource in resources if resource.is_mineral_field]
+            if not minerals:
+                continue
+            mineral_positions = np.array([(m.position.x, m.position.y) for m in minerals])
+            townhall_position = np.array((expansion.x, expansion.y))
+            mining_positions = self.compute_mining_positions(mineral_positions, townhall_position, self.MINING_RADIUS)
+            dropoff_positions = self.compute_dropoff_positions(mining_positions, townhall_position, self.DROPOFF_DISTANCE)
+            for mineral, mining, dropoff in zip(mineral_positions, mining_positions, dropoff_positions):
+                entries.append({
+                    "mineral": mineral.tolist(),
+                    "expansion": [expansion.x, expansion.y],
+                    "mining": mining.tolist(),
+                    "dropoff": dropoff.tolist(),
+                })
+        return entries
+
+    @staticmethod
+    def compute_mining_positions(mineral_positions: np.ndarray, townhall_position: np.ndarray, radius: float) -> np.ndarray:
+        """Point on each mineral's mining circle facing the townhall.
+
+        If another mineral's circle covers that point, the worker would be blocked, so the
+        intersection of the two circles closest to the townhall is used instead.
+        """
+        offsets = townhall_position[None, :] - mineral_positions
+        lengths = np.linalg.norm(offsets, axis=1)
+        lengths[lengths == 0] = 1
+        targets = mineral_positions + offsets / lengths[:, None] * radius
+
+        target_to_mineral = targets[:, None, :] - mineral_positions[None, :, :]
+        blocked = (target_to_mineral ** 2).sum(axis=2) < radius ** 2
+        np.fill_diagonal(blocked, False)
+
+        between = mineral_positions[None, :, :] - mineral_positions[:, None, :]
+        separations = np.linalg.norm(between, axis=2)
+        half_chords_squared = radius ** 2 - (separations / 2) ** 2
+        blocked &= (separations > 0) & (half_chords_squared > 0)
+
+        for i in np.flatnonzero(blocked.any(axis=1)):
+            # the last blocking mineral wins, as when checking them one at a time
+            j = np.flatnonzero(blocked[i])[-1]
+            midpoint = (mineral_positions[i] + mineral_positions[j]) / 2
+            perpendicular = np.array((-between[i, j, 1], between[i, j, 0])) / separations[i, j]
+            half_chord = np.sqrt(half_chords_squared[i, j])
+            candidates = np.array((midpoint + perpendicular * half_chord, midpoint - perpendicular * half_chord))
+            distances = ((candidates - townhall_position) ** 2).sum(axis=1)
+            targets[i] = candidates[distances.argmin()]
+        return targets
+
+    @staticmethod
+    def compute_dropoff_positions(mining_positions: np.ndarray, townhall_position: np.ndarray, distance: float) -> np.ndarray:
+        offsets = mining_positions - townhall_position[None, :]
+        lengths = np.linalg.norm(offsets, axis=1)
+        lengths[lengths == 0] = 1
+        return townhall_position[None, :] + offsets / lengths[:, None] * distance
+
+    def _get_if_at_expansion(self, positions: Dict[Tuple[float, float], Point2], mineral_position: Point2, townhall_position: Point2) -> Point2 | None:
+        key = self._key(mineral_position)
+        expansion = self.expansion_by_mineral.get(key)
+        if expansion is None or expansion.distance_to(townhall_position) > self.EXPANSION_TOLERANCE:
+            return None
+        return positions[key]
+
+    def get_mining_position(self, mineral_position: Point2, townhall_position: Point2) -> Point2 | None:
+        return self._get_if_at_expansion(self.mining_positions, mineral_position, townhall_position)
+
+    def get_dropoff_position(self, mineral_position: Point2, townhall_position: Point2) -> Point2 | None:
+        return self._get_if_at_expansion(self.dropoff_positions, mineral_position, townhall_position)
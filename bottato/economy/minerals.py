@@ -10,6 +10,7 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.economy.mineral_geometry import MineralGeometry
 from bottato.economy.resources import (
     ResourceNode,
     Resources,
@@ -34,6 +35,7 @@ class Minerals(Resources, GeometryMixin):
     def __init__(self, bot: BotAI, map: Map) -> None:
         super().__init__(bot)
         self.map = map
+        self.geometry = MineralGeometry(bot)
 
         self.known_townhall_tags: List[int] = []
         self.max_workers_per_node = 2
@@ -98,6 +100,12 @@ class Minerals(Resources, GeometryMixin):
                 townhall_pos = townhall.position
             else:
                 townhall_pos = mineral_node.position.closest(self.bot.expansion_locations_list)
+            cached_target = self.geometry.get_mining_position(mineral_node.position, townhall_pos)
+            if cached_target is not None:
+                resource_node.mining_position = cached_target
+                resource_node.dropoff_position = self.geometry.get_dropoff_position(mineral_node.position, townhall_pos)
+                return
+            # townhall isn't at an expansion location, compute on the fly
             target = Point2(cy_towards(mineral_node.position, townhall_pos, self.MINING_RADIUS))
             close_minerals = cy_closer_than(self.bot.mineral_field, self.MINING_RADIUS, target)
             for close_mineral in close_minerals:
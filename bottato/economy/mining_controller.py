@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.ids.ability_id import AbilityId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bottato.economy.worker_assignment import WorkerAssignment
+from bottato.enemy import Enemy
+from bottato.enums import MiningPhase, Tactic, UnitMicroType
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.micro.base_unit_micro import BaseUnitMicro
+from bottato.mixins import timed, timed_async
+from bottato.tactics import Tactics
+from bottato.unit_types import UnitTypes
+
+
+class MiningController:
+    """Speed mining for all gathering workers in one pass.
+
+    Gather points and nodes are kept in arrays that are only rebuilt when assignments
+    change. Each step the boost window, dropoff and danger checks are evaluated for all
+    workers at once, and commands are only sent to workers that are in the boost window,
+    have changed trip phase or have gone idle.
+    """
+    TOWNHALL_RADIUS: float = 2.75
+    DISTANCE_TO_TOWNHALL_FACTOR: float = 1.08
+    DROPOFF_MAX_DISTANCE_SQ: float = 225
+    MINERAL_BOOST_WINDOW = (0.5625, 4.0)
+    VESPENE_BOOST_WINDOW = (0.01, 0.25)
+    # same buffer BaseUnitMicro._retreat uses when looking for threats
+    THREAT_RANGE_BUFFER: float = 4
+
+    def __init__(self, bot: BotAI, tactics: Tactics, worker_micro: BaseUnitMicro) -> None:
+        self.bot = bot
+        self.tactics = tactics
+        self.enemy: Enemy = tactics.enemy
+        self.worker_micro = worker_micro
+
+        self.tags: List[int] = []
+        self.node_tags = np.zeros(0, dtype=np.int64)
+        self.gather_points = np.zeros((0, 2))
+        self.is_mineral = np.zeros(0, dtype=bool)
+        # last observed trip phase, used to detect returning -> gathering transitions
+        self.phases = np.zeros(0, dtype=np.int8)
+
+    def sync(self, assignments: List[WorkerAssignment]) -> None:
+        """Rebuild the arrays if the workers, their nodes or gather points have changed."""
+        if len(assignments) == len(self.tags):
+            for row, assignment in enumerate(assignments):
+                node_tag = assignment.target.tag if assignment.target else 0
+                if self.tags[row] != assignment.unit.tag or self.node_tags[row] != node_tag:
+                    break
+                gather_point = assignment.gather_position
+                if gather_point is None:
+                    if not np.isnan(self.gather_points[row, 0]):
+                        break
+                elif self.gather_points[row, 0] != gather_point.x or self.gather_points[row, 1] != gather_point.y:
+                    break
+            else:
+                return
+
+        previous_phases: Dict[int, int] = dict(zip(self.tags, self.phases))
+        previous_nodes: Dict[int, int] = dict(zip(self.tags, self.node_tags))
+        count = len(assignments)
+        self.tags = [assignment.unit.tag for assignment in assignments]
+        self.node_tags = np.zeros(count, dtype=np.int64)
+        self.gather_points = np.full((count, 2), np.nan)
+        self.is_mineral = np.zeros(count, dtype=bool)
+        self.phases = np.zeros(count, dtype=np.int8)
+        for row, assignment in enumerate(assignments):
+            target = assignment.target
+            if target is not None:
+                self.node_tags[row] = target.tag
+                self.is_mineral[row] = target.is_mineral_field
+            if assignment.gather_position is not None:
+                self.gather_points[row] = (assignment.gather_position.x, assignment.gather_position.y)
+            tag = assignment.unit.tag
+            if previous_nodes.get(tag) == self.node_tags[row]:
+                self.phases[row] = previous_phases[tag]
+
+    @timed_async
+    async def speed_mine(self, assignments: List[WorkerAssignment]) -> None:
+        if not assignments:
+            return
+        self.sync(assignments)
+        units: List[Unit] = [assignment.unit for assignment in assignments]
+        count = len(units)
+
+        unit_state = np.array([
+            (unit.position.x, unit.position.y, len(unit.orders), unit.is_returning, unit.is_carrying_resource,
+             unit.is_idle, unit.is_moving, unit.is_constructing_scv, unit.health_percentage)
+            for unit in units
+        ], dtype=float)
+        positions = unit_state[:, 0:2]
+        order_counts = unit_state[:, 2]
+        is_returning = unit_state[:, 3] > 0
+        is_carrying = unit_state[:, 4] > 0
+        is_idle = unit_state[:, 5] > 0
+        is_moving = unit_state[:, 6] > 0
+        is_constructing = unit_state[:, 7] > 0
+        health_percentages = unit_state[:, 8]
+
+        active = np.ones(count, dtype=bool)
+        for row in np.flatnonzero(self.get_rows_to_check_for_retreat(units, positions, health_percentages)):
+            retreat_result = self.worker_micro._retreat(
+                units[row], MN.WORKER_SPEED_MINE_RETREAT_HEALTH_PERCENT_THRESHOLD)
+            if retreat_result != UnitMicroType.NONE:
+                active[row] = False
+
+        # a worker with 2 orders is already speed mining
+        active &= order_counts != 2
+        for row in np.flatnonzero(active & is_constructing):
+            units[row](AbilityId.HALT)
+        active &= ~is_constructing
+
+        heading_home = is_returning | is_carrying
+        current_phases = np.where(heading_home, MiningPhase.RETURN.value, MiningPhase.GATHER.value).astype(np.int8)
+        phase_changed = current_phases != self.phases
+        self.phases = current_phases
+
+        return_rows = active & heading_home & (order_counts < 2)
+        self.issue_return_commands(assignments, units, positions, is_returning, return_rows)
+
+        has_gather_point = ~np.isnan(self.gather_points[:, 0]) & (self.node_tags != 0)
+        gather_rows = active & ~heading_home & (order_counts < 2) & has_gather_point
+        self.issue_gather_commands(assignments, units, positions, is_idle, phase_changed, gather_rows)
+
+        # on rare occasion above conditions don't hit and worker goes idle
+        fallback_rows = active & ~return_rows & ~gather_rows & (is_idle | ~is_moving)
+        for row in np.flatnonzero(fallback_rows):
+            if units[row].is_carrying_resource:
+                units[row].return_resource()
+            elif assignments[row].target:
+                units[row].gather(assignments[row].target)
+
+    def get_rows_to_check_for_retreat(self, units: List[Unit], positions: np.ndarray, health_percentages: np.ndarray) -> np.ndarray:
+        """Workers that could get a retreat command. Conservative, everything else would return UnitMicroType.NONE."""
+        if self.tactics.is_active(Tactic.WORKER_RUSH_DEFENCE):
+            return np.zeros(len(units), dtype=bool)
+        needs_check = health_percentages < MN.WORKER_SPEED_MINE_RETREAT_HEALTH_PERCENT_THRESHOLD
+        threat_positions = []
+        threat_ranges = []
+        for enemy_unit in self.enemy.get_recent_enemies():
+            ground_range = UnitTypes.ground_range(enemy_unit)
+            if ground_range == 0:
+                continue
+            position = enemy_unit.position if enemy_unit.age == 0 \
+                else self.enemy.predicted_positions.get(enemy_unit.tag, enemy_unit.position)
+            threat_positions.append((position.x, position.y))
+            # worker radius is 0.375, round up
+            threat_ranges.append(ground_range + enemy_unit.radius + 0.5 + self.THREAT_RANGE_BUFFER)
+        if threat_positions:
+            enemy_positions = np.array(threat_positions)
+            ranges_squared = np.array(threat_ranges) ** 2
+            distances_squared = ((positions[:, None, :] - enemy_positions[None, :, :]) ** 2).sum(axis=2)
+            needs_check |= (distances_squared <= ranges_squared[None, :]).any(axis=1)
+        return needs_check
+
+    @timed
+    def issue_return_commands(self, assignments: List[WorkerAssignment], units: List[Unit], positions: np.ndarray,
+                              is_returning: np.ndarray, rows: np.ndarray) -> None:
+        row_indices = np.flatnonzero(rows)
+        if row_indices.size == 0:
+            return
+        townhalls = self.bot.townhalls.ready.filter(lambda th: not th.is_flying)
+        townhall_positions = np.array([(th.position.x, th.position.y) for th in townhalls]) if townhalls else np.zeros((0, 2))
+
+        dropoff_positions = np.full((row_indices.size, 2), np.nan)
+        cached_return_points = np.full((row_indices.size, 2), np.nan)
+        dropoff_targets: List[Unit | None] = [None] * row_indices.size
+        for i, row in enumerate(row_indices):
+            assignment = assignments[row]
+            if assignment.dropoff_position is not None:
+                cached_return_points[i] = (assignment.dropoff_position.x, assignment.dropoff_position.y)
+            if assignment.dropoff_target and assignment.dropoff_target.is_flying:
+                # can't dropoff to a flying cc
+                assignment.dropoff_target = None
+            if assignment.dropoff_target is not None:
+                dropoff_targets[i] = assignment.dropoff_target
+                dropoff_positions[i] = (assignment.dropoff_target.position.x, assignment.dropoff_target.position.y)
+
+        missing = np.isnan(dropoff_positions[:, 0])
+        if missing.any() and townhall_positions.shape[0] > 0:
+            missing_indices = np.flatnonzero(missing)
+            worker_positions = positions[row_indices[missing_indices]]
+            distances_squared = ((worker_positions[:, None, :] - townhall_positions[None, :, :]) ** 2).sum(axis=2)
+            closest = distances_squared.argmin(axis=1)
+            in_range = distances_squared[np.arange(closest.size), closest] < self.DROPOFF_MAX_DISTANCE_SQ
+            for i, townhall_index, is_close in zip(missing_indices, closest, in_range):
+                if is_close:
+                    townhall = townhalls[int(townhall_index)]
+                    assignments[row_indices[i]].dropoff_target = townhall
+                    dropoff_targets[i] = townhall
+                    dropoff_positions[i] = townhall_positions[townhall_index]
+
+        has_dropoff = ~np.isnan(dropoff_positions[:, 0])
+        worker_positions = positions[row_indices]
+        offsets = worker_positions - dropoff_positions
+        lengths = np.linalg.norm(offsets, axis=1)
+        lengths[lengths == 0] = 1
+        boost_distance = self.TOWNHALL_RADIUS * self.DISTANCE_TO_TOWNHALL_FACTOR
+        return_points = dropoff_positions + offsets / lengths[:, None] * boost_distance
+        # precomputed return points are only valid for a townhall at the node's expansion
+        cached_distances = np.linalg.norm(cached_return_points - dropoff_positions, axis=1)
+        use_cached = np.abs(cached_distances - boost_distance) < 0.1
+        return_points[use_cached] = cached_return_points[use_cached]
+        distances_squared = ((worker_positions - return_points) ** 2).sum(axis=1)
+        in_window = has_dropoff & (distances_squared > self.MINERAL_BOOST_WINDOW[0]) & (distances_squared < self.MINERAL_BOOST_WINDOW[1])
+
+        for i, row in enumerate(row_indices):
+            if not has_dropoff[i]:
+                continue
+            worker = units[row]
+            if in_window[i]:
+                worker.move(Point2(return_points[i]))
+                worker(AbilityId.SMART, dropoff_targets[i], True)
+            elif not is_returning[row]:
+                # not at right distance to get boost command, but doesn't have return resource command for some reason
+                worker(AbilityId.SMART, dropoff_targets[i])
+
+    @timed
+    def issue_gather_commands(self, assignments: List[WorkerAssignment], units: List[Unit], positions: np.ndarray,
+                              is_idle: np.ndarray, phase_changed: np.ndarray, rows: np.ndarray) -> None:
+        row_indices = np.flatnonzero(rows)
+        if row_indices.size == 0:
+            return
+        distances_squared = ((positions[row_indices] - self.gather_points[row_indices]) ** 2).sum(axis=1)
+        is_mineral = self.is_mineral[row_indices]
+        min_distances = np.where(is_mineral, self.MINERAL_BOOST_WINDOW[0], self.VESPENE_BOOST_WINDOW[0])
+        max_distances = np.where(is_mineral, self.MINERAL_BOOST_WINDOW[1], self.VESPENE_BOOST_WINDOW[1])
+        in_window = ((distances_squared > min_distances) & (distances_squared < max_distances)) | is_idle[row_indices]
+
+        for i, row in enumerate(row_indices):
+            worker = units[row]
+            target = assignments[row].target
+            if target is None:
+                continue
+            if in_window[i]:
+                worker.move(Point2(self.gather_points[row]))
+                worker(AbilityId.SMART, target, True)
+            elif phase_changed[row] and worker.orders:
+                # only inspect orders when the trip phase changes, otherwise the worker is still on its last command
+                first_order = worker.orders[0]
+                if first_order.ability.id != AbilityId.HARVEST_GATHER or first_order.target != target.tag:
+                    worker(AbilityId.SMART, target)
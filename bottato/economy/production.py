@@ -139,6 +139,68 @@ class Facility():
                 return True
         return False
 
+class FacilityIndex():
+    """Production facilities bucketed by (builder type, add-on type) and availability.
+
+    Available means not flying and with free capacity. Bucket capacity totals and idle
+    counts are kept alongside, so capacity and readiness questions don't iterate every
+    facility. Production calls refresh() whenever something that affects a facility's
+    bucket changes: orders updated, add-on attached or lost, unit queued or dequeued.
+    """
+    FLYING_TYPES = (UnitTypeId.BARRACKSFLYING, UnitTypeId.FACTORYFLYING, UnitTypeId.STARPORTFLYING)
+
+    def __init__(self) -> None:
+        self.available: Dict[Tuple[UnitTypeId, UnitTypeId], Dict[int, Facility]] = {}
+        self.busy: Dict[Tuple[UnitTypeId, UnitTypeId], Dict[int, Facility]] = {}
+        self.capacity: Dict[Tuple[UnitTypeId, UnitTypeId], int] = {}
+        self.idle_counts: Dict[Tuple[UnitTypeId, UnitTypeId], int] = {}
+        # facility id -> (bucket key, is available, capacity contributed, is idle)
+        self.entries: Dict[int, Tuple[Tuple[UnitTypeId, UnitTypeId], bool, int, bool]] = {}
+
+    @staticmethod
+    def is_flying(facility: Facility) -> bool:
+        # somehow is_flying isn't sufficient, also check type_id
+        return facility.unit.is_flying or facility.unit.type_id in FacilityIndex.FLYING_TYPES
+
+    def remove(self, facility: Facility) -> None:
+        entry = self.entries.pop(id(facility), None)
+        if entry is None:
+            return
+        key, is_available, capacity, is_idle = entry
+        bucket = self.available if is_available else self.busy
+        bucket[key].pop(id(facility), None)
+        self.capacity[key] -= capacity
+        self.idle_counts[key] -= int(is_idle)
+
+    def refresh(self, facility: Facility, builder_type: UnitTypeId) -> None:
+        self.remove(facility)
+        key = (builder_type, facility.add_on_type)
+        capacity = facility.get_available_capacity()
+        flying = self.is_flying(facility)
+        is_available = capacity > 0 and not flying
+        is_idle = facility.unit.is_idle and not facility.unit.is_flying
+        bucket = self.available if is_available else self.busy
+        bucket.setdefault(key, {})[id(facility)] = facility
+        self.capacity[key] = self.capacity.get(key, 0) + capacity
+        self.idle_counts[key] = self.idle_counts.get(key, 0) + int(is_idle)
+        self.entries[id(facility)] = (key, is_available, capacity, is_idle)
+
+    def get_available(self, builder_type: UnitTypeId, add_on_type: UnitTypeId) -> List[Facility]:
+        return list(self.available.get((builder_type, add_on_type), {}).values())
+
+    def get_busy(self, builder_type: UnitTypeId, add_on_type: UnitTypeId) -> List[Facility]:
+        return list(self.busy.get((builder_type, add_on_type), {}).values())
+
+    def has_available(self, builder_type: UnitTypeId, add_on_type: UnitTypeId) -> bool:
+        return len(self.available.get((builder_type, add_on_type), {})) > 0
+
+    def get_capacity(self, builder_type: UnitTypeId, add_on_type: UnitTypeId) -> int:
+        return self.capacity.get((builder_type, add_on_type), 0)
+
+    def get_idle_count(self, builder_type: UnitTypeId, add_on_type: UnitTypeId) -> int:
+        return self.idle_counts.get((builder_type, add_on_type), 0)
+
+
 class Production():
     def __init__(self, bot: BotAI, tactics: Tactics) -> None:
         self.bot = bot
@@ -193,10 +255,16 @@ class Production():
             },
         }
         self.townhall_tags_with_new_work_this_step: List[int] = []
+        self.facility_index = FacilityIndex()
+        self.structures_by_type: Dict[UnitTypeId, List[Unit]] = {}
+        self.builder_types: Dict[UnitTypeId | UpgradeId, Set[UnitTypeId]] = {}
 
     @timed_async
     async def update_references(self) -> None:
-        for facility_type in self.facilities.values():
+        self.structures_by_type.clear()
+        for structure in self.bot.structures:
+            self.structures_by_type.setdefault(structure.type_id, []).append(structure)
+        for builder_type, facility_type in self.facilities.items():
             for addon_type in facility_type.values():
                 facility: Facility
                 for facility in addon_type:
@@ -204,6 +272,7 @@ class Production():
                         await facility.update_references()
                     except UnitReferenceHelper.UnitNotFound:
                         addon_type.remove(facility)
+                        self.facility_index.remove(facility)
                     if facility.unit.has_add_on and facility.add_on_type == UnitTypeId.NOTAUNIT:
                         # check if existing add-on was connected (newly built is handled through add_builder)
                         add_on_unit = self.bot.structures.find_by_tag(facility.unit.add_on_tag)
@@ -224,8 +293,19 @@ class Production():
                         facility.set_add_on_type(UnitTypeId.NOTAUNIT)
                     if self.bot.supply_left == 0:
                         facility.queued_unit_ids.clear()
+                    if id(facility) in self.facility_index.entries:
+                        self.facility_index.refresh(facility, builder_type)
         self.townhall_tags_with_new_work_this_step.clear()
 
+    def add_queued_unit(self, facility: Facility, unit_type: UnitTypeId) -> None:
+        facility.add_queued_unit_id(unit_type)
+        self.refresh_facility(facility)
+
+    def refresh_facility(self, facility: Facility) -> None:
+        entry = self.facility_index.entries.get(id(facility))
+        if entry is not None:
+            self.facility_index.refresh(facility, entry[0][0])
+
     def remove_type_from_facilty_queue(self, facility_unit: Unit, queued_type: UnitTypeId) -> None:
         if facility_unit.type_id in self.facilities.keys():
             for addon_type in self.facilities[facility_unit.type_id]:
@@ -233,6 +313,7 @@ class Production():
                 for facility in self.facilities[facility_unit.type_id][addon_type]:
                     if facility.unit.tag == facility_unit.tag:
                         facility.remove_queued_unit_id(queued_type)
+                        self.refresh_facility(facility)
                         return
 
     def get_builder(self, unit_type: UnitTypeId) -> Facility | None:
@@ -247,12 +328,10 @@ class Production():
             usable_add_ons = [UnitTypeId.REACTOR, UnitTypeId.NOTAUNIT, UnitTypeId.TECHLAB]
 
         for add_on_type in usable_add_ons:
-            candidates: List[Facility] = self.facilities[builder_type][add_on_type]
+            # only facilities that are landed and have free capacity
+            candidates: List[Facility] = self.facility_index.get_available(builder_type, add_on_type)
             logger.debug(f"{add_on_type} facilities {candidates}")
             for candidate in candidates:
-                # somehow is_flying isn't sufficient, also check type_id
-                if candidate.unit.is_flying or candidate.unit.type_id in (UnitTypeId.BARRACKSFLYING, UnitTypeId.FACTORYFLYING, UnitTypeId.STARPORTFLYING):
-                    continue
                 if unit_type in self.add_on_types:
                     if candidate.unit == self.tactics.proxy_barracks:
                         # don't build addon on proxy barracks
@@ -266,10 +345,7 @@ class Production():
                         LogHelper.add_log(f"can't build {unit_type} at {candidate} - under attack")
                         continue
 
-                if candidate.has_capacity:
-                    return candidate
-                else:
-                    LogHelper.add_log(f"candidate {candidate.unit} has no capacity - orders: {len(candidate.unit.orders)}, queued: {len(candidate.queued_unit_ids)}, capacity: {candidate.capacity}")
+                return candidate
 
         return None
 
@@ -277,11 +353,9 @@ class Production():
         research_structure_type: UnitTypeId = UPGRADE_RESEARCHED_FROM[upgrade_id]
 
         structure: Unit
-        for structure in self.bot.structures:
+        for structure in self.structures_by_type.get(research_structure_type, []):
             if (
-                # Structure can research this upgrade
-                structure.type_id == research_structure_type
-                and structure.is_ready
+                structure.is_ready
                 # If structure hasn't received an action/order this frame
                 and structure.tag not in self.bot.unit_tags_received_action
                 # Structure is idle
@@ -290,7 +364,12 @@ class Production():
                 return structure
         return None
 
-    def get_builder_type(self, unit_type_id: UnitTypeId | UpgradeId):
+    def get_builder_type(self, unit_type_id: UnitTypeId | UpgradeId) -> Set[UnitTypeId]:
+        if unit_type_id not in self.builder_types:
+            self.builder_types[unit_type_id] = self.find_builder_type(unit_type_id)
+        return self.builder_types[unit_type_id]
+
+    def find_builder_type(self, unit_type_id: UnitTypeId | UpgradeId) -> Set[UnitTypeId]:
         if isinstance(unit_type_id, UpgradeId):
             return {UPGRADE_RESEARCHED_FROM[unit_type_id]}
         if unit_type_id in {
@@ -331,28 +410,21 @@ class Production():
         return list(self.get_builder_type(unit_type_id))[0]
 
     def get_build_capacity(self, builder_type: UnitTypeId, tech_lab_required: bool = False, tech_lab_excluded: bool = False) -> int:
-        capacity = 0
         if tech_lab_required:
-            for facility in self.facilities[builder_type][UnitTypeId.TECHLAB]:
-                capacity += facility.get_available_capacity()
-        else:
-            for addon_type, addon_facilities in self.facilities[builder_type].items():
-                if tech_lab_excluded and addon_type == UnitTypeId.TECHLAB:
-                    continue
-                for facility in addon_facilities:
-                    capacity += facility.get_available_capacity()
+            return self.facility_index.get_capacity(builder_type, UnitTypeId.TECHLAB)
+        capacity = 0
+        for addon_type in self.facilities[builder_type]:
+            if tech_lab_excluded and addon_type == UnitTypeId.TECHLAB:
+                continue
+            capacity += self.facility_index.get_capacity(builder_type, addon_type)
         return capacity
     
     def get_idle_production_counts(self) -> Dict[UnitTypeId, Dict[UnitTypeId, int]]:
         idle_counts: Dict[UnitTypeId, Dict[UnitTypeId, int]] = {}
         for builder_type, addon_dict in self.facilities.items():
             idle_counts[builder_type] = {}
-            for addon_type, facilities in addon_dict.items():
-                idle_count = 0
-                for facility in facilities:
-                    if facility.unit.is_idle and not facility.unit.is_flying:
-                        idle_count += 1
-                idle_counts[builder_type][addon_type] = idle_count
+            for addon_type in addon_dict:
+                idle_counts[builder_type][addon_type] = self.facility_index.get_idle_count(builder_type, addon_type)
         return idle_counts
     
     def can_build_any(self, unit_types: List[UnitTypeId | UpgradeId]) -> bool:
@@ -399,19 +471,17 @@ class Production():
             else:
                 addon_types = [UnitTypeId.REACTOR, UnitTypeId.NOTAUNIT, UnitTypeId.TECHLAB]
             for addon_type in addon_types:
-                facilities = self.facilities.get(builder_type, {}).get(addon_type, [])
-                
-                for facility in facilities:                        
+                # Facility has available capacity
+                if self.facility_index.has_available(builder_type, addon_type):
+                    max_readiness = 1.0
+                    break
+
+                for facility in self.facility_index.get_busy(builder_type, addon_type):
                     # Facility is flying (moving to new position)
-                    if facility.unit.is_flying:
+                    if FacilityIndex.is_flying(facility):
                         max_readiness = max(max_readiness, 0.8)
                         continue
                     
-                    # Facility has available capacity
-                    if facility.has_capacity:
-                        max_readiness = 1.0
-                        break
-                    
                     # Facility is busy but has orders - estimate progress
                     max_orders = 2 if addon_type == UnitTypeId.REACTOR else 1
                     num_orders = len(facility.unit.orders)
@@ -450,12 +520,9 @@ class Production():
             },
         }
         for builder_type in self.facilities.keys():
-            for facility in self.facilities[builder_type][UnitTypeId.TECHLAB]:
-                production_capacity[builder_type]["tech"] += facility.get_available_capacity()
-            for facility in self.facilities[builder_type][UnitTypeId.NOTAUNIT]:
-                production_capacity[builder_type]["normal"] += facility.get_available_capacity()
-            for facility in self.facilities[builder_type][UnitTypeId.REACTOR]:
-                production_capacity[builder_type]["normal"] += facility.get_available_capacity()
+            production_capacity[builder_type]["tech"] = self.facility_index.get_capacity(builder_type, UnitTypeId.TECHLAB)
+            production_capacity[builder_type]["normal"] = self.facility_index.get_capacity(builder_type, UnitTypeId.NOTAUNIT) \
+                + self.facility_index.get_capacity(builder_type, UnitTypeId.REACTOR)
 
         remaining_resources: Cost = Cost(self.bot.minerals, self.bot.vespene)
         upgraded_facility_tags = {
@@ -526,6 +593,7 @@ class Production():
             if unit.type_id in [UnitTypeId.BARRACKS, UnitTypeId.FACTORY, UnitTypeId.STARPORT]:
                 new_facility = Facility(self.bot, unit)
                 self.facilities[facility_type][UnitTypeId.NOTAUNIT].append(new_facility)
+                self.facility_index.refresh(new_facility, facility_type)
                 logger.debug(f"added {unit} to {facility_type}-NOTAUNIT, total facilities: {len(self.facilities[facility_type][UnitTypeId.NOTAUNIT])}")
             else:
                 facility: Facility
@@ -543,6 +611,7 @@ class Production():
                         self.facilities[facility_type][generic_type].append(facility)
                         self.facilities[facility_type][UnitTypeId.NOTAUNIT].remove(facility)
                         facility.set_add_on_type(generic_type)
+                        self.facility_index.refresh(facility, facility_type)
                         logger.debug(f"adding to {facility_type}-{generic_type}")
 
     def build_order_with_prereqs(self, unit_type: UnitTypeId | UpgradeId) -> List[UnitTypeId | UpgradeId]:
@@ -26,14 +26,18 @@ class ResourceNode():
         self.worker_tags: Set[int] = set()
         self.mule_tag: int | None = None
         self.mining_position: Point2 | None = None
+        self.dropoff_position: Point2 | None = None
 
-    def needed_workers(self):
+    def worker_capacity(self) -> int:
         if self.is_long_distance:
             # put more workers on long distance nodes to compensate for travel time
-            return MN.WORKERS_PER_LONG_DISTANCE_NODE - len(self.worker_tags)
+            return MN.WORKERS_PER_LONG_DISTANCE_NODE
         if not self.node.is_mineral_field and self.node.vespene_contents == 0:
-            return 0
-        return self.max_workers - len(self.worker_tags)
+            return len(self.worker_tags)
+        return self.max_workers
+
+    def needed_workers(self):
+        return self.worker_capacity() - len(self.worker_tags)
     
     def remove_extra_workers(self) -> Set[int]:
         removed_workers = set()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from bottato.economy.resources import ResourceNode, Resources
+from bottato.economy.worker_assignment import WorkerAssignment
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.mixins import timed
+
+
+class WorkerAssignmentSolver:
+    """Min-cost matching of gathering workers to resource nodes.
+
+    Each node is expanded into one column per worker it can take, so a single
+    linear_sum_assignment call respects the saturation cap of every node. Workers get a
+    discount on their current node so that a move has to save a meaningful walk before it
+    is made. The matching only runs when saturation changes (nodes added or depleted,
+    workers added, lost or pinned) instead of every step, plus every
+    MN.WORKER_ASSIGNMENT_RESOLVE_SECONDS so moves that were skipped get another try.
+    """
+    def __init__(self) -> None:
+        self.last_signatures: dict[str, Tuple] = {}
+        self.last_solve_times: dict[str, float] = {}
+
+    @staticmethod
+    def get_signature(resources: Resources, assignments: List[WorkerAssignment], pinned_tags: set[int]) -> Tuple:
+        node_caps = tuple(sorted((node.node.tag, node.worker_capacity(), node.is_long_distance) for node in resources.nodes))
+        worker_tags = tuple(sorted(assignment.unit.tag for assignment in assignments))
+        return (node_caps, worker_tags, tuple(sorted(pinned_tags)))
+
+    def saturation_changed(self, key: str, resources: Resources, assignments: List[WorkerAssignment],
+                           pinned_tags: set[int], time: float) -> bool:
+        if time - self.last_solve_times.get(key, -float("inf")) >= MN.WORKER_ASSIGNMENT_RESOLVE_SECONDS:
+            return True
+        return self.last_signatures.get(key) != self.get_signature(resources, assignments, pinned_tags)
+
+    def record_solve(self, key: str, resources: Resources, assignments: List[WorkerAssignment],
+                     pinned_tags: set[int], time: float) -> None:
+        """Call once the moves from a solve have been issued."""
+        self.last_signatures[key] = self.get_signature(resources, assignments, pinned_tags)
+        self.last_solve_times[key] = time
+
+    @staticmethod
+    def solve(worker_positions: np.ndarray,
+              current_nodes: np.ndarray,
+              node_positions: np.ndarray,
+              node_capacities: np.ndarray,
+              node_penalties: np.ndarray,
+              hysteresis: float) -> np.ndarray:
+        """Returns the node index for each worker, -1 for workers left without a node.
+
+        worker_positions: (n, 2), current_nodes: (n,) node index or -1,
+        node_positions: (m, 2), node_capacities: (m,) open slots per node,
+        node_penalties: (m,) extra cost for using a node (e.g. long distance mining)
+        """
+        worker_count = worker_positions.shape[0]
+        result = np.full(worker_count, -1, dtype=np.int64)
+        capacities = np.maximum(node_capacities.astype(np.int64), 0)
+        if worker_count == 0 or capacities.sum() == 0:
+            return result
+
+        slot_nodes = np.repeat(np.arange(node_positions.shape[0]), capacities)
+        offsets = worker_positions[:, None, :] - node_positions[None, slot_nodes, :]
+        costs = np.sqrt((offsets ** 2).sum(axis=2)) + node_penalties[slot_nodes][None, :]
+        costs -= hysteresis * (current_nodes[:, None] == slot_nodes[None, :])
+
+        worker_rows, slot_columns = linear_sum_assignment(costs)
+        result[worker_rows] = slot_nodes[slot_columns]
+        return result
+
+    @timed
+    def get_moves(self, resources: Resources, assignments: List[WorkerAssignment], pinned_tags: set[int]) -> List[Tuple[WorkerAssignment, ResourceNode]]:
+        """Assignments that should move to a different node. Pinned workers keep their node and use up its capacity."""
+        nodes = resources.nodes
+        if not nodes:
+            return []
+        node_index_by_tag = {node.node.tag: i for i, node in enumerate(nodes)}
+        capacities = np.array([node.worker_capacity() for node in nodes], dtype=np.int64)
+        movable: List[WorkerAssignment] = []
+        for assignment in assignments:
+            current_index = node_index_by_tag.get(assignment.target.tag, -1) if assignment.target else -1
+            if assignment.unit.tag in pinned_tags:
+                if current_index >= 0:
+                    capacities[current_index] -= 1
+            else:
+                movable.append(assignment)
+        if not movable:
+            return []
+
+        worker_positions = np.array([(a.unit.position.x, a.unit.position.y) for a in movable])
+        current_nodes = np.array([
+            node_index_by_tag.get(a.target.tag, -1) if a.target else -1 for a in movable
+        ], dtype=np.int64)
+        node_positions = np.array([(node.node.position.x, node.node.position.y) for node in nodes])
+        node_penalties = np.array([
+            MN.WORKER_ASSIGNMENT_LONG_DISTANCE_PENALTY if node.is_long_distance else 0.0 for node in nodes
+        ])
+
+        solution = self.solve(worker_positions, current_nodes, node_positions, capacities, node_penalties,
+                              MN.WORKER_ASSIGNMENT_HYSTERESIS)
+        return [
+            (assignment, nodes[node_index])
+            for assignment, current_index, node_index in zip(movable, current_nodes, solution)
+            if node_index >= 0 and node_index != current_index
+        ]
@@ -19,9 +19,11 @@ from sc2.unit import Unit
 from sc2.units import Units
 
 from bottato.economy.minerals import Minerals
+from bottato.economy.mining_controller import MiningController
 from bottato.economy.resources import ResourceNode, Resources
 from bottato.economy.vespene import Vespene
 from bottato.economy.worker_assignment import WorkerAssignment
+from bottato.economy.worker_assignment_solver import WorkerAssignmentSolver
 from bottato.enums import BuildType, Tactic, UnitMicroType, WorkerJobType
 from bottato.log_helper import LogHelper
 from bottato.magic_numbers import MagicNumbers as MN
@@ -54,10 +56,12 @@ class Workers(GeometryMixin):
         }
         self.minerals = Minerals(bot, self.map)
         self.vespene = Vespene(bot)
+        self.assignment_solver = WorkerAssignmentSolver()
         for worker in self.bot.workers:
             self.add_worker(worker)
         self.aged_mules: Units = Units([], bot)
         self.worker_micro: BaseUnitMicro = MicroFactory.get_unit_micro(self.bot.workers.first)
+        self.mining_controller = MiningController(bot, tactics, self.worker_micro)
         self.units_to_attack: Set[Unit] = set()
         self.completed_construction_worker_tags: Dict[int, float] = {}
         self.mineral_walk_targets = self.get_mineral_walk_targets()
@@ -110,6 +114,9 @@ class Workers(GeometryMixin):
                 if resource_node:
                     assignment.target = resource_node.node
                     assignment.target_position = resource_node.node.position
+                    if assignment.dropoff_position is None:
+                        # precomputed return point from the mineral geometry, if the node has one
+                        assignment.dropoff_position = resource_node.dropoff_position
                 else:
                     assignment.target = None
                     assignment.target_position = None
@@ -188,30 +195,26 @@ class Workers(GeometryMixin):
 
     @timed_async
     async def speed_mine(self):
-        assignment: WorkerAssignment
-        for assignment in self.assignments_by_worker.values():
-            if assignment.on_attack_break \
-                    or not assignment.unit_available \
-                    or assignment.job_type not in [WorkerJobType.MINERALS, WorkerJobType.VESPENE] \
-                    or await self.worker_micro._retreat(assignment.unit,
-                                                        MN.WORKER_SPEED_MINE_RETREAT_HEALTH_PERCENT_THRESHOLD) != UnitMicroType.NONE:
-                continue
-
-            if not self.bot.townhalls.ready:
-                LogHelper.add_log(
-                    f"{self.bot.time_formatted} Attempting to speed mine with no townhalls"
-                )
-                break
+        if not self.bot.townhalls.ready:
+            LogHelper.add_log(
+                f"{self.bot.time_formatted} Attempting to speed mine with no townhalls"
+            )
+            return
 
-            if not self.bot.mineral_field:
-                logger.warning(
-                    f"{self.bot.time_formatted} Attempting to speed mine with no mineral fields"
-                )
-                break
+        if not self.bot.mineral_field:
+            logger.warning(
+                f"{self.bot.time_formatted} Attempting to speed mine with no mineral fields"
+            )
+            return
 
-            # self.bottato_speed_mine(assignment)
-            self.ares_speed_mine(assignment)
-            # self.sharpy_speed_mine(assignment)
+        mining_assignments: List[WorkerAssignment] = [
+            assignment for assignment in self.assignments_by_worker.values()
+            if not assignment.on_attack_break
+            and assignment.unit_available
+            and assignment.job_type in [WorkerJobType.MINERALS, WorkerJobType.VESPENE]
+        ]
+        # per-worker alternatives: self.ares_speed_mine, self.bottato_speed_mine, self.sharpy_speed_mine
+        await self.mining_controller.speed_mine(mining_assignments)
 
     def sharpy_speed_mine(self, assignment: WorkerAssignment) -> None:
         worker = assignment.unit
@@ -1356,8 +1359,7 @@ class Workers(GeometryMixin):
             WorkerJobType.SCOUT,
             WorkerJobType.BUILD,
             WorkerJobType.REPAIR,
-            WorkerJobType.VESPENE,
-            WorkerJobType.MINERALS,
+            # gatherers are matched to nodes by rebalance_gatherers
             # WorkerJobType.IDLE,
         ]
         unprocessed_workers = set(self.bot.workers)
@@ -1372,7 +1374,7 @@ class Workers(GeometryMixin):
                 if job_type == WorkerJobType.SCOUT \
                         or assignment.target_position is None \
                         or 0 < self.bot.time - assignment.last_reassign_time < 0.3 \
-                        or self.bot.time - assignment.last_swap_time < 5:
+                        or self.bot.time - assignment.last_swap_time < MN.WORKER_ASSIGNMENT_SWAP_COOLDOWN:
                         # or assignment.on_attack_break \
                         # or self.member_is_closer_than(assignment.unit, self.bot.enemy_units, 3):
                     # skip scouts, missing positions, recently reassigned
@@ -1426,6 +1428,8 @@ class Workers(GeometryMixin):
                 self.update_assigment(worker, job_type, new_target, new_target_position, new_build_type)
                 assignment.last_swap_time = self.bot.time
 
+        self.rebalance_gatherers()
+
         remaining_cooldown = MN.WORKER_REDISTRIBUTE_COOLDOWN - (self.bot.time - self.last_worker_stop)
         if remaining_cooldown > 0:
             logger.debug(f"Distribute workers is on cooldown for {remaining_cooldown}")
@@ -1442,6 +1446,36 @@ class Workers(GeometryMixin):
 
         return 0
 
+    @timed
+    def rebalance_gatherers(self) -> None:
+        for job_type, resources in ((WorkerJobType.VESPENE, self.vespene), (WorkerJobType.MINERALS, self.minerals)):
+            assignments = [
+                assignment for assignment in self.assignments_by_job[job_type]
+                if assignment.unit.type_id != UnitTypeId.MULE
+            ]
+            pinned_tags = {
+                assignment.unit.tag for assignment in assignments
+                if not assignment.unit_available
+                or assignment.on_attack_break
+                or self.bot.time - assignment.last_swap_time < MN.WORKER_ASSIGNMENT_SWAP_COOLDOWN
+            }
+            if not self.assignment_solver.saturation_changed(job_type.name, resources, assignments, pinned_tags, self.bot.time):
+                continue
+            for assignment, resource_node in self.assignment_solver.get_moves(resources, assignments, pinned_tags):
+                worker = assignment.unit
+                straight_distance = cy_distance_to(worker.position, resource_node.node.position)
+                path_distance = self.map.get_distance_by_path(worker.position, resource_node.node.position)
+                if path_distance > 15 and path_distance > straight_distance * 2:
+                    # straight line distance is unreliably short, don't move this worker
+                    continue
+                LogHelper.add_log(f"moving {worker.tag} from {assignment.target} to {resource_node.node}")
+                self.update_assigment(worker, job_type, resource_node.node)
+                assignment.last_swap_time = self.bot.time
+            # the moves pin the workers that made them, so the next solve sees the new saturation
+            pinned_tags |= {assignment.unit.tag for assignment in assignments
+                            if self.bot.time - assignment.last_swap_time < MN.WORKER_ASSIGNMENT_SWAP_COOLDOWN}
+            self.assignment_solver.record_solve(job_type.name, resources, assignments, pinned_tags, self.bot.time)
+
     @timed_async
     async def update_repairers(self, enemy_builds_detected: Dict[BuildType, float]) -> None:
         needed_repairers: int = 0
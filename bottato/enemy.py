@@ -2,22 +2,25 @@ from collections import deque
 from loguru import logger
 from typing import Dict, List, Set, Tuple
 
+import numpy as np
 from cython_extensions.general_utils import cy_in_pathing_grid_burny
 from cython_extensions.geometry import cy_distance_to_squared
 from cython_extensions.units_utils import cy_closer_than
 from sc2.bot_ai import BotAI
 from sc2.data import Race
 from sc2.ids.buff_id import BuffId
-from sc2.ids.effect_id import EffectId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.detection_helper import DetectionHelper
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.squad.enemy_squad import EnemySquad
 from bottato.unit_reference_helper import UnitReferenceHelper
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
+from bottato.visibility_helper import VisibilityHelper
 
 
 class Enemy(GeometryMixin):
@@ -25,6 +28,9 @@ class Enemy(GeometryMixin):
     unit_may_not_exist_seconds = 600
     enemy_squad_counter = 0
     frames_of_movement_history = 5
+    max_prediction_march_steps = 200
+    # outlives the out-of-view cutoff so units still being tracked never lose their state
+    unit_state_stale_seconds = unit_may_not_exist_seconds + 60
 
     def __init__(self, bot: BotAI):
         self.bot: BotAI = bot
@@ -33,13 +39,14 @@ class Enemy(GeometryMixin):
         self.enemies_out_of_view: Units = Units([], bot)
         self.enemies_killed: List[tuple[Unit, float]] = []
         self.new_units: Units = Units([], bot)
-        self.first_seen: Dict[int, float] = {}
-        self.last_seen: Dict[int, float] = {}
-        self.last_seen_step: Dict[int, int] = {}
-        self.last_seen_position: Dict[int, Point2] = {}
-        self.last_seen_positions: Dict[int, deque] = {}
-        self.predicted_positions: Dict[int, Point2] = {}
-        self.predicted_frame_vector: Dict[int, Point2] = {}
+        stale_seconds = self.unit_state_stale_seconds
+        self.first_seen: UnitComponent = UnitStateStore.register("enemy.first_seen", stale_seconds)
+        self.last_seen: UnitComponent = UnitStateStore.register("enemy.last_seen", stale_seconds)
+        self.last_seen_step: UnitComponent = UnitStateStore.register("enemy.last_seen_step", stale_seconds)
+        self.last_seen_position: UnitComponent = UnitStateStore.register("enemy.last_seen_position", stale_seconds)
+        self.last_seen_positions: UnitComponent = UnitStateStore.register("enemy.last_seen_positions", stale_seconds)
+        self.predicted_positions: UnitComponent = UnitStateStore.register("enemy.predicted_positions", stale_seconds)
+        self.predicted_frame_vector: UnitComponent = UnitStateStore.register("enemy.predicted_frame_vector", stale_seconds)
         self.squads_by_unit_tag: Dict[int, EnemySquad] = {}
         self.all_seen: Dict[UnitTypeId, set[int]] = {}
         self.attack_range_squared_cache: Dict[UnitTypeId, Dict[float, Dict[UnitTypeId, float]]] = {}
@@ -69,9 +76,14 @@ class Enemy(GeometryMixin):
         self.add_new_out_of_view()
 
         self.enemies_in_view = new_visible_enemies
+        DetectionHelper.update(self.get_recent_enemies(), self.predicted_positions)
 
     @timed
     def update_out_of_view(self):
+        # units whose prediction is in vision get moved to the edge of vision in one batch
+        units_to_march: List[Unit] = []
+        march_origins: List[Point2] = []
+        march_vectors: List[Point2] = []
         for enemy_unit in self.enemies_out_of_view:
             time_since_last_seen = self.bot.time - self.last_seen[enemy_unit.tag]
             if enemy_unit.is_structure and self.is_visible(enemy_unit.position, enemy_unit.radius):
@@ -85,6 +97,7 @@ class Enemy(GeometryMixin):
                 # assume unit continues in same direction
                 self.last_seen_positions[enemy_unit.tag].append(None)
                 new_prediction = self.get_predicted_position(enemy_unit, 0)
+                self.predicted_positions[enemy_unit.tag] = new_prediction
                 # move projection to edge of visibility
                 if self.is_visible(new_prediction, enemy_unit.radius):
                     if self.last_seen_position[enemy_unit.tag] != new_prediction:
@@ -94,33 +107,41 @@ class Enemy(GeometryMixin):
                         predicted_vector = new_prediction - closest_friendly_unit.position
 
                     if predicted_vector.length > 0:
-                        predicted_vector = predicted_vector.normalized
-                        position_found = False
-                        # check both directions along predicted vector
-                        # checking forward is useful when enemy unit is running away
-                        # checking backward is useful when friendly unit is running away
-                        # use whichever direction gets out of vision first
-                        new_prediction1 = new_prediction + predicted_vector
-                        new_prediction2 = new_prediction - predicted_vector
-                        while not position_found:
-                            if not self.is_visible(new_prediction1, enemy_unit.radius):
-                                position_found = True
-                                new_prediction = new_prediction1
-                                break
-                            if not self.is_visible(new_prediction2, enemy_unit.radius):
-                                position_found = True
-                                new_prediction = new_prediction2
-                                break
-                            new_prediction1 += predicted_vector
-                            new_prediction2 -= predicted_vector
-                self.predicted_positions[enemy_unit.tag] = new_prediction
+                        units_to_march.append(enemy_unit)
+                        march_origins.append(new_prediction)
+                        march_vectors.append(predicted_vector.normalized)
 
-                if time_since_last_seen <= self.unit_probably_moved_seconds:
-                    self.bot.client.debug_box2_out(
-                        self.convert_point2_to_3(self.predicted_positions[enemy_unit.tag], self.bot),
-                        half_vertex_length=enemy_unit.radius,
-                        color=(255, 0, 0)
-                    )
+        if units_to_march:
+            self.move_predictions_out_of_vision(units_to_march, march_origins, march_vectors)
+
+        for enemy_unit in self.enemies_out_of_view:
+            if enemy_unit.type_id.name.endswith("BURROWED"):
+                continue
+            if self.bot.time - self.last_seen[enemy_unit.tag] <= self.unit_probably_moved_seconds:
+                self.bot.client.debug_box2_out(
+                    self.convert_point2_to_3(self.predicted_positions[enemy_unit.tag], self.bot),
+                    half_vertex_length=enemy_unit.radius,
+                    color=(255, 0, 0)
+                )
+
+    def move_predictions_out_of_vision(self, units: List[Unit], origins: List[Point2], vectors: List[Point2]):
+        # check both directions along predicted vector
+        # checking forward is useful when enemy unit is running away
+        # checking backward is useful when friendly unit is running away
+        # use whichever direction gets out of vision first, forward wins ties
+        origin_array = np.array(origins, dtype=np.float64)
+        vector_array = np.array(vectors, dtype=np.float64)
+        radii = np.array([unit.radius for unit in units], dtype=np.float64)
+        forward_steps = VisibilityHelper.first_along_rays(
+            origin_array, vector_array, radii, find_visible=False, max_steps=self.max_prediction_march_steps)
+        backward_steps = VisibilityHelper.first_along_rays(
+            origin_array, -vector_array, radii, find_visible=False, max_steps=self.max_prediction_march_steps)
+        for i, unit in enumerate(units):
+            forward, backward = int(forward_steps[i]), int(backward_steps[i])
+            if forward and (not backward or forward <= backward):
+                self.predicted_positions[unit.tag] = origins[i] + vectors[i] * forward
+            elif backward:
+                self.predicted_positions[unit.tag] = origins[i] - vectors[i] * backward
     
     @timed
     def set_last_seen_for_visible(self, visible_enemies: Units):
@@ -135,12 +156,16 @@ class Enemy(GeometryMixin):
             self.last_seen_position[enemy_unit.tag] = enemy_unit.position
             if enemy_unit.tag not in self.last_seen_positions:
                 self.last_seen_positions[enemy_unit.tag] = deque(maxlen=self.frames_of_movement_history)
+            else:
+                self.last_seen_positions.touch(enemy_unit.tag)
             self.last_seen_positions[enemy_unit.tag].append(enemy_unit.position)
             self.predicted_positions[enemy_unit.tag] = enemy_unit.position
             self.predicted_frame_vector[enemy_unit.tag] = self.get_average_movement_per_step(self.last_seen_positions[enemy_unit.tag])
             if enemy_unit.tag not in self.first_seen:
                 self.first_seen[enemy_unit.tag] = self.bot.time
                 self.all_seen.setdefault(enemy_unit.type_id, set()).add(enemy_unit.tag)
+            else:
+                self.first_seen.touch(enemy_unit.tag)
 
     @timed
     def add_new_out_of_view(self):
@@ -166,21 +191,7 @@ class Enemy(GeometryMixin):
                         )
 
     def is_visible(self, position: Point2, radius: float) -> bool:
-        positions_to_check = [
-            position,
-            Point2((position.x - radius, position.y)),
-            Point2((position.x + radius, position.y)),
-            Point2((position.x, position.y - radius)),
-            Point2((position.x, position.y + radius)),
-            Point2((position.x - radius, position.y - radius)),
-            Point2((position.x - radius, position.y + radius)),
-            Point2((position.x + radius, position.y - radius)),
-            Point2((position.x + radius, position.y + radius)),
-        ]
-        for pos in positions_to_check:
-            if self.bot.is_visible(pos):
-                return True
-        return False
+        return bool(VisibilityHelper.any_visible_near(np.array([position], dtype=np.float64), radius)[0])
 
     @timed
     def get_predicted_position(self, unit: Unit, seconds_ahead: float) -> Point2:
@@ -274,11 +285,7 @@ class Enemy(GeometryMixin):
                     self.enemies_in_view.remove(enemy_unit)
                     self.enemies_killed.append((enemy_unit, self.bot.time))
                     break
-        if found:
-            del self.first_seen[unit_tag]
-            # del self.last_seen_position[unit_tag]
-            if unit_tag in self.predicted_positions:
-                del self.predicted_positions[unit_tag]
+        # per-tag state is evicted by UnitStateStore
 
     def enemy_is_alive(self, unit_tag) -> bool:
         try:
@@ -641,23 +648,11 @@ class Enemy(GeometryMixin):
         if is_mine and unit.energy <= 8:
             # cloak about to end so start retreating
             return True
-        detectors: Units
-        if is_mine:
-            detectors = enemy_units.filter(lambda u: u.is_detector)
-        else:
-            detectors = self.bot.all_own_units.filter(lambda u: u.is_detector)
-        for detector in detectors:
-            bonus_detection_distance = 0
-            if is_mine:
-                bonus_detection_distance = 0.5 if detector.is_structure else 1.5
-            if self.safe_distance_squared(detector, unit) <= (detector.sight_range + unit.radius + bonus_detection_distance) ** 2:
-                return True
-        for effect in self.bot.state.effects:
-            if effect.id == EffectId.SCANNERSWEEP:
-                for position in effect.positions:
-                    if self.safe_distance_squared(position, unit) <= (13 + unit.radius) ** 2:
-                        return True
-        return False
+        # detectors and scans are rasterized once per step, enemy detectors from get_recent_enemies
+        position = unit.position
+        if not is_mine and unit.age > 0 and unit.tag in self.predicted_positions:
+            position = self.predicted_positions[unit.tag]
+        return DetectionHelper.is_detected(position, by_enemy=is_mine)
 
     @timed
     def get_candidates(self, include_structures=True, include_units=True, include_destructables=False,
@@ -134,6 +134,11 @@ class CycloneLockOnState(enum.Enum):
     LOCKED = 1
     ON_COOLDOWN = 2
 
+class MiningPhase(enum.Enum):
+    NONE = 0
+    GATHER = 1
+    RETURN = 2
+
 class ActionErrorCode(enum.Enum):
   Success = 1
   NotSupported = 2
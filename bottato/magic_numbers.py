@@ -35,9 +35,38 @@ class MagicNumbers:
     MINERAL_MAX_DISTANCE_FROM_BASE = 15
     BUILDER_ALLOWED_IDLE_TIME = 5
     WORKER_REDISTRIBUTE_COOLDOWN = 3
+    BUILD_PLANNER_FAST_STALENESS = 1
+    BUILD_PLANNER_SLOW_STALENESS = 3
+    DAMAGE_MEMORY_BUCKET_SECONDS = 5
+    DAMAGE_MEMORY_BUCKET_COUNT = 24
+    UNIT_STATE_EVICTION_INTERVAL = 5
+    COMMAND_POSITION_TOLERANCE = 0.5
+    COMMAND_ANGLE_TOLERANCE = 0.05
+    COMMAND_REPEAT_COOLDOWN = 0.5
+    FOCUS_FIRE_PRIORITY_WEIGHT = 3.0
+    FOCUS_FIRE_OFFENSIVE_WEIGHT = 2.0
+    FOCUS_FIRE_GAS_STRUCTURE_WEIGHT = 0.1
+    FOCUS_FIRE_PREVIOUS_TARGET_BONUS = 1.2
+    DENSITY_GRID_MIN_UNITS = 16
+    AOE_RECENT_CAST_SECONDS = 1.5
+    DETECTION_UNIT_RADIUS = 0.5
+    SCAN_PENDING_SECONDS = 1.0
+    PATH_CACHE_SIZE = 512
+    PATH_CACHE_REGION_SIZE = 8
+    PATH_CACHE_START_QUANTUM = 4
+    # registrations that changed the grid before a cached path on it expires regardless of where
+    PATH_CACHE_MAX_GRID_UPDATES = 16
+    ZONE_PORTAL_SPACING = 8
+    ZONE_PATH_MIN_DISTANCE = 30
+    INIT_PIPELINE_MAX_WORKERS = 3
+    ANALYTICS_MAX_STALENESS = 2.0
     WORKER_REDISTRIBUTE_MAX_COUNT = 10
     WORKER_REDISTRIBUTE_VESPENE_BANK_TARGET = 90
     WORKER_REDISTRIBUTE_MINERAL_BANK_TARGET = 0
+    WORKER_ASSIGNMENT_HYSTERESIS = 8
+    WORKER_ASSIGNMENT_LONG_DISTANCE_PENALTY = 40
+    WORKER_ASSIGNMENT_SWAP_COOLDOWN = 5
+    WORKER_ASSIGNMENT_RESOLVE_SECONDS = 10
     WORKER_REPAIR_MIN_MINERALS = 20
     WORKER_REPAIR_PERCENT_ASSIGNED = 0.2
     WORKER_REPAIR_RAMP_WALL_TIME = 300
@@ -52,4 +81,5 @@ class MagicNumbers:
     WORKER_REPAIR_DEFENSIVE_TANK_DISTANCE = 20
     WORKER_RUSH_REPAIR_WORKER_HEALTH_THRESHOLD = 0.3
     WORKER_RUSH_WALL_REPAIRER_COUNT = 4
-    AVOID_EFFECT_BUFFER = 1.2
\ No newline at end of file
+    AVOID_EFFECT_BUFFER = 1.2
+    EFFECT_HAZARD_UNIT_RADIUS = 0.5
\ No newline at end of file
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from bottato.magic_numbers import MagicNumbers as MN
+
+
+class DamageMemory:
+    """Fixed-size record of damage taken, as a ring of time buckets.
+
+    Memory doesn't grow with game length: damage older than bucket_count buckets is
+    overwritten. With shape () it tracks a single value (a zone), with shape (width, height)
+    it tracks every map cell and positions are [x, y] indices.
+
+    in_last() works at bucket resolution, so the oldest bucket in the window is counted whole.
+    """
+    def __init__(self, shape: Tuple[int, ...] = (),
+                 bucket_seconds: float = MN.DAMAGE_MEMORY_BUCKET_SECONDS,
+                 bucket_count: int = MN.DAMAGE_MEMORY_BUCKET_COUNT) -> None:
+        self.shape = shape
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.buckets: np.ndarray = np.zeros((bucket_count,) + shape, dtype=np.float64)
+        # which bucket-length epoch each slot currently holds
+        self.epochs: np.ndarray = np.full(bucket_count, -1, dtype=np.int64)
+
+    def get_epoch(self, time: float) -> int:
+        return int(time // self.bucket_seconds)
+
+    def add(self, amount, time: float, index: Tuple[np.ndarray, np.ndarray] | None = None) -> None:
+        """Record damage. For grids, index is (xs, ys) and amount is one value per cell."""
+        epoch = self.get_epoch(time)
+        slot = epoch % self.bucket_count
+        if epoch < self.epochs[slot]:
+            # older than the window
+            return
+        if self.epochs[slot] != epoch:
+            self.buckets[slot] = 0
+            self.epochs[slot] = epoch
+        if index is None:
+            self.buckets[slot] += amount
+        else:
+            np.add.at(self.buckets[slot], index, amount)
+
+    def in_last(self, seconds: float, time: float):
+        """Damage in the buckets overlapping the last `seconds`, a float or a grid."""
+        current_epoch = self.get_epoch(time)
+        oldest_epoch = max(self.get_epoch(time - seconds), current_epoch - self.bucket_count + 1, 0)
+        valid = (self.epochs >= oldest_epoch) & (self.epochs <= current_epoch)
+        return self.buckets[valid].sum(axis=0)
+
+    def iter_buckets(self, time: float) -> Iterator[Tuple[float, np.ndarray]]:
+        """(bucket start time, bucket) for every bucket still in the window, oldest first."""
+        current_epoch = self.get_epoch(time)
+        for slot in np.argsort(self.epochs):
+            epoch = int(self.epochs[slot])
+            if epoch >= 0 and current_epoch - self.bucket_count < epoch <= current_epoch:
+                yield epoch * self.bucket_seconds, self.buckets[slot]
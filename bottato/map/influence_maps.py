@@ -1,17 +1,21 @@
+from collections import OrderedDict
 from loguru import logger
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from cython_extensions.geometry import cy_distance_to
 from cython_extensions.units_utils import cy_closest_to
 from MapAnalyzer import MapData
+from scipy.ndimage import label
 from sc2.bot_ai import BotAI
-from sc2.ids.effect_id import EffectId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2
 from sc2.unit import Unit
 
+from bottato.detection_helper import DetectionHelper
 from bottato.log_helper import LogHelper
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.map.pathable_lookup import PathableLookup
 from bottato.map_specifics import MapSpecifics
 from bottato.mixins import GeometryMixin
 from bottato.unit_types import UnitTypes
@@ -23,8 +27,19 @@ class InfluenceMaps():
         self.maps = {}
         self.map_data = MapData(bot, corner_distance=0)
         self.map_name: str = bot.game_info.map_name
+        self.pathable_lookup = PathableLookup()
+        # (grid name, start block, goal cell, planned by a custom path finder) -> (path, versions of the regions it crosses, grid update count)
+        self.path_cache: OrderedDict[Tuple[str, int, int, int, int, bool], Tuple[List[Point2], Dict[Tuple[int, int], int], int]] = OrderedDict()
+        self.registered_grids: Dict[str, np.ndarray] = {}
+        self.region_versions: Dict[str, np.ndarray] = {}
+        # coarse per grid version, counts registrations that changed anything
+        self.grid_updates: Dict[str, int] = {}
+        # connected pathable areas per grid, computed when first needed after pathability changes
+        self.grid_components: Dict[str, np.ndarray | None] = {}
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
 
-    def update_maps(self, damage_by_position: Dict[Point2, List[Tuple[float, float]]]):
+    def update_maps(self):
         self.ground_grid = self.map_data.get_pyastar_grid(3)
         self.reaper_grid = self.map_data.get_climber_grid(3)
         # self.anti_air_grid = self.map_data.get_air_vs_ground_grid(3, 1.5)
@@ -32,6 +47,7 @@ class InfluenceMaps():
         self.detection_grid = self.map_data.get_clean_air_grid()
         self.last_visible_grid = self.map_data.get_clean_air_grid()
         self.need_detection_grid = self.map_data.get_clean_air_grid()
+        self.pathable_lookup.invalidate()
 
         # subtract weight for speed zones
         for destructable in self.bot.destructables:
@@ -56,26 +72,90 @@ class InfluenceMaps():
                 self.add_cost(enemy.position_tuple, air_range + 1, self.anti_air_grid, 1000)
                 self.add_cost(enemy.position_tuple, air_range + 2, self.anti_air_grid, 200)
 
-            if enemy.is_detector:
-                self.add_cost(enemy.position_tuple, enemy.sight_range + 1.5, self.detection_grid, 5)
-
-        for effect in self.bot.state.effects:
-            if effect.id == EffectId.SCANNERSWEEP:
-                for position in effect.positions:
-                    self.add_cost((position[0], position[1]), 14, self.detection_grid, 5)
+        # 5x weight where the enemy detects (detection is multiplied with other grid for cloaked units)
+        width, height = self.detection_grid.shape
+        self.detection_grid[DetectionHelper.enemy[:width, :height]] = 5
 
         for no_fly_zone_center, no_fly_zone_radius in MapSpecifics.no_fly_zones(self.bot):
             self.add_cost((no_fly_zone_center[0], no_fly_zone_center[1]), no_fly_zone_radius, self.anti_air_grid, np.inf)
 
-        # cap detection weights at 5x (detection is multiplied with other grid for cloaked units)
-        self.detection_grid = np.minimum(self.detection_grid, 5)
-
         for unit in self.bot.units:
             # set all current visible positions to infinity
             self.add_cost(unit.position_tuple, unit.sight_range, self.last_visible_grid, np.inf)
         # change the infinities to 0 and decay all the rest to show the age of it last being visible
         self.last_visible_grid = np.where(self.last_visible_grid == np.inf, 0, self.last_visible_grid + 1)
 
+        self.register_grid("ground", self.ground_grid)
+        self.register_grid("reaper", self.reaper_grid)
+        self.register_grid("anti_air", self.anti_air_grid)
+        self.register_grid("detection", self.detection_grid)
+        for name in ("ground", "reaper", "anti_air"):
+            self.register_grid(f"{name}_cloaked", self.registered_grids[name] * self.detection_grid)
+
+    def register_grid(self, name: str, grid: np.ndarray):
+        """Make grid the current version of a named pathing grid so paths on it can be cached.
+
+        Regions whose costs differ from the previously registered grid get their version bumped,
+        which invalidates cached paths crossing them; paths through unchanged regions stay valid.
+        That misses a change off the path that would make a shorter route (a threat leaving a
+        choke the path went around), so the grid also keeps a coarse update count and cached
+        paths expire after MN.PATH_CACHE_MAX_GRID_UPDATES changing registrations.
+        """
+        previous = self.registered_grids.get(name)
+        self.registered_grids[name] = grid
+        if previous is None or previous.shape != grid.shape or not np.array_equal(np.isfinite(previous), np.isfinite(grid)):
+            self.grid_components[name] = None
+        versions = self.region_versions.get(name)
+        if previous is None or versions is None or previous.shape != grid.shape:
+            region_shape = tuple(-(-size // MN.PATH_CACHE_REGION_SIZE) for size in grid.shape)
+            self.region_versions[name] = np.zeros(region_shape, dtype=np.int64) if versions is None \
+                else np.full(region_shape, versions.max() + 1, dtype=np.int64)
+            self.grid_updates[name] = self.grid_updates.get(name, -1) + 1
+            return
+        changed = InfluenceMaps.changed_regions(previous, grid, MN.PATH_CACHE_REGION_SIZE)
+        if changed.any():
+            versions += changed
+            self.grid_updates[name] += 1
+
+    def get_grid_components(self, name: str) -> np.ndarray:
+        """Connected component label per cell of a registered grid, 0 for cells that can't be pathed."""
+        components = self.grid_components.get(name)
+        if components is None:
+            # paths can move diagonally
+            components, _ = label(np.isfinite(self.registered_grids[name]), structure=np.ones((3, 3)))
+            self.grid_components[name] = components
+        return components
+
+    def is_connected(self, name: str, start: Point2, waypoint: Point2) -> bool:
+        components = self.get_grid_components(name)
+        width, height = components.shape
+        start_x, start_y, waypoint_x, waypoint_y = int(start.x), int(start.y), int(waypoint[0]), int(waypoint[1])
+        if not (0 <= start_x < width and 0 <= start_y < height and 0 <= waypoint_x < width and 0 <= waypoint_y < height):
+            return False
+        start_component = components[start_x, start_y]
+        return start_component != 0 and start_component == components[waypoint_x, waypoint_y]
+
+    @staticmethod
+    def changed_regions(previous: np.ndarray, current: np.ndarray, region_size: int) -> np.ndarray:
+        """Per region_size x region_size block, whether any cell differs between two grids of the same shape."""
+        changed = previous != current
+        # nan never equals itself but an unchanged nan isn't a change
+        changed &= ~(np.isnan(previous) & np.isnan(current))
+        width, height = changed.shape
+        padded_width = -(-width // region_size) * region_size
+        padded_height = -(-height // region_size) * region_size
+        changed = np.pad(changed, ((0, padded_width - width), (0, padded_height - height)))
+        return changed.reshape(padded_width // region_size, region_size,
+                               padded_height // region_size, region_size).any(axis=(1, 3))
+
+    def get_grid_name(self, grid: Optional[np.ndarray]) -> Optional[str]:
+        if grid is None:
+            return None
+        for name, registered in self.registered_grids.items():
+            if registered is grid:
+                return name
+        return None
+
     def get_unscouted_position_near(self, position: Point2, radius: float, age_limit: int) -> Optional[Point2]:
         """Get a random position within radius of the given position that hasn't been scouted in the last age_limit seconds."""
         unscouted_positions = self.find_highest_cost_points(position, radius, grid=self.last_visible_grid)
@@ -141,18 +221,64 @@ class InfluenceMaps():
         return self.map_data.pather.add_cost(position=position, radius=radius, arr=grid, weight=weight, safe=safe,
                                              initial_default_weights=initial_default_weights)
     
-    def get_path(self, start: Point2 | Unit, end: Point2, grid: Optional[np.ndarray] = None) -> List[Point2]:
+    def get_path(self, start: Point2 | Unit, end: Point2, grid: Optional[np.ndarray] = None,
+                 path_finder: Optional[Callable[[Point2, Point2], Optional[List[Point2]]]] = None) -> List[Point2]:
+        """Path on grid, cached while the regions it crosses are unchanged.
+
+        path_finder plans the path instead of MapAnalyzer (falling back to it when it returns None),
+        its paths are cached separately and must visit every cell so invalidation sees them.
+        """
         if isinstance(start, Unit):
             if start.type_id == UnitTypeId.REAPER:
-                grid = self.reaper_grid
+                grid_name = "reaper"
             elif start.is_flying:
-                grid = self.anti_air_grid
+                grid_name = "anti_air"
             else:
-                grid = self.ground_grid
+                grid_name = "ground"
             if start.is_cloaked:
-                grid *= self.detection_grid
+                grid_name += "_cloaked"
+            grid = self.registered_grids[grid_name]
             start = start.position
-        
+        else:
+            grid_name = self.get_grid_name(grid)
+        if grid_name is None:
+            # not a grid we track versions for
+            return self.find_path(start, end, grid, path_finder)
+
+        quantum = MN.PATH_CACHE_START_QUANTUM
+        key = (grid_name, int(start.x) // quantum, int(start.y) // quantum, int(end.x), int(end.y), path_finder is not None)
+        versions = self.region_versions[grid_name]
+        grid_updates = self.grid_updates[grid_name]
+        cached = self.path_cache.get(key)
+        if cached is not None:
+            path, path_versions, cached_updates = cached
+            if grid_updates - cached_updates < MN.PATH_CACHE_MAX_GRID_UPDATES \
+                    and all(versions[region] == version for region, version in path_versions.items()):
+                # nearby starts share the path, unless a cliff or wall cuts this one off from its first step
+                if self.is_connected(grid_name, start, path[1] if len(path) > 1 else path[0]):
+                    self.path_cache.move_to_end(key)
+                    self.path_cache_hits += 1
+                    return [start] + path[1:]
+            else:
+                del self.path_cache[key]
+        self.path_cache_misses += 1
+
+        path = self.find_path(start, end, grid, path_finder)
+        region_size = MN.PATH_CACHE_REGION_SIZE
+        width, height = versions.shape
+        regions = {(min(max(int(point[0]) // region_size, 0), width - 1), min(max(int(point[1]) // region_size, 0), height - 1))
+                   for point in path}
+        self.path_cache[key] = (path, {region: int(versions[region]) for region in regions}, grid_updates)
+        if len(self.path_cache) > MN.PATH_CACHE_SIZE:
+            self.path_cache.popitem(last=False)
+        return path
+
+    def find_path(self, start: Point2, end: Point2, grid: Optional[np.ndarray],
+                  path_finder: Optional[Callable[[Point2, Point2], Optional[List[Point2]]]] = None) -> List[Point2]:
+        if path_finder is not None:
+            path = path_finder(start, end)
+            if path is not None:
+                return path
         path = self.map_data.pathfind((start.x, start.y), (end.x, end.y), grid=grid)
         if path is None:
             return [start, end]
@@ -168,6 +294,10 @@ class InfluenceMaps():
         path = self.get_path(start, end, grid)
         if path is None:
             return float('inf')
+        return InfluenceMaps.path_length(path)
+
+    @staticmethod
+    def path_length(path: List[Point2]) -> float:
         distance = 0
         prev_position = None
         for position in path:
@@ -0,0 +1,52 @@
+import asyncio
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from loguru import logger
+from typing import Any, Callable, Dict, Tuple
+
+from bottato.magic_numbers import MagicNumbers as MN
+
+
+class InitPipeline:
+    """Runs the start-of-game analyses that only need game_info grids in worker processes.
+
+    Jobs are static functions of numpy arrays and plain values so their arguments pickle
+    cheaply, and are collected by name when the init step that needs them gets there. If
+    worker processes can't be started (one core, sandboxed ladder host) or a job fails in
+    its worker, the job runs in this process instead.
+    """
+    def __init__(self) -> None:
+        self.jobs: Dict[str, Tuple[Callable, tuple]] = {}
+        self.futures: Dict[str, Future] = {}
+        self.executor: ProcessPoolExecutor | None = None
+        worker_count = min(MN.INIT_PIPELINE_MAX_WORKERS, (os.cpu_count() or 1) - 1)
+        if worker_count > 0:
+            try:
+                self.executor = ProcessPoolExecutor(max_workers=worker_count)
+            except (OSError, NotImplementedError, ValueError) as e:
+                logger.warning(f"init pipeline can't start worker processes, running jobs in process: {e}")
+
+    def submit(self, name: str, function: Callable, *args) -> None:
+        self.jobs[name] = (function, args)
+        if self.executor is None:
+            return
+        try:
+            self.futures[name] = self.executor.submit(function, *args)
+        except (OSError, RuntimeError) as e:
+            # BrokenProcessPool is a RuntimeError
+            logger.warning(f"init job {name} couldn't be submitted, will run in process: {e}")
+
+    async def result(self, name: str) -> Any:
+        function, args = self.jobs.pop(name)
+        future = self.futures.pop(name, None)
+        if future is not None:
+            try:
+                return await asyncio.wrap_future(future)
+            except Exception as e:
+                logger.warning(f"init job {name} failed in worker, running in process: {e}")
+        return function(*args)
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
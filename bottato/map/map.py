@@ -5,7 +5,7 @@ from loguru import logger
 from typing import Dict, List, Set, Tuple
 
 import numpy as np
-from cython_extensions.geometry import cy_distance_to, cy_distance_to_squared
+from cython_extensions.geometry import cy_distance_to
 from cython_extensions.units_utils import cy_closest_to
 from sc2.bot_ai import BotAI
 from sc2.ids.effect_id import EffectId
@@ -16,10 +16,16 @@ from sc2.units import Units
 
 from bottato.enums import ExpansionSelection
 from bottato.log_helper import LogHelper
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.map.damage_memory import DamageMemory
 from bottato.map.influence_maps import InfluenceMaps
+from bottato.map.init_pipeline import InitPipeline
+from bottato.map.terrain import Terrain
 from bottato.map.zone import Path, Zone
+from bottato.map.zone_pather import ZonePather
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.squad.scouting_location import ScoutingLocation
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
 
 
@@ -27,18 +33,20 @@ class Map(GeometryMixin):
     def __init__(self, bot: BotAI) -> None:
         self.bot = bot
         self.influence_maps = InfluenceMaps(self.bot)
+        self.terrain = Terrain(self.bot)
         self.zone_lookup_by_coord: Dict[Tuple, Zone] = {}
         self.cached_neighbors8: Dict[Tuple, Set[Tuple]] = {}
         self.cached_neighbors4: Dict[Tuple, Set[Tuple]] = {}
         self.coords_by_distance: Dict[int, List[Tuple]] = {}
-        self.init_distance_from_edge(self.influence_maps.get_zone_grid())
+        self.distance_from_edge: Dict[Tuple, int] = {}
         self.zones: Dict[int, Zone] = {}
+        self.zone_pather: ZonePather | None = None
         logger.debug(f"zones {self.zones}")
         self.first_draw = True
         self.last_refresh_time = 0
         self.natural_position: Point2 = self.bot.start_location
         self.enemy_natural_position: Point2 = self.bot.enemy_start_locations[0]
-        self.all_damage_by_position: Dict[Point2, List[Tuple[float, float]]] = {}
+        self.damage_memory = DamageMemory((self.terrain.width, self.terrain.height))
         self.expansion_orders: Dict[ExpansionSelection, List[ScoutingLocation]] = {
             ExpansionSelection.CLOSEST: [],
             ExpansionSelection.AWAY_FROM_ENEMY: []
@@ -50,53 +58,50 @@ class Map(GeometryMixin):
         }
         self.path_checking_position: Point2 | None = None
 
-    async def init(self, scouting_locations: List[ScoutingLocation]):
+    def submit_init_jobs(self, pipeline: InitPipeline, scouting_locations: List[ScoutingLocation]):
+        """Start the analyses init needs that only depend on grids."""
+        max_x = self.bot.game_info.playable_area.width - 1
+        max_y = self.bot.game_info.playable_area.height - 1
+        pipeline.submit("distance_from_edge", Map.compute_distance_from_edge,
+                        self.influence_maps.get_zone_grid(), self.terrain.z_heights, max_x, max_y)
+        zone_grid = self.influence_maps.get_zone_grid(False)
+        starts = [self.bot.start_location, self.bot.enemy_start_locations[0]]
+        expansions = [location.expansion_position for location in scouting_locations]
+        # unpathable cells may be 0 or inf depending on the grid
+        pipeline.submit("expansion_distances", Terrain.compute_path_distances,
+                        np.isfinite(zone_grid) & (zone_grid != 0), self.terrain.to_indices(starts), self.terrain.to_indices(expansions))
+
+    async def init(self, scouting_locations: List[ScoutingLocation], pipeline: InitPipeline):
         self.scouting_locations = scouting_locations
         logger.info("Initializing zones...")
+        self.set_distance_from_edge(await pipeline.result("distance_from_edge"))
         self.zones: Dict[int, Zone] = await self.init_zones(self.distance_from_edge)
+        self.zone_pather = self.create_zone_pather()
         logger.info("Zones initialized")
         self.natural_position = await self.get_natural_position(self.bot.start_location)
         self.enemy_natural_position = await self.get_natural_position(self.bot.enemy_start_locations[0])
         logger.info(f"Natural position: {self.natural_position}, Enemy natural position: {self.enemy_natural_position}")
         logger.info("Initializing expansion orders...")
-        self.init_expansion_orders()
+        self.init_expansion_orders(await pipeline.result("expansion_distances"))
         logger.info("Expansion orders initialized")
 
-    def init_expansion_orders(self):
-        # uses pathing so has to be called after map is initialized
-        zone_grid = self.influence_maps.get_zone_grid(False)
-        self.expansion_orders[ExpansionSelection.CLOSEST] = sorted(
-            self.scouting_locations,
-            key=lambda loc: self.influence_maps.get_path_distance(self.bot.start_location, loc.expansion_position, grid=zone_grid)
-            # key=lambda loc: cy_distance_to_squared(loc.expansion_position, self.bot.start_location)
-        )
-        self.expansion_orders[ExpansionSelection.AWAY_FROM_ENEMY] = sorted(
-            self.scouting_locations,
-                key=lambda loc: self._distance_minus_enemy_distance(
-                    loc,
-                    self.bot.start_location,
-                    self.bot.enemy_start_locations[0],
-                    zone_grid)
-        )
+    def init_expansion_orders(self, expansion_distances: np.ndarray):
+        """expansion_distances rows are path distances from our start and the enemy start to each expansion."""
+        starts = [self.bot.start_location, self.bot.enemy_start_locations[0]]
+        straight_distances = np.array([[cy_distance_to(start, location.expansion_position) for location in self.scouting_locations]
+                                       for start in starts])
+        # unreachable expansions count their straight line distance
+        distances = np.where(np.isfinite(expansion_distances), expansion_distances, straight_distances)
+
+        def order_by(keys: np.ndarray) -> List[ScoutingLocation]:
+            return [self.scouting_locations[i] for i in np.argsort(keys, kind="stable")]
+
+        self.expansion_orders[ExpansionSelection.CLOSEST] = order_by(distances[0])
+        self.expansion_orders[ExpansionSelection.AWAY_FROM_ENEMY] = order_by(distances[0] - straight_distances[1])
         # compute both for enemy because we don't know which they use
-        self.enemy_expansion_orders[ExpansionSelection.CLOSEST] = sorted(
-            self.scouting_locations,
-            key=lambda loc: self.influence_maps.get_path_distance(self.bot.enemy_start_locations[0], loc.expansion_position, grid=zone_grid)
-        )
-        self.enemy_expansion_orders[ExpansionSelection.AWAY_FROM_ENEMY] = sorted(
-            self.scouting_locations,
-                key=lambda loc: self._distance_minus_enemy_distance(
-                    loc,
-                    self.bot.enemy_start_locations[0],
-                    self.bot.start_location,
-                    zone_grid)
-        )
-
-    def _distance_minus_enemy_distance(self, location: ScoutingLocation, start_position: Point2, enemy_start_position: Point2, grid: np.ndarray) -> float:
-        """Helper function for sorting expansions by distance from enemy."""
-        path = self.influence_maps.get_path_distance(start_position, location.expansion_position, grid)
-        return path - cy_distance_to(location.expansion_position, enemy_start_position)
-    
+        self.enemy_expansion_orders[ExpansionSelection.CLOSEST] = order_by(distances[1])
+        self.enemy_expansion_orders[ExpansionSelection.AWAY_FROM_ENEMY] = order_by(distances[1] - straight_distances[0])
+
     def get_next_expansion(self, selection: ExpansionSelection = ExpansionSelection.CLOSEST) -> Point2 | None:
         for location in self.expansion_orders[selection]:
             has_minerals = self.member_is_closer_than(location.expansion_position, self.bot.mineral_field, 15)
@@ -114,92 +119,126 @@ class Map(GeometryMixin):
     
     @timed
     def get_influence_path(self, unit: Unit, ultimate_destination: Point2) -> List[Point2]:
+        if not unit.is_flying and not unit.is_cloaked and unit.type_id != UnitTypeId.REAPER:
+            return self.get_ground_path(unit.position, ultimate_destination)
         return self.influence_maps.get_path(unit, ultimate_destination)
     
     def get_influence_path_distance(self, unit: Unit, ultimate_destination: Point2) -> float:
-        return self.influence_maps.get_path_distance(unit.position, ultimate_destination, self.influence_maps.ground_grid)
+        return InfluenceMaps.path_length(self.get_ground_path(unit.position, ultimate_destination))
+
+    def get_ground_path(self, start: Point2, end: Point2) -> List[Point2]:
+        """Path on the ground influence grid, planned over zones and portals when the trip is long."""
+        path_finder = None
+        if self.zone_pather is not None and cy_distance_to(start, end) > MN.ZONE_PATH_MIN_DISTANCE:
+            path_finder = self.zone_pather.get_path
+        return self.influence_maps.get_path(start, end, self.influence_maps.ground_grid, path_finder)
+
+    def create_zone_pather(self) -> ZonePather:
+        labels = np.full((self.terrain.width, self.terrain.height), -1, dtype=np.int64)
+        for (x, y), zone in self.zone_lookup_by_coord.items():
+            if 0 <= x < self.terrain.width and 0 <= y < self.terrain.height:
+                labels[x, y] = zone.id
+        adjacent_zones = {(zone.id, adjacent_zone.id) for zone in self.zones.values() for adjacent_zone in zone.adjacent_zones}
+        return ZonePather(labels, adjacent_zones)
     
     def get_influence_path_waypoint(self, unit: Unit, ultimate_destination: Point2) -> Point2:
         path = self.get_influence_path(unit, ultimate_destination)
         return path[2] if len(path) > 2 else ultimate_destination
     
-    previous_reaper_elevations: Dict[int, float] = {}
+    previous_reaper_elevations: UnitComponent = UnitStateStore.register("map.previous_reaper_elevations")
     @timed_async
     async def refresh_map(self, damage_by_position: dict[Point2, float]) -> None:
-        for reaper in self.bot.units(UnitTypeId.REAPER):
-            if reaper.tag not in self.previous_reaper_elevations:
-                self.previous_reaper_elevations[reaper.tag] = self.bot.get_terrain_z_height(reaper.position)
-            else:
-                previous_elevation = self.previous_reaper_elevations[reaper.tag]
-                current_elevation = self.bot.get_terrain_z_height(reaper.position)
-                if abs(current_elevation - previous_elevation) > 1:
-                    # elevation changed significantly, likely jumped a cliff
-                    if reaper.position.rounded not in self.reaper_cliff_positions:
-                        LogHelper.log_to_db("Reaper cliff", str(reaper.position.rounded))
-                        self.reaper_cliff_positions.add(reaper.position.rounded)
-                self.previous_reaper_elevations[reaper.tag] = current_elevation
+        reapers = self.bot.units(UnitTypeId.REAPER)
+        if reapers:
+            reaper_elevations = self.terrain.z_heights_at([reaper.position for reaper in reapers])
+            for reaper, current_elevation in zip(reapers, reaper_elevations):
+                if reaper.tag in self.previous_reaper_elevations:
+                    previous_elevation = self.previous_reaper_elevations[reaper.tag]
+                    if abs(current_elevation - previous_elevation) > 1:
+                        # elevation changed significantly, likely jumped a cliff
+                        if reaper.position.rounded not in self.reaper_cliff_positions:
+                            LogHelper.log_to_db("Reaper cliff", str(reaper.position.rounded))
+                            self.reaper_cliff_positions.add(reaper.position.rounded)
+                self.previous_reaper_elevations[reaper.tag] = float(current_elevation)
 
         if self.influence_maps.destructables_changed():
             self.init_distance_from_edge(self.influence_maps.get_zone_grid())
             self.zones: Dict[int, Zone] = await self.init_zones(self.distance_from_edge)
-            for position, damage_list in self.all_damage_by_position.items():
-                zone = self.zone_lookup_by_coord.get((position.x, position.y))
-                if zone:
-                    for damage, time in damage_list:
-                        zone.add_damage(damage, time)
+            self.zone_pather = self.create_zone_pather()
+            # replay remembered damage into the new zones, bounded by the memory window
+            for bucket_time, bucket in self.damage_memory.iter_buckets(self.bot.time):
+                for x, y in zip(*np.nonzero(bucket)):
+                    zone = self.zone_lookup_by_coord.get((int(x), int(y)))
+                    if zone:
+                        zone.add_damage(float(bucket[x, y]), bucket_time)
             self.last_refresh_time = self.bot.time
 
-        for position, damage in damage_by_position.items():
-            zone = self.zone_lookup_by_coord.get((position.x, position.y))
-            if zone:
-                zone.add_damage(damage, self.bot.time)
-            if position not in self.all_damage_by_position:
-                self.all_damage_by_position[position] = []
-            self.all_damage_by_position[position].append((damage, self.bot.time))
+        if damage_by_position:
+            for position, damage in damage_by_position.items():
+                zone = self.zone_lookup_by_coord.get((position.x, position.y))
+                if zone:
+                    zone.add_damage(damage, self.bot.time)
+            self.damage_memory.add(np.fromiter(damage_by_position.values(), dtype=np.float64), self.bot.time,
+                                   self.terrain.to_indices(list(damage_by_position.keys())))
 
-        self.influence_maps.update_maps(self.all_damage_by_position)
+        self.influence_maps.update_maps()
+        if self.zone_pather is not None:
+            self.zone_pather.update_costs(self.influence_maps.ground_grid)
         
         # self.draw_influence()
 
     @timed
     def init_distance_from_edge(self, pathing_grid: np.ndarray):
-        self.distance_from_edge: Dict[Tuple, int] = {}
+        max_x = self.bot.game_info.playable_area.width - 1
+        max_y = self.bot.game_info.playable_area.height - 1
+        self.set_distance_from_edge(self.compute_distance_from_edge(pathing_grid, self.terrain.z_heights, max_x, max_y))
+
+    def set_distance_from_edge(self, distances: np.ndarray):
+        self.distance_from_edge = {}
         self.coords_by_distance.clear()
-        # init array with unpathable and put 9999 placeholder for other spots
-        previous_layer = []
-        next_layer = []
-        unpathable = []
-
-        self.coords_by_distance[0] = []
-        for x in range(pathing_grid.shape[0]):
-            for y in range(pathing_grid.shape[1]):
-                coords = (x, y)
-                if pathing_grid[coords] == 0:
-                    next_layer.append(coords)
-                    unpathable.append(coords)
-                    self.distance_from_edge[coords] = 0
-                    self.coords_by_distance[0].append(coords)
+        for current_distance in range(int(distances.max()) + 2):
+            xs, ys = np.nonzero(distances == current_distance)
+            coords_at_distance = list(zip(xs.tolist(), ys.tolist()))
+            self.coords_by_distance[current_distance] = coords_at_distance
+            for coords in coords_at_distance:
+                self.distance_from_edge[coords] = current_distance
+
+    @staticmethod
+    def compute_distance_from_edge(pathing_grid: np.ndarray, z_heights: np.ndarray, max_x: int, max_y: int) -> np.ndarray:
+        """Layered 4-neighbor distance from unpathable cells, -1 where unreached.
+
+        The first layer expands from unpathable cells in every direction. After that a layer
+        only expands to neighbors within 0.5 z-height, so cliffs start a new edge.
+        """
+        width, height = pathing_grid.shape
+        distances = np.full(pathing_grid.shape, -1, dtype=np.int32)
+        distances[pathing_grid == 0] = 0
+        heights = z_heights[:width, :height]
+        # only step right/up from cells below the max coordinate
+        can_step = {
+            (1, 0): np.arange(width)[:, None] < max_x,
+            (0, 1): np.arange(height)[None, :] < max_y,
+        }
 
+        frontier = distances == 0
         current_distance = 0
-        while next_layer:
-            previous_layer = next_layer
+        while frontier.any():
+            reached = np.zeros(pathing_grid.shape, dtype=bool)
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                # move frontier cells (x, y) to their neighbor (x + dx, y + dy)
+                source = (slice(max(-dx, 0), width - max(dx, 0)), slice(max(-dy, 0), height - max(dy, 0)))
+                target = (slice(max(dx, 0), width - max(-dx, 0)), slice(max(dy, 0), height - max(-dy, 0)))
+                step = frontier
+                if (dx, dy) in can_step:
+                    step = step & can_step[(dx, dy)]
+                step = step[source]
+                if current_distance > 0:
+                    step = step & (np.abs(heights[source] - heights[target]) < 0.5)
+                reached[target] |= step
             current_distance += 1
-            self.coords_by_distance[current_distance] = []
-            next_layer = []
-            # logger.debug(f"current layer {previous_layer}")
-            try:
-                for previous_coord in previous_layer:
-                    neighbors = self.neighbors4(previous_coord)
-                    for neighbor in neighbors:
-                        # logger.debug(f"neighbor of {previous_coord}: {neighbor}")
-                        if neighbor not in self.distance_from_edge:
-                            self.distance_from_edge[neighbor] = current_distance
-                            # if not self.has_higher_neighbor(neighbor, self.distance_from_edge):
-                            self.coords_by_distance[current_distance].append(neighbor)
-                            # logger.debug(f"self.distance_from_edge {neighbor} is {self.distance_from_edge[neighbor]}")
-                            next_layer.append(neighbor)
-            except Exception as e:
-                logger.debug(f"error calculating distance from edge at distance {current_distance}: {e}")
+            frontier = reached & (distances == -1)
+            distances[frontier] = current_distance
+        return distances
 
     def get_distance_from_edge(self, point: Point2, unit: Unit | None = None) -> float:
         if unit and unit.is_flying:
@@ -234,7 +273,7 @@ class Map(GeometryMixin):
             if coords in self.distance_from_edge and self.distance_from_edge[coords] == 0:
                 neighbors.update(candidates)
             else:
-                coord_height = self.bot.get_terrain_z_height(Point2(coords))
+                coord_height = self.terrain.z_heights[coords]
                 for candidate in candidates:
                     self.add_if_similar_height(candidate, coord_height, neighbors)
         return self.cached_neighbors4[coords]
@@ -273,13 +312,13 @@ class Map(GeometryMixin):
                     if candidate in self.distance_from_edge and self.distance_from_edge[candidate] == 0:
                         neighbors.add(candidate)
             else:
-                coord_height = self.bot.get_terrain_z_height(Point2(coords))
+                coord_height = self.terrain.z_heights[coords]
                 for candidate in candidates:
                     self.add_if_similar_height(candidate, coord_height, neighbors)
         return self.cached_neighbors8[coords]
 
     def add_if_similar_height(self, coords, height, neighbors: Set[Tuple]):
-        neighbor_height = self.bot.get_terrain_z_height(Point2(coords))
+        neighbor_height = self.terrain.z_heights[coords]
         if abs(height - neighbor_height) < 0.5:
             neighbors.add(coords)
 
@@ -331,7 +370,7 @@ class Map(GeometryMixin):
                                 # check that elevation is similar
                                 next_point_point: Point2 = Point2(next_point)
                                 neighbor_point: Point2 = Point2(neighbor)
-                                if abs(self.bot.get_terrain_z_height(next_point_point) - self.bot.get_terrain_z_height(neighbor_point)) < 1:
+                                if abs(self.terrain.z_heights[next_point] - self.terrain.z_heights[neighbor]) < 1:
                                     # check that the zones are actually close and pathable
                                     # actual_distance = await self.bot.client.query_pathing(average_midpoint1, average_midpoint2)
                                     actual_distance = await self.bot.client.query_pathing(next_point_point, neighbor_point)
@@ -447,7 +486,7 @@ class Map(GeometryMixin):
         return closest_position
     
     def get_distance_by_path(self, start: Point2, end: Point2) -> float:
-        return self.influence_maps.get_path_distance(start, end, self.influence_maps.ground_grid)
+        return InfluenceMaps.path_length(self.get_ground_path(start, end))
         # path = self.get_path(start, end)
         # if path.length < 9999:
         #     return path.length
@@ -495,32 +534,20 @@ class Map(GeometryMixin):
 
     @timed
     def get_pathable_position(self, position: Point2, unit: Unit) -> Point2:
+        grid_name = "ground"
         grid = self.influence_maps.ground_grid
         if unit.is_cloaked:
+            grid_name = "detection"
             grid = self.influence_maps.detection_grid
         elif unit.is_flying:
+            grid_name = "anti_air"
             grid = self.influence_maps.anti_air_grid
-        candidates = self.influence_maps.find_lowest_cost_points(position, 4, grid)
-        if candidates is None:
-            pathable_position = position
-        else:
-            # XXX maybe cache this for performance, would need to use rounded position and store a sorted list of closest positions
-            # most lookups should only have to look at first few candidates
-            pathable_position: Point2 = self.influence_maps.closest_towards_point(candidates, position)
-            try:
-                position_cost = grid[int(position.y), int(position.x)]
-            except IndexError:
-                position_cost = np.inf
-            try:
-                pathable_cost = grid[int(pathable_position.x), int(pathable_position.y)]
-            except IndexError:
-                pathable_position = self.clamp_position_to_map_bounds(pathable_position, unit.position, self.bot)
-                pathable_cost = grid[int(pathable_position.x), int(pathable_position.y)]
-            if position_cost <= pathable_cost and pathable_position._distance_squared(position) < 2.25:
-                pathable_position = position
-            elif unit and not unit.is_flying:
-                self.influence_maps.add_cost((pathable_position[0], pathable_position[1]), unit.radius, self.influence_maps.ground_grid, np.inf)
-        return pathable_position
+        # reserve the cell for ground units so the next unit gets a different one
+        reserve_radius = 0 if unit.is_flying else unit.radius
+        pathable_position = self.influence_maps.pathable_lookup.snap(grid_name, grid, (position.x, position.y), reserve_radius)
+        if pathable_position == (position.x, position.y):
+            return position
+        return Point2(pathable_position)
     
     async def get_path_checking_position(self) -> Point2 | None:
         if self.path_checking_position is None or \
@@ -554,19 +581,19 @@ class Map(GeometryMixin):
                 self.zones_to_check.append(main_zone)
         while self.zones_to_check:
             current_zone = self.zones_to_check.pop(0)
-            for coord in current_zone.coords:
-                point = Point2(coord)
-                if not self.bot.is_visible(point):
-                    # can_place not reliable, also check terrain height
-                    terrain_height = self.bot.get_terrain_z_height(point)
-                    if terrain_height > 0:
-                        # also avoid blocking natural with depot
-                        if self.natural_position and cy_distance_to(point, self.natural_position) <= 4:
-                            continue
-                        can_place = await self.bot.can_place(UnitTypeId.SUPPLYDEPOT, [point])
-                        if can_place[0]:
-                            self.zones_to_check.insert(0, current_zone)
-                            return point
+            if current_zone.coords:
+                zone_coords = np.array(current_zone.coords)
+                # can_place not reliable, also check terrain height
+                candidates = ~self.terrain.visible_at(zone_coords) & (self.terrain.z_heights_at(zone_coords) > 0)
+                for coord in zone_coords[candidates].tolist():
+                    point = Point2(coord)
+                    # also avoid blocking natural with depot
+                    if self.natural_position and cy_distance_to(point, self.natural_position) <= 4:
+                        continue
+                    can_place = await self.bot.can_place(UnitTypeId.SUPPLYDEPOT, [point])
+                    if can_place[0]:
+                        self.zones_to_check.insert(0, current_zone)
+                        return point
             self.checked_zones.add(current_zone)
             for adjacent_zone in current_zone.adjacent_zones:
                 if adjacent_zone not in self.checked_zones:
@@ -0,0 +1,55 @@
+import json
+import os
+from loguru import logger
+from typing import Any, Dict
+
+from sc2.bot_ai import BotAI
+
+
+class MapCache:
+    """Per-map json files for analysis that only depends on the map and spawn.
+
+    Each entry is stored under a section name (e.g. "base_layout") and a key that
+    identifies the map and start location. A version number is stored with the data
+    so stale entries are recomputed after the producing code changes.
+    """
+    CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+    @staticmethod
+    def get_key(bot: BotAI) -> str:
+        start = bot.start_location
+        return f"{bot.game_info.map_name}_{start.x:.1f}_{start.y:.1f}"
+
+    @staticmethod
+    def _get_file_path(section: str, key: str) -> str:
+        safe_key = "".join(c if c.isalnum() or c in "._-" else "_" for c in key)
+        return os.path.join(MapCache.CACHE_DIR, section, f"{safe_key}.json")
+
+    @staticmethod
+    def load(section: str, key: str, version: int) -> Dict[str, Any] | None:
+        file_path = MapCache._get_file_path(section, key)
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            with open(file_path, "r") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"failed to read map cache {file_path}: {e}")
+            return None
+        if cached.get("version") != version:
+            logger.info(f"map cache {file_path} is version {cached.get('version')}, expected {version}")
+            return None
+        return cached.get("data")
+
+    @staticmethod
+    def save(section: str, key: str, version: int, data: Dict[str, Any]) -> bool:
+        file_path = MapCache._get_file_path(section, key)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as cache_file:
+                json.dump({"version": version, "data": data}, cache_file)
+        except OSError as e:
+            # ladder bot directories may be read-only, the data just gets recomputed next game
+            logger.warning(f"failed to write map cache {file_path}: {e}")
+            return False
+        return True
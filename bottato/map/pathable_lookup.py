@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import Dict, Set, Tuple
+
+import numpy as np
+from scipy.ndimage import distance_transform_edt
+
+
+class PathableLookup:
+    """Nearest low-cost and nearest pathable cell for every cell of an influence grid.
+
+    Tables are built lazily with distance_transform_edt the first time a grid is queried
+    after the grids are rebuilt, so a snap is a single array read. Cells handed out to
+    units are reserved here for the rest of the step instead of being written into the
+    shared grid. Grids are indexed [x, y] like the MapAnalyzer grids.
+    """
+    # MapAnalyzer default weight, anything above has some threat or other cost added
+    LOW_COST = 1.0
+
+    def __init__(self, max_distance: float = 4) -> None:
+        self.max_distance = max_distance
+        self.version = 0
+        # grid name -> (low cost distances, low cost indices, pathable distances, pathable indices)
+        self.tables: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.reserved: Dict[str, Set[Tuple[int, int]]] = {}
+
+    def invalidate(self) -> None:
+        """Call when the grids have been rebuilt."""
+        self.version += 1
+        self.tables.clear()
+        self.reserved.clear()
+
+    @staticmethod
+    def compute_nearest(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Distance to and index of the nearest True cell for every cell. Distance is inf if there are none."""
+        if not mask.any():
+            return np.full(mask.shape, np.inf), np.zeros((2,) + mask.shape, dtype=np.int32)
+        distances, indices = distance_transform_edt(~mask, return_indices=True)
+        return distances, indices  # type: ignore
+
+    def get_tables(self, name: str, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if name not in self.tables:
+            pathable = np.isfinite(grid)
+            low_cost = pathable & (grid <= self.LOW_COST)
+            self.tables[name] = self.compute_nearest(low_cost) + self.compute_nearest(pathable)
+        return self.tables[name]
+
+    def snap(self, name: str, grid: np.ndarray, position: Tuple[float, float], reserve_radius: float = 0) -> Tuple[float, float]:
+        """Position if its cell is low cost and free, otherwise the center of the nearest such cell.
+
+        If every low cost cell within max_distance is taken or there are none, falls back to the
+        cheapest pathable cell within max_distance (nearest among equal costs), then to the
+        original position. Snapped cells are reserved when reserve_radius > 0.
+        """
+        width, height = grid.shape
+        x = min(max(int(position[0]), 0), width - 1)
+        y = min(max(int(position[1]), 0), height - 1)
+        reserved = self.reserved.setdefault(name, set())
+        low_cost_distances, low_cost_indices, pathable_distances, _ = self.get_tables(name, grid)
+
+        if low_cost_distances[x, y] == 0 and (x, y) not in reserved:
+            return position
+
+        cell: Tuple[int, int] | None = None
+        if low_cost_distances[x, y] <= self.max_distance:
+            cell = (int(low_cost_indices[0, x, y]), int(low_cost_indices[1, x, y]))
+            if cell in reserved:
+                cell = self.find_unreserved(grid, (x, y), reserved)
+        if cell is None and pathable_distances[x, y] <= self.max_distance:
+            cell = self.find_lowest_cost(grid, (x, y), reserved)
+        if cell is None:
+            return position
+
+        if reserve_radius > 0:
+            self.reserve(name, cell, reserve_radius)
+        return (cell[0] + 0.5, cell[1] + 0.5)
+
+    def find_unreserved(self, grid: np.ndarray, cell: Tuple[int, int], reserved: Set[Tuple[int, int]]) -> Tuple[int, int] | None:
+        """Closest low cost cell within max_distance that isn't reserved."""
+        radius = int(np.ceil(self.max_distance))
+        x_min, x_max = max(cell[0] - radius, 0), min(cell[0] + radius + 1, grid.shape[0])
+        y_min, y_max = max(cell[1] - radius, 0), min(cell[1] + radius + 1, grid.shape[1])
+        window = grid[x_min:x_max, y_min:y_max]
+        xs, ys = np.nonzero(np.isfinite(window) & (window <= self.LOW_COST))
+        if xs.size == 0:
+            return None
+        xs = xs + x_min
+        ys = ys + y_min
+        distances_squared = (xs - cell[0]) ** 2 + (ys - cell[1]) ** 2
+        for i in np.argsort(distances_squared, kind="stable"):
+            if distances_squared[i] > self.max_distance ** 2:
+                break
+            candidate = (int(xs[i]), int(ys[i]))
+            if candidate not in reserved:
+                return candidate
+        return None
+
+    def find_lowest_cost(self, grid: np.ndarray, cell: Tuple[int, int], reserved: Set[Tuple[int, int]]) -> Tuple[int, int] | None:
+        """Cheapest pathable cell within max_distance, nearest first among equal costs, preferring unreserved cells."""
+        radius = int(np.ceil(self.max_distance))
+        x_min, x_max = max(cell[0] - radius, 0), min(cell[0] + radius + 1, grid.shape[0])
+        y_min, y_max = max(cell[1] - radius, 0), min(cell[1] + radius + 1, grid.shape[1])
+        window = grid[x_min:x_max, y_min:y_max]
+        xs, ys = np.nonzero(np.isfinite(window))
+        xs = xs + x_min
+        ys = ys + y_min
+        distances_squared = (xs - cell[0]) ** 2 + (ys - cell[1]) ** 2
+        in_range = distances_squared <= self.max_distance ** 2
+        xs, ys, distances_squared = xs[in_range], ys[in_range], distances_squared[in_range]
+        if xs.size == 0:
+            return None
+        candidates = [(int(xs[i]), int(ys[i])) for i in np.lexsort((distances_squared, grid[xs, ys]))]
+        for candidate in candidates:
+            if candidate not in reserved:
+                return candidate
+        return candidates[0]
+
+    def reserve(self, name: str, cell: Tuple[int, int], radius: float) -> None:
+        reserved = self.reserved.setdefault(name, set())
+        reach = int(np.ceil(radius))
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                if dx * dx + dy * dy <= radius * radius:
+                    reserved.add((cell[0] + dx, cell[1] + dy))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.position import Point2
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+
+class Terrain:
+    """Terrain height, pathing, placement and visibility as [x, y] indexed arrays.
+
+    The batched accessors take any number of points (an (n, 2) array or a list of
+    Point2/tuples) and answer for all of them with one array read. Points are rounded
+    to grid cells the same way BotAI.get_terrain_z_height and friends do, by flooring.
+    """
+    def __init__(self, bot: BotAI) -> None:
+        self.bot = bot
+        self.heights: np.ndarray = bot.game_info.terrain_height.data_numpy.T.copy()
+        self.z_heights: np.ndarray = -16 + 32 * self.heights.astype(np.float64) / 255
+        self.placement: np.ndarray = bot.game_info.placement_grid.data_numpy.T == 1
+        self.width, self.height = self.heights.shape
+        self._visibility_loop = -1
+        self._visibility: np.ndarray = np.zeros(self.heights.shape, dtype=bool)
+
+    @property
+    def pathing(self) -> np.ndarray:
+        # pathing grid changes as structures are built, always read the current one
+        return self.bot.game_info.pathing_grid.data_numpy.T == 1
+
+    @property
+    def visibility(self) -> np.ndarray:
+        if self._visibility_loop != self.bot.state.game_loop:
+            self._visibility = self.bot.state.visibility.data_numpy.T == 2
+            self._visibility_loop = self.bot.state.game_loop
+        return self._visibility
+
+    def to_indices(self, points: np.ndarray | Sequence[Point2] | Iterable[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Floored and clamped grid indices for points."""
+        return Terrain.grid_indices(points, (self.width, self.height))
+
+    @staticmethod
+    def grid_indices(points: np.ndarray | Sequence[Point2] | Iterable[Tuple[float, float]], shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices of the cells containing points in an [x, y] grid of shape, clamped to the grid.
+
+        Floors like Point2.rounded, BotAI.is_visible and get_terrain_z_height, so cell (x, y)
+        covers [x, x + 1) x [y, y + 1).
+        """
+        coordinates = np.asarray(points if isinstance(points, np.ndarray) else list(points), dtype=np.float64).reshape(-1, 2)
+        xs = np.clip(np.floor(coordinates[:, 0]).astype(np.int64), 0, shape[0] - 1)
+        ys = np.clip(np.floor(coordinates[:, 1]).astype(np.int64), 0, shape[1] - 1)
+        return xs, ys
+
+    def z_heights_at(self, points) -> np.ndarray:
+        return self.z_heights[self.to_indices(points)]
+
+    def heights_at(self, points) -> np.ndarray:
+        return self.heights[self.to_indices(points)]
+
+    def pathable_at(self, points) -> np.ndarray:
+        return self.pathing[self.to_indices(points)]
+
+    def placeable_at(self, points) -> np.ndarray:
+        return self.placement[self.to_indices(points)]
+
+    def visible_at(self, points) -> np.ndarray:
+        return self.visibility[self.to_indices(points)]
+
+    def z_height(self, point: Point2 | Tuple[float, float]) -> float:
+        return float(self.z_heights_at([point])[0])
+
+    def path_distances(self, sources, targets) -> np.ndarray:
+        """Ground distance from each source to each target, inf where unreachable."""
+        return self.compute_path_distances(self.pathing, self.to_indices(sources), self.to_indices(targets))
+
+    @staticmethod
+    def compute_path_distances(pathable: np.ndarray, sources: Tuple[np.ndarray, np.ndarray],
+                               targets: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        """One 8-connected Dijkstra flood per source over the pathable cells of an [x, y] grid.
+
+        Sources and targets are (xs, ys) index arrays. Sources or targets on unpathable
+        cells are treated as pathable so points on building footprints still connect.
+        """
+        pathable = pathable.copy()
+        pathable[sources] = True
+        pathable[targets] = True
+        width, height = pathable.shape
+        node_ids = np.arange(width * height).reshape(width, height)
+        rows: list = []
+        cols: list = []
+        weights: list = []
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            x_slice_from = slice(0, width - dx)
+            x_slice_to = slice(dx, width)
+            y_slice_from = slice(max(-dy, 0), height - max(dy, 0))
+            y_slice_to = slice(max(dy, 0), height - max(-dy, 0))
+            connected = pathable[x_slice_from, y_slice_from] & pathable[x_slice_to, y_slice_to]
+            if dx and dy:
+                # don't cut corners between two blocked cells
+                connected &= pathable[x_slice_to, y_slice_from] | pathable[x_slice_from, y_slice_to]
+            rows.append(node_ids[x_slice_from, y_slice_from][connected])
+            cols.append(node_ids[x_slice_to, y_slice_to][connected])
+            weights.append(np.full(rows[-1].shape, np.sqrt(2) if dx and dy else 1.0))
+        graph = coo_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                           shape=(width * height, width * height)).tocsr()
+        source_ids = node_ids[sources]
+        distances = dijkstra(graph, directed=False, indices=np.unique(source_ids))
+        row_lookup = {node: i for i, node in enumerate(np.unique(source_ids))}
+        return distances[[row_lookup[node] for node in source_ids]][:, node_ids[targets]]
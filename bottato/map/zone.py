@@ -7,6 +7,7 @@ from cython_extensions.geometry import cy_distance_to
 from sc2.bot_ai import BotAI
 from sc2.position import Point2, Point3
 
+from bottato.map.damage_memory import DamageMemory
 from bottato.mixins import GeometryMixin
 
 
@@ -86,21 +87,17 @@ class Zone:
         self.points_for_drawing: Dict[tuple, Point3] = {}
         self.midpoint3: Point3 | None = None
         self.all_midpoints3: List[Point3] = []
-        self.damage_received: List[tuple[float, float]] = []  # (amount, time)
+        self.damage_received: DamageMemory = DamageMemory()
         logger.debug(f"creating zone {id} from {midpoint}")
 
     def __repr__(self) -> str:
         return f"Zone({self.id}, {self.midpoint}, {self.radius})"
     
     def add_damage(self, amount: float, time: float) -> None:
-        self.damage_received.append((amount, time))
+        self.damage_received.add(amount, time)
 
     def get_damage_in_last_seconds(self, seconds: float, current_time: float) -> float:
-        total_damage = 0.0
-        for damage, time in self.damage_received:
-            if current_time - time <= seconds:
-                total_damage += damage
-        return total_damage
+        return float(self.damage_received.in_last(seconds, current_time))
 
     def add_adjacent_zone(self, zone: Zone):
         adjacent_zone: Zone
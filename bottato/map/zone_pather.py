@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+from scipy.ndimage import find_objects
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+from sc2.position import Point2
+
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.mixins import timed
+
+Cell = Tuple[int, int]
+
+
+class ZoneGraph:
+    """8-connected cost graph over the pathable cells of one zone, indexed like np.argwhere(mask)."""
+    def __init__(self, zone_id: int, labels: np.ndarray, costs: np.ndarray, origin: Cell) -> None:
+        self.origin = origin
+        mask = (labels == zone_id) & np.isfinite(costs)
+        self.cells: np.ndarray = np.argwhere(mask) + np.array(origin)
+        self.node_ids: np.ndarray = np.full(mask.shape, -1, dtype=np.int64)
+        self.node_ids[mask] = np.arange(len(self.cells))
+        width, height = mask.shape
+        rows: list = []
+        cols: list = []
+        weights: list = []
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            x_slice_from = slice(0, width - dx)
+            x_slice_to = slice(dx, width)
+            y_slice_from = slice(max(-dy, 0), height - max(dy, 0))
+            y_slice_to = slice(max(dy, 0), height - max(-dy, 0))
+            connected = mask[x_slice_from, y_slice_from] & mask[x_slice_to, y_slice_to]
+            if dx and dy:
+                # don't cut corners between two blocked cells
+                connected &= mask[x_slice_to, y_slice_from] | mask[x_slice_from, y_slice_to]
+            rows.append(self.node_ids[x_slice_from, y_slice_from][connected])
+            cols.append(self.node_ids[x_slice_to, y_slice_to][connected])
+            step = np.sqrt(2) if dx and dy else 1.0
+            weights.append(step * (costs[x_slice_from, y_slice_from][connected] + costs[x_slice_to, y_slice_to][connected]) / 2)
+        self.graph = coo_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                                shape=(len(self.cells), len(self.cells))).tocsr()
+
+    def node_id(self, cell: Cell) -> int:
+        x, y = cell[0] - self.origin[0], cell[1] - self.origin[1]
+        if 0 <= x < self.node_ids.shape[0] and 0 <= y < self.node_ids.shape[1]:
+            return int(self.node_ids[x, y])
+        return -1
+
+    def search(self, cell: Cell) -> ZoneSearch:
+        distances, predecessors = dijkstra(self.graph, directed=False, indices=self.node_id(cell), return_predecessors=True)
+        return ZoneSearch(self, distances, predecessors)
+
+
+class ZoneSearch:
+    """Dijkstra flood from one cell through its zone: costs to any cell and the cells on the way back."""
+    def __init__(self, graph: ZoneGraph, distances: np.ndarray, predecessors: np.ndarray) -> None:
+        self.graph = graph
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def cost(self, cell: Cell) -> float:
+        node = self.graph.node_id(cell)
+        return float(self.distances[node]) if node >= 0 else math.inf
+
+    def trace(self, cell: Cell) -> List[Cell]:
+        """Cells from cell back to the search source."""
+        node = self.graph.node_id(cell)
+        cells: List[Cell] = []
+        while node >= 0:
+            cells.append((int(self.graph.cells[node, 0]), int(self.graph.cells[node, 1])))
+            node = int(self.predecessors[node])
+        return cells
+
+
+class ZonePather:
+    """Hierarchical (HPA*) pathing over an [x, y] cost grid with Map zones as the clusters.
+
+    Every entrance between two adjacent zones gets portal cell pairs, one each side, every
+    MN.ZONE_PORTAL_SPACING cells along it. Portal to portal costs inside a zone come from a
+    Dijkstra over just that zone's cells, so a query is an A* over portals plus one flood
+    each in the start and goal zones, whatever the size of the map. The floods from each
+    portal are kept, so the returned path follows the cells between portals and its length
+    is the real walking distance. update_costs diffs the new grid against the last and only
+    redoes the zones whose cells changed.
+    """
+    def __init__(self, labels: np.ndarray, adjacent_zones: Set[Tuple[int, int]]) -> None:
+        # zone id of each cell, -1 outside all zones
+        self.labels = labels
+        self.adjacent_zones = {(min(pair), max(pair)) for pair in adjacent_zones}
+        self.zone_slices: Dict[int, Tuple[slice, slice]] = {
+            zone_id: slices for zone_id, slices in enumerate(find_objects(labels + 1)) if slices is not None
+        }
+        self.grid: np.ndarray | None = None
+        self.pathable: np.ndarray = np.zeros(labels.shape, dtype=bool)
+        self.min_cost = 1.0
+        self.zone_graphs: Dict[int, ZoneGraph] = {}
+        self.portals_by_zone: Dict[int, List[Cell]] = {}
+        self.portal_pairs: List[Tuple[Cell, Cell]] = []
+        # portal -> portals reachable from it, inside its zone or across the entrance
+        self.zone_edges: Dict[Cell, Dict[Cell, float]] = {}
+        self.entrance_edges: Dict[Cell, Dict[Cell, float]] = {}
+        # flood from each portal through its zone, for tracing the cells between portals
+        self.portal_searches: Dict[Cell, ZoneSearch] = {}
+
+    @timed
+    def update_costs(self, grid: np.ndarray) -> None:
+        if grid.shape != self.labels.shape:
+            return
+        pathable = np.isfinite(grid)
+        if self.grid is None:
+            changed_zones = set(self.zone_slices)
+        else:
+            changed = (self.grid != grid) & (pathable | self.pathable)
+            changed_zones = set(np.unique(self.labels[changed & (self.labels >= 0)]).tolist())
+        pathability_changed = self.grid is None or bool(np.any(pathable != self.pathable))
+        self.grid = grid
+        self.pathable = pathable
+        self.min_cost = float(grid[pathable].min()) if pathable.any() else 1.0
+
+        if pathability_changed:
+            previous_portals = self.portals_by_zone
+            self.find_portals()
+            changed_zones |= {zone_id for zone_id in self.zone_slices
+                              if self.portals_by_zone.get(zone_id) != previous_portals.get(zone_id)}
+        for zone_id in changed_zones:
+            self.connect_zone(zone_id)
+        self.entrance_edges = {}
+        for first, second in self.portal_pairs:
+            cost = float(grid[first] + grid[second]) / 2
+            self.entrance_edges.setdefault(first, {})[second] = cost
+            self.entrance_edges.setdefault(second, {})[first] = cost
+
+    def find_portals(self) -> None:
+        """Portal pairs along every entrance between adjacent zones, from the current pathable cells."""
+        labels = self.labels
+        width, height = labels.shape
+        # (lower zone, higher zone) -> lower zone cell -> neighbouring higher zone cell
+        crossings: Dict[Tuple[int, int], Dict[Cell, Cell]] = {}
+        for dx, dy in ((1, 0), (0, 1)):
+            from_labels = labels[:width - dx, :height - dy]
+            to_labels = labels[dx:, dy:]
+            crossing = (from_labels >= 0) & (to_labels >= 0) & (from_labels != to_labels) \
+                & self.pathable[:width - dx, :height - dy] & self.pathable[dx:, dy:]
+            for x, y in zip(*np.nonzero(crossing)):
+                cell: Cell = (int(x), int(y))
+                neighbor: Cell = (int(x) + dx, int(y) + dy)
+                zone_id, neighbor_zone_id = int(labels[cell]), int(labels[neighbor])
+                if zone_id > neighbor_zone_id:
+                    zone_id, neighbor_zone_id, cell, neighbor = neighbor_zone_id, zone_id, neighbor, cell
+                if (zone_id, neighbor_zone_id) in self.adjacent_zones:
+                    crossings.setdefault((zone_id, neighbor_zone_id), {}).setdefault(cell, neighbor)
+
+        self.portal_pairs = []
+        portals: Dict[int, Set[Cell]] = {}
+        for (zone_id, neighbor_zone_id), cell_pairs in crossings.items():
+            for entrance in self.split_entrances(list(cell_pairs)):
+                for cell in ZonePather.place_portals(entrance, MN.ZONE_PORTAL_SPACING):
+                    self.portal_pairs.append((cell, cell_pairs[cell]))
+                    portals.setdefault(zone_id, set()).add(cell)
+                    portals.setdefault(neighbor_zone_id, set()).add(cell_pairs[cell])
+        self.portals_by_zone = {zone_id: sorted(cells) for zone_id, cells in portals.items()}
+
+    @staticmethod
+    def split_entrances(cells: List[Cell]) -> List[List[Cell]]:
+        """Group border cells into 8-connected runs, one per entrance."""
+        remaining = set(cells)
+        entrances: List[List[Cell]] = []
+        while remaining:
+            entrance = [remaining.pop()]
+            unchecked = [entrance[0]]
+            while unchecked:
+                x, y = unchecked.pop()
+                for neighbor in ((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                    if neighbor in remaining:
+                        remaining.remove(neighbor)
+                        entrance.append(neighbor)
+                        unchecked.append(neighbor)
+            entrances.append(entrance)
+        return entrances
+
+    @staticmethod
+    def place_portals(entrance: List[Cell], spacing: int) -> List[Cell]:
+        """Middle cell of each spacing-long stretch of an entrance, ordered along its longer side."""
+        xs = [cell[0] for cell in entrance]
+        ys = [cell[1] for cell in entrance]
+        if max(xs) - min(xs) >= max(ys) - min(ys):
+            ordered = sorted(entrance)
+        else:
+            ordered = sorted(entrance, key=lambda cell: (cell[1], cell[0]))
+        stretches = max(1, round(len(ordered) / spacing))
+        stretch_length = len(ordered) / stretches
+        return [ordered[int((i + 0.5) * stretch_length)] for i in range(stretches)]
+
+    def connect_zone(self, zone_id: int) -> None:
+        """Rebuild a zone's cell graph and the costs between its portals."""
+        if self.grid is None or zone_id not in self.zone_slices:
+            return
+        x_slice, y_slice = self.zone_slices[zone_id]
+        graph = ZoneGraph(zone_id, self.labels[x_slice, y_slice], self.grid[x_slice, y_slice],
+                          (x_slice.start, y_slice.start))
+        self.zone_graphs[zone_id] = graph
+        portals = [portal for portal in self.portals_by_zone.get(zone_id, []) if graph.node_id(portal) >= 0]
+        for portal in portals:
+            self.zone_edges[portal] = {}
+            self.portal_searches.pop(portal, None)
+        if len(portals) < 2:
+            return
+        portal_ids = [graph.node_id(portal) for portal in portals]
+        distances, predecessors = dijkstra(graph.graph, directed=False, indices=portal_ids, return_predecessors=True)
+        for i, portal in enumerate(portals):
+            self.portal_searches[portal] = ZoneSearch(graph, distances[i], predecessors[i])
+            for j, other_portal in enumerate(portals):
+                if i != j and np.isfinite(distances[i, portal_ids[j]]):
+                    self.zone_edges[portal][other_portal] = float(distances[i, portal_ids[j]])
+
+    def nearest_cell(self, position: Point2) -> Tuple[Cell, int] | None:
+        """Pathable zone cell at or next to position, and its zone."""
+        x, y = int(position.x), int(position.y)
+        width, height = self.labels.shape
+        best: Tuple[Cell, int] | None = None
+        best_distance = math.inf
+        for dx in range(-2, 3):
+            for dy in range(-2, 3):
+                cell = (x + dx, y + dy)
+                if not (0 <= cell[0] < width and 0 <= cell[1] < height):
+                    continue
+                zone_id = int(self.labels[cell])
+                if zone_id < 0 or not self.pathable[cell] or zone_id not in self.zone_graphs:
+                    continue
+                distance = dx * dx + dy * dy
+                if distance < best_distance:
+                    best_distance = distance
+                    best = (cell, zone_id)
+        return best
+
+    @timed
+    def get_path(self, start: Point2, end: Point2) -> List[Point2] | None:
+        """Path from start to end through every cell on the way, None if either end is off the grid
+        or there's no way through."""
+        if self.grid is None:
+            return None
+        start_cell_zone = self.nearest_cell(start)
+        end_cell_zone = self.nearest_cell(end)
+        if start_cell_zone is None or end_cell_zone is None:
+            return None
+        start_cell, start_zone = start_cell_zone
+        end_cell, end_zone = end_cell_zone
+        start_search = self.zone_graphs[start_zone].search(start_cell)
+        end_search = start_search if end_zone == start_zone else self.zone_graphs[end_zone].search(end_cell)
+
+        best_cost = start_search.cost(end_cell) if end_zone == start_zone else math.inf
+        best_portal: Cell | None = None
+        end_costs = {portal: end_search.cost(portal) for portal in self.portals_by_zone.get(end_zone, [])}
+        costs: Dict[Cell, float] = {}
+        previous: Dict[Cell, Cell | None] = {}
+        heap: List[Tuple[float, float, Cell]] = []
+        for portal in self.portals_by_zone.get(start_zone, []):
+            cost = start_search.cost(portal)
+            if cost < math.inf:
+                costs[portal] = cost
+                previous[portal] = None
+                heapq.heappush(heap, (cost + self.estimate(portal, end_cell), cost, portal))
+        while heap:
+            estimate, cost, portal = heapq.heappop(heap)
+            if estimate >= best_cost:
+                break
+            if cost > costs[portal]:
+                continue
+            if cost + end_costs.get(portal, math.inf) < best_cost:
+                best_cost = cost + end_costs[portal]
+                best_portal = portal
+            for edges in (self.zone_edges.get(portal, {}), self.entrance_edges.get(portal, {})):
+                for next_portal, edge_cost in edges.items():
+                    next_cost = cost + edge_cost
+                    if next_cost < costs.get(next_portal, math.inf):
+                        costs[next_portal] = next_cost
+                        previous[next_portal] = portal
+                        heapq.heappush(heap, (next_cost + self.estimate(next_portal, end_cell), next_cost, next_portal))
+        if best_cost == math.inf:
+            return None
+
+        if best_portal is None:
+            cells = start_search.trace(end_cell)[::-1]
+        else:
+            portals: List[Cell] = []
+            portal: Cell | None = best_portal
+            while portal is not None:
+                portals.append(portal)
+                portal = previous[portal]
+            portals.reverse()
+            cells = start_search.trace(portals[0])[::-1]
+            for portal, next_portal in zip(portals, portals[1:]):
+                if self.labels[portal] == self.labels[next_portal]:
+                    # across the zone, next portal back to this one reversed
+                    cells += self.portal_searches[portal].trace(next_portal)[::-1][1:]
+                else:
+                    # neighbouring cells across the entrance
+                    cells.append(next_portal)
+            cells += end_search.trace(portals[-1])[1:]
+        return [start] + [Point2(cell) for cell in cells[1:-1]] + [end]
+
+    def estimate(self, cell: Cell, end_cell: Cell) -> float:
+        return math.hypot(cell[0] - end_cell[0], cell[1] - end_cell[1]) * self.min_cost
@@ -0,0 +1,158 @@
+from typing import Callable, Dict, List, Set, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.mixins import timed
+
+
+class AoeSpell:
+    """An area spell as AoePlanner sees it: who casts it and what a cast is worth.
+
+    enemy_value and friendly_value give each unit caught in the radius a weight (0 to ignore it);
+    a cast's value is the enemy total minus the friendly total, and min_value is what a cast has
+    to be worth for that caster to bother.
+    """
+    def __init__(self,
+                 name: str,
+                 caster_types: Set[UnitTypeId],
+                 energy_cost: float,
+                 cast_range: float,
+                 radius: float,
+                 enemy_value: Callable[[Unit], float],
+                 friendly_value: Callable[[Unit], float],
+                 min_value: Callable[[Unit], float]):
+        self.name = name
+        self.caster_types = caster_types
+        self.energy_cost = energy_cost
+        self.cast_range = cast_range
+        self.radius = radius
+        self.enemy_value = enemy_value
+        self.friendly_value = friendly_value
+        self.min_value = min_value
+
+
+class AoePlanner:
+    """Chooses area spell targets for every caster of a spell at once, once per step.
+
+    Candidate centers are enemy positions. Each is scored by the weighted enemies in the
+    radius minus the friendly units it would also hit, then casters are handed the best
+    candidate in their range one at a time, and the enemies a cast covers stop counting for
+    the next caster so two casters never spend their energy on the same group. Recent casts
+    count the same way until they land.
+    """
+    bot: BotAI
+    # spell name -> caster tag -> enemy to center the spell on
+    plans: Dict[str, Dict[int, Unit]] = {}
+    plan_times: Dict[str, float] = {}
+    # spell name -> (center, time) of casts that haven't landed yet
+    recent_casts: Dict[str, List[Tuple[Point2, float]]] = {}
+
+    @staticmethod
+    def init(bot: BotAI):
+        AoePlanner.bot = bot
+        AoePlanner.plans = {}
+        AoePlanner.plan_times = {}
+        AoePlanner.recent_casts = {}
+
+    @staticmethod
+    def get_target(spell: AoeSpell, caster: Unit) -> Unit | None:
+        if AoePlanner.plan_times.get(spell.name) != AoePlanner.bot.time:
+            AoePlanner.plan(spell)
+        return AoePlanner.plans[spell.name].get(caster.tag)
+
+    @staticmethod
+    def record_cast(spell: AoeSpell, position: Point2):
+        AoePlanner.recent_casts.setdefault(spell.name, []).append((position, AoePlanner.bot.time))
+
+    @staticmethod
+    @timed
+    def plan(spell: AoeSpell):
+        bot = AoePlanner.bot
+        AoePlanner.plan_times[spell.name] = bot.time
+        AoePlanner.plans[spell.name] = {}
+        casts = [(position, cast_time) for position, cast_time in AoePlanner.recent_casts.get(spell.name, [])
+                 if bot.time - cast_time < MN.AOE_RECENT_CAST_SECONDS]
+        AoePlanner.recent_casts[spell.name] = casts
+
+        casters = [unit for unit in bot.units
+                   if unit.type_id in spell.caster_types and unit.energy >= spell.energy_cost]
+        if not casters:
+            return
+        enemies = []
+        enemy_weights = []
+        for enemy in bot.enemy_units:
+            value = spell.enemy_value(enemy)
+            if value > 0:
+                enemies.append(enemy)
+                enemy_weights.append(value)
+        if not enemies:
+            return
+        friendlies = []
+        friendly_weights = []
+        for unit in bot.units:
+            value = spell.friendly_value(unit)
+            if value > 0:
+                friendlies.append(unit.position)
+                friendly_weights.append(value)
+
+        enemy_positions = np.array([enemy.position for enemy in enemies], dtype=np.float64)
+        weights = np.array(enemy_weights, dtype=np.float64)
+        for position, _ in casts:
+            # already covered by a spell on its way
+            weights[np.sum((enemy_positions - position) ** 2, axis=1) <= spell.radius ** 2] = 0
+        assigned = AoePlanner.solve(
+            np.array([caster.position for caster in casters], dtype=np.float64),
+            np.array([spell.min_value(caster) for caster in casters], dtype=np.float64),
+            enemy_positions,
+            weights,
+            np.array(friendlies, dtype=np.float64).reshape(-1, 2),
+            np.array(friendly_weights, dtype=np.float64),
+            spell.radius,
+            spell.cast_range,
+        )
+        for i, j in enumerate(assigned):
+            if j >= 0:
+                AoePlanner.plans[spell.name][casters[i].tag] = enemies[j]
+
+    @staticmethod
+    def solve(caster_positions: np.ndarray, min_values: np.ndarray,
+              enemy_positions: np.ndarray, enemy_weights: np.ndarray,
+              friendly_positions: np.ndarray, friendly_weights: np.ndarray,
+              radius: float, cast_range: float) -> np.ndarray:
+        """Index of the enemy each caster should center its spell on, -1 for no cast.
+
+        Repeatedly takes the best (caster, center) pair that is in range and worth the caster's
+        min value, then zeroes the weight of the enemies that cast covers.
+        """
+        assigned = np.full(len(caster_positions), -1, dtype=np.int64)
+        radius_squared = radius ** 2
+
+        def squared_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            differences = a[:, None, :] - b[None, :, :]
+            return np.einsum("ijk,ijk->ij", differences, differences)
+
+        # enemies and friendlies under a spell centered on each enemy
+        covers = squared_distances(enemy_positions, enemy_positions) <= radius_squared
+        friendly_cost = np.zeros(len(enemy_positions))
+        if len(friendly_positions):
+            friendly_cost = (squared_distances(enemy_positions, friendly_positions) <= radius_squared) @ friendly_weights
+        in_range = squared_distances(caster_positions, enemy_positions) <= cast_range ** 2
+
+        weights = enemy_weights.astype(np.float64)
+        available = np.ones(len(caster_positions), dtype=bool)
+        while available.any():
+            values = covers @ weights - friendly_cost
+            pair_values = np.where(in_range & available[:, None] & (values[None, :] >= min_values[:, None]),
+                                   values[None, :], -np.inf)
+            i, j = np.unravel_index(int(np.argmax(pair_values)), pair_values.shape)
+            if pair_values[i, j] == -np.inf or values[j] <= 0:
+                break
+            assigned[i] = j
+            available[i] = False
+            weights[covers[j]] = 0
+        return assigned
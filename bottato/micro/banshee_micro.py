@@ -60,18 +60,18 @@ class BansheeMicro(BaseUnitMicro, GeometryMixin):
         attack_range_buffer = 0 if can_attack else 5
         target_candidates = self.get_target_candidates(unit)
         if target_candidates and can_attack:
-            return await self._kite(unit, target_candidates)
+            return self._kite(unit, target_candidates)
 
         if force_move:
             return UnitMicroType.NONE
         nearest_priority, nearest_priority_distance = self.tactics.enemy.get_closest_target(unit, included_types=UnitTypes.get_priority_target_types(unit))
         maximum_hunting_distance = 150
         if nearest_priority and nearest_priority_distance < maximum_hunting_distance:
-            return await self._kite(unit, nearest_priority)
+            return self._kite(unit, nearest_priority)
         if self.cloak_researched and self.bot.enemy_units((UnitTypeId.OBSERVER, UnitTypeId.OVERSEER, UnitTypeId.RAVEN)).amount == 0:
             nearest_enemy, enemy_distance = self.tactics.enemy.get_closest_target(unit, include_structures=False)
             if nearest_enemy and enemy_distance < 20 and can_attack:
-                return await self._kite(unit, nearest_enemy)
+                return self._kite(unit, nearest_enemy)
         return UnitMicroType.NONE
     
     def get_target_candidates(self, unit: Unit) -> Units:
@@ -106,7 +106,7 @@ class BansheeMicro(BaseUnitMicro, GeometryMixin):
             targets = self.tactics.enemy.in_attack_range(unit, enemy_candidates, 5)
         
         if targets:
-            return await self._kite(unit, targets)
+            return self._kite(unit, targets)
 
         if self.tactics.enemy.can_be_attacked(unit, self.tactics.enemy.get_recent_enemies()):
             threat_range_buffer = 3 if targets and can_attack and unit.health_percentage > self.harass_retreat_health else 5
@@ -131,12 +131,12 @@ class BansheeMicro(BaseUnitMicro, GeometryMixin):
             nearest_workers = self.tactics.enemy.get_closest_targets(unit, included_types=UnitTypes.WORKER_TYPES)
             if nearest_workers:
                 targets = nearest_workers.sorted(key=lambda t: t.health + t.shield)
-                await self._kite(unit, targets)
+                self._kite(unit, targets)
                 return UnitMicroType.ATTACK
             
         if cy_distance_to(unit.position, harass_location) < 5:
             targets = self.bot.enemy_structures.in_attack_range_of(unit, 5)
-            await self._kite(unit, targets)
+            self._kite(unit, targets)
         return UnitMicroType.NONE
 
     @timed_async
@@ -172,7 +172,7 @@ class BansheeMicro(BaseUnitMicro, GeometryMixin):
         # below harass_retreat_health: always retreat
         # below harass_attack_health: retreat if threats
         if threats or is_below_retreat_health:
-            _, retreat_position = await self._get_retreat_destination(unit, threats)
+            _, retreat_position = self._get_retreat_destination(unit, threats)
             unit.move(retreat_position)
             return UnitMicroType.RETREAT
 
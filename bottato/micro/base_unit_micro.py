@@ -4,6 +4,7 @@ from __future__ import annotations
 from loguru import logger
 from typing import Dict, List, Tuple
 
+import numpy as np
 from cython_extensions.general_utils import cy_in_pathing_grid_burny
 from cython_extensions.geometry import (
     cy_distance_to,
@@ -21,6 +22,7 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.enemy import Enemy
 from bottato.enums import (
     CustomEffectTargetArea,
     CustomEffectType,
@@ -28,12 +30,13 @@ from bottato.enums import (
     UnitMicroType,
 )
 from bottato.log_helper import LogHelper
-from bottato.magic_numbers import MagicNumbers as MN
 from bottato.map_specifics import MapSpecifics
-from bottato.micro.custom_effect import CustomEffect
+from bottato.micro.effect_hazards import EffectHazards
+from bottato.micro.target_allocator import TargetAllocator
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.tactics import Tactics
 from bottato.unit_reference_helper import UnitReferenceHelper
+from bottato.unit_state_store import UnitComponent, UnitStateStore, UnitTagSet
 from bottato.unit_types import UnitTypes
 
 
@@ -46,18 +49,18 @@ class BaseUnitMicro(GeometryMixin):
     time_in_frames_to_attack: float = 0.25 * 22.4
 
     # static data sets for sharing between micros. reference with BaseUnitMicro.some_set instead of self.some_set
-    scout_tags: set[int] = set()
-    harass_tags: set[int] = set()
-    healing_unit_tags: set[int] = set()
-    tanks_being_retreated_to: Dict[int, float] = {}
-    tanks_being_retreated_to_prev_frame: Dict[int, float] = {}
-    harass_location_reached_tags: set[int] = set()
+    scout_tags: UnitTagSet = UnitStateStore.register_set("micro.scout_tags")
+    harass_tags: UnitTagSet = UnitStateStore.register_set("micro.harass_tags")
+    healing_unit_tags: UnitTagSet = UnitStateStore.register_set("micro.healing_unit_tags")
+    tanks_being_retreated_to: UnitComponent = UnitStateStore.register("micro.tanks_being_retreated_to")
+    tanks_being_retreated_to_prev_frame: UnitComponent = UnitStateStore.register("micro.tanks_being_retreated_to_prev_frame")
+    harass_location_reached_tags: UnitTagSet = UnitStateStore.register_set("micro.harass_location_reached_tags")
+    # repairer sets and maps are rebuilt every step in reset_tag_sets, so dead tags never pile up
     repairer_tags: set[int] = set()
     repairer_tags_prev_frame: set[int] = set()
     repairers_by_target: Dict[int, List[int]] = {}  # target unit tag -> list of assigned repairer tags
     repairers_by_target_prev_frame: Dict[int, List[int]] = {}
-    depots_raised_for_tank_passage: set[int] = set()  # depot tags raised to let tanks pass
-    custom_effects_to_avoid: List[CustomEffect] = []  # position, time, radius, duration
+    depots_raised_for_tank_passage: UnitTagSet = UnitStateStore.register_set("micro.depots_raised_for_tank_passage")  # depot tags raised to let tanks pass
     healing_shrines: Units | None = None
     flyer_healing_shrines: Units | None = None
 
@@ -79,6 +82,11 @@ class BaseUnitMicro(GeometryMixin):
     def __init__(self, tactics: Tactics):
         self.tactics: Tactics = tactics
         self.bot: BotAI = tactics.bot
+        # skip awaiting _use_ability for micros that don't override it
+        self.has_abilities: bool = type(self)._use_ability is not BaseUnitMicro._use_ability
+        # attack candidates within range of each unit in the current batch, see prepare_batch
+        self.nearby_targets: Dict[int, Units] = {}
+        self.nearby_targets_time: float = -1.0
 
     @property
     def retreat_health(self) -> float:
@@ -86,8 +94,11 @@ class BaseUnitMicro(GeometryMixin):
 
     @staticmethod
     def reset_tag_sets():
-        BaseUnitMicro.tanks_being_retreated_to_prev_frame = BaseUnitMicro.tanks_being_retreated_to
-        BaseUnitMicro.tanks_being_retreated_to = {}
+        # swap contents, the components stay registered with the store
+        BaseUnitMicro.tanks_being_retreated_to_prev_frame.clear()
+        for tag, enemy_distance_sq in BaseUnitMicro.tanks_being_retreated_to.items():
+            BaseUnitMicro.tanks_being_retreated_to_prev_frame[tag] = enemy_distance_sq
+        BaseUnitMicro.tanks_being_retreated_to.clear()
         BaseUnitMicro.repairer_tags_prev_frame = BaseUnitMicro.repairer_tags
         BaseUnitMicro.repairer_tags = set()
         BaseUnitMicro.repairers_by_target_prev_frame = BaseUnitMicro.repairers_by_target
@@ -113,16 +124,16 @@ class BaseUnitMicro(GeometryMixin):
         
         force_move = self._override_force_move(unit, force_move)
 
-        target = await self._get_override_target_for_repair(unit, target)
+        target = self._get_override_target_for_repair(unit, target)
         action_taken: UnitMicroType = self._avoid_effects(unit, force_move)
-        if action_taken == UnitMicroType.NONE:
+        if action_taken == UnitMicroType.NONE and self.has_abilities:
             action_taken = await self._use_ability(unit, target, force_move=force_move)
         if action_taken == UnitMicroType.NONE:
-            action_taken = await self._move_to_repairer(unit)
+            action_taken = self._move_to_repairer(unit)
         if action_taken == UnitMicroType.NONE:
             action_taken = await self._attack_something(unit, health_threshold=attack_health, move_position=target, force_move=force_move)
         if action_taken == UnitMicroType.NONE:
-            action_taken = await self._retreat(unit, health_threshold=self.retreat_health)
+            action_taken = self._retreat(unit, health_threshold=self.retreat_health)
         if action_taken == UnitMicroType.NONE:
             action_taken = self._move_unit(unit, target, previous_position)
         return action_taken
@@ -138,12 +149,12 @@ class BaseUnitMicro(GeometryMixin):
         if unit.tag in self.bot.unit_tags_received_action:
             return UnitMicroType.NONE
 
-        target = await self._get_override_target_for_repair(unit, target)
+        target = self._get_override_target_for_repair(unit, target)
         action_taken: UnitMicroType = self._avoid_effects(unit, force_move)
-        if action_taken == UnitMicroType.NONE:
+        if action_taken == UnitMicroType.NONE and self.has_abilities:
             action_taken = await self._use_ability(unit, target, force_move=force_move)
         if action_taken == UnitMicroType.NONE:
-            action_taken = await self._move_to_repairer(unit)
+            action_taken = self._move_to_repairer(unit)
         if action_taken == UnitMicroType.NONE:
             action_taken = await self._harass_attack_something(unit, health_threshold=attack_health, harass_location=target, force_move=force_move)
         if action_taken == UnitMicroType.NONE:
@@ -159,10 +170,10 @@ class BaseUnitMicro(GeometryMixin):
             return UnitMicroType.NONE
         logger.debug(f"scout {unit} health {unit.health}/{unit.health_max} ({unit.health_percentage}) health")
 
-        scouting_location = await self._get_override_target_for_repair(unit, scouting_location)
+        scouting_location = self._get_override_target_for_repair(unit, scouting_location)
         action_taken: UnitMicroType = self._avoid_effects(unit, False)
         if action_taken == UnitMicroType.NONE:
-            action_taken = await self._retreat(unit, health_threshold=0.95)
+            action_taken = self._retreat(unit, health_threshold=0.95)
         if action_taken == UnitMicroType.NONE:
             if unit.type_id == UnitTypeId.VIKINGFIGHTER:
                 action_taken = await self._attack_something(unit, health_threshold=1.0, move_position=scouting_location)
@@ -199,7 +210,7 @@ class BaseUnitMicro(GeometryMixin):
             if self._retreat_to_better_unit(unit, can_attack=True):
                 action_taken = UnitMicroType.RETREAT
         if action_taken == UnitMicroType.NONE:
-            action_taken = await self._retreat(unit, health_threshold=0.5)
+            action_taken = self._retreat(unit, health_threshold=0.5)
         if action_taken == UnitMicroType.NONE and not target.is_structure:
             # Don't approach a repair target if enemies are nearby — repairers
             # were taking heavy losses by walking into dangerous positions.
@@ -208,7 +219,7 @@ class BaseUnitMicro(GeometryMixin):
                 cy_closer_than(self.bot.enemy_units, 8, target.position), bot_object=self.bot
             )
             if threats_at_target:
-                _, retreat_position = await self._get_retreat_destination(unit, threats_at_target)
+                _, retreat_position = self._get_retreat_destination(unit, threats_at_target)
                 unit.move(retreat_position)
                 action_taken = UnitMicroType.RETREAT
         if action_taken == UnitMicroType.NONE:
@@ -221,6 +232,34 @@ class BaseUnitMicro(GeometryMixin):
                 action_taken = UnitMicroType.REPAIR
         return action_taken
 
+    @timed_async
+    async def move_batch(self, orders: List[Tuple[Unit, Point2, Point2 | None]], force_move: bool = False,
+                         harass: bool = False) -> Dict[int, UnitMicroType]:
+        """move (or harass) every unit in orders, a list of (unit, target, previous_position)."""
+        self.prepare_batch([unit for unit, _, _ in orders])
+        micro_func = self.harass if harass else self.move
+        results: Dict[int, UnitMicroType] = {}
+        for unit, target, previous_position in orders:
+            results[unit.tag] = await micro_func(unit, target, force_move, previous_position=previous_position)
+        return results
+
+    @timed
+    def prepare_batch(self, units: List[Unit]):
+        """Find attack candidates near every unit of the batch with one distance computation."""
+        self.update_valid_targets()
+        self.nearby_targets = {}
+        self.nearby_targets_time = self.bot.time
+        if not units or not self.valid_targets:
+            return
+        # sort once so each unit's slice is already ordered like get_nearby_targets
+        targets = self.valid_targets.sorted(lambda u: u.health + u.shield)
+        target_positions = np.array([target.position for target in targets], dtype=np.float64)
+        unit_positions = np.array([unit.position for unit in units], dtype=np.float64)
+        offsets = unit_positions[:, None, :] - target_positions[None, :, :]
+        in_range = (offsets ** 2).sum(axis=2) < self.nearby_target_distance ** 2
+        for unit, row in zip(units, in_range):
+            self.nearby_targets[unit.tag] = Units([targets[i] for i in np.flatnonzero(row)], bot_object=self.bot)
+
     ###########################################################################
     # main actions - iterated through by meta actions
     ###########################################################################
@@ -234,92 +273,43 @@ class BaseUnitMicro(GeometryMixin):
                           target_area: CustomEffectTargetArea,
                           position: Unit | Point2, radius: float,
                           start_time: float, duration: float):
-        for effect in BaseUnitMicro.custom_effects_to_avoid:
-            if effect.position.position == position.position and effect.radius == radius:
-                effect.start_time = start_time
-                # don't add duplicates
-                return
-        BaseUnitMicro.custom_effects_to_avoid.append(
-            CustomEffect(type, target_area, position, radius, start_time, duration))
+        EffectHazards.add_custom_effect(type, target_area, position, radius, start_time, duration)
+
+    @staticmethod
+    def update_effect_hazards():
+        EffectHazards.update(BaseUnitMicro.damaging_effects, BaseUnitMicro.fixed_radius)
+
+    @staticmethod
+    def allocate_targets(enemy: Enemy):
+        TargetAllocator.update(enemy, BaseUnitMicro.buffs_to_ignore, BaseUnitMicro.previous_targets)
 
     @timed
     def _avoid_effects(self, unit: Unit, force_move: bool) -> UnitMicroType:
         # avoid damaging effects
-        effects_to_avoid = []
-        # built-in-effects
-        furthest_effect_to_avoid_distance = 0.0
-        for effect in self.bot.state.effects:
-            if effect.id not in self.damaging_effects:
-                continue
-            if effect.id == EffectId.RAVAGERCORROSIVEBILECP:
-                for position in effect.positions:
-                    # bile lands a second after effect disappears so replace with custom effect
-                    self.add_custom_effect(CustomEffectType.ENEMY_EFFECT,
-                                           CustomEffectTargetArea.BOTH,
-                                           position=position,
-                                           radius=effect.radius,
-                                           start_time=self.bot.time,
-                                           duration=1.0)
-            if effect.id in (EffectId.LIBERATORTARGETMORPHDELAYPERSISTENT, EffectId.LIBERATORTARGETMORPHPERSISTENT):
-                if effect.is_mine or unit.is_flying:
-                    continue
-            effect_radius = self.fixed_radius.get(effect.id, effect.radius)
-            safe_distance = (effect_radius + unit.radius + MN.AVOID_EFFECT_BUFFER) ** 2
-            for position in effect.positions:
-                effect_distance = unit.position._distance_squared(position)
-                if effect_distance < safe_distance:
-                    effects_to_avoid.append(position)
-                    if effect_distance > furthest_effect_to_avoid_distance:
-                        furthest_effect_to_avoid_distance = effect_distance
-        # custom effects
-        i = len(BaseUnitMicro.custom_effects_to_avoid) - 1
-        while i >= 0:
-            effect = BaseUnitMicro.custom_effects_to_avoid[i]
-            if self.bot.time - effect.start_time > effect.duration:
-                BaseUnitMicro.custom_effects_to_avoid.pop(i)
-            else:
-                if (effect.target_area == CustomEffectTargetArea.AIR and not unit.is_flying
-                    or effect.target_area == CustomEffectTargetArea.GROUND and unit.is_flying):
-                    i -= 1
-                    continue
-                effect_position = effect.position.position
-                safe_distance = (effect.radius + unit.radius + MN.AVOID_EFFECT_BUFFER) ** 2
-                unit_distance = unit.position._distance_squared(effect_position)
-                if unit_distance < safe_distance:
-                    effects_to_avoid.append(effect_position)
-            i -= 1
-        # avoid all nearby
-        if effects_to_avoid:
-            move_away_from_position = effects_to_avoid[0]
-            if furthest_effect_to_avoid_distance < 1:
-                # near center of effect so can run in any direction, so run away from closest threat if any
-                threats = self.tactics.enemy.threats_to_friendly_unit(unit, attack_range_buffer=3)
-                if threats:
-                    closest_threat = cy_closest_to(unit.position, self.tactics.enemy.threats_to_friendly_unit(unit, attack_range_buffer=3))
-                    move_away_from_position = closest_threat.position
-            else:
-                number_of_effects = len(effects_to_avoid)
-                if number_of_effects > 1:
-                    average_x = sum(p.x for p in effects_to_avoid) / number_of_effects
-                    average_y = sum(p.y for p in effects_to_avoid) / number_of_effects
-                    average_position = Point2((average_x, average_y))
-                    if unit.position != average_position:
-                        move_away_from_position = average_position
-            new_position = Point2(cy_towards(unit.position, move_away_from_position, -2))
-            unit.move(new_position)
-            return UnitMicroType.AVOID_EFFECTS
-        return UnitMicroType.NONE
+        hazard = EffectHazards.hazard_at(unit.position, unit.radius, unit.is_flying)
+        if hazard is None:
+            return UnitMicroType.NONE
+        move_away_from_position, _ = hazard
+        if unit.position._distance_squared(move_away_from_position) < 1:
+            # near center of effect so can run in any direction, so run away from closest threat if any
+            threats = self.tactics.enemy.threats_to_friendly_unit(unit, attack_range_buffer=3)
+            if threats:
+                move_away_from_position = cy_closest_to(unit.position, threats).position
+        new_position = Point2(cy_towards(unit.position, move_away_from_position, -2))
+        unit.move(new_position)
+        return UnitMicroType.AVOID_EFFECTS
 
     last_targets_update_time: float = 0.0
     valid_targets: Units | None = None
+    nearby_target_distance: float = 20
     @timed_async
     async def _use_ability(self, unit: Unit, target: Point2, force_move: bool = False) -> UnitMicroType:
         return UnitMicroType.NONE
     
-    @timed_async
-    async def _move_to_repairer(self, unit: Unit) -> UnitMicroType:
+    @timed
+    def _move_to_repairer(self, unit: Unit) -> UnitMicroType:
         if unit.health_percentage < 1.0 and (unit.weapon_cooldown == 0.0 or unit.weapon_cooldown > self.time_in_frames_to_attack):
-            healing_shrines = await self.get_healing_shrines(unit)
+            healing_shrines = self.get_healing_shrines(unit)
             if healing_shrines:
                 closest_shrine = cy_closest_to(unit.position, healing_shrines)
                 if closest_shrine and cy_distance_to_squared(unit.position, closest_shrine.position) < 25:  # 5^2
@@ -338,7 +328,7 @@ class BaseUnitMicro(GeometryMixin):
                 if enemy_siege_tanks and cy_closer_than(enemy_siege_tanks, 6, unit.position):
                     return UnitMicroType.NONE
             repairer_tags = BaseUnitMicro.repairers_by_target_prev_frame[unit.tag]
-            repairers = self.bot.workers.filter(lambda w: w.tag in repairer_tags) + await self.get_healing_shrines(unit)
+            repairers = self.bot.workers.filter(lambda w: w.tag in repairer_tags) + self.get_healing_shrines(unit)
             threats = self.tactics.enemy.threats_to_friendly_unit(unit, attack_range_buffer=3, first_only=True)
             if threats:
                 repairers = repairers.further_than(5, unit)
@@ -361,22 +351,17 @@ class BaseUnitMicro(GeometryMixin):
         if unit.health_percentage < self.retreat_health:
             return UnitMicroType.NONE
 
-        if self.last_targets_update_time != self.bot.time:
-            self.last_targets_update_time = self.bot.time
-            self.valid_targets = self.bot.enemy_units.filter(
-                lambda u: self.tactics.enemy.can_be_attacked(u, self.tactics.enemy.get_recent_enemies()) and u.armor < 10 and u.buffs.isdisjoint({BuffId.NEURALPARASITE, BuffId.TAKENDAMAGE})
-                ) + self.bot.enemy_structures
-
+        self.update_valid_targets()
         if not self.valid_targets:
             return UnitMicroType.NONE
-        nearby_enemies = Units(sorted(cy_closer_than(self.valid_targets, 20, unit.position), key=lambda u: u.health + u.shield), bot_object=self.bot)
+        nearby_enemies = self.get_nearby_targets(unit)
         if not nearby_enemies:
             return UnitMicroType.NONE
         
         # attack enemy in range
         can_attack = unit.weapon_cooldown <= self.time_in_frames_to_attack
         if can_attack:
-            micro_taken = await self._kite(unit, nearby_enemies, force_move=force_move)
+            micro_taken = self._kite(unit, nearby_enemies, force_move=force_move)
             if micro_taken != UnitMicroType.NONE:
                 return micro_taken
         
@@ -395,7 +380,7 @@ class BaseUnitMicro(GeometryMixin):
             if nearby_tanks:
                 nearby_tanks.sort(key=lambda t: t.health + t.shield)
                 nearby_tanks = Units(nearby_tanks, bot_object=self.bot)
-                return await self._kite(unit, nearby_tanks, force_move=force_move)
+                return self._kite(unit, nearby_tanks, force_move=force_move)
 
         # below attack_health: if threats and no target in range, do nothing (retreat)
         if unit.health_percentage < health_threshold:
@@ -405,19 +390,36 @@ class BaseUnitMicro(GeometryMixin):
         # venture out a bit further to attack
         if can_attack:
             if move_position is not None and move_position.manhattan_distance(unit.position) < 20:
-                micro_taken = await self._kite(unit, nearby_enemies)
+                micro_taken = self._kite(unit, nearby_enemies)
                 if micro_taken != UnitMicroType.NONE:
                     return micro_taken
         elif self.valid_targets:
-            return await self._kite(unit, self.valid_targets)
+            return self._kite(unit, self.valid_targets)
 
         return UnitMicroType.NONE
+
+    def update_valid_targets(self):
+        if self.last_targets_update_time != self.bot.time:
+            self.last_targets_update_time = self.bot.time
+            self.valid_targets = self.bot.enemy_units.filter(
+                lambda u: self.tactics.enemy.can_be_attacked(u, self.tactics.enemy.get_recent_enemies()) and u.armor < 10 and u.buffs.isdisjoint({BuffId.NEURALPARASITE, BuffId.TAKENDAMAGE})
+                ) + self.bot.enemy_structures
+
+    def get_nearby_targets(self, unit: Unit) -> Units:
+        """valid_targets near unit, weakest first. Uses the batch result from prepare_batch when available."""
+        if self.nearby_targets_time == self.bot.time and unit.tag in self.nearby_targets:
+            return self.nearby_targets[unit.tag]
+        if not self.valid_targets:
+            return Units([], bot_object=self.bot)
+        return Units(sorted(cy_closer_than(self.valid_targets, self.nearby_target_distance, unit.position),
+                            key=lambda u: u.health + u.shield), bot_object=self.bot)
+
     @timed_async
     async def _harass_attack_something(self, unit: Unit, health_threshold: float, harass_location: Point2, force_move: bool = False) -> UnitMicroType:
         return await self._attack_something(unit, health_threshold, harass_location, force_move)
 
-    @timed_async
-    async def _retreat(self, unit: Unit, health_threshold: float) -> UnitMicroType:
+    @timed
+    def _retreat(self, unit: Unit, health_threshold: float) -> UnitMicroType:
         # below retreat_health: always retreat
         # below attack_health: retreat if threats
         # above attack_health: do nothing
@@ -458,7 +460,7 @@ class BaseUnitMicro(GeometryMixin):
         # below attack_health: retreat if threats
         # below retreat_health: always retreat
         if threats or is_below_retreat_health:
-            ultimate_destination, retreat_position = await self._get_retreat_destination(unit, threats)
+            ultimate_destination, retreat_position = self._get_retreat_destination(unit, threats)
             if unit.is_constructing_scv:
                 unit(AbilityId.HALT)
             elif isinstance(ultimate_destination, Unit) and ultimate_destination.type_id == UnitTypeId.SCV and unit.type_id == UnitTypeId.SCV and ultimate_destination.health_percentage < 1.0:
@@ -471,7 +473,7 @@ class BaseUnitMicro(GeometryMixin):
     
     @timed_async
     async def _harass_retreat(self, unit: Unit, health_threshold: float, harass_location: Point2) -> UnitMicroType:
-        return await self._retreat(unit, health_threshold)
+        return self._retreat(unit, health_threshold)
 
     def _move_unit(self, unit: Unit, target: Point2, previous_position: Point2 | None = None) -> UnitMicroType:
         position_to_compare = target if unit.is_moving else unit.position
@@ -489,9 +491,9 @@ class BaseUnitMicro(GeometryMixin):
     ###########################################################################
     # utility behaviors - used by main actions
     ###########################################################################
-    async def _get_override_target_for_repair(self, unit: Unit, target: Point2) -> Point2:
+    def _get_override_target_for_repair(self, unit: Unit, target: Point2) -> Point2:
         if unit.health_percentage < 1.0:
-            healing_shrines = await self.get_healing_shrines(unit)
+            healing_shrines = self.get_healing_shrines(unit)
             for shrine in healing_shrines:
                 if cy_distance_to_squared(unit.position, shrine.position) < 100:
                     return shrine.position
@@ -506,11 +508,11 @@ class BaseUnitMicro(GeometryMixin):
         
         return target
     
-    async def get_healing_shrines(self, unit: Unit) -> Units:
+    def get_healing_shrines(self, unit: Unit) -> Units:
         # cached version of get_pathable_healing_shrines
         if not unit.is_flying:
             if BaseUnitMicro.healing_shrines is None:
-                BaseUnitMicro.healing_shrines = await self.get_pathable_healing_shrines(unit)
+                BaseUnitMicro.healing_shrines = self.get_pathable_healing_shrines(unit)
                 return BaseUnitMicro.healing_shrines
             else:
                 num_shrines = len(BaseUnitMicro.healing_shrines)
@@ -518,11 +520,11 @@ class BaseUnitMicro(GeometryMixin):
                     BaseUnitMicro.healing_shrines = UnitReferenceHelper.get_updated_units(BaseUnitMicro.healing_shrines)
                     if len(BaseUnitMicro.healing_shrines) != num_shrines:
                         # visibility change causes a tag to change so re-query
-                        BaseUnitMicro.healing_shrines = await self.get_pathable_healing_shrines(unit)
+                        BaseUnitMicro.healing_shrines = self.get_pathable_healing_shrines(unit)
                 return BaseUnitMicro.healing_shrines
         else:
             if BaseUnitMicro.flyer_healing_shrines is None:
-                BaseUnitMicro.flyer_healing_shrines = await self.get_pathable_healing_shrines(unit)
+                BaseUnitMicro.flyer_healing_shrines = self.get_pathable_healing_shrines(unit)
                 return BaseUnitMicro.flyer_healing_shrines
             else:
                 num_shrines = len(BaseUnitMicro.flyer_healing_shrines)
@@ -530,10 +532,10 @@ class BaseUnitMicro(GeometryMixin):
                     BaseUnitMicro.flyer_healing_shrines = UnitReferenceHelper.get_updated_units(BaseUnitMicro.flyer_healing_shrines)
                     if len(BaseUnitMicro.flyer_healing_shrines) != num_shrines:
                         # visibility change causes a tag to change so re-query
-                        BaseUnitMicro.flyer_healing_shrines = await self.get_pathable_healing_shrines(unit)
+                        BaseUnitMicro.flyer_healing_shrines = self.get_pathable_healing_shrines(unit)
                 return BaseUnitMicro.flyer_healing_shrines
         
-    async def get_pathable_healing_shrines(self, unit: Unit) -> Units:
+    def get_pathable_healing_shrines(self, unit: Unit) -> Units:
         if unit.is_flying:
             if MapSpecifics.has_air_healing_shrines(self.bot):
                 return self.bot.destructables(UnitTypeId.XELNAGAHEALINGSHRINE)
@@ -553,10 +555,14 @@ class BaseUnitMicro(GeometryMixin):
                 return False
         return force_move
 
-    previous_targets: Dict[int, int] = {}
+    previous_targets: UnitComponent = UnitStateStore.register("micro.previous_targets")
     buffs_to_ignore: set[BuffId] = {BuffId.NEURALPARASITE, BuffId.TAKENDAMAGE}
     @timed
     def _get_attack_target(self, unit: Unit, nearby_enemies: Units, bonus_distance: float = 0, require_in_range_target: bool = False) -> Unit | None:
+        assigned = TargetAllocator.get_target(unit)
+        if assigned is not None and assigned in nearby_enemies:
+            self.previous_targets[unit.tag] = assigned.tag
+            return assigned
         valid_targets = nearby_enemies.filter(lambda u: UnitTypes.can_attack_target(unit, u) and u.type_id not in UnitTypes.NON_TARGETS and u.buffs.isdisjoint(self.buffs_to_ignore))
         if require_in_range_target:
             bonus_distance = 0
@@ -623,7 +629,7 @@ class BaseUnitMicro(GeometryMixin):
         # nothing in range, attack closest
         return None if require_in_range_target else closest_target
 
-    async def _kite(self, unit: Unit, targets: Units | Unit, force_move: bool = False) -> UnitMicroType:
+    def _kite(self, unit: Unit, targets: Units | Unit, force_move: bool = False) -> UnitMicroType:
         if isinstance(targets, Unit):
             targets = Units([targets], bot_object=self.bot)
         threats_to_avoid = Units([], bot_object=self.bot)
@@ -680,7 +686,7 @@ class BaseUnitMicro(GeometryMixin):
             return UnitMicroType.ATTACK
 
         if threats_to_avoid:
-            _, retreat_position = await self._get_retreat_destination(unit, threats_to_avoid)
+            _, retreat_position = self._get_retreat_destination(unit, threats_to_avoid)
             unit.move(retreat_position)
             return UnitMicroType.RETREAT
         if workers_to_avoid:
@@ -689,7 +695,7 @@ class BaseUnitMicro(GeometryMixin):
             desired_distance = self._get_desired_attack_range(unit, workers_to_avoid[0])
             target_position = Point2(cy_towards(worker_center, unit.position, desired_distance))
             if self._move_to_pathable_position(unit, target_position) == UnitMicroType.NONE:
-                _, retreat_position = await self._get_retreat_destination(unit, workers_to_avoid)
+                _, retreat_position = self._get_retreat_destination(unit, workers_to_avoid)
                 unit.move(retreat_position)
             return UnitMicroType.RETREAT
 
@@ -752,8 +758,8 @@ class BaseUnitMicro(GeometryMixin):
             return UnitMicroType.MOVE
         return UnitMicroType.NONE
 
-    @timed_async
-    async def _get_retreat_destination(self, unit: Unit, threats: Units | None = None) -> Tuple[Point2 | Unit, Point2]:
+    @timed
+    def _get_retreat_destination(self, unit: Unit, threats: Units | None = None) -> Tuple[Point2 | Unit, Point2]:
         ultimate_destination: Point2 | Unit | None = None
 
         if threats is None:
@@ -761,7 +767,7 @@ class BaseUnitMicro(GeometryMixin):
         else:
             threats = self.tactics.enemy.threats_to(unit, threats, attack_range_buffer=2)
 
-        healing_shrines = await self.get_healing_shrines(unit)
+        healing_shrines = self.get_healing_shrines(unit)
         if healing_shrines and unit.health_percentage < 1.0:
             # if near a shrine, always prefer it
             closest_shrine = cy_closest_to(unit.position, healing_shrines)
@@ -827,15 +833,15 @@ class BaseUnitMicro(GeometryMixin):
             return True
         return False
 
-    @timed_async
-    async def _retreat_to_medivac(self, unit: Unit) -> UnitMicroType:
+    @timed
+    def _retreat_to_medivac(self, unit: Unit) -> UnitMicroType:
         medivacs = self.bot.units.filter(lambda unit: unit.type_id == UnitTypeId.MEDIVAC and unit.energy > 5 and unit.cargo_used == 0)
         if medivacs:
             nearest_medivac = cy_closest_to(unit.position, medivacs)
             if unit.distance_to_squared(nearest_medivac) > 16:
                 unit.move(nearest_medivac)
             else:
-                _, retreat_position = await self._get_retreat_destination(unit, Units([nearest_medivac], bot_object=self.bot))
+                _, retreat_position = self._get_retreat_destination(unit, Units([nearest_medivac], bot_object=self.bot))
                 unit.move(retreat_position)
             logger.debug(f"{unit} marine retreating to heal at {nearest_medivac} hp {unit.health_percentage}")
             BaseUnitMicro.healing_unit_tags.add(unit.tag)
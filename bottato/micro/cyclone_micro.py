@@ -1,4 +1,4 @@
-from typing import Dict, Tuple
+from typing import Tuple
 
 import sc2.position
 from sc2.ids.ability_id import AbilityId
@@ -9,11 +9,12 @@ from sc2.units import Units
 from bottato.enums import UnitMicroType
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.mixins import timed_async
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
 
 
 class CycloneMicro(BaseUnitMicro):
-    lock_on_targets: Dict[int, int] = {}  # unit tag -> target tag
+    lock_on_targets: UnitComponent = UnitStateStore.register("cyclone.lock_on_targets")  # unit tag -> target tag
 
     def __init__(self, bot):
         super().__init__(bot)
@@ -30,7 +31,7 @@ class CycloneMicro(BaseUnitMicro):
             target = self.bot.all_enemy_units.find_by_tag(target_tag)
             # maintain target if locked on
             if target and self.is_locked_onto(target):
-                return await self._kite(unit, target)
+                return self._kite(unit, target)
             else:
                 del self.lock_on_targets[unit.tag]
 
@@ -41,7 +42,7 @@ class CycloneMicro(BaseUnitMicro):
                 attack_target = self.bot.all_enemy_units.find_by_tag(first_order.target)
                 if attack_target and self.is_locked_onto(attack_target):
                     self.lock_on_targets[unit.tag] = attack_target.tag
-                    return await self._kite(unit, attack_target)
+                    return self._kite(unit, attack_target)
 
         # no lock, attack normally
         return await super()._attack_something(unit, health_threshold, move_position, force_move)
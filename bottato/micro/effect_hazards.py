@@ -0,0 +1,173 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.ids.effect_id import EffectId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bottato.enums import CustomEffectTargetArea, CustomEffectType
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.micro.custom_effect import CustomEffect
+
+
+class EffectHazards:
+    """Per-step grid of the areas units should get out of, one layer for ground and one for air.
+
+    Each cell holds how many hazards cover it, the sum of their centers (so the escape
+    direction is away from their average center) and when the latest of them expires.
+    update() rebuilds the grid once per step from state.effects and the live custom
+    effects; custom effects added later in the step are stamped on incrementally.
+    Hazards are padded by MN.EFFECT_HAZARD_UNIT_RADIUS, and hazard_at() checks a box
+    around larger units so their extra radius is still respected.
+    """
+    GROUND = 0
+    AIR = 1
+    LAYERS_BY_TARGET_AREA = {
+        CustomEffectTargetArea.GROUND: (GROUND,),
+        CustomEffectTargetArea.AIR: (AIR,),
+        CustomEffectTargetArea.BOTH: (GROUND, AIR),
+    }
+    BOX_OFFSETS = np.array([
+        (0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)
+    ], dtype=np.float64)
+
+    bot: BotAI
+    counts: np.ndarray = np.zeros((2, 0, 0), dtype=np.int32)
+    center_sums: np.ndarray = np.zeros((2, 0, 0, 2), dtype=np.float64)
+    expiry: np.ndarray = np.zeros((2, 0, 0), dtype=np.float64)
+    # keyed by position and radius so re-adding an effect only refreshes its start time
+    custom_effects: Dict[Tuple[float, float, float], CustomEffect] = {}
+    built_loop: int = -1
+    empty: bool = True
+
+    @staticmethod
+    def init(bot: BotAI):
+        EffectHazards.bot = bot
+        width, height = bot.state.visibility.data_numpy.T.shape
+        EffectHazards.counts = np.zeros((2, width, height), dtype=np.int32)
+        EffectHazards.center_sums = np.zeros((2, width, height, 2), dtype=np.float64)
+        EffectHazards.expiry = np.zeros((2, width, height), dtype=np.float64)
+        EffectHazards.custom_effects = {}
+        EffectHazards.built_loop = -1
+        EffectHazards.empty = True
+
+    @staticmethod
+    def update(damaging_effects: Iterable[EffectId | str], fixed_radius: Dict[EffectId | str, float]):
+        bot = EffectHazards.bot
+        if EffectHazards.built_loop == bot.state.game_loop:
+            return
+        if not EffectHazards.empty:
+            EffectHazards.counts.fill(0)
+            EffectHazards.center_sums.fill(0)
+            EffectHazards.expiry.fill(0)
+            EffectHazards.empty = True
+        # custom effects added while rebuilding are picked up by the loop below
+        EffectHazards.built_loop = -1
+        time = bot.time
+
+        for effect in bot.state.effects:
+            if effect.id not in damaging_effects:
+                continue
+            if effect.id == EffectId.RAVAGERCORROSIVEBILECP:
+                for position in effect.positions:
+                    # bile lands a second after effect disappears so replace with custom effect
+                    EffectHazards.add_custom_effect(CustomEffectType.ENEMY_EFFECT,
+                                                    CustomEffectTargetArea.BOTH,
+                                                    position=position,
+                                                    radius=effect.radius,
+                                                    start_time=time,
+                                                    duration=1.0)
+                continue
+            layers: Tuple[int, ...] = (EffectHazards.GROUND, EffectHazards.AIR)
+            if effect.id in (EffectId.LIBERATORTARGETMORPHDELAYPERSISTENT, EffectId.LIBERATORTARGETMORPHPERSISTENT):
+                if effect.is_mine:
+                    continue
+                layers = (EffectHazards.GROUND,)
+            effect_radius = fixed_radius.get(effect.id, effect.radius)
+            for position in effect.positions:
+                EffectHazards.stamp(position, effect_radius, layers, time)
+
+        for key in list(EffectHazards.custom_effects.keys()):
+            effect = EffectHazards.custom_effects[key]
+            if time - effect.start_time > effect.duration:
+                del EffectHazards.custom_effects[key]
+            else:
+                EffectHazards.stamp_custom_effect(effect)
+        EffectHazards.built_loop = bot.state.game_loop
+
+    @staticmethod
+    def add_custom_effect(type: CustomEffectType,
+                          target_area: CustomEffectTargetArea,
+                          position: Unit | Point2, radius: float,
+                          start_time: float, duration: float):
+        point = position.position
+        key = (point.x, point.y, radius)
+        is_new = key not in EffectHazards.custom_effects
+        if is_new:
+            effect = CustomEffect(type, target_area, position, radius, start_time, duration)
+            EffectHazards.custom_effects[key] = effect
+        else:
+            # don't add duplicates
+            effect = EffectHazards.custom_effects[key]
+            effect.start_time = start_time
+        if EffectHazards.built_loop >= 0:
+            # grid for this step is already built, so apply the change in place
+            EffectHazards.stamp_custom_effect(effect, coverage=1 if is_new else 0)
+
+    @staticmethod
+    def get_custom_effects(type: CustomEffectType | None = None) -> List[CustomEffect]:
+        return [effect for effect in EffectHazards.custom_effects.values() if type is None or effect.type == type]
+
+    @staticmethod
+    def stamp_custom_effect(effect: CustomEffect, coverage: int = 1):
+        EffectHazards.stamp(effect.position.position, effect.radius,
+                            EffectHazards.LAYERS_BY_TARGET_AREA[effect.target_area],
+                            effect.start_time + effect.duration, coverage)
+
+    @staticmethod
+    def stamp(center: Point2, radius: float, layers: Tuple[int, ...], expires_at: float, coverage: int = 1):
+        """Mark every cell within the padded radius of center as hazardous on the given layers.
+
+        A coverage of 0 only extends expiry times, for refreshing a hazard that is already stamped.
+        """
+        _, width, height = EffectHazards.counts.shape
+        reach = radius + MN.AVOID_EFFECT_BUFFER + MN.EFFECT_HAZARD_UNIT_RADIUS
+        x_min, x_max = max(int(np.ceil(center.x - reach)), 0), min(int(np.floor(center.x + reach)) + 1, width)
+        y_min, y_max = max(int(np.ceil(center.y - reach)), 0), min(int(np.floor(center.y + reach)) + 1, height)
+        if x_min >= x_max or y_min >= y_max:
+            return
+        xs, ys = np.meshgrid(np.arange(x_min, x_max), np.arange(y_min, y_max), indexing="ij")
+        covered = (xs - center.x) ** 2 + (ys - center.y) ** 2 < reach ** 2
+        if not covered.any():
+            return
+        for layer in layers:
+            if coverage:
+                EffectHazards.counts[layer, x_min:x_max, y_min:y_max] += covered * coverage
+                EffectHazards.center_sums[layer, x_min:x_max, y_min:y_max, 0] += covered * (center.x * coverage)
+                EffectHazards.center_sums[layer, x_min:x_max, y_min:y_max, 1] += covered * (center.y * coverage)
+            expiry = EffectHazards.expiry[layer, x_min:x_max, y_min:y_max]
+            expiry[covered] = np.maximum(expiry[covered], expires_at)
+        EffectHazards.empty = False
+
+    @staticmethod
+    def hazard_at(position: Point2, radius: float, is_flying: bool) -> Tuple[Point2, float] | None:
+        """Average center of the hazards a unit is standing in and when they expire, None if safe."""
+        if EffectHazards.empty:
+            return None
+        layer = EffectHazards.AIR if is_flying else EffectHazards.GROUND
+        _, width, height = EffectHazards.counts.shape
+        extra_radius = max(radius - MN.EFFECT_HAZARD_UNIT_RADIUS, 0.0)
+        points = np.array([position], dtype=np.float64)
+        if extra_radius > 0:
+            points = points + EffectHazards.BOX_OFFSETS * extra_radius
+        xs = np.clip(np.rint(points[:, 0]).astype(np.int64), 0, width - 1)
+        ys = np.clip(np.rint(points[:, 1]).astype(np.int64), 0, height - 1)
+        counts = EffectHazards.counts[layer, xs, ys]
+        if not counts.any():
+            return None
+        # the unit's own cell first, otherwise whichever box point is most covered
+        i = 0 if counts[0] else int(counts.argmax())
+        x, y = xs[i], ys[i]
+        center = EffectHazards.center_sums[layer, x, y] / counts[i]
+        return Point2((float(center[0]), float(center[1]))), float(EffectHazards.expiry[layer, x, y])
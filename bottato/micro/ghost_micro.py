@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
-
 from cython_extensions.units_utils import cy_closer_than
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId
@@ -10,8 +8,10 @@ from sc2.unit import Unit
 from sc2.units import Units
 
 from bottato.enums import UnitMicroType
+from bottato.micro.aoe_planner import AoePlanner, AoeSpell
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.mixins import GeometryMixin, timed_async
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 
 
 class GhostMicro(BaseUnitMicro, GeometryMixin):
@@ -21,7 +21,7 @@ class GhostMicro(BaseUnitMicro, GeometryMixin):
     snipe_range: float = 10.0
     emp_range: float = 10.0
     emp_radius: float = 1.5  # EMP effect radius
-    last_snipe: Dict[int, Tuple[int, float, float]] = {}
+    last_snipe: UnitComponent = UnitStateStore.register("ghost.last_snipe")  # unit tag -> (target tag, time, health)
     
     # Protoss units good for EMP (high shields/energy)
     EMP_TARGETS = {
@@ -50,6 +50,19 @@ class GhostMicro(BaseUnitMicro, GeometryMixin):
         UnitTypeId.LURKERMPBURROWED,
     }
 
+    EMP = AoeSpell(
+        "emp",
+        caster_types={UnitTypeId.GHOST},
+        energy_cost=emp_energy_cost,
+        cast_range=emp_range,
+        radius=emp_radius,
+        # value based on shields and energy
+        enemy_value=lambda u: ((u.shield if u.shield_max > 0 else 0) + (u.energy if u.energy_max > 0 else 0)
+                               if u.type_id in GhostMicro.EMP_TARGETS else 0),
+        friendly_value=lambda u: u.energy if u.energy_max > 0 else 0,
+        min_value=lambda ghost: 200 if ghost.health_percentage >= 0.5 else 75,
+    )
+
     @timed_async
     async def _use_ability(self, unit: Unit, target: Point2, force_move: bool = False) -> UnitMicroType:
         # Try to use EMP against Protoss
@@ -73,40 +86,13 @@ class GhostMicro(BaseUnitMicro, GeometryMixin):
         if unit.energy < self.emp_energy_cost:
             return False
 
-        protoss_targets = cy_closer_than(self.bot.enemy_units.filter(lambda u: u.type_id in self.EMP_TARGETS),
-                                         self.emp_range,
-                                         unit.position)
-
-        if not protoss_targets:
+        # planned together with the other ghosts so they don't EMP the same group
+        target = AoePlanner.get_target(GhostMicro.EMP, unit)
+        if target is None:
             return False
-
-        # Find the best cluster of units to hit with EMP
-        best_target: Unit | None = None
-        best_value = 0
-
-        for enemy in protoss_targets:
-            # Count units within EMP radius of this target
-            units_in_radius = cy_closer_than(protoss_targets, self.emp_radius, enemy.position)
-
-            # Calculate value based on shields and energy
-            value = 0
-            for target_unit in units_in_radius:
-                if target_unit.shield_max > 0:
-                    value += target_unit.shield
-
-                if target_unit.energy_max > 0:
-                    value += target_unit.energy
-
-            if value > best_value:
-                best_value = value
-                best_target = enemy
-
-        min_value_to_emp = 200 if unit.health_percentage >= 0.5 else 75
-        if best_target and best_value > min_value_to_emp:
-            unit(AbilityId.EMP_EMP, best_target.position)
-            return True
-
-        return False
+        unit(AbilityId.EMP_EMP, target.position)
+        AoePlanner.record_cast(GhostMicro.EMP, target.position)
+        return True
     
     @timed_async
     async def _use_snipe(self, unit: Unit) -> bool:
@@ -1,10 +1,7 @@
 from __future__ import annotations
 
-from cython_extensions.units_utils import cy_closer_than
-from sc2.ids.buff_id import BuffId
 from sc2.position import Point2
 from sc2.unit import Unit
-from sc2.units import Units
 
 from bottato.enums import UnitMicroType
 from bottato.micro.base_unit_micro import BaseUnitMicro
@@ -24,22 +21,17 @@ class HellionMicro(BaseUnitMicro, GeometryMixin):
         if unit.health_percentage < self.retreat_health:
             return UnitMicroType.NONE
 
-        if self.last_targets_update_time != self.bot.time:
-            self.last_targets_update_time = self.bot.time
-            self.valid_targets = self.bot.enemy_units.filter(
-                lambda u: self.tactics.enemy.can_be_attacked(u, self.tactics.enemy.get_recent_enemies()) and u.armor < 10 and u.buffs.isdisjoint({BuffId.NEURALPARASITE, BuffId.TAKENDAMAGE})
-                ) + self.bot.enemy_structures
-
+        self.update_valid_targets()
         if not self.valid_targets:
             return UnitMicroType.NONE
-        nearby_enemies = Units(cy_closer_than(self.valid_targets, 20, unit.position), bot_object=self.bot).sorted(lambda u: u.health + u.shield)
+        nearby_enemies = self.get_nearby_targets(unit)
         if not nearby_enemies:
             return UnitMicroType.NONE
         
         can_attack = unit.weapon_cooldown <= self.time_in_frames_to_attack
         if can_attack:
             # attack enemy in range
-            micro_taken = await self._kite(unit, nearby_enemies, force_move=force_move)
+            micro_taken = self._kite(unit, nearby_enemies, force_move=force_move)
             if micro_taken != UnitMicroType.NONE:
                 return micro_taken
         
@@ -55,10 +47,10 @@ class HellionMicro(BaseUnitMicro, GeometryMixin):
         if can_attack:
             # venture out to attack further enemy but don't chase too far
             if move_position is not None and move_position.manhattan_distance(unit.position) < 20:
-                micro_taken = await self._kite(unit, nearby_enemies)
+                micro_taken = self._kite(unit, nearby_enemies)
                 if micro_taken != UnitMicroType.NONE:
                     return micro_taken
         elif self.valid_targets:
-            return await self._kite(unit, self.valid_targets)
+            return self._kite(unit, self.valid_targets)
 
         return UnitMicroType.NONE
@@ -10,12 +10,13 @@ from bottato.enums import UnitMicroType
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.micro.marine_micro import MarineMicro
 from bottato.mixins import GeometryMixin, timed_async
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
 
 
 class MarauderMicro(BaseUnitMicro, GeometryMixin):
     attack_health: float = 0.51
-    last_stim_time: dict[int, float] = {}
+    last_stim_time: UnitComponent = UnitStateStore.register("marauder.last_stim_time")
     stim_researched: bool = False
     attack_range: float = 5.0
     time_in_frames_to_attack: float = 0.3 * 22.4  # 0.3 seconds
@@ -9,12 +9,13 @@ from sc2.unit import Unit
 from bottato.enums import UnitMicroType
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.mixins import GeometryMixin, timed_async
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
 
 
 class MarineMicro(BaseUnitMicro, GeometryMixin):
     attack_health: float = 0.7
-    last_stim_time: dict[int, float] = {}
+    last_stim_time: UnitComponent = UnitStateStore.register("marine.last_stim_time")
     stim_researched: bool = False
     attack_range: float = 5.0
     time_in_frames_to_attack: float = 0.25 * 22.4
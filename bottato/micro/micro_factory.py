@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from loguru import logger
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 from sc2.bot_ai import BotAI
 from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
 from sc2.unit import Unit
 
+from bottato.enums import UnitMicroType
 from bottato.micro.banshee_micro import BansheeMicro
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.micro.cyclone_micro import CycloneMicro
@@ -23,6 +25,7 @@ from bottato.micro.structure_micro import StructureMicro
 from bottato.micro.thor_micro import ThorMicro
 from bottato.micro.viking_micro import VikingMicro
 from bottato.micro.widow_mine_micro import WidowMineMicro
+from bottato.mixins import timed_async
 from bottato.tactics import Tactics
 
 micro_instances: Dict[UnitTypeId, BaseUnitMicro] = {}
@@ -69,3 +72,17 @@ class MicroFactory:
                 micro_instances[unit_type] = micro_instances[UnitTypeId.NOTAUNIT]
 
         return micro_instances[unit_type]
+
+    @staticmethod
+    @timed_async
+    async def move_units(orders: List[Tuple[Unit, Point2, Point2 | None]], force_move: bool = False,
+                         harass: bool = False) -> Dict[int, UnitMicroType]:
+        """Run move (or harass) for (unit, target, previous_position) orders, one batch per micro class."""
+        batches: Dict[int, Tuple[BaseUnitMicro, List[Tuple[Unit, Point2, Point2 | None]]]] = {}
+        for order in orders:
+            micro = MicroFactory.get_unit_micro(order[0])
+            batches.setdefault(id(micro), (micro, []))[1].append(order)
+        results: Dict[int, UnitMicroType] = {}
+        for micro, batch in batches.values():
+            results.update(await micro.move_batch(batch, force_move, harass))
+        return results
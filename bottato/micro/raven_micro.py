@@ -20,6 +20,7 @@ from sc2.unit import Unit
 
 from bottato.enums import CustomEffectTargetArea, CustomEffectType, UnitMicroType
 from bottato.log_helper import LogHelper
+from bottato.micro.aoe_planner import AoePlanner, AoeSpell
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.mixins import GeometryMixin, timed_async
 from bottato.unit_types import UnitTypes
@@ -57,6 +58,19 @@ class RavenMicro(BaseUnitMicro, GeometryMixin):
         UnitTypeId.CARRIER,
         UnitTypeId.MOTHERSHIP,
     ]
+    ANTI_ARMOR_MISSILE = AoeSpell(
+        "anti_armor_missile",
+        caster_types={UnitTypeId.RAVEN},
+        energy_cost=missile_energy_cost,
+        cast_range=15,
+        radius=3.5,
+        enemy_value=lambda u: (1 if u.type_id not in RavenMicro.armor_missile_excluded_types
+                               and not u.has_buff(BuffId.RAVENSHREDDERMISSILEARMORREDUCTION) else 0),
+        # own units lose armor too
+        friendly_value=lambda u: 0.5 if u.type_id not in UnitTypes.WORKER_TYPES and not u.is_structure else 0,
+        min_value=lambda raven: 5,
+    )
+
     # the wrong upgrade is reported in bot.state.upgrades
     interference_patched_ids: Set[UpgradeId] = set([UpgradeId.INTERFERENCEMATRIX, UpgradeId.SUNDERINGIMPACT])
                         
@@ -98,15 +112,11 @@ class RavenMicro(BaseUnitMicro, GeometryMixin):
                     return self.fire_interference_missile(unit, interfere_target)
         
         if unit.energy >= self.missile_energy_cost and army_is_nearby:
-            nearby_enemies = self.bot.enemy_units.filter(
-                lambda enemy: enemy.type_id not in self.armor_missile_excluded_types
-                and not enemy.has_buff(BuffId.RAVENSHREDDERMISSILEARMORREDUCTION)
-                and enemy.distance_to_squared(unit) < 225)
-            if nearby_enemies:
-                most_grouped_enemy, grouped_enemies = self.get_most_grouped_unit(nearby_enemies, self.bot, 3.5)
-                if grouped_enemies.amount >= 5:
-                    if self.fire_armor_missile(unit, most_grouped_enemy):
-                        return UnitMicroType.USE_ABILITY
+            # planned together with the other ravens so they don't hit the same group
+            missile_target = AoePlanner.get_target(RavenMicro.ANTI_ARMOR_MISSILE, unit)
+            if missile_target and self.fire_armor_missile(unit, missile_target) == UnitMicroType.USE_ABILITY:
+                AoePlanner.record_cast(RavenMicro.ANTI_ARMOR_MISSILE, missile_target.position)
+                return UnitMicroType.USE_ABILITY
 
         enemy_unit, enemy_distance = self.tactics.enemy.get_closest_target(unit, distance_limit=20, include_structures=False, include_destructables=False,
                                                                    include_out_of_view=False)
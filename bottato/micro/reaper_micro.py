@@ -92,7 +92,7 @@ class ReaperMicro(BaseUnitMicro, GeometryMixin):
 
         candidates = self.tactics.enemy.get_candidates(included_types={UnitTypeId.SCV, UnitTypeId.PROBE, UnitTypeId.DRONE, UnitTypeId.ZERGLING, UnitTypeId.ZEALOT, UnitTypeId.MARINE, UnitTypeId.REAPER})
         if candidates:
-            action = await self._kite(unit, candidates, force_move=force_move)
+            action = self._kite(unit, candidates, force_move=force_move)
             if action == UnitMicroType.RETREAT:
                 self.add_bad_harass_experience_location(unit, harass_location)
             return action
@@ -195,7 +195,7 @@ class ReaperMicro(BaseUnitMicro, GeometryMixin):
                 unit.move(destination)
                 return UnitMicroType.RETREAT
             # if retreat_to_start:
-            _, retreat_position = await self._get_retreat_destination(unit, threats)
+            _, retreat_position = self._get_retreat_destination(unit, threats)
             unit.move(retreat_position)
             return UnitMicroType.RETREAT
 
@@ -18,6 +18,7 @@ from sc2.unit import Unit
 from bottato.enums import ArmyMode, CustomEffectType, TankSiegeStep, UnitMicroType
 from bottato.log_helper import LogHelper
 from bottato.micro.base_unit_micro import BaseUnitMicro
+from bottato.micro.effect_hazards import EffectHazards
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.unit_types import UnitTypes
 
@@ -59,17 +60,16 @@ class SiegeTankMicro(BaseUnitMicro, GeometryMixin):
                         LogHelper.add_log(f"Unsieging {unit} to avoid liberator")
                         self.unsiege(unit)
                         return UnitMicroType.USE_ABILITY
-        for effect in BaseUnitMicro.custom_effects_to_avoid:
-            # don't block buildings
-            if effect.type == CustomEffectType.BUILDING_FOOTPRINT:
-                effect_radius = effect.radius
-                safe_distance = (effect_radius + unit.radius + 1.5) ** 2
-                if unit.distance_to_squared(effect.position) < safe_distance:
-                    targets = self.tactics.enemy.get_target_closer_than(unit, max_distance=11)
-                    if not targets:
-                        LogHelper.add_log(f"Unsieging {unit} to avoid building footprint")
-                        self.unsiege(unit)
-                        return UnitMicroType.USE_ABILITY
+        # don't block buildings
+        for effect in EffectHazards.get_custom_effects(CustomEffectType.BUILDING_FOOTPRINT):
+            effect_radius = effect.radius
+            safe_distance = (effect_radius + unit.radius + 1.5) ** 2
+            if unit.distance_to_squared(effect.position) < safe_distance:
+                targets = self.tactics.enemy.get_target_closer_than(unit, max_distance=11)
+                if not targets:
+                    LogHelper.add_log(f"Unsieging {unit} to avoid building footprint")
+                    self.unsiege(unit)
+                    return UnitMicroType.USE_ABILITY
         return UnitMicroType.NONE
 
     @timed_async
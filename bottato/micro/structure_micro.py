@@ -19,6 +19,7 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.detection_helper import DetectionHelper
 from bottato.enemy import Enemy
 from bottato.enums import (
     ArmyMode,
@@ -29,7 +30,6 @@ from bottato.enums import (
 from bottato.log_helper import LogHelper
 from bottato.map.map import Map
 from bottato.micro.base_unit_micro import BaseUnitMicro
-from bottato.micro.custom_effect import CustomEffect
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.squad.enemy_intel import EnemyIntel
 from bottato.tactics import Tactics
@@ -93,10 +93,10 @@ class StructureMicro(BaseUnitMicro, GeometryMixin):
                 if self.distance(enemy_unit, depot) < distance_threshold - 2:
                     depot(AbilityId.MORPH_SUPPLYDEPOT_RAISE)
                     # fake effect to tell units to get off the depot
-                    BaseUnitMicro.custom_effects_to_avoid.append(CustomEffect(CustomEffectType.BUILDING_FOOTPRINT,
-                                                                            CustomEffectTargetArea.GROUND,
-                                                                            depot.position, depot.radius,
-                                                                            self.bot.time, 1))
+                    BaseUnitMicro.add_custom_effect(CustomEffectType.BUILDING_FOOTPRINT,
+                                                    CustomEffectTargetArea.GROUND,
+                                                    depot.position, depot.radius,
+                                                    self.bot.time, 1)
                     break
 
         # Lower depots when no enemies are nearby
@@ -465,8 +465,11 @@ class StructureMicro(BaseUnitMicro, GeometryMixin):
         enemies_to_scan = Units([], self.bot)
         air_attackers = None
         ground_attackers = None
-        # identify all candidates that don't have a raven nearby and have attackers in position
-        for enemy in need_detection:
+        already_detected = DetectionHelper.detected_at([enemy.position for enemy in need_detection])
+        # identify all candidates that aren't detected, don't have a raven nearby and have attackers in position
+        for enemy, detected in zip(need_detection, already_detected):
+            if detected:
+                continue
             attackers = None
             # check for nearby raven
             if self.enemy.get_units_closer_than(enemy, ravens, 15).exists:
@@ -504,13 +507,16 @@ class StructureMicro(BaseUnitMicro, GeometryMixin):
                 scan_position = closest_enemy_structure.position
             if scan_position:
                 orbital_with_energy(AbilityId.SCANNERSWEEP_SCAN, scan_position)
+                DetectionHelper.record_scan(scan_position)
                 self.last_scan_time = self.bot.time
                 return
 
         # drop one scan per step 
         if enemies_to_scan:
             LogHelper.add_log(f"Scanning to detect {enemies_to_scan}")
-            _, grouped_enemies = self.get_most_grouped_unit(enemies_to_scan, self.bot, 13)
-            scan_position = self.get_midrange_point(grouped_enemies)
+            scan_position, _ = DetectionHelper.best_scan_position([enemy.position for enemy in enemies_to_scan])
+            if scan_position is None:
+                return
             orbital_with_energy(AbilityId.SCANNERSWEEP_SCAN, scan_position)
+            DetectionHelper.record_scan(scan_position)
             self.last_scan_time = self.bot.time
\ No newline at end of file
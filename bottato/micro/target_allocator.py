@@ -0,0 +1,169 @@
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+from sc2.ids.buff_id import BuffId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+
+from bottato.enemy import Enemy
+from bottato.magic_numbers import MagicNumbers as MN
+from bottato.mixins import timed
+from bottato.unit_types import UnitTypes
+
+
+class TargetAllocator:
+    """Army-wide focus fire. Assigns each attacker one enemy in range once per step.
+
+    Ranges, damage and priority are looked up per (attacker type, target type) pair, so
+    eligibility for every attacker/target pair is a single numpy comparison. Attackers
+    with the fewest options pick first, and each target only takes as much expected damage
+    as its remaining hp so later attackers move on to something else instead of overkilling.
+    Micro reads the result with get_target(); attackers left unassigned pick for themselves.
+    """
+    # have their own targeting: mines lock on automatically and cyclones lock on with an ability
+    EXCLUDED_TYPES: Set[UnitTypeId] = {
+        UnitTypeId.WIDOWMINE,
+        UnitTypeId.WIDOWMINEBURROWED,
+        UnitTypeId.CYCLONE,
+    }
+
+    bot: BotAI
+    # attacker tag -> assigned target
+    assignments: Dict[int, Unit] = {}
+    # target tag -> damage expected from this step's assignments
+    expected_damage: Dict[int, float] = {}
+    allocated_time: float = -1.0
+
+    @staticmethod
+    def init(bot: BotAI):
+        TargetAllocator.bot = bot
+        TargetAllocator.assignments = {}
+        TargetAllocator.expected_damage = {}
+        TargetAllocator.allocated_time = -1.0
+
+    @staticmethod
+    def get_target(unit: Unit) -> Unit | None:
+        if TargetAllocator.allocated_time != TargetAllocator.bot.time:
+            return None
+        return TargetAllocator.assignments.get(unit.tag)
+
+    @staticmethod
+    def get_expected_damage(target: Unit) -> float:
+        return TargetAllocator.expected_damage.get(target.tag, 0.0)
+
+    @staticmethod
+    @timed
+    def update(enemy: Enemy, buffs_to_ignore: Set[BuffId], previous_targets: Dict[int, int]):
+        bot = TargetAllocator.bot
+        if TargetAllocator.allocated_time == bot.time:
+            return
+        TargetAllocator.allocated_time = bot.time
+        TargetAllocator.assignments = {}
+        TargetAllocator.expected_damage = {}
+
+        attackers = [unit for unit in bot.units
+                     if unit.type_id not in TargetAllocator.EXCLUDED_TYPES
+                     and unit.type_id not in UnitTypes.WORKER_TYPES
+                     and UnitTypes.can_attack(unit)]
+        if not attackers:
+            return
+        army = enemy.get_army()
+        targets = [target for target in enemy.enemies_in_view
+                   if target.type_id not in UnitTypes.NON_TARGETS
+                   and target.armor < 10
+                   and target.buffs.isdisjoint(buffs_to_ignore)
+                   and enemy.can_be_attacked(target, army)]
+        if not targets:
+            return
+        # weakest first so ties go to whichever is closest to dying
+        targets.sort(key=lambda t: t.health + t.shield)
+
+        ranges_squared, damage, weights = TargetAllocator.get_pair_tables(enemy, attackers, targets)
+        attacker_positions = np.array([unit.position for unit in attackers], dtype=np.float64)
+        target_positions = np.array([target.position for target in targets], dtype=np.float64)
+        differences = attacker_positions[:, None, :] - target_positions[None, :, :]
+        distances_squared = np.einsum("ijk,ijk->ij", differences, differences)
+        effective_hp = np.array([target.health + target.shield for target in targets], dtype=np.float64)
+
+        target_indices = {target.tag: j for j, target in enumerate(targets)}
+        previous = np.array([target_indices.get(previous_targets.get(unit.tag, -1), -1) for unit in attackers])
+        assigned, expected = TargetAllocator.allocate(distances_squared, ranges_squared, damage, weights,
+                                                      effective_hp, previous)
+        for i, j in enumerate(assigned):
+            if j >= 0:
+                TargetAllocator.assignments[attackers[i].tag] = targets[j]
+        for j in np.flatnonzero(expected):
+            TargetAllocator.expected_damage[targets[j].tag] = float(expected[j])
+
+    @staticmethod
+    def get_pair_tables(enemy: Enemy, attackers: List[Unit], targets: List[Unit]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Range squared, damage per attack and priority weight for every attacker/target pair,
+        computed once per pair of unit types and expanded to (attackers, targets) matrices."""
+        attacker_types: Dict[UnitTypeId, int] = {}
+        attacker_samples: List[Unit] = []
+        for unit in attackers:
+            if unit.type_id not in attacker_types:
+                attacker_types[unit.type_id] = len(attacker_samples)
+                attacker_samples.append(unit)
+        target_types: Dict[UnitTypeId, int] = {}
+        target_samples: List[Unit] = []
+        for target in targets:
+            if target.type_id not in target_types:
+                target_types[target.type_id] = len(target_samples)
+                target_samples.append(target)
+
+        type_ranges = np.zeros((len(attacker_samples), len(target_samples)), dtype=np.float64)
+        type_damage = np.zeros_like(type_ranges)
+        type_weights = np.zeros_like(type_ranges)
+        for a, attacker in enumerate(attacker_samples):
+            priority_types = UnitTypes.get_priority_target_types(attacker)
+            for t, target in enumerate(target_samples):
+                if not UnitTypes.can_attack_target(attacker, target):
+                    continue
+                type_ranges[a, t] = enemy.get_attack_range_with_buffer_squared(attacker, target, 0.0)
+                type_damage[a, t] = attacker.calculate_damage_vs_target(target)[0]
+                if target.type_id in priority_types:
+                    type_weights[a, t] = MN.FOCUS_FIRE_PRIORITY_WEIGHT
+                elif target.type_id in UnitTypes.GAS_STRUCTURE_TYPES:
+                    type_weights[a, t] = MN.FOCUS_FIRE_GAS_STRUCTURE_WEIGHT
+                elif UnitTypes.can_attack(target):
+                    type_weights[a, t] = MN.FOCUS_FIRE_OFFENSIVE_WEIGHT
+                else:
+                    type_weights[a, t] = 1.0
+
+        attacker_index = np.array([attacker_types[unit.type_id] for unit in attackers])
+        target_index = np.array([target_types[target.type_id] for target in targets])
+        pairs = np.ix_(attacker_index, target_index)
+        return type_ranges[pairs], type_damage[pairs], type_weights[pairs]
+
+    @staticmethod
+    def allocate(distances_squared: np.ndarray, ranges_squared: np.ndarray, damage: np.ndarray,
+                 weights: np.ndarray, effective_hp: np.ndarray, previous: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Greedy assignment of attackers (rows) to targets (columns).
+
+        Returns the target index for each attacker (-1 if unassigned) and the expected damage on
+        each target. A target's expected damage is capped at its effective hp, and targets that are
+        already expected to die aren't given more attackers.
+        """
+        eligible = (distances_squared <= ranges_squared) & (damage > 0)
+        assigned = np.full(distances_squared.shape[0], -1, dtype=np.int64)
+        remaining_hp = effective_hp.astype(np.float64)
+        option_counts = eligible.sum(axis=1)
+        # most constrained attackers first so units with only one option still get to use it
+        for i in np.argsort(option_counts, kind="stable"):
+            if option_counts[i] == 0:
+                continue
+            columns = np.flatnonzero(eligible[i] & (remaining_hp > 0))
+            if len(columns) == 0:
+                continue
+            hp = remaining_hp[columns]
+            hits = damage[i, columns]
+            # share of the target's remaining hp this attack removes, 1.0 for a kill
+            value = weights[i, columns] * np.minimum(hits, hp) / hp
+            value[columns == previous[i]] *= MN.FOCUS_FIRE_PREVIOUS_TARGET_BONUS
+            best = int(np.argmax(value))
+            j = columns[best]
+            assigned[i] = j
+            remaining_hp[j] = max(hp[best] - hits[best], 0.0)
+        return assigned, effective_hp - remaining_hp
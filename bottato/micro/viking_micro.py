@@ -192,7 +192,7 @@ class VikingMicro(BaseUnitMicro, GeometryMixin):
             else:
                 threats = self.tactics.enemy.threats_to_friendly_unit(unit, 2)
                 threats.append(target)
-                return await self._kite(unit, threats)
+                return self._kite(unit, threats)
 
         candidates: Units | None = None
         if not unit.is_flying:
@@ -222,7 +222,7 @@ class VikingMicro(BaseUnitMicro, GeometryMixin):
         #     if closest_target.is_structure:
         #         unit.attack(closest_target)
         #         return UnitMicroType.ATTACK
-        return await self._kite(unit, candidates)
+        return self._kite(unit, candidates)
     
     # copied from banshee micro
     @timed_async
@@ -265,7 +265,7 @@ class VikingMicro(BaseUnitMicro, GeometryMixin):
                         return UnitMicroType.MOVE
 
         if nearby_enemies:
-            return await self._kite(unit, nearby_enemies)
+            return self._kite(unit, nearby_enemies)
         if force_move:
             return UnitMicroType.NONE
         # if can_attack:
@@ -19,6 +19,7 @@ from sc2.unit import Unit
 from bottato.enums import CustomEffectType, UnitMicroType
 from bottato.log_helper import LogHelper
 from bottato.micro.base_unit_micro import BaseUnitMicro
+from bottato.micro.effect_hazards import EffectHazards
 from bottato.mixins import GeometryMixin, timed
 from bottato.unit_reference_helper import UnitReferenceHelper
 from bottato.unit_types import UnitTypes
@@ -61,17 +62,16 @@ class WidowMineMicro(BaseUnitMicro, GeometryMixin):
                         LogHelper.add_log(f"Unsieging {unit} to avoid liberator")
                         self.unburrow(unit)
                         return UnitMicroType.USE_ABILITY
-        for effect in BaseUnitMicro.custom_effects_to_avoid:
-            # don't block buildings
-            if effect.type == CustomEffectType.BUILDING_FOOTPRINT:
-                effect_radius = effect.radius
-                safe_distance = (effect_radius + unit.radius + 1.5) ** 2
-                if unit.distance_to_squared(effect.position) < safe_distance:
-                    targets = self.tactics.enemy.get_target_closer_than(unit, max_distance=11)
-                    if targets[0] is None:
-                        LogHelper.add_log(f"Unsieging {unit} to avoid building footprint")
-                        self.unburrow(unit)
-                        return UnitMicroType.USE_ABILITY
+        # don't block buildings
+        for effect in EffectHazards.get_custom_effects(CustomEffectType.BUILDING_FOOTPRINT):
+            effect_radius = effect.radius
+            safe_distance = (effect_radius + unit.radius + 1.5) ** 2
+            if unit.distance_to_squared(effect.position) < safe_distance:
+                targets = self.tactics.enemy.get_target_closer_than(unit, max_distance=11)
+                if targets[0] is None:
+                    LogHelper.add_log(f"Unsieging {unit} to avoid building footprint")
+                    self.unburrow(unit)
+                    return UnitMicroType.USE_ABILITY
         return UnitMicroType.NONE
     
     @timed
@@ -1,5 +1,5 @@
 from loguru import logger
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from cython_extensions.geometry import (
     cy_distance_to,
@@ -19,9 +19,12 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.background_analytics import BackgroundAnalytics
 from bottato.counter_units import CounterUnits
+from bottato.density_grid import DensityGrid
 from bottato.enums import ArmyMode, BuildType, ExpansionSelection, Tactic
 from bottato.log_helper import LogHelper
+from bottato.magic_numbers import MagicNumbers as MN
 from bottato.micro.micro_factory import MicroFactory
 from bottato.mixins import DebugMixin, GeometryMixin, timed, timed_async
 from bottato.squad.bunker import Bunker
@@ -34,6 +37,7 @@ from bottato.squad.squad import Squad
 from bottato.squad.stuck_rescue import StuckRescue
 from bottato.tactics import Tactics
 from bottato.unit_reference_helper import UnitReferenceHelper
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 from bottato.unit_types import UnitTypes
 
 
@@ -53,9 +57,11 @@ class Military(GeometryMixin, DebugMixin):
         self.status_message = ""
         self.units_by_tag: Dict[int, Unit] = {}
         self.enemies_in_base: Units = Units([], self.bot)
-        self.last_damage_taken_time: Dict[int, float] = {}  # unit_tag -> game_time
+        self.last_damage_taken_time: UnitComponent = UnitStateStore.register("military.last_damage_taken_time")  # unit_tag -> game_time
         self.anti_banshee_units: Units | None = None
         self.aborted_attack_count: int = 0
+        # army ratio doesn't need to be frame exact, work it out between steps
+        self.army_ratio_analytics = BackgroundAnalytics("army ratio", self.analyze_army_ratio)
         # special squads
         self.main_army = FormationSquad(
             bot=bot,
@@ -115,7 +121,10 @@ class Military(GeometryMixin, DebugMixin):
             return  # nydus response handled in get_enemies_in_base, don't conflict with it
         defend_with_main_army, countered_enemies = await self.counter_enemies_in_base()
         
-        self.intel.army_ratio = self.calculate_army_ratio()
+        friendlies, enemies = self.get_army_ratio_units()
+        self.army_ratio_analytics.submit((self.bot.time, friendlies, enemies), self.bot.time)
+        army_ratio_result = self.army_ratio_analytics.latest(self.bot.time, MN.ANALYTICS_MAX_STALENESS)
+        self.intel.army_ratio = army_ratio_result.value if army_ratio_result else self.calculate_army_ratio()
         enemies_in_base_ratio = self.calculate_army_ratio(self.enemies_in_base)
         self.intel.avg_enemy_age = self.enemy.get_average_enemy_age()
         required_ratio_for_offense = 1.2 + self.intel.avg_enemy_age * 0.005
@@ -547,24 +556,25 @@ class Military(GeometryMixin, DebugMixin):
                 and unit.armor < 10
                 and unit.tag not in countered_enemies)
         
-        ignored_enemy_tags = set()
         closest_structure = cy_closest_to(army_position, self.bot.enemy_structures) if self.bot.enemy_structures else None
         closest_structure_distance = cy_distance_to_squared(closest_structure.position, army_position) if closest_structure else 100000
         enemy_army: Units | None = None
         enemy_army_distance: float = 100000
 
-        for enemy in attackable_enemies:
-            enemy_distance = cy_distance_to_squared(enemy.position, army_position)
-            if enemy.tag in ignored_enemy_tags or enemy_distance > closest_structure_distance:
-                continue
-            enemy_group = attackable_enemies.filter(lambda e: e.tag not in ignored_enemy_tags
-                            and self.enemy.safe_distance_squared(enemy, e) < 64)
-            if len(enemy_group) >= 3:
-                enemy_army = enemy_group
-                enemy_army_distance = enemy_distance
-                break
-            for e in enemy_group:
-                ignored_enemy_tags.add(e.tag)
+        if len(attackable_enemies) >= 3:
+            # one density pass finds enemies with at least 2 others nearby, then check those closest to the army first
+            counts = DensityGrid.from_units(attackable_enemies, 8).counts_near_units(8)
+            candidates = [enemy for enemy in attackable_enemies if counts[enemy.tag] >= 3]
+            candidates.sort(key=lambda e: cy_distance_to_squared(e.position, army_position))
+            for enemy in candidates:
+                enemy_distance = cy_distance_to_squared(enemy.position, army_position)
+                if enemy_distance > closest_structure_distance:
+                    break
+                enemy_group = Units(cy_closer_than(attackable_enemies, 8, enemy.position), bot_object=self.bot)
+                if len(enemy_group) >= 3:
+                    enemy_army = enemy_group
+                    enemy_army_distance = enemy_distance
+                    break
 
         if enemy_army and enemy_army_distance < closest_structure_distance:
             target_position = Point2(cy_center(enemy_army))
@@ -667,6 +677,10 @@ class Military(GeometryMixin, DebugMixin):
     damage_by_type_cache_friendly: Dict[UnitTypeId, Dict[UnitTypeId, float]] = {}
     damage_by_type_cache_enemy: Dict[UnitTypeId, Dict[UnitTypeId, float]] = {}
     damage_by_type_cache_timestamp: float = 0.0
+    # the analytics thread's own copies so the two threads never write the same cache
+    background_damage_by_type_cache_friendly: Dict[UnitTypeId, Dict[UnitTypeId, float]] = {}
+    background_damage_by_type_cache_enemy: Dict[UnitTypeId, Dict[UnitTypeId, float]] = {}
+    background_damage_by_type_cache_timestamp: float = 0.0
     # XXX why does this fluctuate
     @timed
     def calculate_army_ratio(self, enemies_in_base: Units | None = None) -> float:
@@ -675,7 +689,20 @@ class Military(GeometryMixin, DebugMixin):
             self.damage_by_type_cache_friendly.clear()
             self.damage_by_type_cache_enemy.clear()
             self.damage_by_type_cache_timestamp = self.bot.time
-
+        friendlies, enemies = self.get_army_ratio_units(enemies_in_base)
+        return self.compute_army_ratio(friendlies, enemies, self.damage_by_type_cache_friendly, self.damage_by_type_cache_enemy)
+
+    def analyze_army_ratio(self, snapshot: Tuple[float, Units, Units]) -> float:
+        """Army ratio from a (time, friendlies, enemies) snapshot, run on the analytics thread."""
+        time, friendlies, enemies = snapshot
+        if time - self.background_damage_by_type_cache_timestamp > 20:
+            self.background_damage_by_type_cache_friendly.clear()
+            self.background_damage_by_type_cache_enemy.clear()
+            self.background_damage_by_type_cache_timestamp = time
+        return self.compute_army_ratio(friendlies, enemies, self.background_damage_by_type_cache_friendly,
+                                       self.background_damage_by_type_cache_enemy)
+
+    def get_army_ratio_units(self, enemies_in_base: Units | None = None) -> Tuple[Units, Units]:
         # account for rebuilt units earlier in game when they make up a bigger portion
         enemies = enemies_in_base
         if enemies is None:
@@ -694,14 +721,18 @@ class Military(GeometryMixin, DebugMixin):
             if bunker.structure and bunker.structure.passengers:
                 for passenger in bunker.structure.passengers:
                     friendlies.append(passenger)
-                    
+        return friendlies, enemies
+
+    def compute_army_ratio(self, friendlies: Units, enemies: Units,
+                           friendly_damage_cache: Dict[UnitTypeId, Dict[UnitTypeId, float]],
+                           enemy_damage_cache: Dict[UnitTypeId, Dict[UnitTypeId, float]]) -> float:
         if not enemies:
             return 10.0
         if not friendlies:
             return 0.1
 
-        friendly_damage: float = self.calculate_total_damage(friendlies, enemies, self.damage_by_type_cache_friendly)
-        enemy_damage: float = self.calculate_total_damage(enemies, friendlies, self.damage_by_type_cache_enemy)
+        friendly_damage: float = self.calculate_total_damage(friendlies, enemies, friendly_damage_cache)
+        enemy_damage: float = self.calculate_total_damage(enemies, friendlies, enemy_damage_cache)
         
         friendly_health: float = sum([unit.health for unit in friendlies])
         enemy_health: float = sum([unit.health + unit.shield * 0.95 for unit in enemies])
@@ -13,6 +13,8 @@ from sc2.position import Point2, Point3
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.density_grid import DensityGrid
+from bottato.magic_numbers import MagicNumbers as MN
 from bottato.map.destructibles import BUILDING_RADIUS
 
 # Global timer storage for decorator
@@ -291,6 +293,9 @@ class GeometryMixin:
     @staticmethod
     def get_most_grouped_unit(units: Units, bot: BotAI, range: float = 10) -> tuple[Unit, Units]:
         assert units, "units list is empty"
+        if len(units) > MN.DENSITY_GRID_MIN_UNITS:
+            most_grouped_unit, grouped_units = DensityGrid.from_units(units, range).most_grouped_unit(range)
+            return (most_grouped_unit, Units(grouped_units, bot_object=bot))
         most_nearby_unit: Unit = units[0]
         most_nearby_units: List[Unit] = [units[0]]
         for unit in units:
@@ -22,6 +22,7 @@ from bottato.mixins import GeometryMixin
 from bottato.squad.scouting_location import ScoutingLocation
 from bottato.unit_reference_helper import UnitReferenceHelper
 from bottato.unit_types import UnitTypes
+from bottato.visibility_helper import VisibilityHelper
 
 
 class EnemyIntel(GeometryMixin):
@@ -106,8 +107,9 @@ class EnemyIntel(GeometryMixin):
                 self.enemy_base_built_times[townhall.position] = self.bot.time
                 self.newest_enemy_base = townhall.position
 
-        for location in self.scouting_locations:
-            if self.bot.is_visible(location.scouting_position):
+        visible = VisibilityHelper.visible_at([location.scouting_position for location in self.scouting_locations])
+        for location, location_visible in zip(self.scouting_locations, visible):
+            if location_visible:
                 location.last_seen = self.bot.time
 
             for townhall in enemy_townhalls:
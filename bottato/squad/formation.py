@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import math
 from loguru import logger
-from typing import List, Set
+from typing import Dict, List, Set
 
+import numpy as np
 from cython_extensions.geometry import (
     cy_distance_to,
     cy_distance_to_squared,
@@ -14,6 +15,7 @@ from sc2.bot_ai import BotAI
 from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
+from scipy.optimize import linear_sum_assignment
 
 from bottato.enums import SquadFormationType
 from bottato.map.map import Map
@@ -28,6 +30,39 @@ class UnitDemographics:
         self.maximum_unit_radius: float = 0
 
 
+class SlotAssignment:
+    """Sticky assignment of units to formation slots.
+
+    Units keep their slot until they leave the formation. Units without a slot are
+    matched to the free slots by minimum total squared distance, so units don't swap
+    places or cross through each other while moving.
+    """
+    def __init__(self):
+        self.slot_by_tag: Dict[int, int] = {}
+
+    def assign(self, unit_tags: List[int], unit_positions: np.ndarray, slot_positions: np.ndarray) -> Dict[int, int]:
+        present_tags = set(unit_tags)
+        slot_count = slot_positions.shape[0]
+        self.slot_by_tag = {
+            tag: slot for tag, slot in self.slot_by_tag.items()
+            if tag in present_tags and slot < slot_count
+        }
+        unassigned_rows = [i for i, tag in enumerate(unit_tags) if tag not in self.slot_by_tag]
+        if not unassigned_rows:
+            return self.slot_by_tag
+        taken_slots = set(self.slot_by_tag.values())
+        free_slots = [slot for slot in range(slot_count) if slot not in taken_slots]
+        if not free_slots:
+            return self.slot_by_tag
+
+        offsets = unit_positions[unassigned_rows][:, None, :] - slot_positions[free_slots][None, :, :]
+        costs = (offsets ** 2).sum(axis=2)
+        rows, columns = linear_sum_assignment(costs)
+        for row, column in zip(rows, columns):
+            self.slot_by_tag[unit_tags[unassigned_rows[row]]] = free_slots[column]
+        return self.slot_by_tag
+
+
 class Formation:
     def __init__(
         self, bot: BotAI, formation_type: SquadFormationType, unit_tags: Set[int], offset: Point2, unit_radius: float = 0
@@ -40,6 +75,7 @@ class Formation:
         self.unit_radius = unit_radius
         self.spacing = unit_radius * 2.5
         self.positions: List[Point2] = self.get_formation_positions()
+        self.slot_assignment = SlotAssignment()
         logger.debug(f"created formation {self.positions}")
 
     def __repr__(self):
@@ -327,7 +363,7 @@ class ParentFormation(GeometryMixin):
             next_waypoint = self.path[next_waypoint_index]
             distance_sq = closest_position._distance_squared(next_waypoint)
             next_waypoint_index += 1
-        closest_elevation = self.bot.get_terrain_z_height(closest_position)
+        closest_elevation = self.map.terrain.z_height(closest_position)
         intersect_point: Point2
         if units_center.x == next_waypoint.x:
             # avoid div by zero, but is also much simpler
@@ -348,10 +384,20 @@ class ParentFormation(GeometryMixin):
         towards_distance = min(1, cy_distance_to(intersect_point, next_waypoint))
         new_front_center = Point2(cy_towards(intersect_point, next_waypoint, towards_distance))
         new_front_center = self.clamp_position_to_map_bounds(new_front_center, units_center, self.bot)
-        while abs(self.bot.get_terrain_z_height(new_front_center) - closest_elevation) > 0.8 and new_front_center._distance_squared(closest_position) > 1:
-            towards_distance = min(1, cy_distance_to(new_front_center, closest_position))
-            new_front_center = Point2(cy_towards(new_front_center, closest_position, towards_distance))
-        return new_front_center
+        return self.step_towards_elevation(new_front_center, closest_position, closest_elevation)
+
+    def step_towards_elevation(self, start: Point2, end: Point2, elevation: float) -> Point2:
+        """First point stepping 1 at a time from start towards end that is within 0.8 of elevation, or within 1 of end."""
+        total_distance = cy_distance_to(start, end)
+        if total_distance <= 1:
+            return start
+        step_count = int(math.ceil(total_distance))
+        step_distances = np.minimum(np.arange(step_count + 1), total_distance)
+        direction = (np.array(end) - np.array(start)) / total_distance
+        candidates = np.array(start)[None, :] + direction[None, :] * step_distances[:, None]
+        done = (np.abs(self.map.terrain.z_heights_at(candidates) - elevation) <= 0.8) \
+            | (total_distance - step_distances <= 1)
+        return Point2(candidates[int(np.argmax(done))])
     
     @timed
     def assign_positions_to_units(self, facing: float | None, reference_point: Point2) -> dict[int, Point2]:
@@ -363,13 +409,19 @@ class ParentFormation(GeometryMixin):
                 formation_offsets = self.apply_rotations(facing, formation_offsets)
             positions = [self.destination + offset for offset in formation_offsets]
 
-            # match positions to closest units
+            # match positions to units, keeping previous matches
             formation_units = UnitReferenceHelper.get_updated_units_by_tag(list(formation.unit_tags))
-            for position in positions:
-                if not formation_units:
-                    break
-                closest_unit: Unit = min(formation_units, key=lambda u: u.position.manhattan_distance(position))
-                valid_position = position if closest_unit.is_flying else self.map.get_pathable_position(position, closest_unit)
-                formation_units.remove(closest_unit)
-                unit_destinations[closest_unit.tag] = valid_position
+            if not formation_units or not positions:
+                continue
+            unit_tags = [unit.tag for unit in formation_units]
+            unit_positions = np.array([(unit.position.x, unit.position.y) for unit in formation_units])
+            slot_positions = np.array([(position.x, position.y) for position in positions])
+            slot_by_tag = formation.slot_assignment.assign(unit_tags, unit_positions, slot_positions)
+            for unit in formation_units:
+                slot = slot_by_tag.get(unit.tag)
+                if slot is None:
+                    continue
+                position = positions[slot]
+                valid_position = position if unit.is_flying else self.map.get_pathable_position(position, unit)
+                unit_destinations[unit.tag] = valid_position
         return unit_destinations
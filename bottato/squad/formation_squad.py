@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from loguru import logger
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from cython_extensions.units_utils import cy_center
 from sc2.bot_ai import BotAI
@@ -10,10 +10,11 @@ from sc2.position import Point2, Point3
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bottato.density_grid import DensityGrid
 from bottato.enemy import Enemy
 from bottato.enums import SquadFormationType, UnitMicroType
+from bottato.magic_numbers import MagicNumbers as MN
 from bottato.map.map import Map
-from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.micro.micro_factory import MicroFactory
 from bottato.mixins import GeometryMixin, timed, timed_async
 from bottato.squad.formation import ParentFormation
@@ -40,6 +41,11 @@ class FormationSquad(Squad, GeometryMixin):
         self.destination_facing: float | None = None
         self.last_ungrouped_time: float = -5
         self.executed_positions: Dict[int, Point2] = {}
+        map_width, map_height = self.bot.game_info.map_size
+        # kept up to date incrementally as units move, see get_grouped_units
+        self.density_grid: DensityGrid = DensityGrid(Point2((0, 0)), map_width, map_height)
+        self.grouped_units: Tuple[Unit, Units] | None = None
+        self.grouped_units_time: float = -1
 
     def __repr__(self):
         return f"FormationSquad({self.name},{len(self.units)} units, {len(self.parent_formation.formations)} formations)"
@@ -147,7 +153,7 @@ class FormationSquad(Squad, GeometryMixin):
         if not self.units:
             return
         self._destination = destination
-        most_grouped_unit, grouped_units = self.get_most_grouped_unit(self.units, self.bot, 10)
+        most_grouped_unit, grouped_units = self.get_grouped_units()
         if facing_position is None:
             if destination == self.position:
                 facing_position = destination + (destination - most_grouped_unit.position)
@@ -161,6 +167,7 @@ class FormationSquad(Squad, GeometryMixin):
         formation_positions = self.parent_formation.get_unit_destinations(self._destination, self.units, grouped_units, self.destination_facing)
 
         logger.debug(f"squad {self.name} moving from {self.position} to {self._destination} with {formation_positions.values()}")
+        orders: List[Tuple[Unit, Point2, Point2 | None]] = []
         for unit in self.units:
             if unit.tag in formation_positions:
                 if unit.tag in self.bot.unit_tags_received_action:
@@ -168,14 +175,26 @@ class FormationSquad(Squad, GeometryMixin):
                 if formation_positions[unit.tag] is None:
                     continue
                 # don't spam duplicate move commands
-                previous_position = self.executed_positions.get(unit.tag, None)
-                micro: BaseUnitMicro = MicroFactory.get_unit_micro(unit)
-                micro_func = micro.harass if do_harass else micro.move
-                # 1/3 of total command execution time
-                if await micro_func(unit, formation_positions[unit.tag], force_move, previous_position=previous_position) == UnitMicroType.MOVE:
-                    self.executed_positions[unit.tag] = formation_positions[unit.tag]
-                elif unit.tag in self.executed_positions:
-                    del self.executed_positions[unit.tag]
+                orders.append((unit, formation_positions[unit.tag], self.executed_positions.get(unit.tag, None)))
+        # 1/3 of total command execution time
+        results = await MicroFactory.move_units(orders, force_move, harass=do_harass)
+        for unit, position, _ in orders:
+            if results[unit.tag] == UnitMicroType.MOVE:
+                self.executed_positions[unit.tag] = position
+            elif unit.tag in self.executed_positions:
+                del self.executed_positions[unit.tag]
+
+    def get_grouped_units(self) -> Tuple[Unit, Units]:
+        """Most grouped unit in the squad and the units within 10 of it, computed once per step."""
+        if self.grouped_units is None or self.grouped_units_time != self.bot.time:
+            if len(self.units) > MN.DENSITY_GRID_MIN_UNITS:
+                self.density_grid.update(self.units)
+                most_grouped_unit, grouped_units = self.density_grid.most_grouped_unit(10)
+                self.grouped_units = (most_grouped_unit, Units(grouped_units, bot_object=self.bot))
+            else:
+                self.grouped_units = self.get_most_grouped_unit(self.units, self.bot, 10)
+            self.grouped_units_time = self.bot.time
+        return self.grouped_units
 
     @timed
     def is_grouped(self) -> bool:
@@ -183,7 +202,7 @@ class FormationSquad(Squad, GeometryMixin):
             # give it a couple seconds to regroup before checking again
             return False
         if self.units:
-            most_grouped_unit, grouped_units = self.get_most_grouped_unit(self.units, self.bot, 10)
+            most_grouped_unit, grouped_units = self.get_grouped_units()
             if most_grouped_unit:
                 distance_limit = 18 ** 2
                 units_out_of_formation = self.units.filter(lambda u: u.age == 0 and u.tag not in grouped_units.tags and u.distance_to_squared(most_grouped_unit) > distance_limit)
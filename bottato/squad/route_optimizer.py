@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+
+class RouteOptimizer:
+    """Closed tours over a precomputed distance matrix.
+
+    Small sets are solved exactly with Held-Karp, larger ones with nearest neighbour
+    followed by 2-opt and Or-opt passes. Tours always start at index 0.
+    """
+    HELD_KARP_MAX_LOCATIONS = 12
+
+    @staticmethod
+    def euclidean_matrix(points: np.ndarray, sources: np.ndarray | None = None) -> np.ndarray:
+        """Straight-line distance from each source (default: each point) to each point."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        sources = points if sources is None else np.asarray(sources, dtype=np.float64).reshape(-1, 2)
+        return np.hypot(sources[:, None, 0] - points[None, :, 0], sources[:, None, 1] - points[None, :, 1])
+
+    @staticmethod
+    def fill_unreachable(distances: np.ndarray, points: np.ndarray, sources: np.ndarray | None = None) -> np.ndarray:
+        """Replace inf path distances with a penalized straight-line distance."""
+        fallback = RouteOptimizer.euclidean_matrix(points, sources) * 2
+        return np.where(np.isfinite(distances), distances, fallback)
+
+    @staticmethod
+    def tour_length(distances: np.ndarray, order: List[int]) -> float:
+        if len(order) < 2:
+            return 0.0
+        indices = np.asarray(order)
+        return float(distances[indices, np.roll(indices, -1)].sum())
+
+    @staticmethod
+    def solve(distances: np.ndarray) -> List[int]:
+        count = distances.shape[0]
+        if count <= 3:
+            return list(range(count))
+        if count <= RouteOptimizer.HELD_KARP_MAX_LOCATIONS:
+            return RouteOptimizer.held_karp(distances)
+        return RouteOptimizer.improve(distances, RouteOptimizer.nearest_neighbor(distances))
+
+    @staticmethod
+    def held_karp(distances: np.ndarray) -> List[int]:
+        """Exact shortest closed tour starting at 0, O(2^n * n^2) vectorized over the previous node."""
+        count = distances.shape[0]
+        others = count - 1
+        subset_count = 1 << others
+        # cost[subset, last] = shortest path from 0 through subset ending at node last + 1
+        cost = np.full((subset_count, others), np.inf)
+        parent = np.full((subset_count, others), -1, dtype=np.int64)
+        for node in range(others):
+            cost[1 << node, node] = distances[0, node + 1]
+        inner = distances[1:, 1:]
+        for subset in range(1, subset_count):
+            members = [node for node in range(others) if subset >> node & 1]
+            if len(members) < 2:
+                continue
+            for last in members:
+                previous_subset = subset & ~(1 << last)
+                candidates = cost[previous_subset] + inner[:, last]
+                best = int(np.argmin(candidates))
+                cost[subset, last] = candidates[best]
+                parent[subset, last] = best
+        full = subset_count - 1
+        last = int(np.argmin(cost[full] + distances[1:, 0]))
+        order: List[int] = []
+        subset = full
+        while last >= 0:
+            order.append(last + 1)
+            previous = int(parent[subset, last])
+            subset &= ~(1 << last)
+            last = previous
+        order.append(0)
+        order.reverse()
+        return order
+
+    @staticmethod
+    def nearest_neighbor(distances: np.ndarray) -> List[int]:
+        count = distances.shape[0]
+        order = [0]
+        visited = np.zeros(count, dtype=bool)
+        visited[0] = True
+        for _ in range(count - 1):
+            candidates = np.where(visited, np.inf, distances[order[-1]])
+            next_node = int(np.argmin(candidates))
+            order.append(next_node)
+            visited[next_node] = True
+        return order
+
+    @staticmethod
+    def improve(distances: np.ndarray, order: List[int], max_passes: int = 50) -> List[int]:
+        """2-opt and Or-opt until neither finds an improvement. Index 0 stays first."""
+        order = list(order)
+        for _ in range(max_passes):
+            improved = RouteOptimizer.two_opt_pass(distances, order)
+            improved = RouteOptimizer.or_opt_pass(distances, order) or improved
+            if not improved:
+                break
+        return order
+
+    @staticmethod
+    def two_opt_pass(distances: np.ndarray, order: List[int]) -> bool:
+        count = len(order)
+        improved = False
+        for i in range(1, count - 1):
+            for j in range(i + 1, count):
+                a, b = order[i - 1], order[i]
+                c, d = order[j], order[(j + 1) % count]
+                delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+                if delta < -1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+        return improved
+
+    @staticmethod
+    def or_opt_pass(distances: np.ndarray, order: List[int]) -> bool:
+        """Move segments of 1-3 locations to a cheaper position in the tour."""
+        improved = False
+        for segment_length in (1, 2, 3):
+            i = 1
+            while i + segment_length <= len(order):
+                count = len(order)
+                segment = order[i:i + segment_length]
+                before, after = order[i - 1], order[(i + segment_length) % count]
+                removal_gain = distances[before, segment[0]] + distances[segment[-1], after] - distances[before, after]
+                rest = order[:i] + order[i + segment_length:]
+                best_delta, best_position, best_reversed = -1e-9, -1, False
+                for position in range(len(rest)):
+                    a, b = rest[position], rest[(position + 1) % len(rest)]
+                    if a == before:
+                        continue
+                    forward = distances[a, segment[0]] + distances[segment[-1], b] - distances[a, b] - removal_gain
+                    backward = distances[a, segment[-1]] + distances[segment[0], b] - distances[a, b] - removal_gain
+                    if forward < best_delta:
+                        best_delta, best_position, best_reversed = forward, position, False
+                    if backward < best_delta:
+                        best_delta, best_position, best_reversed = backward, position, True
+                if best_position >= 0:
+                    moved = segment[::-1] if best_reversed else segment
+                    order[:] = rest[:best_position + 1] + moved + rest[best_position + 1:]
+                    improved = True
+                i += 1
+        return improved
+
+    @staticmethod
+    def insert(distances: np.ndarray, order: List[int], new_node: int) -> List[int]:
+        """Add a node at its cheapest position, then touch up with local search."""
+        if not order:
+            return [new_node]
+        best_position, best_delta = 0, np.inf
+        for position in range(len(order)):
+            a, b = order[position], order[(position + 1) % len(order)]
+            delta = distances[a, new_node] + distances[new_node, b] - distances[a, b]
+            if delta < best_delta:
+                best_position, best_delta = position, delta
+        order = order[:best_position + 1] + [new_node] + order[best_position + 1:]
+        return RouteOptimizer.improve(distances, order)
+
+    @staticmethod
+    def remove(distances: np.ndarray, order: List[int], node: int) -> List[int]:
+        """Drop a node and renumber the rest to match a distance matrix with that row and column deleted."""
+        order = [other - (other > node) for other in order if other != node]
+        reduced = np.delete(np.delete(distances, node, axis=0), node, axis=1)
+        if order and order[0] != 0:
+            start = order.index(0)
+            order = order[start:] + order[:start]
+        return RouteOptimizer.improve(reduced, order)
+
+    @staticmethod
+    def add_node(distances: np.ndarray, new_distances: np.ndarray) -> np.ndarray:
+        """Distance matrix grown by one node, new_distances holds its distance to every node including itself."""
+        count = distances.shape[0]
+        grown = np.empty((count + 1, count + 1), dtype=np.float64)
+        grown[:count, :count] = distances
+        grown[count, :] = new_distances
+        grown[:, count] = new_distances
+        return grown
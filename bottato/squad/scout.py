@@ -1,7 +1,8 @@
 from loguru import logger
 from typing import List
 
-from cython_extensions.geometry import cy_distance_to, cy_distance_to_squared
+import numpy as np
+from cython_extensions.geometry import cy_distance_to
 from cython_extensions.units_utils import cy_closer_than, cy_closest_to
 from sc2.bot_ai import BotAI
 from sc2.ids.unit_typeid import UnitTypeId
@@ -15,6 +16,7 @@ from bottato.map.map import Map
 from bottato.micro.base_unit_micro import BaseUnitMicro
 from bottato.micro.micro_factory import MicroFactory
 from bottato.military import Military
+from bottato.squad.route_optimizer import RouteOptimizer
 from bottato.squad.scouting_location import ScoutingLocation
 from bottato.squad.squad import Squad
 from bottato.unit_reference_helper import UnitReferenceHelper
@@ -32,6 +34,8 @@ class Scout(Squad):
         self.time_of_closest_distance = 9999
         self.complete = False
         self.workers = workers
+        self.map: Map | None = None
+        self.distance_matrix: np.ndarray | None = None
         super().__init__(bot=bot, name="scout")
 
     def __repr__(self):
@@ -39,53 +43,60 @@ class Scout(Squad):
 
     def add_location(self, scouting_location: ScoutingLocation):
         self.scouting_locations.append(scouting_location)
-
-    def traveling_salesman_sort(self, map: Map | None = None):
-        """Sort scouting locations in traveling salesman order to minimize travel distance"""
+        if self.distance_matrix is not None:
+            # route already optimized, insert into it instead of re-solving
+            current_location = self.scouting_locations[self.scouting_locations_index]
+            self.distance_matrix = RouteOptimizer.add_node(self.distance_matrix, self.get_distances_from(scouting_location))
+            order = RouteOptimizer.insert(self.distance_matrix, list(range(len(self.scouting_locations) - 1)),
+                                          len(self.scouting_locations) - 1)
+            self.apply_order(order)
+            self.scouting_locations_index = self.scouting_locations.index(current_location)
+
+    def remove_location(self, scouting_location: ScoutingLocation):
+        index = self.scouting_locations.index(scouting_location)
+        self.scouting_locations.pop(index)
+        if self.scouting_locations_index > index or self.scouting_locations_index >= len(self.scouting_locations):
+            self.scouting_locations_index = max(self.scouting_locations_index - 1, 0)
+        if self.distance_matrix is not None:
+            current_location = self.scouting_locations[self.scouting_locations_index] if self.scouting_locations else None
+            order = RouteOptimizer.remove(self.distance_matrix, list(range(len(self.scouting_locations) + 1)), index)
+            self.distance_matrix = np.delete(np.delete(self.distance_matrix, index, axis=0), index, axis=1)
+            self.apply_order(order)
+            if current_location:
+                self.scouting_locations_index = self.scouting_locations.index(current_location)
+
+    def get_distance_matrix(self, locations: List[ScoutingLocation], path_distances: np.ndarray | None = None) -> np.ndarray:
+        points = np.array([location.scouting_position for location in locations], dtype=np.float64)
+        distances = path_distances
+        if distances is None:
+            if self.map is None:
+                return RouteOptimizer.euclidean_matrix(points)
+            # one flood per location over the pathing grid
+            distances = self.map.terrain.path_distances(points, points)
+        return RouteOptimizer.fill_unreachable(np.minimum(distances, distances.T), points)
+
+    def get_distances_from(self, scouting_location: ScoutingLocation) -> np.ndarray:
+        """Distances from one location to each of the scout's locations, a single flood."""
+        points = np.array([location.scouting_position for location in self.scouting_locations], dtype=np.float64)
+        source = np.array([scouting_location.scouting_position], dtype=np.float64)
+        if self.map is None:
+            return RouteOptimizer.euclidean_matrix(points, source)[0]
+        distances = self.map.terrain.path_distances(source, points)
+        return RouteOptimizer.fill_unreachable(distances, points, source)[0]
+
+    def apply_order(self, order: List[int]):
+        self.scouting_locations = [self.scouting_locations[i] for i in order]
+        if self.distance_matrix is not None:
+            self.distance_matrix = self.distance_matrix[np.ix_(order, order)]
+
+    def traveling_salesman_sort(self, map: Map | None = None, path_distances: np.ndarray | None = None):
+        """Sort scouting locations in traveling salesman order to minimize travel distance.
+        path_distances can hold precomputed path distances between the locations."""
         if not self.scouting_locations:
             return
-        sorted_locations: List[ScoutingLocation] = []
-        best_distance = float('inf')
-        current_position = self.scouting_locations[0]
-        sorted_unvisited = sorted(self.scouting_locations, key=lambda loc: current_position.scouting_position._distance_squared(loc.scouting_position))
-        last_position = sorted_unvisited[-1]
-        possible_routes: List[List[ScoutingLocation]] = self.get_routes([current_position], sorted_unvisited[1:-1])
-
-        for route in possible_routes:
-            total_distance = 0.0
-            previous_location = route[0]
-            route.append(last_position)
-            for location in route[1:]:
-                if map:
-                    # add distance to nearest pathing grid point
-                    path_points = map.get_path_points(previous_location.scouting_position, location.scouting_position)
-                    for i in range(1, len(path_points)):
-                        total_distance += cy_distance_to(path_points[i-1], path_points[i])
-                else:
-                    total_distance += cy_distance_to(previous_location.scouting_position, location.scouting_position)
-                if total_distance > best_distance:
-                    break
-                previous_location = location
-            else:
-                best_distance = total_distance
-                sorted_locations = route
-        self.scouting_locations = sorted_locations
-
-    def get_routes(self, current_route: List[ScoutingLocation], unvisited: List[ScoutingLocation]) -> List[List[ScoutingLocation]]:
-        if not unvisited:
-            return [current_route]
-        routes: List[List[ScoutingLocation]] = []
-        previous_location = current_route[-1]
-        sorted_unvisited = sorted(unvisited, key=lambda loc: cy_distance_to_squared(previous_location.scouting_position, loc.scouting_position))
-        for i in range(len(sorted_unvisited)):
-            if i > 2:
-                # limit branching factor for performance
-                break
-            next_location = sorted_unvisited[i]
-            remaining = sorted_unvisited[:i] + sorted_unvisited[i+1:]
-            new_route = current_route + [next_location]
-            routes.extend(self.get_routes(new_route, remaining))
-        return routes
+        self.map = map
+        self.distance_matrix = self.get_distance_matrix(self.scouting_locations, path_distances)
+        self.apply_order(RouteOptimizer.solve(self.distance_matrix))
 
     def contains_location(self, scouting_location: ScoutingLocation):
         return scouting_location in self.scouting_locations
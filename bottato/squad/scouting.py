@@ -1,4 +1,5 @@
 
+import numpy as np
 from cython_extensions.geometry import cy_distance_to
 from sc2.bot_ai import BotAI
 from sc2.ids.ability_id import AbilityId
@@ -7,6 +8,8 @@ from sc2.ids.unit_typeid import UnitTypeId
 from bottato.economy.workers import Workers
 from bottato.enums import BuildType, ExpansionSelection, ScoutType
 from bottato.log_helper import LogHelper
+from bottato.map.init_pipeline import InitPipeline
+from bottato.map.terrain import Terrain
 from bottato.military import Military
 from bottato.mixins import DebugMixin, timed_async
 from bottato.squad.initial_scout import InitialScout
@@ -31,7 +34,14 @@ class Scouting(Squad, DebugMixin):
         self.initial_scout = InitialScout(self.bot, tactics, self.workers)
         self.newest_enemy_base = self.bot.enemy_start_locations[0]
 
-    def init_scouting_routes(self):
+    def submit_init_jobs(self, pipeline: InitPipeline):
+        # path distances between every pair of scouting locations, for ordering the routes
+        points = [location.scouting_position for location in self.intel.scouting_locations]
+        indices = self.map.terrain.to_indices(points)
+        pipeline.submit("scouting_distances", Terrain.compute_path_distances, self.map.terrain.pathing, indices, indices)
+
+    def init_scouting_routes(self, location_distances: np.ndarray):
+        """location_distances holds path distances between the intel scouting locations, in their order."""
         # assign all expansions locations to either friendly or enemy territory
         nearest_locations_temp = self.map.expansion_orders[ExpansionSelection.CLOSEST]
         enemy_nearest_locations_temp = self.map.enemy_expansion_orders[ExpansionSelection.CLOSEST]
@@ -43,7 +53,8 @@ class Scouting(Squad, DebugMixin):
             if not self.friendly_territory.contains_location(enemy_nearest_locations_temp[i]):
                 self.enemy_territory.add_location(enemy_nearest_locations_temp[i])
                 
-        self.friendly_territory.traveling_salesman_sort(self.map)
+        location_indices = [self.intel.scouting_locations.index(location) for location in self.friendly_territory.scouting_locations]
+        self.friendly_territory.traveling_salesman_sort(self.map, location_distances[np.ix_(location_indices, location_indices)])
         self.enemy_territory.traveling_salesman_sort()
 
     def update_visibility(self):
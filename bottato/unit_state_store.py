@@ -0,0 +1,161 @@
+import sys
+from loguru import logger
+from typing import Dict, List
+
+from sc2.bot_ai import BotAI
+
+from bottato.magic_numbers import MagicNumbers as MN
+
+
+class UnitComponent(dict):
+    """Per-unit state owned by one subsystem, keyed by unit tag.
+
+    Behaves like a normal dict. Assigning to a tag marks it fresh; components with a
+    stale_seconds timeout drop tags that haven't been written or touched for that long.
+    State that is mutated in place (e.g. appending to a deque) should call touch().
+    """
+    def __init__(self, name: str, stale_seconds: float | None = None) -> None:
+        super().__init__()
+        self.name = name
+        self.stale_seconds = stale_seconds
+        self.touched: Dict[int, float] = {}
+
+    def __setitem__(self, tag: int, value) -> None:
+        super().__setitem__(tag, value)
+        self.touched[tag] = UnitStateStore.time
+
+    def __delitem__(self, tag: int) -> None:
+        super().__delitem__(tag)
+        self.touched.pop(tag, None)
+
+    def setdefault(self, tag: int, default=None):
+        if tag not in self:
+            self[tag] = default
+        return self[tag]
+
+    def pop(self, tag: int, *default):
+        self.touched.pop(tag, None)
+        return super().pop(tag, *default)
+
+    def clear(self) -> None:
+        super().clear()
+        self.touched.clear()
+
+    def touch(self, tag: int) -> None:
+        if tag in self:
+            self.touched[tag] = UnitStateStore.time
+
+    def evict(self, tag: int) -> bool:
+        if tag not in self:
+            return False
+        del self[tag]
+        return True
+
+    def evict_stale(self, time: float) -> int:
+        if self.stale_seconds is None:
+            return 0
+        cutoff = time - self.stale_seconds
+        stale_tags = [tag for tag, touched in self.touched.items() if touched < cutoff]
+        for tag in stale_tags:
+            del self[tag]
+        return len(stale_tags)
+
+    def get_size_bytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.touched) + sum(sys.getsizeof(value) for value in self.values())
+
+
+class UnitTagSet(set):
+    """Set of unit tags owned by one subsystem, tags are dropped when the unit is destroyed."""
+    def __init__(self, name: str) -> None:
+        super().__init__()
+        self.name = name
+
+    def evict(self, tag: int) -> bool:
+        if tag not in self:
+            return False
+        self.remove(tag)
+        return True
+
+    def evict_stale(self, time: float) -> int:
+        return 0
+
+    def get_size_bytes(self) -> int:
+        return sys.getsizeof(self)
+
+
+class UnitStateStore:
+    """Central registry of per-unit components.
+
+    Subsystems register a component once and use it as their tag-keyed dict. Every
+    component drops a tag when that unit is destroyed, and components with a
+    staleness timeout also drop tags nobody has updated recently.
+    """
+    bot: BotAI | None = None
+    time: float = 0.0
+    components: Dict[str, UnitComponent | UnitTagSet] = {}
+    evicted_by_death: Dict[str, int] = {}
+    evicted_by_staleness: Dict[str, int] = {}
+    last_stale_check: float = 0.0
+
+    @staticmethod
+    def register(name: str, stale_seconds: float | None = None) -> UnitComponent:
+        """Create a component, replacing any earlier one with the same name."""
+        component = UnitComponent(name, stale_seconds)
+        UnitStateStore.components[name] = component
+        UnitStateStore.evicted_by_death[name] = 0
+        UnitStateStore.evicted_by_staleness[name] = 0
+        return component
+
+    @staticmethod
+    def register_set(name: str) -> UnitTagSet:
+        """Create a tag set component, replacing any earlier one with the same name."""
+        tag_set = UnitTagSet(name)
+        UnitStateStore.components[name] = tag_set
+        UnitStateStore.evicted_by_death[name] = 0
+        UnitStateStore.evicted_by_staleness[name] = 0
+        return tag_set
+
+    @staticmethod
+    def init(bot: BotAI):
+        UnitStateStore.bot = bot
+        UnitStateStore.time = bot.time
+        UnitStateStore.last_stale_check = bot.time
+
+    @staticmethod
+    def update():
+        if UnitStateStore.bot is None:
+            return
+        UnitStateStore.time = UnitStateStore.bot.time
+        if UnitStateStore.time - UnitStateStore.last_stale_check >= MN.UNIT_STATE_EVICTION_INTERVAL:
+            UnitStateStore.evict_stale()
+
+    @staticmethod
+    def evict_stale() -> int:
+        UnitStateStore.last_stale_check = UnitStateStore.time
+        total = 0
+        for name, component in UnitStateStore.components.items():
+            evicted = component.evict_stale(UnitStateStore.time)
+            UnitStateStore.evicted_by_staleness[name] += evicted
+            total += evicted
+        return total
+
+    @staticmethod
+    def on_unit_destroyed(unit_tag: int):
+        for name, component in UnitStateStore.components.items():
+            if component.evict(unit_tag):
+                UnitStateStore.evicted_by_death[name] += 1
+
+    @staticmethod
+    def memory_report() -> List[str]:
+        lines = []
+        for name, component in sorted(UnitStateStore.components.items()):
+            lines.append(f"{name}: {len(component)} entries, ~{component.get_size_bytes()} bytes, "
+                         f"evicted {UnitStateStore.evicted_by_death[name]} dead "
+                         f"/ {UnitStateStore.evicted_by_staleness[name]} stale")
+        return lines
+
+    @staticmethod
+    def log_memory_report():
+        logger.info("unit state store:")
+        for line in UnitStateStore.memory_report():
+            logger.info(f"  {line}")
@@ -11,6 +11,7 @@ from sc2.units import Units
 
 from bottato.enums import CycloneLockOnState, UnitAttribute
 from bottato.mixins import GeometryMixin, timed
+from bottato.unit_state_store import UnitComponent, UnitStateStore
 
 
 class UnitTypes(GeometryMixin):
@@ -589,8 +590,8 @@ class UnitTypes(GeometryMixin):
         actual_distance = (distance ** 0.5) - attacker.radius - target.radius
         return actual_distance - attack_range
 
-    cyclone_lockon_states: Dict[int, CycloneLockOnState] = {}
-    cyclone_lockon_lost_times: Dict[int, float] = {}
+    cyclone_lockon_states: UnitComponent = UnitStateStore.register("cyclone.lockon_states")
+    cyclone_lockon_lost_times: UnitComponent = UnitStateStore.register("cyclone.lockon_lost_times")
     @staticmethod
     async def update_cyclone_lockon_state(bot: BotAI, lock_on_targets: Dict[int, int]):
         """
@@ -0,0 +1,112 @@
+from typing import Tuple
+
+import numpy as np
+from sc2.bot_ai import BotAI
+
+from bottato.map.terrain import Terrain
+
+
+class VisibilityHelper:
+    """Per-step visibility and creep as [x, y] arrays, plus when each cell was last seen.
+
+    Call update() once per step, then answer visibility questions for many points or
+    rays with a single array operation. The visibility snapshot and point rounding are
+    Terrain's, so both agree on what is visible this loop.
+    """
+    bot: BotAI
+    terrain: Terrain
+    visible: np.ndarray = np.zeros((0, 0), dtype=bool)
+    creep: np.ndarray = np.zeros((0, 0), dtype=bool)
+    last_visible_loop: np.ndarray = np.zeros((0, 0), dtype=np.int64)
+    snapshot_loop: int = -1
+
+    # offsets of the box corners and edge midpoints checked around a unit, scaled by radius
+    BOX_OFFSETS = np.array([
+        (0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)
+    ], dtype=np.float64)
+    # ray steps checked per pass in first_along_rays, most rays resolve in the first pass
+    RAY_CHUNK_STEPS = 16
+
+    @staticmethod
+    def init(bot: BotAI, terrain: Terrain):
+        VisibilityHelper.bot = bot
+        VisibilityHelper.terrain = terrain
+        VisibilityHelper.snapshot_loop = -1
+        VisibilityHelper.last_visible_loop = np.full((terrain.width, terrain.height), -1, dtype=np.int64)
+        VisibilityHelper.update()
+
+    @staticmethod
+    def update():
+        bot = VisibilityHelper.bot
+        if VisibilityHelper.snapshot_loop == bot.state.game_loop:
+            return
+        VisibilityHelper.visible = VisibilityHelper.terrain.visibility
+        VisibilityHelper.creep = bot.state.creep.data_numpy.T == 1
+        VisibilityHelper.last_visible_loop[VisibilityHelper.visible] = bot.state.game_loop
+        VisibilityHelper.snapshot_loop = bot.state.game_loop
+
+    @staticmethod
+    def visible_at(points) -> np.ndarray:
+        return VisibilityHelper.visible[VisibilityHelper.terrain.to_indices(points)]
+
+    @staticmethod
+    def creep_at(points) -> np.ndarray:
+        return VisibilityHelper.creep[VisibilityHelper.terrain.to_indices(points)]
+
+    @staticmethod
+    def any_visible_near(centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """True for each center where the center or any corner/edge of its radius box is visible."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (centers.shape[0],))
+        points = centers[:, None, :] + VisibilityHelper.BOX_OFFSETS[None, :, :] * radii[:, None, None]
+        return VisibilityHelper.visible_at(points.reshape(-1, 2)).reshape(centers.shape[0], -1).any(axis=1)
+
+    @staticmethod
+    def first_along_rays(origins: np.ndarray, directions: np.ndarray, radii: np.ndarray,
+                         find_visible: bool, max_steps: int) -> np.ndarray:
+        """Number of steps along each ray to the first point matching find_visible, 0 if none within max_steps.
+
+        Step k of ray i is origins[i] + directions[i] * k for k in 1..max_steps, and a point counts
+        as visible if any part of its radius box is visible. Steps are checked a chunk at a time
+        for the rays that haven't matched yet, stopping once every ray has.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+        ray_count = origins.shape[0]
+        result = np.zeros(ray_count, dtype=np.int64)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (ray_count,))
+        remaining = np.arange(ray_count)
+        for first_step in range(1, max_steps + 1, VisibilityHelper.RAY_CHUNK_STEPS):
+            if remaining.size == 0:
+                break
+            steps = np.arange(first_step, min(first_step + VisibilityHelper.RAY_CHUNK_STEPS, max_steps + 1), dtype=np.float64)
+            points = origins[remaining, None, :] + directions[remaining, None, :] * steps[None, :, None]
+            point_radii = np.repeat(radii[remaining], steps.size)
+            visible = VisibilityHelper.any_visible_near(points.reshape(-1, 2), point_radii).reshape(remaining.size, steps.size)
+            matches = visible if find_visible else ~visible
+            matched = matches.any(axis=1)
+            result[remaining[matched]] = matches[matched].argmax(axis=1) + first_step
+            remaining = remaining[~matched]
+        return result
+
+    @staticmethod
+    def fraction_visible(center: Tuple[float, float], radius: float) -> float:
+        """Fraction of grid cells within radius of center that are visible."""
+        width, height = VisibilityHelper.visible.shape
+        x_min, x_max = max(int(center[0] - radius), 0), min(int(center[0] + radius) + 1, width)
+        y_min, y_max = max(int(center[1] - radius), 0), min(int(center[1] + radius) + 1, height)
+        if x_min >= x_max or y_min >= y_max:
+            return 0.0
+        xs, ys = np.meshgrid(np.arange(x_min, x_max), np.arange(y_min, y_max), indexing="ij")
+        in_circle = (xs + 0.5 - center[0]) ** 2 + (ys + 0.5 - center[1]) ** 2 <= radius ** 2
+        cell_count = in_circle.sum()
+        if cell_count == 0:
+            return 0.0
+        return float(VisibilityHelper.visible[x_min:x_max, y_min:y_max][in_circle].sum() / cell_count)
+
+    @staticmethod
+    def last_visible_age(points) -> np.ndarray:
+        """Seconds since each point was last visible, inf if never seen."""
+        last_loops = VisibilityHelper.last_visible_loop[VisibilityHelper.terrain.to_indices(points)]
+        ages = (VisibilityHelper.snapshot_loop - last_loops) / 22.4
+        return np.where(last_loops < 0, np.inf, ages)
@@ -0,0 +1,44 @@
+import numpy as np
+
+from ..bottato.micro.aoe_planner import AoePlanner
+
+
+def solve(casters, enemies, weights, friendlies=(), friendly_weights=(), min_value=1.0, radius=1.5, cast_range=10.0):
+    return list(AoePlanner.solve(
+        np.array(casters, dtype=np.float64),
+        np.full(len(casters), min_value),
+        np.array(enemies, dtype=np.float64),
+        np.array(weights, dtype=np.float64),
+        np.array(friendlies, dtype=np.float64).reshape(-1, 2),
+        np.array(friendly_weights, dtype=np.float64),
+        radius,
+        cast_range,
+    ))
+
+
+class TestAoePlanner:
+    def test_centers_on_best_group(self):
+        enemies = [(10, 10), (10.5, 10), (11, 10), (20, 10)]
+        assigned = solve([(5, 10)], enemies, [50, 50, 50, 100])
+        assert assigned[0] in (0, 1, 2)
+
+    def test_casters_split_groups(self):
+        enemies = [(10, 10), (10.5, 10), (10, 20), (10.5, 20)]
+        assigned = solve([(5, 15), (6, 15)], enemies, [100] * 4)
+        groups = sorted(j // 2 for j in assigned)
+        assert groups == [0, 1]
+
+    def test_no_second_cast_on_covered_group(self):
+        enemies = [(10, 10), (10.5, 10)]
+        assert sorted(solve([(5, 10), (6, 10)], enemies, [100, 100])) == [-1, 0]
+
+    def test_min_value_and_range(self):
+        enemies = [(10, 10), (30, 10)]
+        assert solve([(5, 10)], enemies, [50, 500], min_value=100) == [-1]
+        assert solve([(25, 10)], enemies, [50, 500], min_value=100) == [1]
+
+    def test_friendly_fire_penalty(self):
+        enemies = [(10, 10), (10, 20)]
+        friendlies = [(10.5, 10), (10, 10.5)]
+        assigned = solve([(5, 15)], enemies, [100, 80], friendlies, [50, 50])
+        assert assigned == [1]
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from ..bottato.background_analytics import BackgroundAnalytics
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestBackgroundAnalytics:
+    def test_latest_result_and_staleness(self):
+        analytics = BackgroundAnalytics("test", lambda snapshot: sum(snapshot))
+        assert analytics.latest(0.0, 1.0) is None
+        analytics.submit((1, 2, 3), 10.0)
+        wait_for(lambda: analytics.front is not None)
+        result = analytics.latest(10.5, 1.0)
+        assert result is not None and result.value == 6
+        assert result.staleness(10.5) == 0.5
+        assert analytics.latest(11.5, 1.0) is None
+        analytics.stop()
+
+    def test_only_newest_pending_snapshot_is_computed(self):
+        release = threading.Event()
+        computed = []
+
+        def compute(snapshot):
+            release.wait()
+            computed.append(snapshot)
+            return snapshot
+
+        analytics = BackgroundAnalytics("test", compute)
+        analytics.submit(1, 1.0)
+        wait_for(lambda: analytics.pending is None)
+        # the worker is busy with 1, 2 gets replaced by 3 before it's picked up
+        analytics.submit(2, 2.0)
+        analytics.submit(3, 3.0)
+        release.set()
+        wait_for(lambda: analytics.front is not None and analytics.front.value == 3)
+        assert computed == [1, 3]
+        analytics.stop()
+
+    def test_failure_keeps_worker_running(self):
+        analytics = BackgroundAnalytics("test", lambda snapshot: 1 / snapshot)
+        analytics.submit(0, 1.0)
+        analytics.submit(2, 2.0)
+        wait_for(lambda: analytics.front is not None)
+        assert analytics.front.value == 0.5
+        analytics.stop()
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from ..bottato.building.base_layout import BaseLayout
+
+
+def open_grid(size=60, margin=10):
+    grid = np.zeros((size, size), dtype=bool)
+    grid[margin:size - margin, margin:size - margin] = True
+    return grid
+
+
+class TestBaseLayout:
+    def test_window_is_free(self):
+        free = np.ones((5, 4), dtype=bool)
+        free[2, 1] = False
+        windows = BaseLayout.window_is_free(free, 2, 2)
+        assert windows.shape == (4, 3)
+        assert not windows[1, 0]
+        assert not windows[2, 1]
+        assert windows[3, 2]
+        assert windows[0, 2]
+
+    def test_production_slots_do_not_overlap(self):
+        free = open_grid()
+        buildable = free.copy()
+        slots = BaseLayout.plan_production_slots(free, (30, 30), 8)
+        assert len(slots) == 8
+        occupied = np.zeros_like(buildable, dtype=np.int32)
+        for x, y in slots:
+            # structure and add-on footprints
+            occupied[int(x - 1.5):int(x + 1.5), int(y - 1.5):int(y + 1.5)] += 1
+            occupied[int(x + 1.5):int(x + 3.5), int(y - 1.5):int(y + 0.5)] += 1
+        assert occupied.max() == 1
+        assert buildable[occupied > 0].all()
+
+    def test_production_slots_keep_lanes(self):
+        free = open_grid()
+        slots = BaseLayout.plan_production_slots(free, (30, 30), 8)
+        for x, y in slots:
+            for other_x, other_y in slots:
+                if (x, y) == (other_x, other_y):
+                    continue
+                # add-on plus one cell lane to the right, lane below
+                assert abs(other_x - x) >= 6 or abs(other_y - y) >= 4
+
+    def test_production_slots_closest_first(self):
+        free = open_grid()
+        slots = BaseLayout.plan_production_slots(free, (30, 30), 5)
+        distances = [(x - 30) ** 2 + (y - 30) ** 2 for x, y in slots]
+        assert distances == sorted(distances)
+
+    def test_depot_slots_hug_edges(self):
+        free = open_grid()
+        buildable = free.copy()
+        slots = BaseLayout.plan_depot_slots(free, buildable, (30, 30), 6)
+        assert len(slots) == 6
+        for x, y in slots:
+            near_edge = min(x - 10, y - 10, 50 - x, 50 - y) <= 2
+            assert near_edge
+
+    def test_depots_avoid_production(self):
+        free = open_grid()
+        buildable = free.copy()
+        production = BaseLayout.plan_production_slots(free, (30, 30), 4)
+        depots = BaseLayout.plan_depot_slots(free, buildable, (30, 30), 20)
+        production_cells = BaseLayout._occupied_by(production, [], buildable.shape)
+        depot_cells = BaseLayout._occupied_by([], depots, buildable.shape)
+        assert not (production_cells & depot_cells).any()
+
+    def test_find_nearest_free_footprint(self):
+        free = open_grid()
+        free[28:33, 28:33] = False
+        slot = BaseLayout.find_nearest_free_footprint(free, (30, 30), 2, 6)
+        assert slot is not None
+        x, y = slot
+        assert free[int(x - 1):int(x + 1), int(y - 1):int(y + 1)].all()
+        assert BaseLayout.find_nearest_free_footprint(free, (30, 30), 2, 1) is None
+
+    def test_mark_corridors(self):
+        grid = np.zeros((40, 40), dtype=bool)
+        BaseLayout.mark_corridors(grid, (20.5, 20.5), [(27.5, 20.5)], 1)
+        assert grid[24, 20]
+        assert not grid[24, 23]
+        assert not grid[30, 20]
+
+    def test_slots_are_kept_until_claimed(self):
+        bot = SimpleNamespace(time=0.0)
+        layout = BaseLayout(bot)  # type: ignore
+        first, second, third = Point2((10.5, 10.5)), Point2((20.5, 10.5)), Point2((30.5, 10.5))
+        layout.depot_slots = [first, second, third]
+        # reserved slots are skipped by other steps but not removed
+        layout.reserve_slot(first, 1)
+        assert layout.get_free_slots(UnitTypeId.SUPPLYDEPOT, 2) == [second, third]
+        assert layout.get_free_slots(UnitTypeId.SUPPLYDEPOT, 1) == [first, second, third]
+        bot.time = BaseLayout.RESERVATION_SECONDS + 1
+        assert layout.get_free_slots(UnitTypeId.SUPPLYDEPOT, 2) == [first, second, third]
+        layout.defer_slot(UnitTypeId.SUPPLYDEPOT, second)
+        assert layout.depot_slots == [first, third, second]
+        layout.claim_slot(first)
+        assert layout.depot_slots == [third, second]
+        assert first not in layout.reservations
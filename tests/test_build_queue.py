@@ -0,0 +1,58 @@
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+from ..bottato.building.build_queue import BuildQueue
+
+
+class FakeStep:
+    def __init__(self, key):
+        self.key = key
+
+    def get_queue_key(self):
+        return self.key
+
+
+def make_queue():
+    return BuildQueue([
+        FakeStep(UnitTypeId.MARINE),
+        FakeStep(UnitTypeId.REFINERY),
+        FakeStep(UnitTypeId.MARINE),
+        FakeStep(UpgradeId.INTERFERENCEMATRIX),
+    ])
+
+
+class TestBuildQueue:
+    def test_counts(self):
+        queue = make_queue()
+        assert queue.count_unit_type(UnitTypeId.MARINE) == 2
+        assert queue.count_unit_type(UnitTypeId.REFINERYRICH) == 1
+        assert queue.count_unit_type(UpgradeId.INTERFERENCEMATRIX) == 0
+        assert queue.count_upgrade_type(UpgradeId.SUNDERINGIMPACT) == 1
+        assert queue.count_exact(UpgradeId.SUNDERINGIMPACT) == 0
+
+    def test_mutations_keep_counts(self):
+        queue = make_queue()
+        marine = queue.pop(0)
+        assert queue.count_unit_type(UnitTypeId.MARINE) == 1
+        assert marine not in queue
+        queue.insert(1, marine)
+        assert marine in queue
+        queue.remove(queue[2])
+        assert queue.count_unit_type(UnitTypeId.MARINE) == 1
+        queue[0:0] = [FakeStep(UnitTypeId.SCV), FakeStep(UnitTypeId.SCV)]
+        assert queue.count_unit_type(UnitTypeId.SCV) == 2
+        assert len(queue) == 5
+        del queue[2:]
+        assert queue.count_unit_type(UnitTypeId.MARINE) == 0
+        assert queue.count_upgrade_type(UpgradeId.INTERFERENCEMATRIX) == 0
+        queue[0] = marine
+        assert queue.count_unit_type(UnitTypeId.SCV) == 1
+        assert marine in queue
+        queue.clear()
+        assert not queue.type_counts and marine not in queue
+
+    def test_total_over_queues(self):
+        first = make_queue()
+        second = BuildQueue([FakeStep(UnitTypeId.MARINE), FakeStep(UnitTypeId.SCV)])
+        assert BuildQueue.total_unit_type([first, second], UnitTypeId.MARINE) == 3
+        assert BuildQueue.total_unit_type([first, second], [UnitTypeId.MARINE, UnitTypeId.SCV]) == 4
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from ..bottato.command_filter import CommandFilter
+
+
+def make_unit(tag, position=(10, 10), type_id=UnitTypeId.MARINE, orders=()):
+    return SimpleNamespace(tag=tag, position=Point2(position), type_id=type_id, orders=list(orders))
+
+
+def make_order(ability, target=None):
+    return SimpleNamespace(ability=SimpleNamespace(id=ability, exact_id=ability), target=target)
+
+
+def make_command(ability, unit, target=None, queue=False):
+    return SimpleNamespace(ability=ability, unit=unit, target=target, queue=queue,
+                           combining_tuple=(ability, target, queue, True))
+
+
+@pytest.fixture(autouse=True)
+def fresh_filter():
+    CommandFilter.init(SimpleNamespace(actions=[], time=0.0))  # type: ignore
+
+
+class TestCommandFilter:
+    def test_drops_move_matching_current_order(self):
+        unit = make_unit(1, orders=[make_order(AbilityId.MOVE_MOVE, Point2((20, 10)))])
+        same = make_command(AbilityId.MOVE_MOVE, unit, Point2((20.3, 10)))
+        assert CommandFilter.filter([same], 1.0) == []  # type: ignore
+        different = make_command(AbilityId.MOVE_MOVE, unit, Point2((20, 14)))
+        assert CommandFilter.filter([different], 1.0) == [different]  # type: ignore
+
+    def test_far_targets_use_angle_tolerance(self):
+        unit = make_unit(1, orders=[make_order(AbilityId.MOVE_MOVE, Point2((110, 10)))])
+        # 2 apart but 100 away, well inside the angle tolerance
+        assert CommandFilter.filter([make_command(AbilityId.MOVE_MOVE, unit, Point2((110, 12)))], 1.0) == []  # type: ignore
+
+    def test_repeat_within_cooldown_dropped(self):
+        unit = make_unit(1)
+        first = make_command(AbilityId.ATTACK_ATTACK, unit, Point2((30, 30)))
+        assert CommandFilter.filter([first], 1.0) == [first]  # type: ignore
+        assert CommandFilter.filter([make_command(AbilityId.ATTACK_ATTACK, unit, Point2((30, 30)))], 1.2) == []  # type: ignore
+        again = make_command(AbilityId.ATTACK_ATTACK, unit, Point2((30, 30)))
+        assert CommandFilter.filter([again], 2.0) == [again]  # type: ignore
+
+    def test_morph_into_current_state_dropped(self):
+        raised = make_unit(1, type_id=UnitTypeId.SUPPLYDEPOT)
+        lowered = make_unit(2, type_id=UnitTypeId.SUPPLYDEPOTLOWERED)
+        raise_raised = make_command(AbilityId.MORPH_SUPPLYDEPOT_RAISE, raised)
+        raise_lowered = make_command(AbilityId.MORPH_SUPPLYDEPOT_RAISE, lowered)
+        assert CommandFilter.filter([raise_raised, raise_lowered], 1.0) == [raise_lowered]  # type: ignore
+
+    def test_untargeted_commands_kept(self):
+        barracks = make_unit(1, type_id=UnitTypeId.BARRACKS, orders=[make_order(AbilityId.BARRACKSTRAIN_MARINE)])
+        train = make_command(AbilityId.BARRACKSTRAIN_MARINE, barracks)
+        assert CommandFilter.filter([train], 1.0) == [train]  # type: ignore
+        train_again = make_command(AbilityId.BARRACKSTRAIN_MARINE, barracks)
+        assert CommandFilter.filter([train_again], 1.1) == [train_again]  # type: ignore
+
+    def test_sequences_untouched(self):
+        unit = make_unit(1, orders=[make_order(AbilityId.MOVE_MOVE, Point2((20, 10)))])
+        move = make_command(AbilityId.MOVE_MOVE, unit, Point2((20, 10)))
+        gather = make_command(AbilityId.HARVEST_GATHER, unit, Point2((25, 10)), queue=True)
+        assert CommandFilter.filter([move, gather], 1.0) == [move, gather]  # type: ignore
+
+    def test_identical_commands_grouped(self):
+        target = Point2((50, 50))
+        moves = [make_command(AbilityId.MOVE_MOVE, make_unit(tag), target) for tag in range(3)]
+        other = make_command(AbilityId.MOVE_MOVE, make_unit(9), Point2((5, 5)))
+        actions = CommandFilter.filter([moves[0], other, moves[1], moves[2]], 1.0)  # type: ignore
+        assert actions == [other] + moves
+        assert CommandFilter.count_grouped_actions(actions) == 2  # type: ignore
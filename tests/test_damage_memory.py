@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from ..bottato.map.damage_memory import DamageMemory
+
+
+class TestDamageMemory:
+    def test_scalar_window(self):
+        memory = DamageMemory(bucket_seconds=5, bucket_count=4)
+        memory.add(10, 1)
+        memory.add(20, 7)
+        assert memory.in_last(5, 8) == pytest.approx(30)
+        assert memory.in_last(2, 8) == pytest.approx(20)
+        # first bucket has left the window
+        assert memory.in_last(60, 21) == pytest.approx(20)
+
+    def test_memory_is_bounded(self):
+        memory = DamageMemory(bucket_seconds=5, bucket_count=4)
+        for second in range(1000):
+            memory.add(1, second)
+        assert memory.buckets.shape == (4,)
+        assert memory.in_last(1000, 999) == pytest.approx(20)
+
+    def test_grid(self):
+        memory = DamageMemory((4, 4), bucket_seconds=5, bucket_count=4)
+        memory.add(np.array([5.0, 3.0, 2.0]), 1, (np.array([1, 1, 2]), np.array([2, 2, 3])))
+        window = memory.in_last(5, 2)
+        assert window[1, 2] == pytest.approx(8)
+        assert window[2, 3] == pytest.approx(2)
+        assert window.sum() == pytest.approx(10)
+        buckets = list(memory.iter_buckets(2))
+        assert len(buckets) == 1 and buckets[0][0] == 0
+
+    def test_too_old_ignored(self):
+        memory = DamageMemory(bucket_seconds=5, bucket_count=2)
+        memory.add(1, 12)
+        memory.add(5, 2)
+        assert memory.in_last(20, 12) == pytest.approx(1)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from sc2.position import Point2
+
+from ..bottato.density_grid import DensityGrid
+
+
+def make_unit(tag, position):
+    return SimpleNamespace(tag=tag, position=Point2(position))
+
+
+def make_group(start_tag, center, count):
+    return [make_unit(start_tag + i, (center[0] + (i % 3) * 0.5, center[1] + (i // 3) * 0.5)) for i in range(count)]
+
+
+class TestDensityGrid:
+    def test_most_grouped_unit(self):
+        units = make_group(0, (10, 10), 6) + make_group(100, (40, 40), 3) + [make_unit(200, (70, 10))]
+        grid = DensityGrid.from_units(units, 3)
+        most_grouped_unit, grouped_units = grid.most_grouped_unit(3)
+        assert most_grouped_unit.tag < 6
+        assert sorted(u.tag for u in grouped_units) == list(range(6))
+
+    def test_densest_point_and_counts(self):
+        units = make_group(0, (10, 10), 6) + [make_unit(200, (30, 10))]
+        grid = DensityGrid.from_units(units, 2)
+        center, count = grid.densest_point(2)
+        assert count == 6
+        assert center.distance_to(Point2((10.5, 10.25))) < 1
+        counts = grid.counts_near_units(2)
+        assert counts[0] == 6
+        assert counts[200] == 1
+        assert grid.count_near(Point2((20, 10)), 2) == 0
+
+    def test_clusters_are_disjoint(self):
+        units = make_group(0, (10, 10), 6) + make_group(100, (20, 10), 4) + [make_unit(200, (40, 40))]
+        grid = DensityGrid.from_units(units, 3)
+        clusters = grid.clusters(3, 5, min_size=2)
+        assert [len(members) for _, members in clusters] == [6, 4]
+        assert sorted(u.tag for u in clusters[1][1]) == list(range(100, 104))
+        # finding clusters leaves the grid untouched
+        assert grid.counts.sum() == len(units)
+
+    def test_incremental_update(self):
+        grid = DensityGrid(Point2((0, 0)), 50, 50)
+        units = make_group(0, (10, 10), 4)
+        grid.update(units)
+        assert grid.densest_point(2)[1] == 4
+        units[0] = make_unit(0, (30, 30))
+        grid.update(units[:3])
+        assert grid.counts.sum() == 3
+        assert grid.densest_point(2)[1] == 2
+        assert 3 not in grid.units
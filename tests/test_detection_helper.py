@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.ids.effect_id import EffectId
+from sc2.position import Point2
+
+from ..bottato.detection_helper import DetectionHelper
+
+
+def make_bot(own_units=(), effects=(), time=10.0, game_loop=1):
+    return SimpleNamespace(
+        time=time,
+        all_own_units=list(own_units),
+        state=SimpleNamespace(
+            game_loop=game_loop,
+            effects=list(effects),
+            visibility=SimpleNamespace(data_numpy=np.zeros((100, 100))),
+        ),
+    )
+
+
+def make_unit(tag, position, is_detector=True, sight_range=11, is_structure=False, age=0):
+    return SimpleNamespace(tag=tag, position=Point2(position), is_detector=is_detector, sight_range=sight_range,
+                           is_structure=is_structure, age=age)
+
+
+def make_scan(position, is_mine):
+    return SimpleNamespace(id=EffectId.SCANNERSWEEP, positions={Point2(position)}, is_mine=is_mine)
+
+
+class TestDetectionHelper:
+    def test_own_detectors_and_scans(self):
+        # units stand on cell centers, a cell is detected when its center is in range
+        raven = make_unit(1, (20.5, 20.5))
+        marine = make_unit(2, (60, 60), is_detector=False)
+        bot = make_bot([raven, marine], [make_scan((60, 20), True), make_scan((20, 60), False)])
+        DetectionHelper.init(bot)  # type: ignore
+        DetectionHelper.update([], {})
+        assert DetectionHelper.is_detected(Point2((31, 20)))
+        assert not DetectionHelper.is_detected(Point2((33, 20)))
+        assert DetectionHelper.is_detected(Point2((70, 20)))
+        assert not DetectionHelper.is_detected(Point2((60, 60)))
+        # the enemy's scan only reveals our units
+        assert not DetectionHelper.is_detected(Point2((20, 60)))
+        assert DetectionHelper.is_detected(Point2((20, 60)), by_enemy=True)
+
+    def test_enemy_detectors_use_predicted_positions(self):
+        overseer = make_unit(5, (20, 20), age=3)
+        turret = make_unit(6, (80.5, 80.5), sight_range=11, is_structure=True)
+        bot = make_bot()
+        DetectionHelper.init(bot)  # type: ignore
+        DetectionHelper.update([overseer, turret], {5: Point2((40.5, 20.5))})
+        assert DetectionHelper.is_detected(Point2((40, 20)), by_enemy=True)
+        assert not DetectionHelper.is_detected(Point2((20, 20)), by_enemy=True)
+        # mobile detectors get more room than structures
+        assert DetectionHelper.is_detected(Point2((53, 20)), by_enemy=True)
+        assert not DetectionHelper.is_detected(Point2((93, 80)), by_enemy=True)
+        assert DetectionHelper.is_detected(Point2((92, 80)), by_enemy=True)
+
+    def test_pending_scans_expire(self):
+        bot = make_bot()
+        DetectionHelper.init(bot)  # type: ignore
+        DetectionHelper.update([], {})
+        DetectionHelper.record_scan(Point2((50, 50)))
+        assert DetectionHelper.is_detected(Point2((55, 50)))
+        bot.time, bot.state.game_loop = 10.5, 2
+        DetectionHelper.update([], {})
+        assert DetectionHelper.is_detected(Point2((55, 50)))
+        bot.time, bot.state.game_loop = 11.5, 3
+        DetectionHelper.update([], {})
+        assert not DetectionHelper.is_detected(Point2((55, 50)))
+
+    def test_best_scan_position(self):
+        bot = make_bot([make_unit(1, (80, 20))])
+        DetectionHelper.init(bot)  # type: ignore
+        DetectionHelper.update([], {})
+        assert DetectionHelper.best_scan_position([]) == (None, 0)
+        # two banshees 20 apart share a scan at their midpoint, the lone one is on its own
+        position, gain = DetectionHelper.best_scan_position([Point2((20, 20)), Point2((40, 20)), Point2((20, 70))])
+        assert gain == 2
+        assert position == Point2((30, 20))
+        # targets we already detect don't count
+        assert DetectionHelper.best_scan_position([Point2((80, 25))]) == (None, 0)
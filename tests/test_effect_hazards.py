@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sc2.ids.effect_id import EffectId
+from sc2.position import Point2
+
+from ..bottato.micro import effect_hazards
+from ..bottato.micro.effect_hazards import EffectHazards
+
+# use the enums effect_hazards was imported with so dict lookups match
+CustomEffectTargetArea = effect_hazards.CustomEffectTargetArea
+CustomEffectType = effect_hazards.CustomEffectType
+
+DAMAGING_EFFECTS = [EffectId.PSISTORMPERSISTENT, EffectId.RAVAGERCORROSIVEBILECP,
+                    EffectId.LIBERATORTARGETMORPHPERSISTENT]
+FIXED_RADIUS = {EffectId.PSISTORMPERSISTENT: 2}
+
+
+def make_bot(effects=(), time=10.0, game_loop=1):
+    return SimpleNamespace(
+        time=time,
+        state=SimpleNamespace(
+            game_loop=game_loop,
+            effects=list(effects),
+            visibility=SimpleNamespace(data_numpy=np.zeros((40, 50))),
+        ),
+    )
+
+
+def make_effect(effect_id, position, radius=0.5, is_mine=False):
+    return SimpleNamespace(id=effect_id, positions={Point2(position)}, radius=radius, is_mine=is_mine)
+
+
+class TestEffectHazards:
+    def test_storm_covers_both_layers(self):
+        bot = make_bot([make_effect(EffectId.PSISTORMPERSISTENT, (20, 20))])
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        for is_flying in (False, True):
+            hazard = EffectHazards.hazard_at(Point2((21, 20)), 0.375, is_flying)
+            assert hazard is not None
+            assert hazard[0] == Point2((20, 20))
+        # storm radius 2 + buffer 1.2 + padding 0.5
+        assert EffectHazards.hazard_at(Point2((23.4, 20)), 0.375, False) is not None
+        assert EffectHazards.hazard_at(Point2((25, 20)), 0.375, False) is None
+
+    def test_large_units_check_their_edges(self):
+        bot = make_bot([make_effect(EffectId.PSISTORMPERSISTENT, (20, 20))])
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        assert EffectHazards.hazard_at(Point2((24.2, 20)), 0.5, False) is None
+        assert EffectHazards.hazard_at(Point2((24.2, 20)), 1.25, False) is not None
+
+    def test_escape_from_average_center(self):
+        bot = make_bot([make_effect(EffectId.PSISTORMPERSISTENT, (18, 20)),
+                        make_effect(EffectId.PSISTORMPERSISTENT, (22, 20))])
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        hazard = EffectHazards.hazard_at(Point2((20, 21)), 0.375, False)
+        assert hazard is not None
+        assert hazard[0] == Point2((20, 20))
+
+    def test_own_liberator_zone_ignored_and_enemy_zone_ground_only(self):
+        bot = make_bot([make_effect(EffectId.LIBERATORTARGETMORPHPERSISTENT, (10, 10), 5, is_mine=True),
+                        make_effect(EffectId.LIBERATORTARGETMORPHPERSISTENT, (30, 30), 5)])
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        assert EffectHazards.hazard_at(Point2((10, 10)), 0.375, False) is None
+        assert EffectHazards.hazard_at(Point2((30, 30)), 0.375, False) is not None
+        assert EffectHazards.hazard_at(Point2((30, 30)), 0.375, True) is None
+
+    def test_bile_lingers_as_custom_effect(self):
+        bot = make_bot([make_effect(EffectId.RAVAGERCORROSIVEBILECP, (15, 15))])
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        hazard = EffectHazards.hazard_at(Point2((15, 15)), 0.375, False)
+        assert hazard is not None
+        assert hazard[1] == pytest.approx(11.0)
+        # counted once even though it was added during the rebuild
+        assert EffectHazards.counts[EffectHazards.GROUND, 15, 15] == 1
+
+        bot.state.effects = []
+        bot.time, bot.state.game_loop = 10.5, 2
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        assert EffectHazards.hazard_at(Point2((15, 15)), 0.375, False) is not None
+        bot.time, bot.state.game_loop = 11.5, 3
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        assert EffectHazards.hazard_at(Point2((15, 15)), 0.375, False) is None
+        assert not EffectHazards.custom_effects
+
+    def test_custom_effects_added_mid_step(self):
+        bot = make_bot()
+        EffectHazards.init(bot)  # type: ignore
+        EffectHazards.update(DAMAGING_EFFECTS, FIXED_RADIUS)
+        EffectHazards.add_custom_effect(CustomEffectType.ANTI_AIR, CustomEffectTargetArea.AIR,
+                                        Point2((25, 25)), 7, 10.0, 0.1)
+        EffectHazards.add_custom_effect(CustomEffectType.ANTI_AIR, CustomEffectTargetArea.AIR,
+                                        Point2((25, 25)), 7, 10.0, 0.1)
+        assert len(EffectHazards.custom_effects) == 1
+        assert EffectHazards.counts[EffectHazards.AIR, 25, 25] == 1
+        assert EffectHazards.hazard_at(Point2((25, 25)), 0.375, True) is not None
+        assert EffectHazards.hazard_at(Point2((25, 25)), 0.375, False) is None
+        assert EffectHazards.get_custom_effects(CustomEffectType.BUILDING_FOOTPRINT) == []
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from sc2.ids.unit_typeid import UnitTypeId
+
+from ..bottato.economy.production import FacilityIndex
+
+
+def make_facility(add_on_type=UnitTypeId.NOTAUNIT, capacity=1, orders=0, is_flying=False):
+    unit = SimpleNamespace(is_flying=is_flying, type_id=UnitTypeId.BARRACKS, is_idle=orders == 0)
+    return SimpleNamespace(
+        unit=unit,
+        add_on_type=add_on_type,
+        get_available_capacity=lambda: capacity - orders,
+    )
+
+
+class TestFacilityIndex:
+    def test_buckets(self):
+        index = FacilityIndex()
+        idle = make_facility()
+        busy = make_facility(orders=1)
+        flying = make_facility(is_flying=True)
+        reactor = make_facility(UnitTypeId.REACTOR, capacity=2, orders=1)
+        for facility in (idle, busy, flying, reactor):
+            index.refresh(facility, UnitTypeId.BARRACKS)  # type: ignore
+        assert index.get_available(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == [idle]
+        assert index.get_busy(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == [busy, flying]
+        assert index.get_capacity(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == 2
+        assert index.get_capacity(UnitTypeId.BARRACKS, UnitTypeId.REACTOR) == 1
+        assert index.get_idle_count(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == 1
+        assert not index.has_available(UnitTypeId.BARRACKS, UnitTypeId.TECHLAB)
+
+    def test_refresh_moves_between_buckets(self):
+        index = FacilityIndex()
+        facility = make_facility()
+        index.refresh(facility, UnitTypeId.BARRACKS)  # type: ignore
+        facility.get_available_capacity = lambda: 0
+        index.refresh(facility, UnitTypeId.BARRACKS)  # type: ignore
+        assert not index.has_available(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT)
+        assert index.get_capacity(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == 0
+        facility.add_on_type = UnitTypeId.TECHLAB
+        facility.get_available_capacity = lambda: 1
+        index.refresh(facility, UnitTypeId.BARRACKS)  # type: ignore
+        assert index.get_available(UnitTypeId.BARRACKS, UnitTypeId.TECHLAB) == [facility]
+        assert index.get_busy(UnitTypeId.BARRACKS, UnitTypeId.NOTAUNIT) == []
+        index.remove(facility)  # type: ignore
+        assert index.get_capacity(UnitTypeId.BARRACKS, UnitTypeId.TECHLAB) == 0
+        assert not index.entries
@@ -1,10 +1,12 @@
 import math
 
+import numpy as np
 import pytest
 
 from ..bottato.squad.formation import (
     ParentFormation,
     Formation,
+    SlotAssignment,
     UnitDemographics,
 )
 from ..bottato.enums import SquadFormationType
@@ -170,3 +172,30 @@ class TestFormation:
         assert formation.positions[20].offset.y == pytest.approx(4.698463103929543)
         assert formation.positions[21].offset.x == pytest.approx(-3.2139380484326963)
         assert formation.positions[21].offset.y == pytest.approx(3.83022221559489)
+
+
+class TestSlotAssignment:
+    def test_assigns_closest_slots(self):
+        slots = SlotAssignment()
+        slot_by_tag = slots.assign([1, 2], np.array([[0.0, 0.0], [10.0, 0.0]]), np.array([[9.0, 0.0], [1.0, 0.0]]))
+        assert slot_by_tag == {1: 1, 2: 0}
+
+    def test_assignments_are_sticky(self):
+        slots = SlotAssignment()
+        slots.assign([1, 2], np.array([[0.0, 0.0], [10.0, 0.0]]), np.array([[1.0, 0.0], [9.0, 0.0]]))
+        # units have moved past each other's slots, but keep their assignment
+        slot_by_tag = slots.assign([1, 2], np.array([[10.0, 0.0], [0.0, 0.0]]), np.array([[1.0, 0.0], [9.0, 0.0]]))
+        assert slot_by_tag == {1: 0, 2: 1}
+
+    def test_new_unit_gets_free_slot(self):
+        slots = SlotAssignment()
+        slots.assign([1, 2], np.array([[0.0, 0.0], [10.0, 0.0]]), np.array([[1.0, 0.0], [9.0, 0.0], [5.0, 0.0]]))
+        slot_by_tag = slots.assign([1, 2, 3], np.array([[0.0, 0.0], [10.0, 0.0], [9.0, 0.0]]),
+                                   np.array([[1.0, 0.0], [9.0, 0.0], [5.0, 0.0]]))
+        assert slot_by_tag == {1: 0, 2: 1, 3: 2}
+
+    def test_missing_units_release_slots(self):
+        slots = SlotAssignment()
+        slots.assign([1, 2], np.array([[0.0, 0.0], [10.0, 0.0]]), np.array([[1.0, 0.0], [9.0, 0.0]]))
+        slot_by_tag = slots.assign([2, 3], np.array([[10.0, 0.0], [20.0, 0.0]]), np.array([[1.0, 0.0], [9.0, 0.0]]))
+        assert slot_by_tag == {2: 1, 3: 0}
@@ -0,0 +1,35 @@
+import asyncio
+
+import numpy as np
+
+from ..bottato.map.init_pipeline import InitPipeline
+from ..bottato.map.terrain import Terrain
+
+
+def run_job(pipeline: InitPipeline, pathable: np.ndarray, indices):
+    pipeline.submit("distances", Terrain.compute_path_distances, pathable, indices, indices)
+    try:
+        return asyncio.run(pipeline.result("distances"))
+    finally:
+        pipeline.shutdown()
+
+
+class TestInitPipeline:
+    def make_grid(self):
+        pathable = np.ones((30, 30), dtype=bool)
+        pathable[10, :25] = False
+        indices = (np.array([2, 20, 5]), np.array([2, 2, 28]))
+        return pathable, indices
+
+    def test_matches_in_process_result(self):
+        pathable, indices = self.make_grid()
+        expected = Terrain.compute_path_distances(pathable, indices, indices)
+        assert np.allclose(run_job(InitPipeline(), pathable, indices), expected)
+
+    def test_runs_in_process_without_workers(self):
+        pathable, indices = self.make_grid()
+        pipeline = InitPipeline()
+        pipeline.shutdown()
+        distances = run_job(pipeline, pathable, indices)
+        assert distances.shape == (3, 3)
+        assert distances[0, 1] > 18
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from ..bottato.building.base_layout import BaseLayout
+from ..bottato.building.scv_build_step import SCVBuildStep
+
+
+class FakeTownhalls(list):
+    def filter(self, condition):
+        return FakeTownhalls(unit for unit in self if condition(unit))
+
+
+def make_step(start: Point2, placeable):
+    async def can_place_single(unit_type_id, position):
+        return placeable(position)
+    bot = SimpleNamespace(
+        time=0.0,
+        start_location=start,
+        townhalls=FakeTownhalls([SimpleNamespace(position=start, is_flying=False)]),
+        structures=[],
+        mineral_field=[],
+        vespene_geyser=[],
+        can_place_single=can_place_single,
+    )
+    step = SCVBuildStep.__new__(SCVBuildStep)
+    step.bot = bot
+    # planned depots hug the base edge, so the generic edge check would reject all of them
+    step.map = SimpleNamespace(get_distance_from_edge=lambda position: 1)
+    return step, bot
+
+
+class TestLayoutPlacement:
+    def test_planned_depot_slot_is_used(self):
+        free = np.zeros((40, 40), dtype=bool)
+        free[5:35, 5:35] = True
+        slots = BaseLayout.plan_depot_slots(free, free.copy(), (20.0, 20.0), 4)
+        assert slots
+        start = Point2((20.5, 20.5))
+        step, bot = make_step(start, lambda position: True)
+        layout = BaseLayout(bot)  # type: ignore
+        layout.depot_slots = [Point2(slot) for slot in slots]
+        special_locations = SimpleNamespace(base_layout=layout)
+        slot = asyncio.run(step.find_layout_placement(UnitTypeId.SUPPLYDEPOT, special_locations, {}))  # type: ignore
+        assert slot == Point2(slots[0])
+        # reserved, not removed
+        assert slot in layout.depot_slots
+        assert layout.get_free_slots(UnitTypeId.SUPPLYDEPOT, 0)[0] == Point2(slots[1])
+
+    def test_blocked_slot_is_deferred(self):
+        start = Point2((20.5, 20.5))
+        first, second = Point2((6.0, 6.0)), Point2((8.0, 6.0))
+        step, bot = make_step(start, lambda position: position != first)
+        layout = BaseLayout(bot)  # type: ignore
+        layout.depot_slots = [first, second]
+        special_locations = SimpleNamespace(base_layout=layout)
+        slot = asyncio.run(step.find_layout_placement(UnitTypeId.SUPPLYDEPOT, special_locations, {}))  # type: ignore
+        assert slot == second
+        assert layout.depot_slots == [second, first]
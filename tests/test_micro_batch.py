@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from sc2.position import Point2
+from sc2.units import Units
+
+from ..bottato.micro.base_unit_micro import BaseUnitMicro
+
+
+def make_unit(tag, position, health=100, shield=0):
+    return SimpleNamespace(tag=tag, position=Point2(position), health=health, shield=shield)
+
+
+class TestMicroBatch:
+    def setup_method(self):
+        self.bot = SimpleNamespace(time=10.0)
+        self.micro = BaseUnitMicro(SimpleNamespace(bot=self.bot))  # type: ignore
+        # targets for this step are already known
+        self.micro.last_targets_update_time = self.bot.time
+
+    def test_base_micro_skips_use_ability(self):
+        assert not self.micro.has_abilities
+
+    def test_nearby_targets_by_unit(self):
+        weak = make_unit(101, (12, 10), health=20)
+        strong = make_unit(102, (15, 10), health=200)
+        far = make_unit(103, (60, 10), health=5)
+        self.micro.valid_targets = Units([strong, weak, far], self.bot)  # type: ignore
+        near_unit = make_unit(1, (10, 10))
+        far_unit = make_unit(2, (58, 10))
+        self.micro.prepare_batch([near_unit, far_unit])  # type: ignore
+        assert [u.tag for u in self.micro.get_nearby_targets(near_unit)] == [101, 102]  # type: ignore
+        assert [u.tag for u in self.micro.get_nearby_targets(far_unit)] == [103]  # type: ignore
+
+    def test_no_targets(self):
+        self.micro.valid_targets = Units([], self.bot)  # type: ignore
+        unit = make_unit(1, (10, 10))
+        self.micro.prepare_batch([unit])  # type: ignore
+        assert not self.micro.get_nearby_targets(unit)  # type: ignore
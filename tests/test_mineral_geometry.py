@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sc2.position import Point2
+
+from ..bottato.economy.mineral_geometry import MineralGeometry
+
+
+class TestMineralGeometry:
+    def test_mining_position_faces_townhall(self):
+        minerals = np.array([[10.0, 0.0]])
+        townhall = np.array([0.0, 0.0])
+        positions = MineralGeometry.compute_mining_positions(minerals, townhall, 1.325)
+        assert positions[0] == pytest.approx([10 - 1.325, 0])
+
+    def test_blocked_mining_position_uses_circle_intersection(self):
+        minerals = np.array([[10.0, 0.0], [9.0, 1.0]])
+        townhall = np.array([0.0, 0.0])
+        positions = MineralGeometry.compute_mining_positions(minerals, townhall, 1.325)
+        # same as the per-node calculation using Point2.circle_intersection
+        candidates = Point2((10, 0)).circle_intersection(Point2((9, 1)), 1.325)
+        expected = Point2((0, 0)).closest(candidates)
+        assert positions[0] == pytest.approx([expected.x, expected.y])
+
+    def test_dropoff_positions(self):
+        mining = np.array([[5.0, 0.0], [0.0, -7.0]])
+        townhall = np.array([0.0, 0.0])
+        dropoffs = MineralGeometry.compute_dropoff_positions(mining, townhall, 3)
+        assert dropoffs[0] == pytest.approx([3, 0])
+        assert dropoffs[1] == pytest.approx([0, -3])
+
+    def test_cached_position_requires_townhall_at_expansion(self):
+        geometry = MineralGeometry.__new__(MineralGeometry)
+        geometry.expansion_by_mineral = {}
+        geometry.mining_positions = {}
+        geometry.dropoff_positions = {}
+        geometry.load_entries([{"mineral": [10.0, 0.5], "expansion": [0.5, 0.5], "mining": [8.7, 0.5], "dropoff": [3.5, 0.5]}])
+        assert geometry.get_mining_position(Point2((10.0, 0.5)), Point2((0.5, 0.5))) == Point2((8.7, 0.5))
+        assert geometry.get_dropoff_position(Point2((10.0, 0.5)), Point2((0.5, 0.5))) == Point2((3.5, 0.5))
+        assert geometry.get_mining_position(Point2((10.0, 0.5)), Point2((5.5, 0.5))) is None
+        assert geometry.get_mining_position(Point2((20.0, 0.5)), Point2((0.5, 0.5))) is None
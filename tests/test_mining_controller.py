@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from ..bottato.economy import mining_controller
+from ..bottato.economy.mining_controller import MiningController
+from ..bottato.economy.worker_assignment import WorkerAssignment
+
+# the enums the controller compares against, bottato.enums is loaded under its own name there
+Tactic = mining_controller.Tactic
+UnitMicroType = mining_controller.UnitMicroType
+
+
+class FakeWorker:
+    def __init__(self, tag, position, orders=(), carrying=False, idle=False, health_percentage=1.0):
+        self.tag = tag
+        self.position = Point2(position)
+        self.orders = list(orders)
+        self.is_returning = False
+        self.is_carrying_resource = carrying
+        self.is_idle = idle
+        self.is_moving = True
+        self.is_constructing_scv = False
+        self.health_percentage = health_percentage
+        self.commands = []
+
+    def move(self, position):
+        self.commands.append(("move", position))
+
+    def __call__(self, ability, target=None, queue=False):
+        self.commands.append((ability, target, queue))
+
+    def gather(self, target):
+        self.commands.append(("gather", target))
+
+    def return_resource(self):
+        self.commands.append(("return",))
+
+
+def make_order(target_tag):
+    return SimpleNamespace(ability=SimpleNamespace(id=AbilityId.HARVEST_GATHER), target=target_tag)
+
+
+def make_enemy(tag, position, ground_range=0.1, age=0):
+    return SimpleNamespace(tag=tag, position=Point2(position), type_id=UnitTypeId.ZERGLING, can_attack_ground=True,
+                           ground_range=ground_range, radius=0.375, age=age)
+
+
+def make_assignment(worker, mineral, gather_position):
+    assignment = WorkerAssignment(worker)  # type: ignore
+    assignment.target = mineral
+    assignment.gather_position = Point2(gather_position)
+    return assignment
+
+
+class TestMiningController:
+    def setup_method(self):
+        self.mineral = SimpleNamespace(tag=500, position=Point2((20, 20)), is_mineral_field=True)
+        self.enemies = []
+        self.predicted_positions = {}
+        self.active_tactics = set()
+        self.retreat_checks = []
+        enemy = SimpleNamespace(get_recent_enemies=lambda: self.enemies, predicted_positions=self.predicted_positions)
+        tactics = SimpleNamespace(enemy=enemy, is_active=lambda tactic: tactic in self.active_tactics)
+        worker_micro = SimpleNamespace(_retreat=self.record_retreat)
+        # no townhalls, returning workers have nowhere to go and are left alone
+        bot = SimpleNamespace(townhalls=SimpleNamespace(ready=SimpleNamespace(filter=lambda condition: [])))
+        self.controller = MiningController(bot, tactics, worker_micro)  # type: ignore
+
+    def record_retreat(self, unit, health_threshold):
+        self.retreat_checks.append(unit.tag)
+        return UnitMicroType.NONE
+
+    def test_boost_window(self):
+        # squared distances of 1 and 9 to the gather point, only the first is inside the mineral window
+        close = FakeWorker(1, (20, 19), orders=[make_order(500)])
+        far = FakeWorker(2, (20, 15), orders=[make_order(500)])
+        assignments = [make_assignment(close, self.mineral, (20, 20)), make_assignment(far, self.mineral, (20, 18))]
+        asyncio.run(self.controller.speed_mine(assignments))
+        assert close.commands == [("move", Point2((20, 20))), (AbilityId.SMART, self.mineral, True)]
+        assert far.commands == []
+
+    def test_idle_worker_is_always_boosted(self):
+        worker = FakeWorker(1, (20, 10), idle=True)
+        asyncio.run(self.controller.speed_mine([make_assignment(worker, self.mineral, (20, 20))]))
+        assert worker.commands == [("move", Point2((20, 20))), (AbilityId.SMART, self.mineral, True)]
+
+    def test_orders_only_checked_on_phase_change(self):
+        worker = FakeWorker(1, (20, 10), orders=[make_order(999)], carrying=True)
+        assignments = [make_assignment(worker, self.mineral, (20, 20))]
+        asyncio.run(self.controller.speed_mine(assignments))
+        assert worker.commands == []
+
+        # dropped off, gathering again but still ordered to the wrong mineral
+        worker.is_carrying_resource = False
+        asyncio.run(self.controller.speed_mine(assignments))
+        assert worker.commands == [(AbilityId.SMART, self.mineral, False)]
+
+        # same phase as last step, the order isn't inspected again
+        worker.commands.clear()
+        asyncio.run(self.controller.speed_mine(assignments))
+        assert worker.commands == []
+
+    def test_phase_kept_when_assignments_rebuilt(self):
+        worker = FakeWorker(1, (20, 10), carrying=True)
+        other = FakeWorker(2, (30, 10), carrying=True)
+        self.controller.sync([make_assignment(worker, self.mineral, (20, 20))])
+        self.controller.phases[0] = 2
+        self.controller.sync([make_assignment(other, self.mineral, (20, 20)),
+                              make_assignment(worker, self.mineral, (20, 20))])
+        assert list(self.controller.phases) == [0, 2]
+
+    def test_retreat_prefilter(self):
+        hurt = FakeWorker(1, (10, 10), health_percentage=0.05)
+        near_enemy = FakeWorker(2, (40, 10))
+        near_unseen_enemy = FakeWorker(3, (70, 10))
+        safe = FakeWorker(4, (100, 10))
+        units = [hurt, near_enemy, near_unseen_enemy, safe]
+        positions = np.array([(u.position.x, u.position.y) for u in units])
+        health_percentages = np.array([u.health_percentage for u in units])
+        # reach is 0.1 + 0.375 + 0.5 + 4 from the enemy position
+        self.enemies.extend([make_enemy(10, (44.9, 10)), make_enemy(11, (100, 40), age=5)])
+        self.predicted_positions[11] = Point2((74, 10))
+
+        rows = self.controller.get_rows_to_check_for_retreat(units, positions, health_percentages)  # type: ignore
+        assert list(rows) == [True, True, True, False]
+
+        self.active_tactics.add(Tactic.WORKER_RUSH_DEFENCE)
+        rows = self.controller.get_rows_to_check_for_retreat(units, positions, health_percentages)  # type: ignore
+        assert not rows.any()
+
+    def test_only_prefiltered_workers_check_retreat(self):
+        hurt = FakeWorker(1, (20, 19), orders=[make_order(500)], health_percentage=0.05)
+        healthy = FakeWorker(2, (20, 19), orders=[make_order(500)])
+        assignments = [make_assignment(hurt, self.mineral, (20, 20)), make_assignment(healthy, self.mineral, (20, 20))]
+        asyncio.run(self.controller.speed_mine(assignments))
+        assert self.retreat_checks == [1]
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.position import Point2
+
+from ..bottato.magic_numbers import MagicNumbers as MN
+from ..bottato.map.influence_maps import InfluenceMaps
+
+
+def make_influence_maps(searches):
+    influence_maps = InfluenceMaps.__new__(InfluenceMaps)
+    influence_maps.path_cache = OrderedDict()
+    influence_maps.registered_grids = {}
+    influence_maps.region_versions = {}
+    influence_maps.grid_updates = {}
+    influence_maps.grid_components = {}
+    influence_maps.path_cache_hits = 0
+    influence_maps.path_cache_misses = 0
+
+    def pathfind(start, end, grid):
+        searches.append((start, end))
+        return [Point2(start), Point2(((start[0] + end[0]) / 2, (start[1] + end[1]) / 2)), Point2(end)]
+    influence_maps.map_data = SimpleNamespace(pathfind=pathfind)
+    return influence_maps
+
+
+class TestPathCache:
+    def test_changed_regions(self):
+        previous = np.ones((20, 12))
+        current = previous.copy()
+        current[9, 11] = 100
+        changed = InfluenceMaps.changed_regions(previous, current, 8)
+        assert changed.shape == (3, 2)
+        assert changed.tolist() == [[False, False], [False, True], [False, False]]
+
+    def test_nearby_starts_share_path(self):
+        searches = []
+        influence_maps = make_influence_maps(searches)
+        grid = np.ones((64, 64))
+        influence_maps.register_grid("ground", grid)
+        path = influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert path[-1] == Point2((40.5, 4.5))
+        path = influence_maps.get_path(Point2((6.5, 7.5)), Point2((40.2, 4.8)), grid)
+        assert len(searches) == 1
+        assert path[0] == Point2((6.5, 7.5))
+        # a start in the next block searches again
+        influence_maps.get_path(Point2((8.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 2
+        # unregistered grids aren't cached
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), np.ones((64, 64)))
+        assert len(searches) == 3
+
+    def test_start_across_wall_searches_again(self):
+        searches = []
+        influence_maps = make_influence_maps(searches)
+        grid = np.ones((64, 64))
+        # a pocket below a cliff in the corner, cut off from the rest of the start block
+        grid[6, 0:8] = np.inf
+        grid[0:7, 8] = np.inf
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((7.5, 4.5)), Point2((40.5, 4.5)), grid)
+        influence_maps.get_path(Point2((7.2, 6.8)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 1
+        path = influence_maps.get_path(Point2((5.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 2
+        assert path[0] == Point2((5.5, 4.5))
+
+        # opening the cliff connects the pocket
+        grid = grid.copy()
+        grid[6, 0:8] = 1
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((7.5, 4.5)), Point2((40.5, 4.5)), grid)
+        influence_maps.get_path(Point2((5.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 3
+
+    def test_invalidated_only_by_regions_on_path(self):
+        searches = []
+        influence_maps = make_influence_maps(searches)
+        grid = np.ones((64, 64))
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+
+        # new cost far from the path
+        grid = np.ones((64, 64))
+        grid[50:55, 50:55] = 100
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 1
+
+        # new cost next to the midpoint
+        grid = grid.copy()
+        grid[22, 5] = 100
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 2
+
+    def test_expires_after_grid_updates(self):
+        searches = []
+        influence_maps = make_influence_maps(searches)
+        grid = np.ones((64, 64))
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        for i in range(MN.PATH_CACHE_MAX_GRID_UPDATES):
+            # unchanged registrations don't count
+            influence_maps.register_grid("ground", grid)
+            grid = grid.copy()
+            grid[60, 60] = i + 2
+            influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        assert len(searches) == 2
+
+    def test_path_finder_paths_cached_separately(self):
+        searches = []
+        influence_maps = make_influence_maps(searches)
+        grid = np.ones((64, 64))
+        influence_maps.register_grid("ground", grid)
+        planned = []
+
+        def path_finder(start, end):
+            planned.append((start, end))
+            return [start, Point2((20.5, 20.5)), end]
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid)
+        path = influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid, path_finder)
+        assert path[1] == Point2((20.5, 20.5))
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid, path_finder)
+        assert len(planned) == 1 and len(searches) == 1
+        # crossing a changed region replans
+        grid = grid.copy()
+        grid[20, 20] = 100
+        influence_maps.register_grid("ground", grid)
+        influence_maps.get_path(Point2((4.5, 4.5)), Point2((40.5, 4.5)), grid, path_finder)
+        assert len(planned) == 2
@@ -0,0 +1,58 @@
+import numpy as np
+
+from ..bottato.map.pathable_lookup import PathableLookup
+
+
+def make_grid():
+    grid = np.ones((20, 20))
+    grid[:, 10:] = np.inf
+    return grid
+
+
+class TestPathableLookup:
+    def test_pathable_position_unchanged(self):
+        lookup = PathableLookup()
+        assert lookup.snap("ground", make_grid(), (5.3, 5.7)) == (5.3, 5.7)
+
+    def test_snaps_to_nearest_pathable_cell(self):
+        lookup = PathableLookup()
+        assert lookup.snap("ground", make_grid(), (5.5, 11.5)) == (5.5, 9.5)
+
+    def test_too_far_returns_position(self):
+        lookup = PathableLookup(max_distance=4)
+        assert lookup.snap("ground", make_grid(), (5.5, 18.5)) == (5.5, 18.5)
+
+    def test_prefers_low_cost_cells(self):
+        grid = make_grid()
+        grid[:, 8:10] = 100
+        lookup = PathableLookup()
+        assert lookup.snap("ground", grid, (5.5, 11.5)) == (5.5, 7.5)
+        # nothing low cost in range, use nearest pathable
+        assert lookup.snap("ground", grid, (5.5, 13.5)) == (5.5, 9.5)
+
+    def test_falls_back_to_lowest_cost_cell(self):
+        grid = make_grid()
+        grid[:, 8:10] = 100
+        grid[7, 9] = 20
+        lookup = PathableLookup()
+        # every pathable cell in range is threatened, take the cheapest rather than the nearest
+        assert lookup.snap("ground", grid, (5.5, 12.5)) == (7.5, 9.5)
+
+    def test_reservations_spread_units(self):
+        grid = make_grid()
+        lookup = PathableLookup()
+        first = lookup.snap("ground", grid, (5.5, 11.5), reserve_radius=0.375)
+        second = lookup.snap("ground", grid, (5.5, 11.5), reserve_radius=0.375)
+        assert first == (5.5, 9.5)
+        assert second != first
+        assert grid[int(second[0]), int(second[1])] == 1
+        # reservations don't touch the grid
+        assert np.isinf(grid[5, 11])
+        assert grid[5, 9] == 1
+
+    def test_invalidate_clears_reservations(self):
+        grid = make_grid()
+        lookup = PathableLookup()
+        lookup.snap("ground", grid, (5.5, 11.5), reserve_radius=0.375)
+        lookup.invalidate()
+        assert lookup.snap("ground", grid, (5.5, 11.5), reserve_radius=0.375) == (5.5, 9.5)
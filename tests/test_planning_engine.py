@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ..bottato.building.planning_engine import PlanningEngine
+
+
+def make_engine():
+    bot = SimpleNamespace(time=0.0)
+    state = {"supply": 10}
+    engine = PlanningEngine(bot)  # type: ignore
+    engine.add_input("supply", lambda: state["supply"])
+    engine.add_planner("supply", ["supply"], max_staleness=2)
+    return engine, bot, state
+
+
+class TestPlanningEngine:
+    def test_first_run_is_due(self):
+        engine, _, _ = make_engine()
+        assert engine.is_due("supply")
+
+    def test_only_due_on_input_change(self):
+        engine, bot, state = make_engine()
+        engine.mark_ran("supply")
+        bot.time = 1
+        assert not engine.is_due("supply")
+        state["supply"] = 11
+        assert engine.is_due("supply")
+        engine.mark_ran("supply")
+        assert not engine.is_due("supply")
+
+    def test_due_when_stale(self):
+        engine, bot, _ = make_engine()
+        engine.mark_ran("supply")
+        bot.time = 2
+        assert engine.is_due("supply")
+
+    def test_invalidate(self):
+        engine, _, _ = make_engine()
+        engine.mark_ran("supply")
+        engine.invalidate("supply")
+        assert engine.is_due("supply")
+
+    def test_unknown_input(self):
+        engine, _, _ = make_engine()
+        with pytest.raises(ValueError):
+            engine.add_planner("bunker", ["staging"], max_staleness=1)
@@ -0,0 +1,64 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from ..bottato.squad.route_optimizer import RouteOptimizer
+
+
+def brute_force_length(distances):
+    count = distances.shape[0]
+    return min(RouteOptimizer.tour_length(distances, [0] + list(rest)) for rest in permutations(range(1, count)))
+
+
+def random_distances(count, seed):
+    points = np.random.default_rng(seed).uniform(0, 100, size=(count, 2))
+    return RouteOptimizer.euclidean_matrix(points)
+
+
+class TestRouteOptimizer:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_held_karp_is_optimal(self, seed):
+        distances = random_distances(8, seed)
+        order = RouteOptimizer.held_karp(distances)
+        assert order[0] == 0
+        assert sorted(order) == list(range(8))
+        assert RouteOptimizer.tour_length(distances, order) == pytest.approx(brute_force_length(distances))
+
+    def test_local_search_close_to_optimal(self):
+        distances = random_distances(9, 3)
+        order = RouteOptimizer.improve(distances, list(range(9)))
+        assert order[0] == 0
+        assert sorted(order) == list(range(9))
+        assert RouteOptimizer.tour_length(distances, order) <= brute_force_length(distances) * 1.1
+
+    def test_large_sets_use_local_search(self):
+        distances = random_distances(30, 4)
+        order = RouteOptimizer.solve(distances)
+        assert sorted(order) == list(range(30))
+        assert RouteOptimizer.tour_length(distances, order) < RouteOptimizer.tour_length(distances, list(range(30)))
+
+    def test_insert(self):
+        distances = random_distances(7, 5)
+        order = RouteOptimizer.held_karp(distances[:6, :6])
+        order = RouteOptimizer.insert(distances, order, 6)
+        assert sorted(order) == list(range(7))
+
+    def test_remove(self):
+        distances = random_distances(7, 5)
+        order = RouteOptimizer.held_karp(distances)
+        reduced_order = RouteOptimizer.remove(distances, order, 2)
+        assert reduced_order[0] == 0
+        assert sorted(reduced_order) == list(range(6))
+        reduced = np.delete(np.delete(distances, 2, axis=0), 2, axis=1)
+        assert RouteOptimizer.tour_length(reduced, reduced_order) <= RouteOptimizer.tour_length(distances, order)
+
+    def test_add_node(self):
+        distances = random_distances(7, 5)
+        grown = RouteOptimizer.add_node(distances[:6, :6], distances[6])
+        assert np.array_equal(grown, distances)
+
+    def test_fill_unreachable(self):
+        points = np.array([[0, 0], [3, 4]])
+        distances = np.array([[0, np.inf], [np.inf, 0]])
+        assert RouteOptimizer.fill_unreachable(distances, points)[0, 1] == pytest.approx(10)
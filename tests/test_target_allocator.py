@@ -0,0 +1,46 @@
+import numpy as np
+
+from ..bottato.micro.target_allocator import TargetAllocator
+
+
+def allocate(distances, damage, effective_hp, weights=None, previous=None, attack_range=6.0):
+    distances_squared = np.array(distances, dtype=np.float64) ** 2
+    damage = np.array(damage, dtype=np.float64)
+    ranges_squared = np.full(distances_squared.shape, attack_range ** 2)
+    weights = np.ones(distances_squared.shape) if weights is None else np.array(weights, dtype=np.float64)
+    previous = np.full(distances_squared.shape[0], -1) if previous is None else np.array(previous)
+    return TargetAllocator.allocate(distances_squared, ranges_squared, damage, weights,
+                                    np.array(effective_hp, dtype=np.float64), previous)
+
+
+class TestTargetAllocator:
+    def test_spreads_damage_instead_of_overkilling(self):
+        # three attackers each able to kill either target alone
+        assigned, expected = allocate([[3, 3], [3, 3], [3, 3]], [[10, 10]] * 3, [10, 10])
+        assert sorted(assigned[:2]) == [0, 1]
+        # nothing left worth shooting for the third
+        assert assigned[2] == -1
+        assert list(expected) == [10, 10]
+
+    def test_focuses_until_expected_kill(self):
+        assigned, expected = allocate([[3, 3]] * 3, [[6, 6]] * 3, [12, 30])
+        assert list(assigned) == [0, 0, 1]
+        # capped at effective hp
+        assert list(expected) == [12, 6]
+
+    def test_out_of_range_targets_ignored(self):
+        assigned, _ = allocate([[3, 9], [9, 9]], [[5, 5], [5, 5]], [40, 1])
+        assert list(assigned) == [0, -1]
+
+    def test_most_constrained_attacker_picks_first(self):
+        # attacker 1 can only reach target 0, attacker 0 could take either
+        assigned, _ = allocate([[3, 3], [3, 9]], [[10, 10], [10, 10]], [10, 10])
+        assert list(assigned) == [1, 0]
+
+    def test_priority_weight(self):
+        assigned, _ = allocate([[3, 3]], [[5, 5]], [50, 50], weights=[[1, 3]])
+        assert list(assigned) == [1]
+
+    def test_keeps_previous_target_on_tie(self):
+        assigned, _ = allocate([[3, 3]], [[5, 5]], [50, 50], previous=[1])
+        assert list(assigned) == [1]
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sc2.position import Point2
+
+from ..bottato.map.terrain import Terrain
+
+
+def make_bot():
+    # PixelMap data is indexed [y, x]
+    heights = np.zeros((4, 6), dtype=np.uint8)
+    heights[:, 3:] = 255
+    placement = np.zeros((4, 6), dtype=np.uint8)
+    placement[1, 2] = 1
+    pathing = np.ones((4, 6), dtype=np.uint8)
+    pathing[0, 0] = 0
+    visibility = np.zeros((4, 6), dtype=np.uint8)
+    visibility[2, 4] = 2
+    game_info = SimpleNamespace(
+        terrain_height=SimpleNamespace(data_numpy=heights),
+        placement_grid=SimpleNamespace(data_numpy=placement),
+        pathing_grid=SimpleNamespace(data_numpy=pathing),
+    )
+    state = SimpleNamespace(visibility=SimpleNamespace(data_numpy=visibility), game_loop=0)
+    return SimpleNamespace(game_info=game_info, state=state)
+
+
+class TestTerrain:
+    def test_z_heights(self):
+        terrain = Terrain(make_bot())
+        heights = terrain.z_heights_at(np.array([[0, 0], [4, 1], [2.6, 3], [3.9, 3]]))
+        # floored like get_terrain_z_height, 2.6 is still in cell 2
+        assert heights == pytest.approx([-16, 16, -16, 16])
+        assert terrain.z_height(Point2((1, 1))) == pytest.approx(-16)
+
+    def test_accepts_point_lists(self):
+        terrain = Terrain(make_bot())
+        assert list(terrain.placeable_at([Point2((2, 1)), Point2((1, 2))])) == [True, False]
+        assert list(terrain.pathable_at([(0, 0), (1, 0)])) == [False, True]
+        assert list(terrain.visible_at([(4, 2), (2, 4)])) == [True, False]
+
+    def test_out_of_bounds_clamped(self):
+        terrain = Terrain(make_bot())
+        assert terrain.heights_at([(-3, -3), (100, 100)]).tolist() == [0, 255]
+
+    def test_visibility_refreshes_each_loop(self):
+        bot = make_bot()
+        terrain = Terrain(bot)
+        assert not terrain.visible_at([(0, 0)])[0]
+        bot.state.visibility.data_numpy[0, 0] = 2
+        assert not terrain.visible_at([(0, 0)])[0]
+        bot.state.game_loop = 1
+        assert terrain.visible_at([(0, 0)])[0]
+
+    def test_path_distances(self):
+        pathable = np.ones((5, 5), dtype=bool)
+        pathable[2, :4] = False
+        sources = (np.array([0]), np.array([0]))
+        targets = (np.array([4, 0, 2]), np.array([0, 4, 4]))
+        distances = Terrain.compute_path_distances(pathable, sources, targets)
+        # straight line blocked by the wall, must go around through (2, 4)
+        assert distances[0, 0] == pytest.approx(4 + 4 * np.sqrt(2))
+        assert distances[0, 1] == pytest.approx(4)
+        assert distances[0, 2] == pytest.approx(2 + 2 * np.sqrt(2))
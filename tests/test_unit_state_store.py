@@ -0,0 +1,98 @@
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from ..bottato.magic_numbers import MagicNumbers as MN
+from ..bottato.unit_state_store import UnitStateStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    UnitStateStore.components = {}
+    UnitStateStore.evicted_by_death = {}
+    UnitStateStore.evicted_by_staleness = {}
+    bot = SimpleNamespace(time=0.0)
+    UnitStateStore.init(bot)  # type: ignore
+    yield bot
+    UnitStateStore.bot = None
+    UnitStateStore.components = {}
+
+
+class TestUnitStateStore:
+    def test_destroyed_unit_is_evicted_everywhere(self):
+        positions = UnitStateStore.register("positions")
+        targets = UnitStateStore.register("targets")
+        positions[1] = (3, 4)
+        positions[2] = (5, 6)
+        targets[1] = 99
+        UnitStateStore.on_unit_destroyed(1)
+        assert 1 not in positions and 1 not in targets
+        assert positions[2] == (5, 6)
+        assert UnitStateStore.evicted_by_death == {"positions": 1, "targets": 1}
+
+    def test_stale_entries_are_evicted(self, fresh_store):
+        last_seen = UnitStateStore.register("last_seen", stale_seconds=10)
+        forever = UnitStateStore.register("forever")
+        last_seen[1] = 0.0
+        last_seen[2] = 0.0
+        forever[1] = 0.0
+        fresh_store.time = 8.0
+        UnitStateStore.update()
+        last_seen[2] = 8.0
+        fresh_store.time = 15.0
+        UnitStateStore.update()
+        assert 1 not in last_seen
+        assert 2 in last_seen
+        assert 1 in forever
+        assert UnitStateStore.evicted_by_staleness["last_seen"] == 1
+
+    def test_touch_keeps_mutated_entries_fresh(self, fresh_store):
+        history = UnitStateStore.register("history", stale_seconds=10)
+        history[1] = deque(maxlen=3)
+        fresh_store.time = 9.0
+        UnitStateStore.update()
+        history[1].append(5)
+        history.touch(1)
+        fresh_store.time = 9.0 + MN.UNIT_STATE_EVICTION_INTERVAL
+        UnitStateStore.update()
+        assert list(history[1]) == [5]
+
+    def test_staleness_check_is_throttled(self, fresh_store):
+        last_seen = UnitStateStore.register("last_seen", stale_seconds=1)
+        last_seen[1] = 0.0
+        fresh_store.time = MN.UNIT_STATE_EVICTION_INTERVAL / 2
+        UnitStateStore.update()
+        assert 1 in last_seen
+        fresh_store.time = MN.UNIT_STATE_EVICTION_INTERVAL
+        UnitStateStore.update()
+        assert 1 not in last_seen
+
+    def test_dict_methods_keep_timestamps_in_sync(self):
+        component = UnitStateStore.register("component")
+        component.setdefault(1, []).append(2)
+        assert component[1] == [2]
+        assert component.pop(1) == [2]
+        assert component.pop(1, None) is None
+        component[3] = 1
+        component.clear()
+        assert not component.touched
+
+    def test_memory_report(self):
+        component = UnitStateStore.register("component")
+        component[1] = 2
+        report = UnitStateStore.memory_report()
+        assert len(report) == 1
+        assert report[0].startswith("component: 1 entries")
+
+    def test_tag_sets_drop_destroyed_units(self, fresh_store):
+        scouts = UnitStateStore.register_set("scouts")
+        scouts.add(1)
+        scouts.add(2)
+        UnitStateStore.on_unit_destroyed(1)
+        assert scouts == {2}
+        assert UnitStateStore.evicted_by_death["scouts"] == 1
+        # sets have no staleness timeout
+        fresh_store.time = 1000.0
+        UnitStateStore.update()
+        assert scouts == {2}
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from s2clientprotocol import common_pb2
+from sc2.bot_ai import BotAI
+from sc2.pixel_map import PixelMap
+from sc2.position import Point2
+
+from ..bottato.map.terrain import Terrain
+from ..bottato.visibility_helper import VisibilityHelper
+
+
+def make_bot():
+    # PixelMap data is indexed [y, x]
+    visibility = np.zeros((10, 20), dtype=np.uint8)
+    visibility[:, :5] = 2
+    creep = np.zeros((10, 20), dtype=np.uint8)
+    creep[3, 7] = 1
+    state = SimpleNamespace(
+        visibility=SimpleNamespace(data_numpy=visibility),
+        creep=SimpleNamespace(data_numpy=creep),
+        game_loop=0,
+    )
+    game_info = SimpleNamespace(
+        terrain_height=SimpleNamespace(data_numpy=np.zeros((10, 20), dtype=np.uint8)),
+        placement_grid=SimpleNamespace(data_numpy=np.zeros((10, 20), dtype=np.uint8)),
+    )
+    bot = SimpleNamespace(state=state, game_info=game_info)
+    VisibilityHelper.init(bot, Terrain(bot))  # type: ignore
+    return bot
+
+
+class TestVisibilityHelper:
+    def test_point_lookups(self):
+        make_bot()
+        assert VisibilityHelper.visible_at([Point2((4.4, 2)), (5.6, 2)]).tolist() == [True, False]
+        assert VisibilityHelper.creep_at([(7, 3), (3, 7)]).tolist() == [True, False]
+
+    def test_any_visible_near(self):
+        make_bot()
+        result = VisibilityHelper.any_visible_near(np.array([[5.5, 5], [5.5, 5], [9, 5]]), np.array([1, 0.5, 1]))
+        assert result.tolist() == [True, False, False]
+
+    def test_first_along_rays(self):
+        make_bot()
+        origins = np.array([[2, 5], [2, 5], [2, 5]])
+        directions = np.array([[1, 0], [-1, 0], [0, 1]])
+        steps = VisibilityHelper.first_along_rays(origins, directions, np.zeros(3), find_visible=False, max_steps=20)
+        # 3 steps right leaves vision, left and up stay in vision
+        assert steps.tolist() == [3, 0, 0]
+        assert VisibilityHelper.first_along_rays(np.array([[12, 5]]), np.array([[-1, 0]]), 0, True, 20).tolist() == [8]
+        # a match past the first chunk of steps
+        assert VisibilityHelper.first_along_rays(np.array([[2, 5]]), np.array([[0.125, 0]]), 0, False, 40).tolist() == [24]
+
+    def test_fraction_visible(self):
+        make_bot()
+        assert VisibilityHelper.fraction_visible((5, 5), 2) == pytest.approx(0.5)
+        assert VisibilityHelper.fraction_visible((15, 5), 2) == 0
+
+    def test_last_visible_age(self):
+        bot = make_bot()
+        bot.state.visibility.data_numpy[:, :] = 0
+        bot.state.visibility.data_numpy[0, 10] = 2
+        bot.state.game_loop = 224
+        VisibilityHelper.update()
+        ages = VisibilityHelper.last_visible_age([(1, 1), (10, 0), (15, 5)])
+        assert ages[0] == pytest.approx(10)
+        assert ages[1] == 0
+        assert np.isinf(ages[2])
+
+    def test_matches_bot_ai_is_visible(self):
+        # checkerboard so every neighbouring cell differs
+        data = np.zeros((10, 20), dtype=np.uint8)
+        data[::2, ::2] = 2
+        data[1::2, 1::2] = 2
+        visibility = PixelMap(common_pb2.ImageData(bits_per_pixel=8, size=common_pb2.Size2DI(x=20, y=10), data=data.tobytes()))
+        bot = make_bot()
+        bot.state.visibility = visibility
+        bot.state.game_loop = 1
+        VisibilityHelper.update()
+        points = [Point2((x, y)) for x in np.arange(0, 19.9, 0.3) for y in np.arange(0, 9.9, 0.45)]
+        expected = [BotAI.is_visible(bot, point) for point in points]  # type: ignore
+        assert VisibilityHelper.visible_at(points).tolist() == expected
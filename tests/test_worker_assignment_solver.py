@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from ..bottato.economy.worker_assignment_solver import WorkerAssignmentSolver
+
+
+class TestWorkerAssignmentSolver:
+    def test_respects_capacity(self):
+        workers = np.array([[0.0, 0.0], [0.5, 0.0], [1.0, 0.0]])
+        nodes = np.array([[0.0, 1.0], [10.0, 0.0]])
+        solution = WorkerAssignmentSolver.solve(
+            workers, np.full(3, -1), nodes, np.array([2, 2]), np.zeros(2), 0)
+        assert (solution == 0).sum() == 2
+        assert (solution == 1).sum() == 1
+        # the worker closest to the far node takes it
+        assert solution[2] == 1
+
+    def test_leaves_extra_workers_unassigned(self):
+        workers = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]])
+        nodes = np.array([[0.0, 1.0]])
+        solution = WorkerAssignmentSolver.solve(
+            workers, np.full(3, -1), nodes, np.array([2]), np.zeros(1), 0)
+        assert (solution == -1).sum() == 1
+        assert solution[2] == -1
+
+    def test_hysteresis_keeps_current_node(self):
+        workers = np.array([[4.0, 0.0]])
+        nodes = np.array([[0.0, 0.0], [10.0, 0.0]])
+        without_hysteresis = WorkerAssignmentSolver.solve(
+            workers, np.array([1]), nodes, np.array([1, 1]), np.zeros(2), 0)
+        assert without_hysteresis[0] == 0
+        with_hysteresis = WorkerAssignmentSolver.solve(
+            workers, np.array([1]), nodes, np.array([1, 1]), np.zeros(2), 5)
+        assert with_hysteresis[0] == 1
+
+    def test_penalty_prefers_close_nodes(self):
+        workers = np.array([[0.0, 0.0]])
+        nodes = np.array([[5.0, 0.0], [1.0, 0.0]])
+        solution = WorkerAssignmentSolver.solve(
+            workers, np.full(1, -1), nodes, np.array([1, 1]), np.array([0.0, 10.0]), 0)
+        assert solution[0] == 0
+
+    def test_no_capacity(self):
+        workers = np.array([[0.0, 0.0]])
+        nodes = np.array([[5.0, 0.0]])
+        solution = WorkerAssignmentSolver.solve(
+            workers, np.full(1, -1), nodes, np.array([0]), np.zeros(1), 0)
+        assert solution[0] == -1
+
+    def test_resolves_when_pins_change_and_on_timer(self):
+        node = SimpleNamespace(node=SimpleNamespace(tag=1), worker_capacity=lambda: 2, is_long_distance=False)
+        resources = SimpleNamespace(nodes=[node])
+        assignments = [SimpleNamespace(unit=SimpleNamespace(tag=tag)) for tag in (10, 11)]
+        solver = WorkerAssignmentSolver()
+        assert solver.saturation_changed("minerals", resources, assignments, {10}, 0.0)  # type: ignore
+        solver.record_solve("minerals", resources, assignments, {10}, 0.0)  # type: ignore
+        assert not solver.saturation_changed("minerals", resources, assignments, {10}, 1.0)  # type: ignore
+        # a pinned worker freed up
+        assert solver.saturation_changed("minerals", resources, assignments, set(), 1.0)  # type: ignore
+        # nothing changed but skipped moves get another try
+        assert solver.saturation_changed("minerals", resources, assignments, {10}, 10.0)  # type: ignore
@@ -0,0 +1,52 @@
+import numpy as np
+from sc2.position import Point2
+
+from ..bottato.map.zone_pather import ZonePather
+
+
+def make_pather(adjacent=True):
+    # two zones split at x=20 by a wall with a gap at y 8 to 11, a third zone on the far right
+    labels = np.zeros((60, 20), dtype=np.int64)
+    labels[20:40] = 1
+    labels[40:] = 2
+    grid = np.ones((60, 20))
+    grid[18:22] = np.inf
+    grid[18:22, 8:12] = 1
+    pather = ZonePather(labels, {(0, 1), (1, 2)} if adjacent else set())
+    pather.update_costs(grid)
+    return pather, grid
+
+
+class TestZonePather:
+    def test_path_through_entrance(self):
+        pather, _ = make_pather()
+        path = pather.get_path(Point2((5.5, 2.5)), Point2((55.5, 2.5)))
+        assert path is not None
+        assert path[0] == Point2((5.5, 2.5))
+        assert path[-1] == Point2((55.5, 2.5))
+        assert all(8 <= point.y < 12 for point in path if 18 <= point.x < 22)
+        # every cell on the way, so the path length is the walking distance
+        assert path[1].distance_to(Point2((5, 2))) < 1.5
+        assert all(first.distance_to(second) < 1.5 for first, second in zip(path[1:-2], path[2:-1]))
+
+    def test_same_zone_and_unreachable(self):
+        pather, _ = make_pather()
+        path = pather.get_path(Point2((2.5, 2.5)), Point2((10.5, 15.5)))
+        assert path is not None and len(path) > 2
+        pather, _ = make_pather(adjacent=False)
+        assert pather.get_path(Point2((5.5, 2.5)), Point2((30.5, 2.5))) is None
+
+    def test_update_only_touches_changed_zones(self):
+        pather, grid = make_pather()
+        zone_graphs = dict(pather.zone_graphs)
+        grid = grid.copy()
+        grid[45:50, :] = 100
+        pather.update_costs(grid)
+        assert pather.zone_graphs[0] is zone_graphs[0]
+        assert pather.zone_graphs[1] is zone_graphs[1]
+        assert pather.zone_graphs[2] is not zone_graphs[2]
+        # closing the gap cuts the left zone off
+        grid = grid.copy()
+        grid[18:22, 8:12] = np.inf
+        pather.update_costs(grid)
+        assert pather.get_path(Point2((5.5, 2.5)), Point2((55.5, 2.5))) is None